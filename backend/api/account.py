@@ -4,7 +4,7 @@
 写的API，简洁高效！
 """
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
@@ -66,6 +66,18 @@ async def get_accounts(
     return accounts
 
 
+@router.get("/rotation/status", response_model=ApiResponse)
+async def get_rotation_status(
+    platform: Optional[str] = Query(None, description="平台ID，不传返回全部平台"),
+    limit: int = Query(50, ge=1, le=500, description="最近选择记录条数"),
+    db: Session = Depends(get_db)
+):
+    """发布账号轮换状态：各账号当日用量/冷却/失败率，以及最近的选号记录"""
+    from backend.services.account_selector import AccountSelector
+
+    return ApiResponse(success=True, data=AccountSelector(db).report(platform, limit))
+
+
 @router.get("/{account_id}", response_model=AccountDetailResponse)
 async def get_account(account_id: int, db: Session = Depends(get_db)):
     """获取账号详情"""
@@ -135,6 +147,8 @@ async def update_account(
         account.status = account_data.status
     if account_data.remark is not None:
         account.remark = account_data.remark
+    if account_data.worker_node is not None:
+        account.worker_node = account_data.worker_node or None
 
     db.commit()
     db.refresh(account)
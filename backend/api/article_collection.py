@@ -15,8 +15,11 @@ from sqlalchemy.orm import Session
 from backend.database import get_db
 from backend.database.models import ReferenceArticle
 from backend.services.article_collector_service import ArticleCollectorService
+from backend.services import crawl_frontier
+from backend.services.job_executor import LANE_BACKFILL
+from backend.services.worker_jobs import submit_job, job_handle
 from backend.schemas import ApiResponse
-from backend.config import PLATFORMS
+from backend.config import PLATFORMS, CAMPAIGN_MAX_KEYWORDS
 from loguru import logger
 
 
@@ -36,6 +39,16 @@ class CollectStartRequest(BaseModel):
     sync_to_ragflow: bool = Field(default=True, description="是否同步到RAGFlow进行向量化")
 
 
+class CollectCampaignRequest(BaseModel):
+    """多关键词采集活动请求"""
+    keywords: List[str] = Field(..., min_length=1, max_length=CAMPAIGN_MAX_KEYWORDS, description="关键词列表")
+    platforms: List[str] = Field(..., min_length=1, description="目标平台列表，如 ['zhihu', 'toutiao']")
+    min_likes: int = Field(default=100, ge=0, description="最低点赞数阈值")
+    min_reads: int = Field(default=1000, ge=0, description="最低阅读量阈值")
+    max_articles_per_keyword: int = Field(default=10, ge=1, le=50, description="每个 (平台, 关键词) 最多收集文章数")
+    save_to_db: bool = Field(default=True, description="是否保存到数据库")
+
+
 class CollectTaskResponse(BaseModel):
     """采集任务响应"""
     task_id: str
@@ -307,6 +320,54 @@ async def list_collect_tasks(
     ]
 
 
+@router.post("/campaign", response_model=ApiResponse)
+async def start_collect_campaign(request: CollectCampaignRequest):
+    """
+    多关键词采集活动
+
+    一批关键词一起采：每个平台的浏览器上下文开一次用到底，
+    同一篇文章被多个关键词搜到只提取一次。进度通过 /api/jobs/{job_id} 查询。
+    """
+    supported_platforms = ["zhihu", "toutiao"]
+    invalid_platforms = [p for p in request.platforms if p not in supported_platforms]
+    if invalid_platforms:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的平台: {invalid_platforms}，支持的平台: {supported_platforms}"
+        )
+    keywords = list(dict.fromkeys(k.strip() for k in request.keywords if k.strip()))
+    if not keywords:
+        raise HTTPException(status_code=400, detail="关键词不能为空")
+
+    # 一批关键词属于批量任务，走 backfill 通道，不挡住单关键词采集
+    job = submit_job(
+        "collect_campaign",
+        {
+            "keywords": keywords,
+            "platforms": request.platforms,
+            "min_likes": request.min_likes,
+            "min_reads": request.min_reads,
+            "max_articles": request.max_articles_per_keyword,
+            "save_to_db": request.save_to_db,
+        },
+        lane=LANE_BACKFILL,
+        name=f"采集活动: {len(keywords)} 个关键词",
+        meta={"keywords": len(keywords), "platforms": request.platforms}
+    )
+    logger.info(f"采集活动已提交: {len(keywords)} 个关键词, platforms={request.platforms}")
+    return ApiResponse(success=True, message="采集活动已提交", data=job_handle(job))
+
+
+@router.get("/frontier", response_model=ApiResponse)
+async def list_crawl_watermarks(platform: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    增量采集水位
+
+    每个 (平台, 关键词) 上次采集的时间、翻页数、新文章数和跳过的已采文章数。
+    """
+    return ApiResponse(success=True, data={"items": crawl_frontier.list_watermarks(db, platform)})
+
+
 @router.get("/articles", response_model=ReferenceArticleListResponse)
 async def list_reference_articles(
     platform: Optional[str] = None,
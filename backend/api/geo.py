@@ -13,6 +13,8 @@ from sqlalchemy import desc
 
 from backend.database import get_db, SessionLocal
 from backend.services.geo_article_service import GeoArticleService
+from backend.services.job_executor import LANE_INTERACTIVE
+from backend.services.worker_jobs import submit_job, job_handle
 from backend.database.models import GeoArticle, Project
 from backend.schemas import ApiResponse
 from loguru import logger
@@ -55,11 +57,13 @@ class ArticleResponse(BaseModel):
     error_msg: Optional[str] = None
     publish_logs: Optional[str] = None
     platform_url: Optional[str] = None  # 🌟 发布成功后的真实链接
+    account_id: Optional[int] = None  # 实际发布使用的账号（轮换选出）
     index_details: Optional[str] = None
 
     # 时间戳
     publish_time: Optional[datetime] = None
     last_check_time: Optional[datetime] = None
+    next_check_time: Optional[datetime] = None
     created_at: Optional[datetime] = None
 
     # 兼容 SQLAlchemy 对象
@@ -136,16 +140,21 @@ async def check_quality(article_id: int, db: Session = Depends(get_db)):
 
 @router.post("/articles/{article_id}/check-index", response_model=ApiResponse)
 async def manual_check_index(article_id: int, db: Session = Depends(get_db)):
-    """手动触发单篇文章的收录监测"""
-    service = GeoArticleService(db)
-    try:
-        result = await service.check_article_index(article_id)
-        if result.get("status") == "error":
-            return ApiResponse(success=False, message=result.get("message"))
-        return ApiResponse(success=True, message=f"检测完成，当前状态：{result.get('index_status')}")
-    except Exception as e:
-        logger.error(f"收录检测异常: {str(e)}")
-        return ApiResponse(success=False, message="检测服务暂时不可用")
+    """手动触发单篇文章的收录监测（交互通道，立即返回任务句柄）"""
+    article = db.query(GeoArticle).filter(GeoArticle.id == article_id).first()
+    if not article:
+        raise HTTPException(status_code=404, detail="文章不存在")
+    if article.publish_status != "published":
+        return ApiResponse(success=False, message="文章未发布")
+
+    job = submit_job(
+        "article_index_check",
+        {"article_id": article_id},
+        lane=LANE_INTERACTIVE,
+        name=f"文章收录检测: {article_id}",
+        meta={"article_id": article_id}
+    )
+    return ApiResponse(success=True, message="检测任务已提交", data=job_handle(job))
 
 
 @router.delete("/articles/{article_id}", response_model=ApiResponse)
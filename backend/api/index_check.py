@@ -12,6 +12,8 @@ from sqlalchemy.orm import Session
 
 from backend.database import get_db
 from backend.services.index_check_service import IndexCheckService
+from backend.services.job_executor import LANE_INTERACTIVE, LANE_BACKFILL
+from backend.services.worker_jobs import submit_job, job_handle
 from backend.database.models import IndexCheckRecord
 from backend.schemas import ApiResponse
 from loguru import logger
@@ -42,6 +44,7 @@ class CheckResultResponse(BaseModel):
     keyword_found: bool
     company_found: bool
     success: bool
+    cached: bool = False
 
 
 class RecordResponse(BaseModel):
@@ -53,6 +56,7 @@ class RecordResponse(BaseModel):
     answer: Optional[str]
     keyword_found: Optional[bool]
     company_found: Optional[bool]
+    cached: Optional[bool] = False
     check_time: str
 
     @field_serializer('check_time')
@@ -91,24 +95,20 @@ async def check_index(
     if not keyword:
         raise HTTPException(status_code=404, detail="关键词不存在")
 
-    service = IndexCheckService(db)
-
-    # 执行检测
-    try:
-        results = await service.check_keyword(
-            keyword_id=request.keyword_id,
-            company_name=request.company_name,
-            platforms=request.platforms
-        )
-
-        return ApiResponse(
-            success=True,
-            message=f"检测完成，共{len(results)}条记录",
-            data={"results": results}
-        )
-    except Exception as e:
-        logger.error(f"收录检测失败: {e}")
-        return ApiResponse(success=False, message=f"检测失败: {str(e)}")
+    # 提交到任务执行器（交互通道，优先于排队的批量任务），立即返回任务句柄
+    job = submit_job(
+        "index_check",
+        {
+            "keyword_id": request.keyword_id,
+            "keyword": keyword.keyword,
+            "company_name": request.company_name,
+            "platforms": request.platforms,
+        },
+        lane=LANE_INTERACTIVE,
+        name=f"收录检测: {keyword.keyword}",
+        meta={"keyword_id": request.keyword_id}
+    )
+    return ApiResponse(success=True, message="检测任务已提交", data=job_handle(job))
 
 @router.post("/batch/check", response_model=ApiResponse)
 async def batch_check_index(
@@ -128,24 +128,15 @@ async def batch_check_index(
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
 
-    service = IndexCheckService(db)
-
-    # 执行批量检测
-    try:
-        results = await service.check_project_keywords(
-            project_id=request.project_id,
-            platforms=request.platforms
-        )
-
-        return ApiResponse(
-            success=True,
-            message=f"批量检测完成，共{len(results)}条记录",
-            data={"results": results}
-        )
-    except Exception as e:
-        logger.error(f"批量收录检测失败: {e}")
-        return ApiResponse(success=False, message=f"批量检测失败: {str(e)}")
-
+    # 整个项目的检测属于批量任务，走 backfill 通道，不挡住用户的单关键词检测
+    job = submit_job(
+        "project_check",
+        {"project_id": request.project_id, "platforms": request.platforms},
+        lane=LANE_BACKFILL,
+        name=f"项目批量检测: {project.name}",
+        meta={"project_id": request.project_id}
+    )
+    return ApiResponse(success=True, message="批量检测任务已提交", data=job_handle(job))
 
 @router.get("/records")
 async def get_records(
@@ -196,6 +187,7 @@ async def get_records(
                 "answer": record.answer,
                 "keyword_found": record.keyword_found,
                 "company_found": record.company_found,
+                "cached": bool(record.cached),
                 "check_time": record.check_time.isoformat() if record.check_time else ""
             }
             result.append(record_dict)
@@ -241,6 +233,44 @@ async def get_hit_rate(keyword_id: int, db: Session = Depends(get_db)):
     return service.get_hit_rate(keyword_id)
 
 
+@router.get("/keywords/{keyword_id}/samples")
+async def get_keyword_samples(
+    keyword_id: int,
+    platform: Optional[str] = Query(None, description="平台筛选"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    获取关键词的抽样记录
+
+    每次检测实际问了哪些问法、命中率估计及置信区间
+    """
+    import json
+    from backend.database.models import IndexCheckSample
+
+    query = db.query(IndexCheckSample).filter(IndexCheckSample.keyword_id == keyword_id)
+    if platform:
+        query = query.filter(IndexCheckSample.platform == platform)
+    samples = query.order_by(IndexCheckSample.created_at.desc()).limit(limit).all()
+
+    items = [{
+        "id": s.id,
+        "platform": s.platform,
+        "variants_total": s.variants_total,
+        "variants_asked": s.variants_asked,
+        "asked_questions": json.loads(s.asked_questions) if s.asked_questions else [],
+        "history_checks": s.history_checks,
+        "stopped_early": bool(s.stopped_early),
+        "hit_rate_estimate": s.hit_rate_estimate,
+        "ci_low": s.ci_low,
+        "ci_high": s.ci_high,
+        "confidence": s.confidence,
+        "created_at": s.created_at.isoformat() if s.created_at else ""
+    } for s in samples]
+
+    return ApiResponse(success=True, message=f"获取抽样记录成功", data={"items": items})
+
+
 @router.get("/keywords/{keyword_id}/trend")
 async def get_keyword_trend(
     keyword_id: int,
@@ -350,6 +380,17 @@ async def get_project_summary(
     )
 
 
+@router.get("/storage/report", response_model=ApiResponse)
+async def get_storage_report(db: Session = Depends(get_db)):
+    """
+    获取回答内容存储报告
+
+    返回数据库大小、回答去重率和压缩率，迁移旧数据请运行 scripts/migrate_answer_blobs.py
+    """
+    from backend.services.answer_store import get_storage_report as build_report
+    return ApiResponse(success=True, message="获取存储报告成功", data=build_report(db))
+
+
 @router.get("/records/{record_id}", response_model=RecordResponse)
 async def get_record(record_id: int, db: Session = Depends(get_db)):
     """获取检测记录详情"""
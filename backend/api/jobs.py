@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+任务执行器API
+手动检测、批量检测、手动发布提交后都返回 job_id，用这里轮询进度、取消任务！
+多节点部署时也可以直接往共享队列里投任务、查看各节点 worker 的心跳。
+浏览器自动化各平台各步骤的耗时分布也在这里看。
+"""
+
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.services.job_executor import get_job_executor, LANE_PRIORITY, LANE_INTERACTIVE
+from backend.services.worker_jobs import (
+    JOB_HANDLERS, get_queued_job, list_queued_jobs, cancel_queued_job, worker_job_to_dict,
+    submit_job, job_handle, list_worker_nodes,
+)
+from backend.services.playwright import resource_blocking, timing, waits
+from backend.services.playwright.collectors import http_fetch
+from backend.schemas import ApiResponse
+
+
+router = APIRouter(prefix="/api/jobs", tags=["任务执行器"])
+
+
+class SubmitJobRequest(BaseModel):
+    """直接提交任务"""
+    job_type: str = Field(..., description="任务类型：publish_article/manual_publish/index_check/collect/account_validate 等")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="任务参数")
+    lane: str = Field(LANE_INTERACTIVE, description="通道：interactive/scheduled/backfill")
+    name: Optional[str] = Field(None, description="任务名称")
+    affinity: Optional[str] = Field(None, description="指定优先执行的节点")
+    dedupe_key: Optional[str] = Field(None, description="去重键，同键任务未结束时返回已有任务")
+
+
+@router.get("", response_model=ApiResponse)
+async def list_jobs(
+    lane: Optional[str] = Query(None, description="通道：interactive/scheduled/backfill"),
+    status: Optional[str] = Query(None, description="状态：queued/running/succeeded/failed/cancelled"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """任务列表（最新的在前，包含进程内任务和 worker 队列任务）"""
+    if lane and lane not in LANE_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"未知通道: {lane}")
+    executor = get_job_executor()
+    jobs = [j.to_dict() for j in executor.list_jobs(lane=lane, status=status, limit=limit)]
+    jobs += [worker_job_to_dict(r) for r in list_queued_jobs(db, lane=lane, status=status, limit=limit)]
+    jobs.sort(key=lambda j: j["created_at"] or "", reverse=True)
+    return ApiResponse(success=True, data={"jobs": jobs[:limit], "stats": executor.stats()})
+
+
+@router.post("", response_model=ApiResponse)
+async def create_job(request: SubmitJobRequest):
+    """提交任务（external 模式进共享队列，由任意节点的 worker 认领）"""
+    if request.job_type not in JOB_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"未知任务类型: {request.job_type}")
+    if request.lane not in LANE_PRIORITY:
+        raise HTTPException(status_code=400, detail=f"未知通道: {request.lane}")
+    job = submit_job(
+        request.job_type,
+        request.payload,
+        lane=request.lane,
+        name=request.name,
+        dedupe_key=request.dedupe_key,
+        affinity=request.affinity
+    )
+    return ApiResponse(success=True, message="任务已提交", data=job_handle(job))
+
+
+@router.get("/workers", response_model=ApiResponse)
+async def list_workers(db: Session = Depends(get_db)):
+    """各节点 worker 的心跳与在线状态"""
+    workers = list_worker_nodes(db)
+    return ApiResponse(success=True, data={
+        "workers": workers,
+        "alive": sum(1 for w in workers if w["alive"]),
+        "nodes": sorted({w["node"] for w in workers if w["alive"]}),
+    })
+
+
+@router.get("/stats", response_model=ApiResponse)
+async def get_stats():
+    """各通道排队/运行数量"""
+    return ApiResponse(success=True, data=get_job_executor().stats())
+
+
+@router.get("/timings", response_model=ApiResponse)
+def get_timings(
+    platform: Optional[str] = Query(None, description="平台ID"),
+    operation: Optional[str] = Query(None, description="操作类型：publish/collect/check"),
+    hours: int = Query(24, ge=1, le=24 * 7, description="统计最近多少小时"),
+    db: Session = Depends(get_db)
+):
+    """各平台各步骤的 p50/p95 耗时（goto/fill/click/等待……），累计耗时最多的排前面（普通函数，落库和统计查询在线程池里跑）"""
+    return ApiResponse(success=True, data=timing.step_stats(db, platform=platform, operation_type=operation, hours=hours))
+
+
+@router.get("/timings/recent", response_model=ApiResponse)
+async def get_recent_spans(
+    platform: Optional[str] = Query(None, description="平台ID"),
+    limit: int = Query(200, ge=1, le=2000)
+):
+    """本进程最近的操作耗时明细（环形缓冲，未必已落库）"""
+    return ApiResponse(success=True, data={"spans": timing.recorder.recent(platform=platform, limit=limit)})
+
+
+@router.get("/waits", response_model=ApiResponse)
+async def get_wait_stats():
+    """本进程条件等待统计：每个等待点平均/最长等了多久、多少次等满超时"""
+    return ApiResponse(success=True, data={"waits": waits.wait_stats.summary()})
+
+
+@router.get("/blocking", response_model=ApiResponse)
+async def get_blocking_stats():
+    """本进程请求拦截统计：各平台请求数、拦截数、放行名单命中数、按资源类型的拦截分布"""
+    return ApiResponse(success=True, data={"platforms": resource_blocking.block_stats.summary()})
+
+
+@router.get("/http-fetch", response_model=ApiResponse)
+async def get_http_fetch_stats():
+    """本进程文章正文直连提取统计：各平台命中率、回退浏览器次数和原因、吞吐（篇/秒）"""
+    return ApiResponse(success=True, data={"platforms": http_fetch.fetch_stats.summary()})
+
+
+@router.get("/{job_id}", response_model=ApiResponse)
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    """查询任务进度和结果"""
+    job = get_job_executor().get(job_id)
+    if job:
+        return ApiResponse(success=True, data=job.to_dict())
+    row = get_queued_job(db, job_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return ApiResponse(success=True, data=worker_job_to_dict(row))
+
+
+@router.post("/{job_id}/cancel", response_model=ApiResponse)
+async def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    """取消排队中或运行中的任务"""
+    executor = get_job_executor()
+    job = executor.get(job_id)
+    if job:
+        if not executor.cancel(job_id):
+            return ApiResponse(success=False, message=f"任务已结束（{job.status}），无法取消")
+        return ApiResponse(success=True, message="已取消", data=job.to_dict())
+
+    # worker 队列任务：运行中的由 worker 在下一次轮询时取消
+    row = get_queued_job(db, job_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    if not cancel_queued_job(db, job_id):
+        return ApiResponse(success=False, message=f"任务已结束（{row.status}），无法取消")
+    db.refresh(row)
+    return ApiResponse(success=True, message="已取消" if row.status == "cancelled" else "已请求取消", data=worker_job_to_dict(row))
@@ -192,12 +192,59 @@ async def generate_questions(request: GenerateQuestionsRequest, db: Session = De
     service = KeywordService(db)
     questions = await service.generate_questions(keyword=keyword.keyword, count=request.count)
 
-    saved_questions = []
-    for question in questions:
-        qv = service.add_question_variant(keyword_id=request.keyword_id, question=question)
-        saved_questions.append({"id": qv.id, "question": qv.question})
+    # 入库前做近似去重，换汤不换药的问法不再入库
+    saved, skipped = service.add_question_variants(keyword_id=request.keyword_id, questions=questions)
+    saved_questions = [{"id": qv.id, "question": qv.question} for qv in saved]
+
+    return ApiResponse(
+        success=True,
+        message=f"生成完成，新增{len(saved_questions)}个，过滤重复{skipped}个",
+        data={"questions": saved_questions, "skipped": skipped}
+    )
+
+
+@router.post("/keywords/{keyword_id}/questions/prune", response_model=ApiResponse)
+async def prune_keyword_questions(
+    keyword_id: int,
+    dry_run: bool = Query(True, description="只预览聚类结果，不删除（默认只预览，确认后传 false 才真删）"),
+    db: Session = Depends(get_db)
+):
+    """清理关键词下近似重复的问题变体，每簇保留一个"""
+    keyword = db.query(Keyword).filter(Keyword.id == keyword_id).first()
+    if not keyword:
+        raise HTTPException(status_code=404, detail="关键词不存在")
+
+    service = KeywordService(db)
+    result = service.prune_question_variants(keyword_id, dry_run=dry_run)
 
-    return ApiResponse(success=True, message="生成完成", data={"questions": saved_questions})
+    action = "预计清理" if dry_run else "已清理"
+    return ApiResponse(success=True, message=f"{action}{result['removed']}个近似重复问法", data=result)
+
+
+@router.post("/projects/{project_id}/questions/prune", response_model=ApiResponse)
+async def prune_project_questions(
+    project_id: int,
+    dry_run: bool = Query(True, description="只预览聚类结果，不删除（默认只预览，确认后传 false 才真删）"),
+    db: Session = Depends(get_db)
+):
+    """清理项目下所有关键词的近似重复问题变体"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+
+    service = KeywordService(db)
+    results = [
+        service.prune_question_variants(kw.id, dry_run=dry_run)
+        for kw in service.get_project_keywords(project_id)
+    ]
+    removed = sum(r["removed"] for r in results)
+
+    action = "预计清理" if dry_run else "已清理"
+    return ApiResponse(
+        success=True,
+        message=f"{action}{removed}个近似重复问法",
+        data={"removed": removed, "keywords": [r for r in results if r["removed"]]}
+    )
 
 
 @router.post("/projects/{project_id}/keywords", response_model=KeywordResponse, status_code=201)
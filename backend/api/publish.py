@@ -21,7 +21,9 @@ from backend.schemas import (
     PublishProgressItem,
     PublishStatus,
 )
-from backend.config import PLATFORMS
+from backend.config import PLATFORMS, PUBLISH_ACCOUNT_CONCURRENCY
+from backend.services.job_executor import LANE_INTERACTIVE
+from backend.services.worker_jobs import submit_job, account_affinity
 
 
 router = APIRouter(prefix="/api/publish", tags=["发布管理"])
@@ -184,63 +186,65 @@ async def create_publish_task(
 
     db.commit()
 
-    # 5. 后台执行发布任务
-    # 注意：用asyncio.create_task而不是BackgroundTasks，因为要运行async函数！
-    asyncio.create_task(execute_publish_task(task_id, articles, accounts))
+    # 5. 提交到任务执行器（手动发布走交互通道，优先于定时批量任务拿浏览器槽位）
+    job = submit_job(
+        "manual_publish",
+        {"task_id": task_id, "article_ids": request.article_ids, "account_ids": request.account_ids},
+        lane=LANE_INTERACTIVE,
+        name=f"手动发布: {len(articles)}篇 × {len(accounts)}个账号",
+        meta={"task_id": task_id},
+        affinity=account_affinity(db, request.account_ids)
+    )
 
     logger.info(f"发布任务已创建: {task_id}, 文章数: {len(articles)}, 账号数: {len(accounts)}")
 
     return ApiResponse(data={
         "task_id": task_id,
+        "job_id": job.id,
         "total_tasks": len(articles) * len(accounts),
         "message": "发布任务已创建，正在后台执行"
     })
 
 
 async def execute_publish_task(task_id: str, articles: List[Article],
-                               accounts: List[Account]):
+                               accounts: List[Account], job=None):
     """
     执行发布任务（后台异步任务）
 
+    同一账号的多篇文章在一个已登录的上下文里连续发，只加载一次会话、结束时写回一次；
+    不同账号之间并行。
     注意：这个函数在事件循环中运行！
+    job: 任务执行器句柄，用于上报进度
     """
-    from backend.services.playwright_mgr import PublishManager, playwright_mgr
-
-    # 获取发布管理器
-    publish_mgr = PublishManager(PLATFORMS)
+    from backend.services.playwright_mgr import playwright_mgr
+    from backend.services.crypto import encrypt_storage_state
+    from backend.database import SessionLocal
 
-    # 创建所有子任务
-    tasks = []
-    for article in articles:
-        for account in accounts:
-            sub_task_id = f"{task_id}_{article.id}_{account.id}"
-            task = await publish_mgr.create_task(sub_task_id, article, account)
-            tasks.append(task)
+    total = len(articles) * len(accounts)
+    completed = 0
 
     # 进度回调
-    async def progress_callback(completed: int, total: int, task):
+    async def progress_callback(article_id: int, account_id: int, result: dict):
         """更新进度到数据库和任务管理器"""
-        # 更新内存中的任务状态
-        article_id = task.article.id
-        account_id = task.account.id
+        nonlocal completed
+        completed += 1
 
-        if task.status == "success":
+        if result.get("success"):
             status = PublishStatus.SUCCESS
-            platform_url = task.result.get("platform_url") if task.result else None
+            platform_url = result.get("platform_url")
             error_msg = None
-        elif task.status == "failed":
+        else:
             status = PublishStatus.FAILED
             platform_url = None
-            error_msg = task.error_message or task.result.get("error_msg") if task.result else "未知错误"
-        else:
-            return
+            error_msg = result.get("error_msg") or "未知错误"
 
         publish_task_manager.update_sub_task(
             task_id, article_id, account_id, status, platform_url, error_msg
         )
+        if job:
+            job.report(completed, total, f"已完成 {completed}/{total}")
 
         # 更新数据库记录
-        from backend.database import SessionLocal
         db = SessionLocal()
         try:
             record = db.query(PublishRecord).filter(
@@ -301,9 +305,42 @@ async def execute_publish_task(task_id: str, articles: List[Article],
         finally:
             db.close()
 
-    # 批量执行
+    semaphore = asyncio.Semaphore(PUBLISH_ACCOUNT_CONCURRENCY)
+
+    async def run_account(account: Account):
+        done = set()
+
+        async def on_result(article, result: dict):
+            done.add(article.id)
+            await progress_callback(article.id, account.id, result)
+
+        async with semaphore:
+            batch = await playwright_mgr.execute_publish_batch(articles, account, on_result=on_result)
+
+        # 上下文中途崩溃：没跑到的文章记失败
+        for article in articles:
+            if article.id not in done:
+                await progress_callback(article.id, account.id, {
+                    "success": False, "error_msg": batch.get("error_msg") or "发布中断"
+                })
+
+        # 整批结束只写回一次会话
+        if batch.get("storage_state"):
+            db = SessionLocal()
+            try:
+                account_obj = db.query(Account).filter(Account.id == account.id).first()
+                if account_obj:
+                    account_obj.storage_state = encrypt_storage_state(batch["storage_state"])
+                    db.commit()
+            except Exception as e:
+                logger.error(f"回写账号会话失败: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    # 按账号批量执行
     try:
-        await publish_mgr.execute_batch(tasks, progress_callback)
+        await asyncio.gather(*[run_account(account) for account in accounts])
         logger.info(f"发布任务完成: {task_id}")
     except Exception as e:
         logger.error(f"发布任务执行失败: {task_id}, {e}")
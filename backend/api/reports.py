@@ -8,6 +8,8 @@ from sqlalchemy import func, cast, Integer, desc, case
 from backend.database import get_db
 from backend.database.models import Project, Keyword, IndexCheckRecord, GeoArticle, Article, PublishRecord, Account, QuestionVariant
 from backend.schemas import ApiResponse
+from backend.services.job_executor import LANE_BACKFILL
+from backend.services.worker_jobs import submit_job, job_handle
 from loguru import logger
 
 router = APIRouter(prefix="/api/reports", tags=["数据报表"])
@@ -410,26 +412,17 @@ async def run_check(
     在数据报表页面执行项目收录收录检测
     复用 IndexCheckService.check_project_keywords() 方法
     """
-    from backend.services.index_check_service import IndexCheckService
-
     # 验证项目存在
     project = db.query(Project).filter(Project.id == request.project_id).first()
     if not project:
         return ApiResponse(success=False, message="项目不存在")
 
-    service = IndexCheckService(db)
-
-    # 执行批量检测（复用收录查询的服务逻辑）
-    try:
-        results = await service.check_project_keywords(
-            project_id=request.project_id,
-            platforms=request.platforms
-        )
-
-        return ApiResponse(
-            success=True,
-            message=f"收录检测完成，共生成 {len(results)} 条检测记录"
-        )
-    except Exception as e:
-        logger.error(f"收录检测失败: {e}")
-        return ApiResponse(success=False, message=f"检测失败: {str(e)}")
+    # 提交到任务执行器，立即返回任务句柄，不再阻塞 HTTP 请求直到整个项目检测完
+    job = submit_job(
+        "project_check",
+        {"project_id": request.project_id, "platforms": request.platforms},
+        lane=LANE_BACKFILL,
+        name=f"报表收录检测: {project.name}",
+        meta={"project_id": request.project_id}
+    )
+    return ApiResponse(success=True, message="收录检测任务已提交", data=job_handle(job))
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from backend.database import get_db
-from backend.database.models import ScheduledTask
+from backend.database.models import ScheduledTask, ScheduledTaskRun
 from backend.services.scheduler_service import get_scheduler_service
 from backend.schemas import ApiResponse
 
@@ -49,8 +49,51 @@ async def update_job(task_id: int, data: TaskUpdate, db: Session = Depends(get_d
     task.is_active = data.is_active
     db.commit()
 
-    # 🌟 关键：通知调度器热重载该任务
+    # 🌟 关键：通知调度器热重载该任务；调度跑在 worker 里时由 worker 检测到表变更后自行重载
     scheduler = get_scheduler_service()
-    scheduler.reload_task(task_id)
+    if scheduler.reload_task(task_id):
+        return ApiResponse(success=True, message="任务配置已更新并生效")
+    return ApiResponse(success=True, message="任务配置已更新，调度 worker 将在下次同步时生效")
 
-    return ApiResponse(success=True, message="任务配置已更新并生效")
\ No newline at end of file
+
+@router.get("/shards", response_model=ApiResponse)
+async def get_shard_report():
+    """分片调度情况：每个槽位的待处理量、每个 tick 的延迟和耗时"""
+    scheduler = get_scheduler_service()
+    return ApiResponse(success=True, data=scheduler.get_shard_report())
+
+
+
+@router.get("/runs", response_model=ApiResponse)
+async def list_runs(
+    task_key: Optional[str] = Query(None, description="任务标识符"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """最近的任务执行记录"""
+    query = db.query(ScheduledTaskRun)
+    if task_key:
+        query = query.filter(ScheduledTaskRun.task_key == task_key)
+    runs = query.order_by(ScheduledTaskRun.started_at.desc()).limit(limit).all()
+    return ApiResponse(success=True, data={"runs": [
+        {
+            "id": r.id,
+            "task_key": r.task_key,
+            "scheduled_time": r.scheduled_time.isoformat() if r.scheduled_time else None,
+            "started_at": r.started_at.isoformat(),
+            "duration_seconds": r.duration_seconds,
+            "lag_seconds": r.lag_seconds,
+            "items": r.items,
+            "shard_slot": r.shard_slot,
+            "status": r.status,
+            "error": r.error,
+        }
+        for r in runs
+    ]})
+
+
+@router.get("/runs/stats", response_model=ApiResponse)
+async def get_run_stats(hours: int = Query(24, ge=1, le=24 * 30, description="统计最近多少小时")):
+    """各任务 p50/p95 耗时、平均延迟、每次处理条数，看调度器是否跟得上负载"""
+    scheduler = get_scheduler_service()
+    return ApiResponse(success=True, data=scheduler.get_run_stats(hours))
@@ -41,7 +41,8 @@ CORS_ORIGINS = [
 ]
 
 # ==================== 数据库配置 ====================
-DATABASE_URL = f"sqlite:///{DATABASE_DIR}/auto_geo_v3.db"
+# 多台机器的 worker 共享同一个任务队列时，用环境变量指向共享数据库
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_DIR}/auto_geo_v3.db")
 
 # ==================== 加密配置 ====================
 # AES-256加密密钥（32字节）- 生产环境必须从环境变量读取
@@ -54,6 +55,70 @@ ENCRYPTION_KEY = os.getenv(
 # 浏览器类型
 BROWSER_TYPE: Literal["chromium", "firefox", "webkit"] = "chromium"
 
+# 浏览器运行模式（按子系统）：
+#   headless  无头，服务器上不用虚拟桌面，CPU/内存省很多
+#   headed    有头，本地调试或者需要人工扫码的场景
+#   auto      无头运行，碰到登录弹窗/验证码时把任务转给有头 worker 重跑（生产默认）
+BROWSER_MODE = os.getenv("BROWSER_MODE", "auto").lower()
+BROWSER_MODES = {
+    "publish": os.getenv("BROWSER_MODE_PUBLISH", BROWSER_MODE).lower(),
+    "index_check": os.getenv("BROWSER_MODE_INDEX_CHECK", BROWSER_MODE).lower(),
+    "collect": os.getenv("BROWSER_MODE_COLLECT", BROWSER_MODE).lower(),
+    # 授权要用户扫码/输密码，默认有头
+    "auth": os.getenv("BROWSER_MODE_AUTH", "headed").lower(),
+}
+
+# 请求拦截：采集/检测只读文字，图片、视频、字体、统计脚本、广告都不用下载
+# 各平台的 block_profile 在下面 PLATFORMS / AI_PLATFORMS 里，URL 规则按子串匹配，allow_patterns 优先于拦截
+RESOURCE_BLOCKING_ENABLED = os.getenv("RESOURCE_BLOCKING_ENABLED", "true").lower() == "true"
+RESOURCE_BLOCK_TYPES = ["image", "media", "font"]
+RESOURCE_BLOCK_PATTERNS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hm.baidu.com",
+    "cnzz.com",
+    "/sentry",
+]
+# 验证码、登录二维码图片必须放行，不然转有头之前连弹窗都判断不准
+RESOURCE_ALLOW_PATTERNS = ["captcha", "verify", "qrcode"]
+
+# 文章正文直连提取：带上浏览器上下文的 Cookie 用 httpx 拉服务端渲染的 HTML，不开页面
+# 解析不出来或者正文太短（被登录墙挡住）才回退到浏览器
+HTTP_FETCH_ENABLED = os.getenv("HTTP_FETCH_ENABLED", "true").lower() == "true"
+HTTP_FETCH_CONCURRENCY = int(os.getenv("HTTP_FETCH_CONCURRENCY", "4"))
+HTTP_FETCH_TIMEOUT = float(os.getenv("HTTP_FETCH_TIMEOUT", "15"))
+HTTP_FETCH_MIN_CHARS = 100
+
+# 账号授权批量检测：总并发、单平台并发（同平台开太多容易触发风控）
+ACCOUNT_VALIDATE_CONCURRENCY = int(os.getenv("ACCOUNT_VALIDATE_CONCURRENCY", "4"))
+ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY = int(os.getenv("ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY", "2"))
+# 浏览器检测前先带 Cookie 直连平台的登录态接口，能判定的就不开浏览器
+ACCOUNT_PRECHECK_ENABLED = os.getenv("ACCOUNT_PRECHECK_ENABLED", "true").lower() == "true"
+ACCOUNT_PRECHECK_TIMEOUT = float(os.getenv("ACCOUNT_PRECHECK_TIMEOUT", "10"))
+
+# 浏览器提取正文：同一个上下文里另开几个页面并发打开文章，搜索结果页一直留着不动
+# 平台可以在 PLATFORMS 里用 extract_concurrency / extract_jitter 覆盖
+COLLECT_EXTRACT_CONCURRENCY = int(os.getenv("COLLECT_EXTRACT_CONCURRENCY", "3"))
+COLLECT_EXTRACT_JITTER = (1.0, 3.0)  # 每个页面打开下一篇之前随机停顿（秒）
+
+# 搜索结果优先从页面自己请求的搜索接口 JSON 里拿，翻页跟着接口游标走；等这么久没截到就回退 DOM 抓取
+SEARCH_API_CAPTURE_TIMEOUT = float(os.getenv("SEARCH_API_CAPTURE_TIMEOUT", "8"))
+
+# 增量采集：已采过的链接（reference_articles.url 唯一索引 + 进程内布隆过滤器）提取前就跳过
+# 同一 (平台, 关键词) 采过一次后，连续这么多页搜索结果里的爆火文章都是采过的，就不再往后翻
+FRONTIER_ENABLED = os.getenv("FRONTIER_ENABLED", "true").lower() == "true"
+FRONTIER_STALE_PAGES = int(os.getenv("FRONTIER_STALE_PAGES", "1"))
+FRONTIER_BLOOM_CAPACITY = 200000     # 预估链接数，超过后误判率会上升（误判的会再查一次索引，不会漏采）
+FRONTIER_BLOOM_ERROR_RATE = 0.001
+
+# 多关键词采集活动：每个平台开几个浏览器上下文一直用到活动结束，(平台, 关键词) 组合排队轮流跑
+CAMPAIGN_CONTEXTS_PER_PLATFORM = int(os.getenv("CAMPAIGN_CONTEXTS_PER_PLATFORM", "1"))
+CAMPAIGN_MAX_KEYWORDS = 200
+
+# 以前各采集平台共用的登录状态文件，只在平台还没有自己的加密会话时读一次
+LEGACY_COLLECTOR_STATE_PATH = "auth/state.json"
+
 # 浏览器启动参数
 BROWSER_ARGS = [
     "--no-sandbox",
@@ -71,6 +136,14 @@ LOGIN_CHECK_INTERVAL = 1000  # 毫秒
 LOGIN_MAX_WAIT_TIME = 120000  # 2分钟
 
 # ==================== 平台配置 ====================
+# 页面探测用的选择器表（有序，靠前的优先，交给 dom_probe 一次判断完）：
+#   username_selectors  授权完成后从页面取用户名
+#   login_selectors     出现即未登录（账号校验用）
+#   auth_selectors      出现即已登录（账号校验用）
+#   login_url_keywords  URL 里带这些词说明被踢回了登录页
+#   block_profile       采集时的请求拦截规则（见 RESOURCE_BLOCK_*）
+#   extract_concurrency 采集时浏览器并发提取正文的页面数（见 COLLECT_EXTRACT_*）
+#   extract_jitter      每个提取页面打开下一篇前的随机停顿区间（秒）
 PLATFORMS = {
     "zhihu": {
         "id": "zhihu",
@@ -79,6 +152,20 @@ PLATFORMS = {
         "login_url": "https://www.zhihu.com/signin",
         "publish_url": "https://zhuanlan.zhihu.com/write",
         "color": "#0084FF",
+        "username_selectors": [".AppHeader-profileText", ".Header-userName", ".UserLink-link", ".ProfileHeader-name"],
+        "login_selectors": ["button:has-text('登录')"],
+        "auth_selectors": [".AppHeader-userAvatar", ".AppHeader-profileText"],
+        "login_url_keywords": ["/signin", "/login"],
+        # 登录态接口：未登录返回 401，登录了返回带 id 的用户信息
+        "session_check": {"url": "https://www.zhihu.com/api/v4/me", "logged_in_key": "id", "missing_is_logged_out": True},
+        "block_profile": {
+            "block_types": RESOURCE_BLOCK_TYPES,
+            "block_patterns": RESOURCE_BLOCK_PATTERNS + ["zhihu-web-analytics", "datahub.zhihu.com", "sc-profiler"],
+            "allow_patterns": RESOURCE_ALLOW_PATTERNS,
+        },
+        # 知乎风控严，少开几个、停久一点
+        "extract_concurrency": 2,
+        "extract_jitter": (2.0, 4.0),
     },
     "baijiahao": {
         "id": "baijiahao",
@@ -88,6 +175,9 @@ PLATFORMS = {
         "home_url": "https://baijiahao.baidu.com/builder/rc/static/edit/index",  # 百家号首页（作者中心）
         "publish_url": "https://baijiahao.baidu.com/builder/rc/edit/index",  # 编辑器首页
         "color": "#E53935",
+        "username_selectors": [".user-info-name"],
+        "auth_selectors": [".user-info-name"],
+        "login_url_keywords": ["login", "passport"],
     },
     "sohu": {
         "id": "sohu",
@@ -96,6 +186,8 @@ PLATFORMS = {
         "login_url": "https://mp.sohu.com/",
         "publish_url": "https://mp.sohu.com/upload/article",
         "color": "#FF6B00",
+        "username_selectors": [".user-name", ".name"],
+        "auth_selectors": [".user-name"],
     },
     "toutiao": {
         "id": "toutiao",
@@ -104,6 +196,18 @@ PLATFORMS = {
         "login_url": "https://mp.toutiao.com/",
         "publish_url": "https://mp.toutiao.com/profile/article/article_edit",
         "color": "#333333",
+        "username_selectors": [".user-name", ".name", ".mp-name"],
+        "auth_selectors": [".user-name"],
+        "login_url_keywords": ["/login"],
+        # 拿不到用户信息不一定是掉线（接口偶尔改版），交给浏览器再看
+        "session_check": {"url": "https://mp.toutiao.com/mp/agw/media/get_media_info", "logged_in_key": "data.user"},
+        "block_profile": {
+            "block_types": RESOURCE_BLOCK_TYPES,
+            "block_patterns": RESOURCE_BLOCK_PATTERNS + ["mcs.snssdk.com", "mon.snssdk.com", "mon.zijieapi.com", "/monitor_browser/"],
+            "allow_patterns": RESOURCE_ALLOW_PATTERNS,
+        },
+        "extract_concurrency": 3,
+        "extract_jitter": (1.0, 2.0),
     },
     "wenku": {
         "id": "wenku",
@@ -112,6 +216,7 @@ PLATFORMS = {
         "login_url": "https://passport.baidu.com/v2/?login&tpl=wenku",
         "publish_url": "https://wenku.baidu.com/user/upload",
         "color": "#2932E1",
+        "username_selectors": [".user-info-name", ".user-name", ".name"],
     },
     "penguin": {
         "id": "penguin",
@@ -120,6 +225,7 @@ PLATFORMS = {
         "login_url": "https://om.qq.com/userAuth/index",
         "publish_url": "https://om.qq.com/article/articlePublish",
         "color": "#1E8AE8",
+        "username_selectors": [".header-user-name", ".user-info-name"],
     },
     "weixin": {
         "id": "weixin",
@@ -128,6 +234,9 @@ PLATFORMS = {
         "login_url": "https://mp.weixin.qq.com/",
         "publish_url": "https://mp.weixin.qq.com/cgi-bin/appmsg?t=media/appmsg_edit",
         "color": "#07C160",
+        "username_selectors": [".weui-desktop-account__name", ".account_name"],
+        "auth_selectors": [".weui-desktop-account__name"],
+        "login_url_keywords": ["/login"],
     },
     "wangyi": {
         "id": "wangyi",
@@ -136,6 +245,7 @@ PLATFORMS = {
         "login_url": "https://mp.163.com/login.html",
         "publish_url": "https://mp.163.com/admin/article/publish",
         "color": "#E60026",
+        "username_selectors": [".name", ".account-name", ".user-name", ".m-name", ".header-info .name", ".media-info .name", "div[class*='name']"],
     },
     "zijie": {
         "id": "zijie",
@@ -144,6 +254,7 @@ PLATFORMS = {
         "login_url": "https://mp.toutiao.com/",
         "publish_url": "https://mp.toutiao.com/profile/article/article_edit",
         "color": "#FA2A2D",
+        "username_selectors": [".user-name", ".name", ".mp-name"],
     },
     "xiaohongshu": {
         "id": "xiaohongshu",
@@ -152,6 +263,7 @@ PLATFORMS = {
         "login_url": "https://creator.xiaohongshu.com/login",
         "publish_url": "https://creator.xiaohongshu.com/publish/publish",
         "color": "#FF2442",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "bilibili": {
         "id": "bilibili",
@@ -160,6 +272,8 @@ PLATFORMS = {
         "login_url": "https://passport.bilibili.com/login",
         "publish_url": "https://member.bilibili.com/article/post_text",
         "color": "#FB7299",
+        "username_selectors": [".username-text", ".user-nick", ".nickname"],
+        "session_check": {"url": "https://api.bilibili.com/x/web-interface/nav", "logged_in_key": "data.isLogin", "missing_is_logged_out": True},
     },
     "36kr": {
         "id": "36kr",
@@ -168,6 +282,7 @@ PLATFORMS = {
         "login_url": "https://passport.36kr.com/mo/signin",
         "publish_url": "https://36kr.com/publish",
         "color": "#FF6A00",
+        "username_selectors": [".user-name", ".name", ".profile-name"],
     },
     "huxiu": {
         "id": "huxiu",
@@ -176,6 +291,7 @@ PLATFORMS = {
         "login_url": "https://www.huxiu.com/passport/login",
         "publish_url": "https://www.huxiu.com/article/post",
         "color": "#FF9C41",
+        "username_selectors": [".user-name", ".username", ".author-name"],
     },
     "woshipm": {
         "id": "woshipm",
@@ -184,6 +300,7 @@ PLATFORMS = {
         "login_url": "https://passport.woshipm.com/login",
         "publish_url": "https://www.woshipm.com/article/post",
         "color": "#2ECC71",
+        "username_selectors": [".user-name", ".username", ".author-name"],
     },
     # 新增平台
     "douyin": {
@@ -193,6 +310,7 @@ PLATFORMS = {
         "login_url": "https://www.douyin.com/",
         "publish_url": "https://creator.douyin.com/",
         "color": "#000000",
+        "username_selectors": [".user-name", ".username", ".nickname"],
     },
     "kuaishou": {
         "id": "kuaishou",
@@ -201,6 +319,7 @@ PLATFORMS = {
         "login_url": "https://cp.kuaishou.com/",
         "publish_url": "https://cp.kuaishou.com/article/publish",
         "color": "#FF4500",
+        "username_selectors": [".user-name", ".username", ".creator-name"],
     },
     "video_account": {
         "id": "video_account",
@@ -209,6 +328,7 @@ PLATFORMS = {
         "login_url": "https://channels.weixin.qq.com/",
         "publish_url": "https://channels.weixin.qq.com/post",
         "color": "#07C160",
+        "username_selectors": [".user-name", ".username", ".nickname"],
     },
     "sohu_video": {
         "id": "sohu_video",
@@ -217,6 +337,7 @@ PLATFORMS = {
         "login_url": "https://tv.sohu.com/",
         "publish_url": "https://tv.sohu.com/upload",
         "color": "#FF6B00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "weibo": {
         "id": "weibo",
@@ -225,6 +346,7 @@ PLATFORMS = {
         "login_url": "https://weibo.com/",
         "publish_url": "https://weibo.com/compose",
         "color": "#E6162D",
+        "username_selectors": [".ScreenName", ".username", ".name"],
     },
     "haokan": {
         "id": "haokan",
@@ -233,6 +355,7 @@ PLATFORMS = {
         "login_url": "https://haokan.baidu.com/",
         "publish_url": "https://haokan.baidu.com/upload",
         "color": "#2932E1",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "xigua": {
         "id": "xigua",
@@ -241,6 +364,7 @@ PLATFORMS = {
         "login_url": "https://ixigua.com/",
         "publish_url": "https://ixigua.com/publish",
         "color": "#FA2A2D",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "jianshu": {
         "id": "jianshu",
@@ -249,6 +373,7 @@ PLATFORMS = {
         "login_url": "https://www.jianshu.com/sign_in",
         "publish_url": "https://www.jianshu.com/writer",
         "color": "#EA6F5A",
+        "username_selectors": [".user-nick", ".username", ".name"],
     },
     "iqiyi": {
         "id": "iqiyi",
@@ -257,6 +382,7 @@ PLATFORMS = {
         "login_url": "https://www.iqiyi.com/",
         "publish_url": "https://mp.iqiyi.com/upload",
         "color": "#00BE06",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "dayu": {
         "id": "dayu",
@@ -265,6 +391,7 @@ PLATFORMS = {
         "login_url": "https://mp.dayu.com/",
         "publish_url": "https://mp.dayu.com/article/post",
         "color": "#FF6A00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "acfun": {
         "id": "acfun",
@@ -273,6 +400,7 @@ PLATFORMS = {
         "login_url": "https://www.acfun.cn/login",
         "publish_url": "https://member.acfun.cn/article/publish",
         "color": "#FD4C5D",
+        "username_selectors": [".user-name", ".username", ".nickname"],
     },
     "tencent_video": {
         "id": "tencent_video",
@@ -281,6 +409,7 @@ PLATFORMS = {
         "login_url": "https://v.qq.com/",
         "publish_url": "https://upload.video.qq.com/",
         "color": "#FF6B00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "yidian": {
         "id": "yidian",
@@ -289,6 +418,7 @@ PLATFORMS = {
         "login_url": "https://mp.yidianzixun.com/",
         "publish_url": "https://mp.yidianzixun.com/publish",
         "color": "#007AFF",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "pipixia": {
         "id": "pipixia",
@@ -297,6 +427,7 @@ PLATFORMS = {
         "login_url": "https://www.pipixia.com/",
         "publish_url": "https://www.pipixia.com/publish",
         "color": "#FF6900",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "meipai": {
         "id": "meipai",
@@ -305,6 +436,7 @@ PLATFORMS = {
         "login_url": "https://www.meipai.com/",
         "publish_url": "https://www.meipai.com/publish",
         "color": "#1E88E5",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "douban": {
         "id": "douban",
@@ -313,6 +445,7 @@ PLATFORMS = {
         "login_url": "https://www.douban.com/",
         "publish_url": "https://www.douban.com/note",
         "color": "#007722",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "kuai_chuan": {
         "id": "kuai_chuan",
@@ -321,6 +454,7 @@ PLATFORMS = {
         "login_url": "https://kuai.360.cn/",
         "publish_url": "https://kuai.360.cn/publish",
         "color": "#00BE3B",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "dafeng": {
         "id": "dafeng",
@@ -329,6 +463,7 @@ PLATFORMS = {
         "login_url": "https://mp.ifeng.com/",
         "publish_url": "https://mp.ifeng.com/article/post",
         "color": "#DD2E1B",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "xueqiu": {
         "id": "xueqiu",
@@ -337,6 +472,7 @@ PLATFORMS = {
         "login_url": "https://xueqiu.com/",
         "publish_url": "https://xueqiu.com/post",
         "color": "#2775CA",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "yiche": {
         "id": "yiche",
@@ -345,6 +481,7 @@ PLATFORMS = {
         "login_url": "https://mp.yiche.com/",
         "publish_url": "https://mp.yiche.com/article/post",
         "color": "#FF6600",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "chejia": {
         "id": "chejia",
@@ -353,6 +490,7 @@ PLATFORMS = {
         "login_url": "https://mp.autohome.com.cn/",
         "publish_url": "https://mp.autohome.com.cn/article/post",
         "color": "#E60012",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "duoduo": {
         "id": "duoduo",
@@ -361,6 +499,7 @@ PLATFORMS = {
         "login_url": "https://mp.pinduoduo.com/",
         "publish_url": "https://mp.pinduoduo.com/publish",
         "color": "#E02E24",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "weishi": {
         "id": "weishi",
@@ -369,6 +508,7 @@ PLATFORMS = {
         "login_url": "https://weishi.qq.com/",
         "publish_url": "https://weishi.qq.com/publish",
         "color": "#FF6B00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "mango": {
         "id": "mango",
@@ -377,6 +517,7 @@ PLATFORMS = {
         "login_url": "https://www.mgtv.com/",
         "publish_url": "https://www.mgtv.com/upload",
         "color": "#FF7F00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "ximalaya": {
         "id": "ximalaya",
@@ -385,6 +526,7 @@ PLATFORMS = {
         "login_url": "https://www.ximalaya.com/",
         "publish_url": "https://www.ximalaya.com/upload",
         "color": "#F84438",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "meituan": {
         "id": "meituan",
@@ -393,6 +535,7 @@ PLATFORMS = {
         "login_url": "https://meituan.com/",
         "publish_url": "https://meituan.com/publish",
         "color": "#FFBC00",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "alipay": {
         "id": "alipay",
@@ -401,6 +544,7 @@ PLATFORMS = {
         "login_url": "https://open.alipay.com/",
         "publish_url": "https://open.alipay.com/publish",
         "color": "#1677FF",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "douyin_company": {
         "id": "douyin_company",
@@ -409,6 +553,7 @@ PLATFORMS = {
         "login_url": "https://business.douyin.com/",
         "publish_url": "https://business.douyin.com/publish",
         "color": "#000000",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "douyin_company_lead": {
         "id": "douyin_company_lead",
@@ -417,6 +562,7 @@ PLATFORMS = {
         "login_url": "https://business.douyin.com/",
         "publish_url": "https://business.douyin.com/publish",
         "color": "#000000",
+        "username_selectors": [".user-name", ".username", ".name"],
     },
     "custom": {
         "id": "custom",
@@ -428,6 +574,78 @@ PLATFORMS = {
     },
 }
 
+# ==================== 会话健康配置 ====================
+# 各平台的关键登录 Cookie（支持多个备选Cookie，用|分隔）：授权时有任意一个就算登录完成
+SESSION_KEY_COOKIES = {
+    "zhihu": "z_c0|z_cari0",  # 知乎关键Cookie，增加 z_c0 作为备选
+    "baijiahao": "BDUSS|STOKEN",
+    "toutiao": "sessionid|sid_tt",
+    "wenku": "BDUSS|STOKEN",
+    "penguin": "uin|skey|p_sktkt",
+    "weixin": "pt2gguin|token|app_id|app_msgid",  # 微信公众号关键Cookie
+    "wangyi": "NTES_SESS|S_INFO",
+    "sohu": "ppinf|pprdig",
+    "zijie": "sessionid|sid_tt",
+    "xiaohongshu": "xhs_web_session|webid|web_session|webId",  # 小红书关键Cookie
+    "bilibili": "bili_jct|SESSDATA",
+    "36kr": "uid|ticket",
+    "huxiu": "huxiu_hash|huxiusessionid",
+    "woshipm": "uid|token",
+    # 新增平台
+    "doyin": "sessionid|passport_auth_id",
+    "kuaishou": "userId|token",
+    "video_account": "wxuin|webwxuvid",
+    "sohu_video": "ppinf|pprdig",
+    "weibo": "SUB|SUBP",
+    "haokan": "BAIDUID|STOKEN",
+    "xigua": "sessionid|sid_tt",
+    "jianshu": "_session_id",
+    "iqiyi": "P00001|P00003",
+    "dayu": "e_token|e_u",
+    "acfun": "acFun__web__pc__session_id",
+    "tencent_video": "vqq_vusession",
+    "yidian": "uid|token",
+    "pipixia": "token|uid",
+    "meipai": "token|uid",
+    "douban": "dbcl2|ll",
+    "kuai_chuan": "qi_uin|qkn",
+    "dafeng": "auth_cookie|ssuid",
+    "xueqiu": "xq_a_token|xq_r_token",
+    "yiche": "yiche_uid|yiche_sso",
+    "chejia": "autohomecookie|token",
+    "duoduo": "cookie2|p_token",
+    "weishi": "uin|skey",
+    "mango": "mgtv_complex_id",
+    "ximalaya": "device_idudi|token",
+    "meituan": "token|userId",
+    "alipay": "euid|ALIPAY_JWT",
+    "douyin_company": "sessionid|passport_auth_id",
+    "douyin_company_lead": "sessionid|passport_auth_id",
+}
+
+# 会话健康按这些 Cookie 的过期时间算，和授权判定分开：授权表里有些备选是设备标识/偏好，没登录也有，不能拿来算登录态过期
+SESSION_HEALTH_KEY_COOKIES = {
+    **SESSION_KEY_COOKIES,
+    "xiaohongshu": "xhs_web_session|web_session",  # webId 是设备标识
+    "haokan": "BDUSS|STOKEN",  # BAIDUID 是设备标识，登录态看 BDUSS
+    "douban": "dbcl2",  # ll 是地区偏好
+    # AI 平台（收录检测用的会话）；DeepSeek 的登录 token 存在 localStorage 里，没有关键 Cookie，只能靠心跳
+    "doubao": "sessionid|sessionid_ss",
+    "qianwen": "tongyi_sso_ticket",
+}
+
+# 会话健康：按关键 Cookie 的 expires 判断有效/临近过期/失效，没有过期时间的靠最近一次心跳结果
+SESSION_EXPIRING_HOURS = 48              # 关键 Cookie 这么多小时内过期算“临近过期”
+SESSION_HEARTBEAT_TTL_HOURS = 24         # 心跳成功后这么多小时内不用再开浏览器验证（关键 Cookie 没有过期时间时）
+# 后台主动续期：临近过期/心跳快过期的会话按各自的时间点错开做心跳，不挤在同一时刻开浏览器
+SESSION_REFRESH_TICK_MINUTES = int(os.getenv("SESSION_REFRESH_TICK_MINUTES", "30"))   # 扫描间隔（分钟）
+SESSION_REFRESH_PER_TICK = int(os.getenv("SESSION_REFRESH_PER_TICK", "2"))           # 每次最多续期几个会话
+SESSION_REFRESH_SPREAD_HOURS = 12        # 各会话续期时间点按哈希在这么多小时内错开
+
+# 回答内容存储：没有检测记录引用的回答由定时维护任务清理，只清创建超过宽限期的（刚去重、还没挂上检测记录的不能删）
+ANSWER_BLOB_PRUNE_INTERVAL_HOURS = 6     # 清理间隔（小时）
+ANSWER_BLOB_PRUNE_GRACE_MINUTES = 60     # 宽限期（分钟）
+
 # ==================== 日志配置 ====================
 LOG_DIR = BASE_DIR / "logs"
 LOG_FILE = LOG_DIR / "auto_geo.log"
@@ -472,27 +690,135 @@ RAGFLOW_DUPLICATE_THRESHOLD = float(os.getenv("RAGFLOW_DUPLICATE_THRESHOLD", "0.
 
 # ==================== AI平台检测配置 ====================
 # 收录检测的AI平台列表
+# 通用的登录入口选择器：页面上可见任意一个就说明要登录（导航和心跳检测共用）
+AI_LOGIN_INDICATORS = [
+    "[class*='login']",
+    "[id*='login']",
+    "[class*='auth']",
+    "[id*='auth']",
+    "button:has-text('登录')",
+    "button:has-text('Sign in')",
+]
+
 AI_PLATFORMS = {
     "doubao": {
         "id": "doubao",
         "name": "豆包",
         "url": "https://www.doubao.com",
         "color": "#0066FF",
+        # 豆包的登录按钮类名不统一，先查专门的再查通用的
+        "login_indicators": [
+            "[class*='login-btn']",
+            "[class*='login-button']",
+            "[href*='login']",
+            "[class*='account']",
+        ] + AI_LOGIN_INDICATORS,
+        "block_profile": {
+            "block_types": RESOURCE_BLOCK_TYPES,
+            "block_patterns": RESOURCE_BLOCK_PATTERNS + ["mcs.zijieapi.com", "mon.zijieapi.com", "/monitor_browser/"],
+            "allow_patterns": RESOURCE_ALLOW_PATTERNS,
+        },
     },
     "qianwen": {
         "id": "qianwen",
         "name": "通义千问",
         "url": "https://qianwen.com/?source=tongyiqw",
         "color": "#FF6A00",
+        "login_indicators": AI_LOGIN_INDICATORS + ["[class*='login-entry']", "[class*='user-login']"],
+        "block_profile": {
+            "block_types": RESOURCE_BLOCK_TYPES,
+            "block_patterns": RESOURCE_BLOCK_PATTERNS + ["arms-retcode", "log.mmstat.com", "/alilog/"],
+            "allow_patterns": RESOURCE_ALLOW_PATTERNS,
+        },
     },
     "deepseek": {
         "id": "deepseek",
         "name": "DeepSeek",
         "url": "https://chat.deepseek.com",
         "color": "#4D6BFE",
+        "login_indicators": AI_LOGIN_INDICATORS,
+        "block_profile": {
+            "block_types": RESOURCE_BLOCK_TYPES,
+            "block_patterns": RESOURCE_BLOCK_PATTERNS,
+            "allow_patterns": RESOURCE_ALLOW_PATTERNS,
+        },
     },
 }
 
+# 收录检测结果缓存：相同(平台, 问题)在TTL内直接复用回答，不再打开浏览器（秒，0=关闭）
+INDEX_CHECK_CACHE_TTL = int(os.getenv("INDEX_CHECK_CACHE_TTL", "21600"))
+
+# 问题变体抽样：按历史波动挑问法，命中率置信区间够窄后提前停止
+INDEX_CHECK_SAMPLING_ENABLED = os.getenv("INDEX_CHECK_SAMPLING_ENABLED", "true").lower() == "true"
+INDEX_CHECK_SAMPLING_MIN_SAMPLES = 2  # 每个(关键词, 平台)至少问几个问法
+INDEX_CHECK_SAMPLING_CI_HALF_WIDTH = 0.15  # 置信区间半宽（命中率 0~1）
+INDEX_CHECK_SAMPLING_CONFIDENCE = 0.95  # 置信水平
+INDEX_CHECK_SAMPLING_PRIOR_WEIGHT = 10  # 历史数据最多折算成多少次检测作为先验
+INDEX_CHECK_SAMPLING_HISTORY_DAYS = 14  # 先验使用最近多少天的记录
+
+# 问题变体近似去重：字符 n-gram TF-IDF 余弦相似度达到阈值视为同一问法
+# 字+双字组合对中文短问句区分度最好：换个说法的问法约 0.6~0.7，不同意图的一般低于 0.4
+QUESTION_DEDUP_THRESHOLD = float(os.getenv("QUESTION_DEDUP_THRESHOLD", "0.6"))
+QUESTION_DEDUP_NGRAM_RANGE = (1, 2)
+
+# 已发布文章收录复查：按发布时长和历史结果指数退避，已收录的只做低频复核
+ARTICLE_RECHECK_BASE_MINUTES = 10          # 首次复查间隔（分钟）
+ARTICLE_RECHECK_MAX_HOURS = 24             # 未收录文章的最长复查间隔（小时）
+ARTICLE_RECHECK_AGE_FACTOR = 0.25          # 间隔至少为已发布时长的这个比例，老文章自然查得少
+ARTICLE_VERIFY_INTERVAL_DAYS = 7           # 已收录文章的复核间隔（天）
+ARTICLE_RECHECK_BATCH_SIZE = int(os.getenv("ARTICLE_RECHECK_BATCH_SIZE", "20"))   # 每轮最多处理多少篇
+ARTICLE_RECHECK_CONCURRENCY = int(os.getenv("ARTICLE_RECHECK_CONCURRENCY", "3"))  # 同时检测的篇数
+
+# 分片调度：把每个定时任务的 cron 周期切成若干 tick，每个 tick 只处理一个槽位的文章（按文章 ID 取模），削平负载尖峰
+# 默认关闭；打开后只对触发间隔固定的 cron 生效（*/5 * * * * 这种），工作日/多个时间点的照原 cron 触发
+SCHEDULER_SHARDED_MODE = os.getenv("SCHEDULER_SHARDED_MODE", "false").lower() == "true"
+SCHEDULER_SHARD_COUNT = int(os.getenv("SCHEDULER_SHARD_COUNT", "10"))        # 每个周期的分片数
+SCHEDULER_SHARD_MIN_TICK_SECONDS = 5                                          # tick 最短间隔，周期太短时自动减少分片
+
+# 定时任务错过触发时间后多少秒内仍补跑（执行统计里 lag 超过它的次数单独列出）
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "60"))
+
+# 定时任务执行记录保留天数
+SCHEDULER_RUN_HISTORY_DAYS = 30
+
+# 共享任务执行器：浏览器槽位数，以及只给交互任务（用户手动触发）预留的槽位
+JOB_EXECUTOR_SLOTS = int(os.getenv("JOB_EXECUTOR_SLOTS", "3"))
+JOB_EXECUTOR_INTERACTIVE_RESERVED = int(os.getenv("JOB_EXECUTOR_INTERACTIVE_RESERVED", "1"))
+JOB_EXECUTOR_HISTORY_SIZE = 500  # 内存里保留多少个已结束任务供查询
+
+# Worker 进程模式：inline=任务在 API 进程内执行；external=API 只入队，由 python -m backend.worker 执行
+WORKER_MODE = os.getenv("WORKER_MODE", "inline").lower()
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))   # worker 轮询队列/同步进度的间隔（秒）
+WORKER_DRAIN_TIMEOUT = int(os.getenv("WORKER_DRAIN_TIMEOUT", "300"))     # 优雅退出时等待运行中任务的最长时间（秒）
+WORKER_LOG_RETENTION_HOURS = 24                                          # worker 中转日志保留时长
+
+# 多节点协调：认领任务拿租约，运行中持续续约；worker 挂了租约过期，其他节点可以接手
+WORKER_NODE_NAME = os.getenv("WORKER_NODE_NAME", "")                     # 节点名，默认用主机名
+WORKER_LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "30"))      # 租约时长（秒），续约间隔为 WORKER_POLL_INTERVAL
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))         # 同一任务最多被认领几次（含租约被抢）
+WORKER_AFFINITY_GRACE_SECONDS = int(os.getenv("WORKER_AFFINITY_GRACE_SECONDS", "300"))  # 指定节点不在线时，等多久后允许其他节点接手
+WORKER_HEADED = os.getenv("WORKER_HEADED", "false").lower() == "true"    # 本机有显示器/虚拟桌面，可以接需要有头浏览器的任务
+WORKER_HEADED_WAIT_SECONDS = int(os.getenv("WORKER_HEADED_WAIT_SECONDS", "1800"))  # 转有头的任务等多久，期间没有在线的有头 worker 就标记失败
+
+# 发布账号轮换：同平台多个授权账号分摊发布量，避免全部压在一个账号上触发平台限流
+ACCOUNT_DAILY_PUBLISH_QUOTA = int(os.getenv("ACCOUNT_DAILY_PUBLISH_QUOTA", "5"))   # 单账号每天最多发布篇数
+ACCOUNT_DAILY_QUOTA_BY_PLATFORM: dict = {}                                        # 按平台覆盖，如 {"zhihu": 3}
+ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES = 10     # 同一账号两次发布的最短间隔（分钟）
+ACCOUNT_FAILURE_COOLDOWN_MINUTES = 30         # 发布失败后的冷却时间（分钟），连续失败按倍数延长
+ACCOUNT_FAILURE_WINDOW_HOURS = 72             # 统计失败率的时间窗口（小时）
+ACCOUNT_UNHEALTHY_FAILURE_RATE = 0.5          # 失败率超过这个值的账号排到最后（至少 3 次样本才算）
+
+# 批量发布：同一账号的多篇文章在一个已登录的浏览器上下文里连续发，只加载一次会话
+PUBLISH_BATCH_SIZE = int(os.getenv("PUBLISH_BATCH_SIZE", "5"))   # 定时发布每个任务最多带几篇（同平台）
+PUBLISH_BATCH_GAP_SECONDS = (3, 8)                               # 同一上下文里两篇之间的随机间隔（秒）
+PUBLISH_ACCOUNT_CONCURRENCY = 3                                  # 手动发布时同时开几个账号的上下文
+
+# Playwright 操作耗时埋点：goto/fill/click/evaluate/等待 都记一条 span，进程内环形缓冲，定期批量落库
+TIMING_BUFFER_SIZE = 5000                                                   # 内存里保留最近多少条 span
+TIMING_FLUSH_INTERVAL_SECONDS = int(os.getenv("TIMING_FLUSH_INTERVAL_SECONDS", "60"))  # 落库间隔（秒）
+TIMING_FLUSH_BATCH = 500                                                    # 未落库的 span 攒够这么多条也立刻落库
+TIMING_RETENTION_DAYS = 7                                                   # operation_spans 保留天数
+
 # 收录检测定时任务配置
 INDEX_CHECK_HOUR = 2  # 每天凌晨2点执行
 INDEX_CHECK_MINUTE = 0
@@ -17,9 +17,11 @@ DATABASE_DIR.mkdir(exist_ok=True, parents=True)
 
 # 2. 创建引擎
 # connect_args={"check_same_thread": False} 是 SQLite 在多线程环境下运行的必要参数
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
     echo=False,  # 开启后可查看所有 SQL 语句，开发调试时有用
     pool_pre_ping=True,  # 每次使用连接前检查是否可用
 )
@@ -29,6 +31,8 @@ engine = create_engine(
 # 这样可以实现“读写不冲突”，极大减少 "database is locked" 错误
 @event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    if not IS_SQLITE:
+        return
     cursor = dbapi_connection.cursor()
     try:
         cursor.execute("PRAGMA journal_mode=WAL")
@@ -66,8 +70,9 @@ def init_db():
     from backend.database.models import (
         Account, Article, PublishRecord,
         Project, Keyword, QuestionVariant,
-        IndexCheckRecord, GeoArticle,
-        ScheduledTask, KnowledgeCategory, Knowledge  # 🌟 补齐了之前遗漏的表
+        IndexCheckRecord, IndexCheckSample, AnswerBlob, GeoArticle,
+        ScheduledTask, ScheduledTaskRun, WorkerJob, WorkerNode, WorkerLog, AccountSelection,
+        OperationSpan, CrawlWatermark, KnowledgeCategory, Knowledge  # 🌟 补齐了之前遗漏的表
     )
 
     # 获取已存在的表名用于对比
@@ -4,7 +4,7 @@
 包含基础发布、GEO、监控、知识库及AI招聘所有表结构
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, func, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, LargeBinary, func, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
@@ -27,6 +27,7 @@ class Account(Base):
     status = Column(Integer, default=1)
     last_auth_time = Column(DateTime, nullable=True)
     remark = Column(Text, nullable=True)
+    worker_node = Column(String(100), nullable=True, comment="会话所在的 worker 节点（多机部署时发布任务优先派给该节点）")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -54,6 +55,130 @@ class ScheduledTask(Base):
         return f"<Task {self.name} : {self.cron_expression}>"
 
 
+class ScheduledTaskRun(Base):
+    """
+    定时任务执行记录表
+    每次调度器触发任务都记一条：什么时候该跑、实际什么时候跑、跑了多久、处理了多少
+    """
+    __tablename__ = "scheduled_task_runs"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    task_key = Column(String(50), nullable=False, index=True, comment="任务标识符")
+    scheduled_time = Column(DateTime, nullable=True, comment="计划触发时间")
+    started_at = Column(DateTime, nullable=False, index=True, comment="实际开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+    duration_seconds = Column(Float, nullable=True, comment="执行耗时（秒）")
+    lag_seconds = Column(Float, nullable=True, comment="开始时间相对计划时间的延迟（秒）")
+    items = Column(Integer, default=0, comment="本次处理的条目数")
+    shard_slot = Column(Integer, nullable=True, comment="分片模式下的槽位")
+    status = Column(String(20), default="success", comment="执行结果：success=成功 failed=失败")
+    error = Column(Text, nullable=True, comment="错误信息")
+
+    def __repr__(self):
+        return f"<TaskRun {self.task_key} {self.started_at} {self.status}>"
+
+
+class WorkerJob(Base):
+    """
+    Worker 任务队列表
+    API 进程只负责入队，独立的 worker 进程（python -m backend.worker）认领并执行浏览器类任务
+    """
+    __tablename__ = "worker_jobs"
+    __table_args__ = (
+        Index("ix_worker_jobs_claim", "status", "priority", "created_at"),
+        # 同一去重键只能有一个未结束的任务，多个进程同时入队由数据库挡住
+        Index(
+            "uq_worker_jobs_active_dedupe", "dedupe_key", unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        TABLE_ARGS,
+    )
+
+    id = Column(String(32), primary_key=True, comment="任务ID")
+    job_type = Column(String(50), nullable=False, comment="任务类型（对应 worker 处理函数）")
+    name = Column(String(200), nullable=True, comment="任务名称")
+    lane = Column(String(20), nullable=False, default="interactive", comment="通道：interactive/scheduled/backfill")
+    priority = Column(Integer, nullable=False, default=0, comment="通道优先级，越小越先执行")
+    payload = Column(Text, nullable=True, comment="任务参数（JSON）")
+    meta = Column(Text, nullable=True, comment="附加信息（JSON）")
+    dedupe_key = Column(String(100), nullable=True, index=True, comment="去重键：同键任务未结束时不重复入队")
+    status = Column(String(20), nullable=False, default="queued", comment="状态：queued/running/succeeded/failed/cancelled")
+    progress = Column(Text, nullable=True, comment="进度（JSON）")
+    result = Column(Text, nullable=True, comment="执行结果（JSON）")
+    error = Column(Text, nullable=True, comment="错误信息")
+    cancel_requested = Column(Boolean, default=False, comment="是否请求取消运行中的任务")
+    worker_id = Column(String(100), nullable=True, comment="认领的 worker")
+    affinity = Column(String(100), nullable=True, comment="节点亲和：优先由该节点执行（如账号会话只在这台机器上）")
+    headed = Column(Boolean, default=False, comment="需要有头浏览器（无头执行碰到登录弹窗/验证码后转过来的），只有有头 worker 认领")
+    lease_expires_at = Column(DateTime, nullable=True, index=True, comment="租约到期时间，过期后其他 worker 可以接手")
+    attempts = Column(Integer, default=0, comment="被认领次数")
+    created_at = Column(DateTime, default=func.now(), comment="入队时间")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+
+    def __repr__(self):
+        return f"<WorkerJob {self.id} {self.job_type} {self.status}>"
+
+
+class WorkerNode(Base):
+    """
+    Worker 节点心跳表
+    每个 worker 进程定期上报，用来判断节点是否在线、亲和任务能否改派
+    worker_id 为 lease:scheduler 的一行是定时调度的领导租约（node 存持有者，last_heartbeat 是续约时间）
+    """
+    __tablename__ = "worker_nodes"
+    __table_args__ = TABLE_ARGS
+
+    worker_id = Column(String(100), primary_key=True, comment="worker 标识（主机:进程:序号）")
+    node = Column(String(100), nullable=False, index=True, comment="节点名")
+    pid = Column(Integer, nullable=True, comment="进程号")
+    slots = Column(Integer, nullable=True, comment="槽位数")
+    running = Column(Integer, default=0, comment="运行中任务数")
+    headed = Column(Boolean, default=False, comment="能否运行有头浏览器（有显示器/虚拟桌面）")
+    status = Column(String(20), default="active", comment="状态：active/draining/stopped")
+    started_at = Column(DateTime, default=func.now(), comment="启动时间")
+    last_heartbeat = Column(DateTime, nullable=True, index=True, comment="最近心跳时间")
+
+
+class WorkerLog(Base):
+    """
+    Worker 日志中转表
+    worker 进程把日志写到这里，API 进程轮询后通过 WebSocket 推给前端
+    """
+    __tablename__ = "worker_logs"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    worker_id = Column(String(100), nullable=True, comment="worker 标识")
+    level = Column(String(20), nullable=True, comment="日志级别")
+    module = Column(String(50), nullable=True, comment="模块")
+    message = Column(Text, nullable=True, comment="日志内容")
+    created_at = Column(DateTime, default=func.now(), index=True, comment="时间")
+
+
+class OperationSpan(Base):
+    """
+    Playwright 操作耗时表
+    发布/采集/检测里每个页面操作（导航、填充、点击、等待……）记一条，用来看各平台哪一步最慢
+    """
+    __tablename__ = "operation_spans"
+    __table_args__ = (
+        Index("ix_operation_spans_step", "platform", "step", "created_at"),
+        TABLE_ARGS,
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    platform = Column(String(50), nullable=False, comment="平台ID")
+    operation = Column(String(20), nullable=False, comment="操作类型：publish/collect/check")
+    step = Column(String(200), nullable=False, comment="步骤：goto/locator.click/wait:xxx/total 等")
+    duration_ms = Column(Float, nullable=False, comment="耗时（毫秒）")
+    ok = Column(Boolean, default=True, comment="是否成功（异常/等待超时为 False）")
+    node = Column(String(100), nullable=True, comment="执行节点")
+    created_at = Column(DateTime, default=func.now(), index=True, comment="记录时间")
+
+
 class Candidate(Base):
     """
     AI招聘候选人表
@@ -261,22 +386,103 @@ class IndexCheckRecord(Base):
     keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False, index=True, comment="关键词ID")
     platform = Column(String(50), nullable=False, comment="检测平台：doubao/qianwen/deepseek")
     question = Column(Text, nullable=False, comment="检测时使用的问题")
-    answer = Column(Text, nullable=True, comment="AI回答内容")
+    question_key = Column(String(64), nullable=True, index=True, comment="归一化问题哈希（结果缓存键）")
+
+    # AI回答内容：新数据存放在 answer_blobs 表（压缩 + 按哈希去重），这里只保留引用
+    answer_hash = Column(String(64), ForeignKey("answer_blobs.content_hash"), nullable=True, index=True, comment="回答内容哈希（answer_blobs.content_hash）")
+    legacy_answer = Column("answer", Text, nullable=True, comment="旧版内联回答内容（迁移后清空）")
 
     # 检测结果
     keyword_found = Column(Boolean, nullable=True, comment="是否包含关键词")
     company_found = Column(Boolean, nullable=True, comment="是否包含公司名")
+    cached = Column(Boolean, default=False, comment="是否复用了缓存中的回答（未实际访问AI平台）")
+    sample_id = Column(Integer, ForeignKey("index_check_samples.id", ondelete="SET NULL"), nullable=True, index=True, comment="所属抽样批次ID")
 
     # 时间戳
     check_time = Column(DateTime, default=func.now(), comment="检测时间")
 
     # 关联关系
     keyword = relationship("Keyword", back_populates="index_records")
+    answer_blob = relationship("AnswerBlob", lazy="select")
+
+    @property
+    def answer(self):
+        """AI回答内容（优先从压缩存储中解压，兼容未迁移的旧数据）"""
+        if self.answer_blob is not None:
+            return self.answer_blob.text
+        return self.legacy_answer
+
+    @answer.setter
+    def answer(self, value):
+        # 直接赋值时按旧方式内联保存，新写入请走 answer_store.put_answer()
+        self.legacy_answer = value
+
+    @property
+    def has_answer(self) -> bool:
+        """是否有回答内容（不解压正文）"""
+        return self.answer_hash is not None or bool(self.legacy_answer and self.legacy_answer.strip())
 
     def __repr__(self):
         return f"<IndexCheckRecord keyword_id={self.keyword_id} platform={self.platform}>"
 
 
+class IndexCheckSample(Base):
+    """
+    收录检测抽样记录表
+    记录每次(关键词, 平台)检测实际问了哪些问法，以及命中率的估计和置信区间
+    """
+    __tablename__ = "index_check_samples"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), nullable=False, index=True, comment="关键词ID")
+    platform = Column(String(50), nullable=False, comment="检测平台")
+
+    # 抽样情况
+    variants_total = Column(Integer, default=0, comment="问题变体总数")
+    variants_asked = Column(Integer, default=0, comment="实际检测的变体数")
+    asked_questions = Column(Text, nullable=True, comment="实际检测的问题列表（JSON）")
+    history_checks = Column(Integer, default=0, comment="作为先验的历史检测次数")
+    stopped_early = Column(Boolean, default=False, comment="是否因置信区间达标提前停止")
+
+    # 命中率估计（百分比）
+    hit_rate_estimate = Column(Float, nullable=True, comment="命中率估计（%）")
+    ci_low = Column(Float, nullable=True, comment="置信区间下限（%）")
+    ci_high = Column(Float, nullable=True, comment="置信区间上限（%）")
+    confidence = Column(Float, nullable=True, comment="置信水平（0~1）")
+
+    # 时间戳
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+
+    def __repr__(self):
+        return f"<IndexCheckSample keyword_id={self.keyword_id} platform={self.platform} asked={self.variants_asked}/{self.variants_total}>"
+
+
+class AnswerBlob(Base):
+    """
+    AI回答内容存储表
+    按内容哈希寻址、压缩保存，相同回答只存一份
+    """
+    __tablename__ = "answer_blobs"
+    __table_args__ = TABLE_ARGS
+
+    content_hash = Column(String(64), primary_key=True, comment="回答原文的 SHA-256")
+    codec = Column(String(10), nullable=False, default="zlib", comment="压缩算法：zlib/zstd")
+    data = Column(LargeBinary, nullable=False, comment="压缩后的回答内容")
+    raw_size = Column(Integer, nullable=False, default=0, comment="原文字节数")
+    stored_size = Column(Integer, nullable=False, default=0, comment="压缩后字节数")
+
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+
+    @property
+    def text(self) -> str:
+        from backend.services.answer_store import decompress_answer
+        return decompress_answer(self.codec, self.data)
+
+    def __repr__(self):
+        return f"<AnswerBlob {self.content_hash[:12]} {self.raw_size}->{self.stored_size}>"
+
+
 class GeoArticle(Base):
     """
     GEO文章表
@@ -311,6 +517,9 @@ class GeoArticle(Base):
     index_status = Column(String(20), default="uncheck")
     last_check_time = Column(DateTime, nullable=True)
     index_details = Column(Text, nullable=True)
+    next_check_time = Column(DateTime, nullable=True, index=True, comment="下次收录检测时间（为空表示无需检测）")
+    check_count = Column(Integer, default=0, comment="当前状态下连续检测次数（用于退避）")
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True, index=True, comment="实际发布使用的账号ID")
 
     # 时间戳
     created_at = Column(DateTime, default=func.now(), comment="创建时间")
@@ -323,6 +532,27 @@ class GeoArticle(Base):
         return f"<GeoArticle id={self.id} keyword_id={self.keyword_id}>"
 
 
+class AccountSelection(Base):
+    """
+    发布账号选择记录
+    每次为文章挑选发布账号都记一笔（含当时所有候选账号的状态），
+    同时也是账号当日用量、冷却、失败率的统计来源
+    """
+    __tablename__ = "account_selections"
+    __table_args__ = TABLE_ARGS
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    platform = Column(String(50), nullable=False, index=True, comment="平台")
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True, index=True, comment="选中的账号ID（无可用账号时为空）")
+    article_id = Column(Integer, nullable=True, index=True, comment="GEO文章ID")
+    reason = Column(String(200), nullable=True, comment="选择理由")
+    candidates = Column(Text, nullable=True, comment="候选账号快照（JSON）")
+    outcome = Column(String(20), default="pending", comment="结果：pending/success/failed/skipped")
+    error = Column(Text, nullable=True, comment="失败原因")
+    created_at = Column(DateTime, default=func.now(), index=True, comment="选择时间")
+    finished_at = Column(DateTime, nullable=True, comment="发布结束时间")
+
+
 # ==================== 知识库相关表 ====================
 
 class KnowledgeCategory(Base):
@@ -454,3 +684,28 @@ class ReferenceArticle(Base):
 
     def __repr__(self):
         return f"<ReferenceArticle {self.title[:30]}... ({self.platform})>"
+
+
+class CrawlWatermark(Base):
+    """
+    采集水位表
+    每个 (平台, 关键词) 一行，记上次采集到哪、新增多少，增量采集时判断翻页什么时候该停
+    """
+    __tablename__ = "crawl_watermarks"
+    __table_args__ = (
+        UniqueConstraint("platform", "keyword", name="uq_crawl_watermarks_platform_keyword"),
+        TABLE_ARGS,
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="主键ID")
+    platform = Column(String(50), nullable=False, comment="平台ID")
+    keyword = Column(String(200), nullable=False, comment="采集关键词")
+    runs = Column(Integer, default=0, comment="累计采集次数")
+    last_run_at = Column(DateTime, nullable=True, comment="上次采集时间")
+    last_new_at = Column(DateTime, nullable=True, comment="上次采到新文章的时间")
+    last_pages = Column(Integer, default=0, comment="上次翻了几页搜索结果")
+    last_new_count = Column(Integer, default=0, comment="上次新文章数")
+    last_skipped_count = Column(Integer, default=0, comment="上次跳过的已采文章数")
+    total_new = Column(Integer, default=0, comment="累计新文章数")
+    high_water_url = Column(String(1000), nullable=True, comment="上次搜索结果里排最前的爆火文章链接")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
@@ -26,16 +26,18 @@ from loguru import logger
 # 导入配置和数据库
 from backend.config import (
     APP_NAME, APP_VERSION, DEBUG, HOST, PORT, RELOAD,
-    CORS_ORIGINS, PLATFORMS
+    CORS_ORIGINS, PLATFORMS, WORKER_MODE
 )
 from backend.database import init_db, get_db, engine, SessionLocal
 from backend.scripts.fix_database import check_and_fix_database
-from backend.api import account, article, publish, keywords, geo, index_check, reports, notifications, scheduler, knowledge, upload, candidate, auth, article_collection
+from backend.api import account, article, publish, keywords, geo, index_check, reports, notifications, scheduler, knowledge, upload, candidate, auth, article_collection, jobs
 
 # 导入服务组件
 from backend.services.websocket_manager import ws_manager
 from backend.services.scheduler_service import get_scheduler_service
 from backend.services.n8n_service import get_n8n_service
+from backend.services.worker_relay import relay_worker_logs
+from backend.services.playwright import timing
 
 
 # ==================== 🌟 日志拦截器 (核心监控功能) ====================
@@ -104,9 +106,14 @@ async def lifespan(app: FastAPI):
     # 4. 启动定时任务引擎
     scheduler_instance = get_scheduler_service()
     scheduler_instance.set_db_factory(SessionLocal)
-    scheduler_instance.start()
-
-    logger.bind(module="调度中心").success("自动化任务引擎已启动")
+    relay_task = None
+    if WORKER_MODE == "external":
+        # 🌟 浏览器任务和定时调度都在 python -m backend.worker 里跑，这里只转发 worker 日志
+        relay_task = asyncio.create_task(relay_worker_logs(ws_manager.broadcast))
+        logger.bind(module="调度中心").success("Worker 模式：任务交给独立 worker 进程执行")
+    else:
+        scheduler_instance.start()
+        logger.bind(module="调度中心").success("自动化任务引擎已启动")
 
     yield
 
@@ -115,9 +122,12 @@ async def lifespan(app: FastAPI):
 
     # 停止定时任务
     scheduler_instance.stop()
+    if relay_task:
+        relay_task.cancel()
 
-    # 关闭 Playwright
+    # 关闭 Playwright，没落库的操作耗时写进去
     await playwright_mgr.stop()
+    timing.recorder.flush()
 
     # 关闭 n8n HTTP 客户端连接
     n8n_service = await get_n8n_service()
@@ -159,6 +169,7 @@ app.include_router(upload.router)  # 加上文件上传路由！
 app.include_router(candidate.router)  # 加上候选人管理路由！
 app.include_router(auth.router)  # 加上授权路由！
 app.include_router(article_collection.router)  # 加上文章收集路由！
+app.include_router(jobs.router)  # 加上任务执行器路由！
 
 
 # ==================== WebSocket 端点 ====================
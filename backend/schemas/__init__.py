@@ -71,6 +71,7 @@ class AccountUpdate(BaseModel):
     account_name: Optional[str] = Field(None, min_length=1, max_length=100)
     status: Optional[int] = Field(None, ge=-1, le=1)
     remark: Optional[str] = None
+    worker_node: Optional[str] = Field(None, max_length=100, description="会话所在的 worker 节点，传空字符串表示不限制")
 
 
 class AccountResponse(AccountBase):
@@ -79,6 +80,7 @@ class AccountResponse(AccountBase):
     username: Optional[str] = None
     status: int
     last_auth_time: Optional[datetime] = None
+    worker_node: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+请求拦截效果基准
+同一个页面分别在拦截开/关两种情况下各打开几次，对比传输字节数和页面可用耗时
+
+用法：
+    python -m backend.scripts.benchmark_resource_blocking
+    python -m backend.scripts.benchmark_resource_blocking --platform zhihu --rounds 5
+    python -m backend.scripts.benchmark_resource_blocking --platform doubao --url https://www.doubao.com
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from loguru import logger
+from playwright.async_api import async_playwright
+
+from backend.config import BROWSER_ARGS
+from backend.services.playwright import browser_mode, resource_blocking, waits
+
+# 各平台默认测哪个页面、页面可用以哪个元素出现为准
+TARGETS: Dict[str, Dict[str, str]] = {
+    "zhihu": {"url": "https://www.zhihu.com/search?type=content&q=GEO", "ready": ".SearchResult-Card, .List-item"},
+    "toutiao": {"url": "https://so.toutiao.com/search?keyword=GEO", "ready": ".result-content, .cs-card"},
+    "doubao": {"url": "https://www.doubao.com", "ready": "textarea, [contenteditable='true']"},
+    "qianwen": {"url": "https://qianwen.com/?source=tongyiqw", "ready": "textarea, [contenteditable='true']"},
+    "deepseek": {"url": "https://chat.deepseek.com", "ready": "textarea, [contenteditable='true']"},
+}
+
+
+async def _measure(browser, platform: str, url: str, ready: Optional[str], blocking: bool) -> Dict[str, float]:
+    """打开一次页面：传输字节数取 CDP 的 encodedDataLength，可用耗时到 ready 元素出现为止"""
+    context = await browser.new_context(viewport={"width": 1280, "height": 800})
+    try:
+        if blocking:
+            await resource_blocking.apply(context, platform, browser_mode.SUBSYSTEM_COLLECT, enabled=True)
+        page = await context.new_page()
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        transferred = {"bytes": 0, "requests": 0}
+
+        def on_finished(event):
+            transferred["bytes"] += event.get("encodedDataLength", 0)
+            transferred["requests"] += 1
+
+        cdp.on("Network.loadingFinished", on_finished)
+
+        start = time.monotonic()
+        await waits.goto(page, url, ready_selector=ready, timeout=60, label=f"{platform}:基准")
+        ready_ms = (time.monotonic() - start) * 1000
+        # 让页面把懒加载的资源也拉一会儿，字节数才有可比性
+        await waits.pause(3, label="基准:收尾")
+        return {"ready_ms": ready_ms, "bytes": transferred["bytes"], "requests": transferred["requests"]}
+    finally:
+        await context.close()
+
+
+def _median(rows: List[Dict[str, float]], key: str) -> float:
+    return statistics.median(r[key] for r in rows) if rows else 0.0
+
+
+async def run_benchmark(platform: str, url: Optional[str], rounds: int):
+    target = TARGETS.get(platform, {})
+    url = url or target.get("url")
+    if not url:
+        logger.error(f"❌ 平台 {platform} 没有默认页面，请用 --url 指定")
+        return
+    if resource_blocking.profile_for(platform) is None:
+        logger.error(f"❌ 平台 {platform} 没有配置 block_profile")
+        return
+
+    results: Dict[bool, List[Dict[str, float]]] = {False: [], True: []}
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        try:
+            for round_index in range(rounds):
+                # 开/关交替跑，网络波动对两边影响差不多
+                for blocking in (False, True):
+                    row = await _measure(browser, platform, url, target.get("ready"), blocking)
+                    results[blocking].append(row)
+                    logger.info(
+                        f"第 {round_index + 1} 轮 拦截{'开' if blocking else '关'}: "
+                        f"{row['bytes'] / 1024:.0f}KB / {row['requests']} 个请求 / 可用 {row['ready_ms']:.0f}ms"
+                    )
+        finally:
+            await browser.close()
+
+    off_bytes, on_bytes = _median(results[False], "bytes"), _median(results[True], "bytes")
+    off_ready, on_ready = _median(results[False], "ready_ms"), _median(results[True], "ready_ms")
+    print(f"\n平台: {platform}  页面: {url}  轮数: {rounds}（取中位数）")
+    print(f"{'':8}{'传输量':>12}{'请求数':>10}{'可用耗时':>12}")
+    print(f"{'拦截关':8}{off_bytes / 1024:>10.0f}KB{_median(results[False], 'requests'):>10.0f}{off_ready:>10.0f}ms")
+    print(f"{'拦截开':8}{on_bytes / 1024:>10.0f}KB{_median(results[True], 'requests'):>10.0f}{on_ready:>10.0f}ms")
+    if off_bytes:
+        print(f"节省流量 {1 - on_bytes / off_bytes:.0%}，可用耗时 {on_ready - off_ready:+.0f}ms")
+    for row in resource_blocking.block_stats.summary():
+        print(f"拦截分布: {row['blocked_by_type']}，放行名单命中 {row['allowed']} 次")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="请求拦截效果基准")
+    parser.add_argument("--platform", default="zhihu", help="平台ID（PLATFORMS / AI_PLATFORMS 里配了 block_profile 的）")
+    parser.add_argument("--url", default=None, help="要测的页面，不填用平台默认页面")
+    parser.add_argument("--rounds", type=int, default=3, help="开/关各跑几轮")
+    args = parser.parse_args(argv)
+    asyncio.run(run_benchmark(args.platform, args.url, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
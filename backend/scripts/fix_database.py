@@ -24,6 +24,16 @@ def check_and_fix_database():
     BASE_DIR = current_file.parent.parent
     db_path = BASE_DIR / "database" / "auto_geo_v3.db"
 
+    # 通过 DATABASE_URL 指定了其他 SQLite 文件时以它为准；非 SQLite 数据库不走这个脚本
+    from sqlalchemy.engine import make_url
+    from backend.config import DATABASE_URL
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != "sqlite":
+        logger.info(f"非 SQLite 数据库，跳过结构修复: {url.get_backend_name()}")
+        return
+    if url.database:
+        db_path = Path(url.database)
+
     logger.info(f"正在检查数据库结构: {db_path}")
 
     if not db_path.exists():
@@ -55,7 +65,10 @@ def check_and_fix_database():
             ("error_msg", "TEXT"),
             ("publish_logs", "TEXT"),
             ("platform_url", "TEXT"),
-            ("index_status", "TEXT DEFAULT 'uncheck'")
+            ("index_status", "TEXT DEFAULT 'uncheck'"),
+            ("next_check_time", "DATETIME"),
+            ("check_count", "INTEGER DEFAULT 0"),
+            ("account_id", "INTEGER")
         ]
 
         for col_name, col_def in columns_to_check:
@@ -72,6 +85,100 @@ def check_and_fix_database():
                 # logger.debug(f"{col_name} 列已存在")
                 pass
 
+        # 收录复查调度按 next_check_time 取到期文章
+        if existing_columns:
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS ix_geo_articles_next_check_time "
+                "ON geo_articles (next_check_time)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS ix_geo_articles_account_id "
+                "ON geo_articles (account_id)"
+            )
+            conn.commit()
+
+        # 检查index_check_records表结构（回答内容迁移到 answer_blobs）
+        cursor.execute("PRAGMA table_info(index_check_records)")
+        record_columns = [col[1] for col in cursor.fetchall()]
+        record_columns_to_check = [
+            ("answer_hash", "VARCHAR(64)", True),
+            ("question_key", "VARCHAR(64)", True),
+            ("cached", "BOOLEAN DEFAULT 0", False),
+            ("sample_id", "INTEGER", True),
+        ]
+
+        for col_name, col_def, indexed in record_columns_to_check:
+            if record_columns and col_name not in record_columns:
+                logger.info(f"添加缺失的列: {col_name}...")
+                try:
+                    cursor.execute(f"ALTER TABLE index_check_records ADD COLUMN {col_name} {col_def}")
+                    if indexed:
+                        cursor.execute(
+                            f"CREATE INDEX IF NOT EXISTS ix_index_check_records_{col_name} "
+                            f"ON index_check_records ({col_name})"
+                        )
+                    conn.commit()
+                    logger.success(f"✓ {col_name} 列添加成功")
+                except Exception as e:
+                    logger.error(f"✗ 添加 {col_name} 列失败: {e}")
+                    conn.rollback()
+
+        # worker 任务队列：多节点租约 / 亲和性字段
+        cursor.execute("PRAGMA table_info(worker_jobs)")
+        job_columns = [col[1] for col in cursor.fetchall()]
+        job_columns_to_check = [
+            ("lease_expires_at", "DATETIME"),
+            ("attempts", "INTEGER DEFAULT 0"),
+            ("affinity", "VARCHAR(100)"),
+            ("headed", "BOOLEAN DEFAULT 0"),
+        ]
+        for col_name, col_def in job_columns_to_check:
+            if job_columns and col_name not in job_columns:
+                logger.info(f"添加缺失的列: {col_name}...")
+                try:
+                    cursor.execute(f"ALTER TABLE worker_jobs ADD COLUMN {col_name} {col_def}")
+                    conn.commit()
+                    logger.success(f"✓ {col_name} 列添加成功")
+                except Exception as e:
+                    logger.error(f"✗ 添加 {col_name} 列失败: {e}")
+                    conn.rollback()
+
+        # 同一去重键只允许一个未结束的任务（老库里已经有重复的话建不上，先记日志）
+        if job_columns:
+            try:
+                cursor.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_worker_jobs_active_dedupe "
+                    "ON worker_jobs (dedupe_key) WHERE status IN ('queued', 'running')"
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"✗ 创建去重唯一索引失败（队列里有重复的未结束任务？）: {e}")
+                conn.rollback()
+
+        # worker 节点：能否运行有头浏览器
+        cursor.execute("PRAGMA table_info(worker_nodes)")
+        node_columns = [col[1] for col in cursor.fetchall()]
+        if node_columns and "headed" not in node_columns:
+            try:
+                cursor.execute("ALTER TABLE worker_nodes ADD COLUMN headed BOOLEAN DEFAULT 0")
+                conn.commit()
+                logger.success("✓ headed 列添加成功")
+            except Exception as e:
+                logger.error(f"✗ 添加 headed 列失败: {e}")
+                conn.rollback()
+
+        # 账号会话所在节点
+        cursor.execute("PRAGMA table_info(accounts)")
+        account_columns = [col[1] for col in cursor.fetchall()]
+        if account_columns and "worker_node" not in account_columns:
+            try:
+                cursor.execute("ALTER TABLE accounts ADD COLUMN worker_node VARCHAR(100)")
+                conn.commit()
+                logger.success("✓ worker_node 列添加成功")
+            except Exception as e:
+                logger.error(f"✗ 添加 worker_node 列失败: {e}")
+                conn.rollback()
+
         logger.success("数据库表结构检查和修复完成")
 
     except Exception as e:
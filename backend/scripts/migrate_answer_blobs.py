@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+回答内容迁移脚本
+把 index_check_records.answer 里的内联回答迁移到 answer_blobs（压缩 + 去重），
+完成后 VACUUM 回收空间，并输出迁移前后的数据库大小报告
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+from sqlalchemy import text
+
+from backend.database import engine, SessionLocal, init_db
+from backend.scripts.fix_database import check_and_fix_database
+from backend.services.answer_store import (
+    migrate_inline_answers, prune_orphan_blobs, get_storage_report
+)
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def migrate(vacuum: bool = True) -> dict:
+    """执行迁移并返回前后对比报告"""
+    init_db()
+    check_and_fix_database()
+
+    db = SessionLocal()
+    try:
+        before = get_storage_report(db)
+        logger.info(f"迁移前数据库占用: {_format_bytes(before['database']['used_bytes'])}")
+
+        stats = migrate_inline_answers(db)
+        orphans = prune_orphan_blobs(db)
+        logger.success(f"✅ 迁移完成: {stats['migrated']} 条回答已转存，清理孤立内容 {orphans} 条")
+    finally:
+        db.close()
+
+    if vacuum:
+        # VACUUM 不能在事务里执行，单独拿连接
+        logger.info("正在 VACUUM 回收空间...")
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            conn.execute(text("VACUUM"))
+
+    db = SessionLocal()
+    try:
+        after = get_storage_report(db)
+    finally:
+        db.close()
+
+    logger.info(f"迁移后数据库占用: {_format_bytes(after['database']['used_bytes'])}")
+    logger.info(
+        f"回答内容: {after['blobs']['count']} 份, "
+        f"原文 {_format_bytes(after['blobs']['raw_bytes'])} -> 压缩后 {_format_bytes(after['blobs']['stored_bytes'])}, "
+        f"去重系数 {after['blobs']['dedup_factor']}"
+    )
+
+    return {"migration": stats, "orphans_pruned": orphans, "before": before, "after": after}
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+
+    report = migrate(vacuum="--no-vacuum" not in sys.argv)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
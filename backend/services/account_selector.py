@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+发布账号轮换
+以前定时发布永远取平台第一个可用账号，所有发布量压在一个号上，很快被平台限流，还只能串行发！
+这里在平台所有健康账号之间分摊：
+1. 过滤：已授权、没超当日配额、不在失败冷却期、距上次发布超过最短间隔
+2. 排序：失败率高的排最后 -> 本节点会话优先 -> 当日用量占比低的优先 -> 最久没用的优先
+3. 批量发布时一个账号按当日剩余配额分一批，在同一个上下文里连发，篇与篇之间按最短间隔等；一个号发不完的交给下一个号
+每次选择都写进 account_selections，既是决策记录，也是下一次选择的统计来源。
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    ACCOUNT_DAILY_PUBLISH_QUOTA,
+    ACCOUNT_DAILY_QUOTA_BY_PLATFORM,
+    ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES,
+    ACCOUNT_FAILURE_COOLDOWN_MINUTES,
+    ACCOUNT_FAILURE_WINDOW_HOURS,
+    ACCOUNT_UNHEALTHY_FAILURE_RATE,
+)
+from backend.database.models import Account, AccountSelection
+
+log = logger.bind(module="账号轮换")
+
+OUTCOME_PENDING = "pending"
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILED = "failed"
+OUTCOME_SKIPPED = "skipped"
+
+# 失败率至少要这么多次样本才参与判断，刚加的号不会因为一次失败就被打入冷宫
+MIN_FAILURE_SAMPLES = 3
+# 连续失败的冷却倍数上限
+MAX_COOLDOWN_MULTIPLIER = 8
+
+
+def daily_quota(platform: str) -> int:
+    return ACCOUNT_DAILY_QUOTA_BY_PLATFORM.get(platform, ACCOUNT_DAILY_PUBLISH_QUOTA)
+
+
+@dataclass
+class AccountState:
+    """某个账号此刻的用量与健康状况"""
+    account: Account
+    quota: int
+    used_today: int = 0
+    last_used: Optional[datetime] = None
+    recent_total: int = 0
+    recent_failed: int = 0
+    consecutive_failures: int = 0
+    last_failure: Optional[datetime] = None
+    local: bool = True
+
+    @property
+    def failure_rate(self) -> float:
+        return self.recent_failed / self.recent_total if self.recent_total else 0.0
+
+    @property
+    def unhealthy(self) -> bool:
+        return self.recent_total >= MIN_FAILURE_SAMPLES and self.failure_rate > ACCOUNT_UNHEALTHY_FAILURE_RATE
+
+    def available_at(self, now: datetime) -> datetime:
+        """最早什么时候能再用（配额用完的到第二天零点）"""
+        times = [now]
+        if self.consecutive_failures and self.last_failure:
+            multiplier = min(2 ** (self.consecutive_failures - 1), MAX_COOLDOWN_MULTIPLIER)
+            times.append(self.last_failure + timedelta(minutes=ACCOUNT_FAILURE_COOLDOWN_MINUTES * multiplier))
+        if self.last_used:
+            times.append(self.last_used + timedelta(minutes=ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES))
+        if self.used_today >= self.quota:
+            times.append(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+        return max(times)
+
+    def blocked_reason(self, now: datetime) -> Optional[str]:
+        if not self.account.storage_state:
+            return "缺少授权数据"
+        if self.used_today >= self.quota:
+            return f"已达当日配额 {self.quota}"
+        if self.available_at(now) > now:
+            return "冷却中" if self.consecutive_failures else "距上次发布间隔过短"
+        return None
+
+    def batch_capacity(self) -> int:
+        """这一轮能交给这个账号连发几篇：按当日剩余配额；篇与篇之间的最短发布间隔由 publish_batch 在上下文里控制"""
+        return max(self.quota - self.used_today, 1)
+
+    def sort_key(self):
+        return (
+            self.unhealthy,
+            not self.local,
+            self.used_today / max(self.quota, 1),
+            self.last_used or datetime.min,
+            self.account.id,
+        )
+
+    def to_dict(self, now: datetime) -> Dict[str, Any]:
+        return {
+            "account_id": self.account.id,
+            "account_name": self.account.account_name,
+            "used_today": self.used_today,
+            "quota": self.quota,
+            "last_used": self.last_used.isoformat() if self.last_used else None,
+            "failure_rate": round(self.failure_rate, 3),
+            "recent_total": self.recent_total,
+            "consecutive_failures": self.consecutive_failures,
+            "unhealthy": self.unhealthy,
+            "local": self.local,
+            "available_at": self.available_at(now).isoformat(),
+            "blocked": self.blocked_reason(now),
+        }
+
+
+class AccountSelector:
+    """发布账号选择器"""
+
+    def __init__(self, db: Session, node: Optional[str] = None):
+        self.db = db
+        if node is None:
+            from backend.services.worker_jobs import current_node_name
+            node = current_node_name()
+        self.node = node
+
+    def account_states(self, platform: str, now: Optional[datetime] = None) -> List[AccountState]:
+        """平台下所有启用账号的状态（统计来自选择记录）"""
+        now = now or datetime.now()
+        accounts = self.db.query(Account).filter(Account.platform == platform, Account.status == 1).all()
+        if not accounts:
+            return []
+
+        quota = daily_quota(platform)
+        states = {
+            a.id: AccountState(account=a, quota=quota, local=a.worker_node in (None, self.node))
+            for a in accounts
+        }
+
+        today = datetime.combine(now.date(), datetime.min.time())
+        window_start = min(today, now - timedelta(hours=ACCOUNT_FAILURE_WINDOW_HOURS))
+        rows = self.db.query(AccountSelection).filter(
+            AccountSelection.account_id.in_(list(states)),
+            AccountSelection.created_at >= window_start,
+            AccountSelection.outcome != OUTCOME_SKIPPED
+        ).order_by(AccountSelection.created_at.desc()).all()
+
+        streak_open = set(states)
+        for row in rows:
+            state = states[row.account_id]
+            if row.created_at >= today:
+                state.used_today += 1
+            # 批量发布时一批记录同时创建、陆续发完，按发完的时间算最近一次使用
+            used_at = row.finished_at or row.created_at
+            state.last_used = max(state.last_used, used_at) if state.last_used else used_at
+            if row.outcome == OUTCOME_PENDING:
+                continue
+            state.recent_total += 1
+            if row.outcome == OUTCOME_FAILED:
+                state.recent_failed += 1
+                state.last_failure = state.last_failure or (row.finished_at or row.created_at)
+                if row.account_id in streak_open:
+                    state.consecutive_failures += 1
+            else:
+                streak_open.discard(row.account_id)
+
+        return list(states.values())
+
+    def select(self, platform: str, article_id: Optional[int] = None) -> Tuple[Optional[Account], AccountSelection]:
+        """
+        选出这次发布用的账号，并写一条选择记录（pending）
+
+        Returns:
+            (账号或 None, 选择记录)；没有可用账号时记录里写明原因和最早可用时间
+        """
+        account, selections = self.select_batch(platform, [article_id])
+        return account, selections[0]
+
+    def select_batch(
+        self,
+        platform: str,
+        article_ids: List[Optional[int]]
+    ) -> Tuple[Optional[Account], List[AccountSelection]]:
+        """
+        为同一个上下文里连续发布的一批文章选一个账号
+
+        选中账号后按 batch_capacity（当日剩余配额）截取前几篇，每篇一条 pending 记录，篇间隔由 publish_batch 控制；
+        剩下的文章由调用方再选下一个账号，刚选中的账号在间隔内不会再被选中。没有可用账号时每篇一条 skipped 记录。
+
+        Returns:
+            (账号或 None, 选择记录列表)；选中时记录数就是这个账号这批要发的篇数
+        """
+        now = datetime.now()
+        states = self.account_states(platform, now)
+        eligible = sorted((s for s in states if s.blocked_reason(now) is None), key=AccountState.sort_key)
+        chosen = eligible[0] if eligible else None
+
+        if chosen:
+            batch_ids = article_ids[:chosen.batch_capacity()]
+            reason = (
+                f"当日 {chosen.used_today}/{chosen.quota}，失败率 {chosen.failure_rate:.0%}，"
+                f"{'本节点' if chosen.local else '其他节点'}会话，可用 {len(eligible)}/{len(states)}"
+            )
+            if len(batch_ids) > 1:
+                reason += f"，本批 {len(batch_ids)} 篇"
+        elif not states:
+            batch_ids = article_ids
+            reason = "平台暂无启用账号"
+        else:
+            batch_ids = article_ids
+            available_at = self.next_available_time(states, now)
+            reason = (
+                f"{len(states)} 个账号均不可用，最早 {available_at:%m-%d %H:%M} 可用"
+                if available_at else f"{len(states)} 个账号均缺少授权数据"
+            )
+
+        candidates = json.dumps([s.to_dict(now) for s in states], ensure_ascii=False)
+        selections = [
+            AccountSelection(
+                platform=platform,
+                account_id=chosen.account.id if chosen else None,
+                article_id=article_id,
+                reason=reason,
+                candidates=candidates,
+                outcome=OUTCOME_PENDING if chosen else OUTCOME_SKIPPED,
+                created_at=now,
+                finished_at=None if chosen else now
+            )
+            for article_id in batch_ids
+        ]
+        self.db.add_all(selections)
+        self.db.commit()
+
+        ids = ", ".join(str(a) for a in batch_ids)
+        if chosen:
+            log.info(f"🎯 [{platform}] 文章 {ids} 选用账号 {chosen.account.account_name}（{reason}）")
+        else:
+            log.warning(f"⏸️ [{platform}] 文章 {ids} 暂无可用账号：{reason}")
+        return (chosen.account if chosen else None), selections
+
+    @staticmethod
+    def next_available_time(states: List[AccountState], now: Optional[datetime] = None) -> Optional[datetime]:
+        """有授权数据的账号里最早恢复可用的时间"""
+        now = now or datetime.now()
+        times = [s.available_at(now) for s in states if s.account.storage_state]
+        return min(times) if times else None
+
+    def record_result(self, selection: AccountSelection, success: bool, error: Optional[str] = None):
+        """发布结束后回写结果，决定账号的失败率和冷却"""
+        selection.outcome = OUTCOME_SUCCESS if success else OUTCOME_FAILED
+        selection.error = None if success else (error or "发布失败")[:1000]
+        selection.finished_at = datetime.now()
+        self.db.commit()
+
+    def report(self, platform: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """各平台账号轮换状态 + 最近的选择记录"""
+        now = datetime.now()
+        query = self.db.query(Account.platform).filter(Account.status == 1)
+        if platform:
+            query = query.filter(Account.platform == platform)
+        platforms = sorted({p for (p,) in query.distinct().all()})
+
+        recent = self.db.query(AccountSelection)
+        if platform:
+            recent = recent.filter(AccountSelection.platform == platform)
+        recent = recent.order_by(AccountSelection.created_at.desc()).limit(limit).all()
+
+        return {
+            "platforms": {
+                p: [s.to_dict(now) for s in sorted(self.account_states(p, now), key=AccountState.sort_key)]
+                for p in platforms
+            },
+            "recent": [
+                {
+                    "id": r.id,
+                    "platform": r.platform,
+                    "account_id": r.account_id,
+                    "article_id": r.article_id,
+                    "reason": r.reason,
+                    "outcome": r.outcome,
+                    "error": r.error,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                    "finished_at": r.finished_at.isoformat() if r.finished_at else None,
+                }
+                for r in recent
+            ],
+        }
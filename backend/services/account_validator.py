@@ -6,13 +6,24 @@
 
 import asyncio
 import re
+import time
 from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
+
+import httpx
 from loguru import logger
 from playwright.async_api import async_playwright, Browser, BrowserContext, TimeoutError as PlaywrightTimeoutError
 
-from backend.config import PLATFORMS, BROWSER_ARGS
+from backend.config import (
+    PLATFORMS,
+    BROWSER_ARGS,
+    ACCOUNT_VALIDATE_CONCURRENCY,
+    ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY,
+    ACCOUNT_PRECHECK_ENABLED,
+    ACCOUNT_PRECHECK_TIMEOUT,
+)
 from backend.services.crypto import decrypt_cookies, decrypt_storage_state
+from backend.services.playwright import dom_probe
 
 
 class AccountValidator:
@@ -21,9 +32,15 @@ class AccountValidator:
     def __init__(self):
         self._browser: Optional[Browser] = None
         self._playwright = None
+        # 并发检测时只启动一个浏览器
+        self._browser_lock = asyncio.Lock()
 
     async def _start_browser(self):
         """启动浏览器实例"""
+        async with self._browser_lock:
+            await self._launch_browser()
+
+    async def _launch_browser(self):
         if self._browser is None:
             self._playwright = await async_playwright().start()
             self._browser = await self._playwright.chromium.launch(
@@ -129,60 +146,22 @@ class AccountValidator:
         返回None表示无法确定，需要其他方法判断
         """
         try:
-            # 平台特定的验证方法
-            if platform == "zhihu":
-                # 知乎：检查是否有页面标题异常或关键元素
-                current_url = page.url
-                if "/signin" in current_url or "/login" in current_url:
-                    return False, f"当前在登录页: {current_url}"
-
-                # 检查登录按钮（如果存在则未登录）
-                login_button = await page.query_selector("button:has-text('登录')")
-                if login_button:
-                    return False, "检测到登录按钮，未登录"
-
-                # 检查是否有用户头像或用户菜单
-                user_avatar = await page.query_selector(".AppHeader-userAvatar")
-                user_menu = await page.query_selector(".AppHeader-profileText")
-                if user_avatar or user_menu:
-                    return True, "检测到用户信息，已登录"
-
-            elif platform == "weixin":
-                # 微信公众号：检查URL和特定元素
-                current_url = page.url
-                if "/login" in current_url:
+            # 平台特定的验证规则在 PLATFORMS 的选择器表里
+            platform_config = PLATFORMS.get(platform, {})
+            current_url = page.url
+            for keyword in platform_config.get("login_url_keywords", []):
+                if keyword in current_url:
                     return False, f"当前在登录页: {current_url}"
 
-                # 检查是否有公众号信息
-                account_name = await page.query_selector(".weui-desktop-account__name")
-                if account_name:
-                    return True, "检测到公众号名称，已登录"
-
-            elif platform == "toutiao":
-                # 头条号：检查用户信息
-                current_url = page.url
-                if "/login" in current_url:
-                    return False, f"当前在登录页: {current_url}"
+            # 登录按钮（如果存在则未登录）
+            login_hit = await dom_probe.probe_first(page, platform_config.get("login_selectors", []), visible=False)
+            if login_hit:
+                return False, f"检测到登录按钮 {login_hit.selector}，未登录"
 
-                user_name = await page.query_selector(".user-name")
-                if user_name:
-                    return True, "检测到用户名，已登录"
-
-            elif platform == "baijiahao":
-                # 百家号：检查作者中心
-                current_url = page.url
-                if "login" in current_url or "passport" in current_url:
-                    return False, f"可能重定向到登录页: {current_url}"
-
-                user_info = await page.query_selector(".user-info-name")
-                if user_info:
-                    return True, "检测到用户信息，已登录"
-
-            elif platform == "sohu":
-                # 搜狐号
-                user_name = await page.query_selector(".user-name")
-                if user_name:
-                    return True, "检测到用户名，已登录"
+            # 用户头像/用户名等登录后才有的元素
+            auth_hit = await dom_probe.probe_first(page, platform_config.get("auth_selectors", []), visible=False)
+            if auth_hit:
+                return True, f"检测到用户信息 {auth_hit.selector}，已登录"
 
             # 检查Cookie数量（至少要有1个）
             cookies = await page.context.cookies()
@@ -209,6 +188,8 @@ class AccountValidator:
             "status_before": account.status,
             "is_valid": False,
             "message": "",
+            "stage": "skipped",
+            "timing": {},
             "check_time": datetime.now().isoformat()
         }
 
@@ -226,6 +207,21 @@ class AccountValidator:
             logger.warning(f"不支持的平台: {account.platform}")
             return result
 
+        # ========== 直连预检：带 Cookie 请求登录态接口，能判定就不开浏览器 ==========
+        session_check = platform_config.get("session_check")
+        if ACCOUNT_PRECHECK_ENABLED and session_check:
+            started = time.perf_counter()
+            decided, reason = await self._precheck_http(account, session_check)
+            result["timing"]["precheck_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if decided is not None:
+                result["stage"] = "precheck"
+                result["is_valid"] = decided
+                result["message"] = f"授权{'有效' if decided else '失效'}: {reason}"
+                logger.info(f"账号 {account.account_name} 直连预检判定: {result['message']}")
+                self._commit_status(account, db_session, 1 if decided else -1)
+                return result
+            logger.debug(f"账号 {account.account_name} 直连预检无法判定（{reason}），改用浏览器检测")
+
         # 优先使用 publish_url，如果没有则使用 home_url
         test_url = platform_config.get("publish_url") or platform_config.get("home_url")
         if not test_url:
@@ -233,6 +229,76 @@ class AccountValidator:
             logger.warning(f"平台 {account.platform} URL未配置")
             return result
 
+        result["stage"] = "browser"
+        started = time.perf_counter()
+        try:
+            await self._check_in_browser(account, db_session, test_url, result)
+        finally:
+            result["timing"]["browser_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _commit_status(self, account: Any, db_session: Any, status: int):
+        account.status = status
+        try:
+            db_session.commit()
+        except Exception as e:
+            logger.error(f"提交数据库变更失败: {e}")
+            db_session.rollback()
+
+    def _load_cookies(self, account: Any) -> List[Dict[str, Any]]:
+        """从账号的 storage_state（没有就用独立 cookies）解出 Cookie 列表"""
+        storage_state = decrypt_storage_state(account.storage_state) if account.storage_state else None
+        if isinstance(storage_state, dict) and storage_state.get("cookies"):
+            return storage_state["cookies"]
+        cookies = decrypt_cookies(account.cookies) if account.cookies else []
+        return cookies if isinstance(cookies, list) else []
+
+    async def _precheck_http(self, account: Any, session_check: Dict[str, Any]) -> Tuple[Optional[bool], str]:
+        """
+        直连预检：带账号 Cookie 请求平台的登录态接口
+        返回: (是否已登录, 原因)，None 表示判定不了，交给浏览器
+        判失效只认 401 和 JSON 里明确的未登录，误判失效会把好账号停掉
+        """
+        jar = httpx.Cookies()
+        for cookie in self._load_cookies(account):
+            if cookie.get("name") and cookie.get("value") is not None:
+                jar.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        if not jar:
+            return None, "没有可用的Cookie"
+
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "zh-CN,zh;q=0.9",
+        }
+        try:
+            async with httpx.AsyncClient(cookies=jar, headers=headers, timeout=ACCOUNT_PRECHECK_TIMEOUT) as client:
+                response = await client.get(session_check["url"])
+        except Exception as e:
+            return None, f"预检请求失败: {e}"
+
+        # 只有 401 和接口明确说未登录才算失效：403 多半是风控/限频/IP 不对，跳转也可能是验证页，都交给浏览器
+        if response.status_code == 401:
+            return False, "登录态接口返回 401"
+        if response.is_redirect:
+            return None, f"登录态接口跳转: {response.headers.get('location', '')}"
+        if response.status_code != 200:
+            return None, f"登录态接口返回 {response.status_code}"
+
+        try:
+            value = response.json()
+        except ValueError:
+            return None, "登录态接口返回的不是JSON"
+        for key in session_check["logged_in_key"].split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if value:
+            return True, "登录态接口返回了用户信息"
+        if session_check.get("missing_is_logged_out"):
+            return False, "登录态接口显示未登录"
+        return None, "登录态接口没有用户信息"
+
+    async def _check_in_browser(self, account: Any, db_session: Any, test_url: str, result: Dict[str, Any]):
+        """浏览器检测：打开发布页，按跳转、标题、页面元素、Cookie 依次判断，结论写进 result"""
         try:
             await self._start_browser()
 
@@ -291,7 +357,7 @@ class AccountValidator:
                     account.status = -1
                     logger.warning(f"账号 {account.account_name} 跳转到登录页: {actual_url}")
                     db_session.commit()
-                    return result
+                    return
 
                 # ========== 验证步骤2：页面标题检测 ==========
                 if self._has_login_keywords_in_title(title):
@@ -300,7 +366,7 @@ class AccountValidator:
                     account.status = -1
                     logger.warning(f"账号 {account.account_name} 页面标题显示需要登录: {title}")
                     db_session.commit()
-                    return result
+                    return
 
                 # ========== 验证步骤3：正面验证 ==========
                 # 检查页面上是否有登录后的元素
@@ -312,7 +378,7 @@ class AccountValidator:
                     account.status = 1
                     logger.success(f"账号 {account.account_name} 正面验证通过: {auth_reason}")
                     db_session.commit()
-                    return result
+                    return
 
                 elif is_authenticated is False:
                     result["is_valid"] = False
@@ -320,7 +386,7 @@ class AccountValidator:
                     account.status = -1
                     logger.warning(f"账号 {account.account_name} 正面验证失败: {auth_reason}")
                     db_session.commit()
-                    return result
+                    return
 
                 # ========== 验证步骤4：Cookie数量检查 ==========
                 cookies = await context.cookies()
@@ -331,7 +397,7 @@ class AccountValidator:
                     account.status = -1
                     logger.warning(f"账号 {account.account_name} 没有Cookie")
                     db_session.commit()
-                    return result
+                    return
 
                 # ========== 默认：授权有效 ==========
                 result["is_valid"] = True
@@ -358,8 +424,6 @@ class AccountValidator:
                 logger.error(f"提交数据库变更失败: {commit_error}")
                 db_session.rollback()  # 新增：提交失败时回滚，避免数据库会话卡死
 
-        return result
-
     async def check_all_accounts(
         self,
         db_session: Any,
@@ -382,43 +446,82 @@ class AccountValidator:
                 "check_time": datetime.now().isoformat()
             }
 
-        logger.info(f"开始批量检测 {total} 个账号的授权状态")
-
-        results = []
-        success_count = 0
-        failed_count = 0
+        return await self.check_accounts(accounts, db_session, progress_callback)
 
-        for index, account in enumerate(accounts, 1):
-            logger.info(f"[{index}/{total}] 检测账号: {account.account_name} ({account.platform})")
-
-            result = await self._check_account_auth(account, db_session)
-            results.append(result)
+    async def check_accounts(
+        self,
+        accounts: List[Any],
+        db_session: Any,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """
+        并发检测一批账号
 
-            if result["is_valid"]:
-                success_count += 1
-            else:
-                failed_count += 1
+        总并发 ACCOUNT_VALIDATE_CONCURRENCY，同一平台最多 ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY 个；
+        每个账号先走直连预检，判定不了才开浏览器。结果按传入顺序返回，汇总里带各阶段耗时。
+        """
+        total = len(accounts)
+        logger.info(f"开始批量检测 {total} 个账号的授权状态（并发 {ACCOUNT_VALIDATE_CONCURRENCY}）")
+
+        started = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        limit = asyncio.Semaphore(ACCOUNT_VALIDATE_CONCURRENCY)
+        platform_limits: Dict[str, asyncio.Semaphore] = {}
+        done = 0
+
+        async def check(index: int, account: Any):
+            nonlocal done
+            platform_limit = platform_limits.setdefault(
+                account.platform, asyncio.Semaphore(ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY)
+            )
+            # 先占平台名额再占总名额，排队等平台的账号不占着总并发
+            async with platform_limit, limit:
+                result = await self._check_account_auth(account, db_session)
+            results[index] = result
+            done += 1
+            logger.info(f"[{done}/{total}] {account.account_name} ({account.platform}): {result['message']}")
 
             # 进度回调兼容同步/异步函数
             if progress_callback:
                 if asyncio.iscoroutinefunction(progress_callback):
-                    await progress_callback(index, total, result)
+                    await progress_callback(done, total, result)
                 else:
-                    progress_callback(index, total, result)
+                    progress_callback(done, total, result)
 
-        await self._stop_browser()
+        try:
+            await asyncio.gather(*(check(i, a) for i, a in enumerate(accounts)))
+        finally:
+            await self._stop_browser()
 
+        success_count = sum(1 for r in results if r["is_valid"])
+        failed_count = total - success_count
         summary = {
             "total": total,
             "success": success_count,
             "failed": failed_count,
             "results": results,
+            "timing": self._stage_timing(results, time.perf_counter() - started),
             "check_time": datetime.now().isoformat()
         }
 
-        logger.info(f"批量检测完成: 总计 {total}, 成功 {success_count}, 失败 {failed_count}")
+        logger.info(f"批量检测完成: 总计 {total}, 成功 {success_count}, 失败 {failed_count}, "
+                    f"预检判定 {summary['timing']['precheck']['decided']}, 浏览器检测 {summary['timing']['browser']['count']}")
         return summary
 
+    def _stage_timing(self, results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+        """各阶段耗时汇总：预检/浏览器各跑了几个、平均和总耗时"""
+        def stage(key: str) -> Dict[str, Any]:
+            values = [r["timing"][key] for r in results if key in r.get("timing", {})]
+            return {
+                "count": len(values),
+                "total_ms": round(sum(values), 1),
+                "avg_ms": round(sum(values) / len(values), 1) if values else 0,
+            }
+
+        timing = {"wall_seconds": round(wall_seconds, 2), "precheck": stage("precheck_ms"), "browser": stage("browser_ms")}
+        timing["precheck"]["decided"] = sum(1 for r in results if r.get("stage") == "precheck")
+        return timing
+
 
 # 全局单例
 account_validator = AccountValidator()
\ No newline at end of file
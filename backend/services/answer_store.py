@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+AI回答内容存储
+按内容哈希寻址 + 压缩保存，同一个回答只存一份！
+检测记录表里只留一个哈希引用，列表/聚合查询就不用再拖着几KB的正文跑了
+"""
+
+import hashlib
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import exists, func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.config import ANSWER_BLOB_PRUNE_GRACE_MINUTES
+from backend.database.models import AnswerBlob, IndexCheckRecord
+
+# zstd 是可选依赖，没装就用 zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 与旧版 answer 字段保持一致的截断长度
+MAX_ANSWER_LENGTH = 5000
+
+DEFAULT_CODEC = "zstd" if zstandard else "zlib"
+
+
+def hash_answer(answer: str) -> str:
+    """计算回答原文的内容哈希"""
+    return hashlib.sha256(answer.encode("utf-8")).hexdigest()
+
+
+def compress_answer(answer: str, codec: str = DEFAULT_CODEC) -> bytes:
+    """压缩回答内容"""
+    raw = answer.encode("utf-8")
+    if codec == "zstd":
+        if not zstandard:
+            raise RuntimeError("未安装 zstandard，无法使用 zstd 压缩")
+        return zstandard.ZstdCompressor(level=9).compress(raw)
+    return zlib.compress(raw, 9)
+
+
+def decompress_answer(codec: str, data: bytes) -> str:
+    """解压回答内容"""
+    if not data:
+        return ""
+    if codec == "zstd":
+        if not zstandard:
+            raise RuntimeError("未安装 zstandard，无法解压 zstd 数据")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = zlib.decompress(data)
+    return raw.decode("utf-8")
+
+
+def put_answer(db: Session, answer: Optional[str]) -> Optional[str]:
+    """
+    保存回答内容，返回内容哈希
+
+    相同内容只会写入一次；空回答返回 None。
+    注意：这里只 flush 不 commit，由调用方和检测记录一起提交！
+    """
+    if not answer or not answer.strip():
+        return None
+
+    answer = answer[:MAX_ANSWER_LENGTH]
+    content_hash = hash_answer(answer)
+
+    now = datetime.now()
+    blob = db.get(AnswerBlob, content_hash)
+    if blob is not None:
+        # 复用的旧内容可能正好是孤立的，刷新时间让它重新进宽限期，免得记录提交前被定时清理删掉
+        if blob.created_at is None or blob.created_at < now - timedelta(minutes=ANSWER_BLOB_PRUNE_GRACE_MINUTES):
+            blob.created_at = now
+        return content_hash
+
+    data = compress_answer(answer)
+    values = dict(
+        content_hash=content_hash,
+        codec=DEFAULT_CODEC,
+        data=data,
+        raw_size=len(answer.encode("utf-8")),
+        stored_size=len(data),
+        # 和清理时的宽限期用同一个时钟（数据库的 now() 在 SQLite 上是 UTC）
+        created_at=now
+    )
+    # 两个检测同时拿到相同回答时，db.get 都查不到，后插入的会撞主键；
+    # 内容按哈希寻址，撞了说明已经有人存过，直接忽略。语句立即执行，同一批次里再遇到时 db.get 就能查到
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        db.execute(dialect_insert(AnswerBlob).values(**values).on_conflict_do_nothing(
+            index_elements=[AnswerBlob.content_hash]
+        ))
+    else:
+        try:
+            with db.begin_nested():
+                db.execute(insert(AnswerBlob).values(**values))
+        except IntegrityError:
+            pass
+    return content_hash
+
+
+def get_answers(db: Session, hashes: Iterable[str]) -> Dict[str, str]:
+    """批量读取回答内容：{hash: text}"""
+    hashes = {h for h in hashes if h}
+    if not hashes:
+        return {}
+    blobs = db.query(AnswerBlob).filter(AnswerBlob.content_hash.in_(hashes)).all()
+    return {b.content_hash: decompress_answer(b.codec, b.data) for b in blobs}
+
+
+def migrate_inline_answers(db: Session, batch_size: int = 500) -> Dict[str, int]:
+    """
+    把旧版内联在 index_check_records.answer 里的回答迁移到 answer_blobs
+
+    按批次处理，每批提交一次，中途中断可以重复执行。
+    """
+    migrated = 0
+    emptied = 0
+
+    while True:
+        rows = db.query(IndexCheckRecord).filter(
+            IndexCheckRecord.legacy_answer.isnot(None),
+            IndexCheckRecord.answer_hash.is_(None)
+        ).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        for record in rows:
+            content_hash = put_answer(db, record.legacy_answer)
+            if content_hash:
+                record.answer_hash = content_hash
+                migrated += 1
+            else:
+                emptied += 1
+            record.legacy_answer = None
+
+        db.commit()
+        logger.info(f"回答内容迁移中: 已迁移 {migrated} 条")
+
+    return {"migrated": migrated, "emptied": emptied}
+
+
+def prune_orphan_blobs(db: Session, grace_minutes: int = ANSWER_BLOB_PRUNE_GRACE_MINUTES) -> int:
+    """
+    删除已经没有检测记录引用的回答内容（定时维护任务调用，不在删除检测记录时同步清）
+
+    只删创建超过宽限期的：并发检测刚 put_answer 去重、检测记录还没提交时，内容看起来也是孤立的。
+    引用判断用 NOT EXISTS 放在同一条 DELETE 里，不先查一遍再删。
+    """
+    cutoff = datetime.now() - timedelta(minutes=grace_minutes)
+    count = db.query(AnswerBlob).filter(
+        AnswerBlob.created_at < cutoff,
+        ~exists().where(IndexCheckRecord.answer_hash == AnswerBlob.content_hash)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+
+def get_storage_report(db: Session) -> Dict[str, Any]:
+    """
+    回答存储报告：数据库大小、去重率、压缩率
+    """
+    record_total = db.query(func.count(IndexCheckRecord.id)).scalar() or 0
+    referenced = db.query(func.count(IndexCheckRecord.id)).filter(
+        IndexCheckRecord.answer_hash.isnot(None)
+    ).scalar() or 0
+    inline = db.query(func.count(IndexCheckRecord.id)).filter(
+        IndexCheckRecord.legacy_answer.isnot(None)
+    ).scalar() or 0
+
+    blob_count, raw_bytes, stored_bytes = db.query(
+        func.count(AnswerBlob.content_hash),
+        func.coalesce(func.sum(AnswerBlob.raw_size), 0),
+        func.coalesce(func.sum(AnswerBlob.stored_size), 0)
+    ).one()
+
+    return {
+        "records": {
+            "total": record_total,
+            "with_blob": referenced,
+            "inline_legacy": inline,
+        },
+        "blobs": {
+            "count": blob_count,
+            "raw_bytes": int(raw_bytes),
+            "stored_bytes": int(stored_bytes),
+            "compression_ratio": round(stored_bytes / raw_bytes, 4) if raw_bytes else 0,
+            # 每个 blob 平均被多少条记录引用
+            "dedup_factor": round(referenced / blob_count, 2) if blob_count else 0,
+        },
+        "database": _database_usage(db),
+    }
+
+
+def _database_usage(db: Session) -> Dict[str, Any]:
+    """
+    数据库占用：路径从当前连接的引擎 URL 取（DATABASE_URL 可以改，不能写死文件名）
+    只有 SQLite 有页数和本地文件可看，其他数据库只报后端类型
+    """
+    url = db.get_bind().url
+    if url.get_backend_name() != "sqlite":
+        return {"backend": url.get_backend_name()}
+
+    # SQLite 实际占用 = 页数 * 页大小（WAL 文件单独统计）
+    page_count = db.execute(text("PRAGMA page_count")).scalar() or 0
+    page_size = db.execute(text("PRAGMA page_size")).scalar() or 0
+    freelist = db.execute(text("PRAGMA freelist_count")).scalar() or 0
+
+    # 内存库（":memory:" 或空路径）没有文件
+    path = url.database if url.database and url.database != ":memory:" else None
+
+    def file_size(file_path: Optional[str]) -> int:
+        return os.path.getsize(file_path) if file_path and os.path.exists(file_path) else 0
+
+    return {
+        "backend": "sqlite",
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_pages": freelist,
+        "used_bytes": (page_count - freelist) * page_size,
+        "file_bytes": file_size(path),
+        "wal_bytes": file_size(f"{path}-wal" if path else None),
+    }
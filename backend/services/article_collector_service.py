@@ -7,16 +7,17 @@
 import asyncio
 import re
 import random
-import os
 import json
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Awaitable, Callable
 from dataclasses import asdict
 from loguru import logger
 from sqlalchemy.orm import Session
 from playwright.async_api import Page, BrowserContext
 
 from backend.services.playwright_mgr import playwright_mgr
+from backend.services.playwright import browser_mode, resource_blocking, timing
+from backend.services.playwright.browser_mode import HeadedRequired
 from backend.services.playwright.collectors import (
     get_collector,
     list_collectors,
@@ -24,14 +25,36 @@ from backend.services.playwright.collectors import (
     CollectedArticle,
 )
 from backend.services.ragflow_client import get_ragflow_client
+from backend.services import crawl_frontier
+from backend.services.session_manager import secure_session_manager
 from backend.config import (
     PLATFORMS,
     RAGFLOW_DATASET_ID,
     RAGFLOW_DATASET_NAME,
     RAGFLOW_DUPLICATE_THRESHOLD,
+    FRONTIER_ENABLED,
+    CAMPAIGN_CONTEXTS_PER_PLATFORM,
 )
 
 
+async def _run_all(aws) -> None:
+    """
+    并发跑完一组协程；任何一个抛异常就取消其余的、等它们真正退出后再把异常抛出去
+    （asyncio.gather 不会取消兄弟任务，异常往上抛时它们还在后台跑）
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        pending = [t for t in tasks if not t.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
 class ArticleCollectorService:
     """
     爆火文章收集服务
@@ -417,12 +440,24 @@ class ArticleCollectorService:
             "error_msg": None
         }
 
+        # 边采边存：各平台每提取完一篇就进队列，一个消费者按顺序入库（数据库会话不能并发用）
+        save_queue: asyncio.Queue = asyncio.Queue()
+        saver = None
+        on_article = None
+        if save_to_db and self.db:
+            saver = asyncio.create_task(self._save_stream(save_queue))
+
+            async def on_article(article: Dict[str, Any]):
+                article["content"] = self._clean_html(article.get("content", ""))
+                await save_queue.put((article, keyword))
+
         try:
             # 启动 Playwright
             await playwright_mgr.start()
 
             # 并行收集各平台
             tasks = []
+            task_platforms = []
             for platform in platforms:
                 collector = get_collector(platform)
                 if collector:
@@ -430,18 +465,18 @@ class ArticleCollectorService:
                     collector.min_likes = min_likes
                     collector.min_reads = min_reads
                     tasks.append(self._collect_from_platform(
-                        collector, keyword, max_articles_per_platform
+                        collector, keyword, max_articles_per_platform, on_article=on_article
                     ))
+                    task_platforms.append(platform)
                 else:
                     logger.warning(f"平台收集器不存在: {platform}")
                     results["results"][platform] = []
 
             # 等待所有任务完成
-            all_articles = []
             if tasks:
                 platform_results = await asyncio.gather(*tasks, return_exceptions=True)
 
-                for platform, result in zip(platforms, platform_results):
+                for platform, result in zip(task_platforms, platform_results):
                     if isinstance(result, Exception):
                         logger.error(f"[{platform}] 收集异常: {result}")
                         results["results"][platform] = []
@@ -451,24 +486,191 @@ class ArticleCollectorService:
                             article["content"] = self._clean_html(article.get("content", ""))
                         results["results"][platform] = result
                         results["total_count"] += len(result)
-                        all_articles.extend(result)
 
             logger.info(f"收集完成: 共 {results['total_count']} 篇爆火文章")
 
-            # 保存到数据库
-            if save_to_db and self.db and all_articles:
-                save_results = await self._save_to_database(all_articles, keyword)
+        except Exception as e:
+            logger.error(f"收集爆火文章失败: {e}")
+            results["success"] = False
+            results["error_msg"] = str(e)
+
+        finally:
+            # 等队列里剩下的存完
+            if saver:
+                await save_queue.put(None)
+                save_results = await saver
                 results["save_results"] = save_results
                 results["saved_count"] = sum(1 for r in save_results if r.get("saved"))
                 results["ragflow_synced_count"] = sum(
                     1 for r in save_results if r.get("ragflow_synced")
                 )
 
+        return results
+
+    async def _save_stream(self, queue: asyncio.Queue) -> List[Dict[str, Any]]:
+        """入库消费者：收到一篇 (文章, 关键词) 存一篇，收到 None 结束"""
+        save_results = []
+        while True:
+            item = await queue.get()
+            if item is None:
+                return save_results
+            article, keyword = item
+            save_results.extend(await self._save_to_database([article], keyword))
+
+    async def collect_campaign(
+        self,
+        keywords: List[str],
+        platforms: List[str],
+        min_likes: int = 100,
+        min_reads: int = 1000,
+        max_articles_per_keyword: int = 10,
+        save_to_db: bool = True,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        多关键词采集活动
+
+        每个平台开固定几个浏览器上下文（CAMPAIGN_CONTEXTS_PER_PLATFORM）一直用到活动结束，
+        (平台, 关键词) 组合排队轮流跑；同一篇文章被多个关键词搜到只提取一次。
+
+        Args:
+            keywords: 关键词列表
+            platforms: 目标平台列表
+            min_likes: 最低点赞数阈值
+            min_reads: 最低阅读量阈值
+            max_articles_per_keyword: 每个 (平台, 关键词) 最多收集文章数
+            save_to_db: 是否保存到数据库
+            progress_callback: 进度回调 (已完成组合数, 总组合数, 描述)
+
+        Returns:
+            活动结果：总数、入库数、跨关键词去重数、按关键词/平台的篇数、失败的组合
+        """
+        await self._ensure_initialized()
+
+        keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+        collectors = {}
+        for platform in platforms:
+            collector = get_collector(platform)
+            if collector:
+                collector.min_likes = min_likes
+                collector.min_reads = min_reads
+                collectors[platform] = collector
+            else:
+                logger.warning(f"平台收集器不存在: {platform}")
+
+        results = {
+            "success": True,
+            "keywords": keywords,
+            "platforms": list(collectors),
+            "total_pairs": len(keywords) * len(collectors),
+            "done_pairs": 0,
+            "total_count": 0,
+            "saved_count": 0,
+            "ragflow_synced_count": 0,
+            "duplicate_skipped": 0,
+            "by_keyword": {kw: {} for kw in keywords},
+            "failed_pairs": [],
+            "error_msg": None
+        }
+        shared = crawl_frontier.SharedSeen()
+        logger.info(f"🚀 采集活动开始: {len(keywords)} 个关键词 × {len(collectors)} 个平台")
+
+        def report():
+            results["duplicate_skipped"] = shared.skipped
+            if progress_callback:
+                progress_callback(
+                    results["done_pairs"], results["total_pairs"],
+                    f"已完成 {results['done_pairs']}/{results['total_pairs']} 组，"
+                    f"采到 {results['total_count']} 篇，跨关键词去重 {shared.skipped} 篇"
+                )
+
+        # 边采边存，和单关键词采集一样一个消费者按顺序入库
+        save_queue: asyncio.Queue = asyncio.Queue()
+        saver = asyncio.create_task(self._save_stream(save_queue)) if save_to_db and self.db else None
+
+        def sink_for(keyword: str):
+            if not saver:
+                return None
+
+            async def on_article(article: Dict[str, Any]):
+                article["content"] = self._clean_html(article.get("content", ""))
+                await save_queue.put((article, keyword))
+            return on_article
+
+        async def run_platform(platform: str, collector):
+            pending: asyncio.Queue = asyncio.Queue()
+            for kw in keywords:
+                pending.put_nowait(kw)
+
+            finished = set()
+
+            async def lane(context: BrowserContext):
+                while not pending.empty():
+                    kw = pending.get_nowait()
+                    try:
+                        articles = await self._collect_from_platform(
+                            collector, kw, max_articles_per_keyword,
+                            on_article=sink_for(kw), context=context, shared=shared, raise_errors=True
+                        )
+                    except HeadedRequired:
+                        raise
+                    except Exception as e:
+                        results["failed_pairs"].append({"platform": platform, "keyword": kw, "error": str(e)})
+                    else:
+                        results["by_keyword"][kw][platform] = len(articles)
+                        results["total_count"] += len(articles)
+                    finished.add(kw)
+                    results["done_pairs"] += 1
+                    report()
+
+            contexts = []
+            try:
+                for _ in range(max(1, min(CAMPAIGN_CONTEXTS_PER_PLATFORM, len(keywords)))):
+                    contexts.append(await self._open_platform_context(collector))
+                await _run_all(lane(c) for c in contexts)
+                await self._save_login_state(contexts[0], platform)
+            except HeadedRequired:
+                raise
+            except Exception as e:
+                logger.error(f"[{collector.name}] 采集活动中断: {e}")
+                # 这个平台没跑完的组合记为失败
+                for kw in keywords:
+                    if kw not in finished:
+                        results["failed_pairs"].append({"platform": platform, "keyword": kw, "error": str(e)})
+                        results["done_pairs"] += 1
+                report()
+            finally:
+                for context in contexts:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+
+        try:
+            await playwright_mgr.start()
+            report()
+            # 一个平台要转有头时先停掉其他平台，都退出了再收尾存库，有头重跑不会和还在跑的无头任务重叠
+            await _run_all(run_platform(p, c) for p, c in collectors.items())
+            logger.info(f"✅ 采集活动完成: 共 {results['total_count']} 篇，跨关键词去重 {shared.skipped} 篇")
+
+        except HeadedRequired:
+            raise
         except Exception as e:
-            logger.error(f"收集爆火文章失败: {e}")
+            logger.error(f"采集活动失败: {e}")
             results["success"] = False
             results["error_msg"] = str(e)
 
+        finally:
+            # 等队列里剩下的存完
+            if saver:
+                await save_queue.put(None)
+                save_results = await saver
+                results["saved_count"] = sum(1 for r in save_results if r.get("saved"))
+                results["ragflow_synced_count"] = sum(
+                    1 for r in save_results if r.get("ragflow_synced")
+                )
+            results["duplicate_skipped"] = shared.skipped
+
         return results
 
     async def _random_sleep(self, min_seconds: float = 2.0, max_seconds: float = 5.0):
@@ -523,7 +725,7 @@ class ArticleCollectorService:
                     needs_login = True
                     break
             
-            if needs_login:
+            if needs_login and browser_mode.request_headed(browser_mode.SUBSYSTEM_COLLECT, "登录弹窗/验证码"):
                 logger.warning("\n" + "!"*50)
                 logger.warning("检测到登录弹窗或验证码！")
                 logger.warning("请在 45 秒内手动完成登录/验证操作...")
@@ -534,14 +736,57 @@ class ArticleCollectorService:
                 
                 logger.info("手动操作时间结束，继续执行...")
                 
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"登录检测异常: {e}")
 
+    async def _open_platform_context(self, collector) -> BrowserContext:
+        """给一个平台开浏览器上下文：加载登录状态、请求拦截、隐藏 webdriver"""
+        # 准备上下文配置
+        context_options = {
+            "viewport": {"width": 1280, "height": 720},
+            # 设置真实的 User-Agent
+            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+            "device_scale_factor": 1,
+        }
+
+        # 加载这个平台保存的登录状态（每个平台一份，并发采集互不覆盖）
+        storage_state = await secure_session_manager.load_collector_session(collector.platform_id)
+        if storage_state:
+            context_options["storage_state"] = storage_state
+            logger.info(f"[{collector.name}] 已加载本地登录状态")
+
+        # 创建浏览器上下文（默认无头，碰到登录弹窗/验证码转有头重跑）
+        browser = await playwright_mgr.get_browser(browser_mode.SUBSYSTEM_COLLECT)
+        context = await browser.new_context(**context_options)
+        # 只读文字：图片、字体、统计脚本不下载
+        await resource_blocking.apply(context, collector.platform_id, browser_mode.SUBSYSTEM_COLLECT)
+
+        # 防止 WebDriver 检测
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+        """)
+        return context
+
+    async def _save_login_state(self, context: BrowserContext, platform: str):
+        """采集成功后保存这个平台的登录状态（采集过程中可能人工登录过）"""
+        try:
+            await secure_session_manager.save_collector_session(platform, await context.storage_state())
+        except Exception as e:
+            logger.warning(f"保存登录状态失败: {e}")
+
     async def _collect_from_platform(
         self,
         collector,
         keyword: str,
-        max_articles: int
+        max_articles: int,
+        on_article: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+        context: Optional[BrowserContext] = None,
+        shared: Optional[crawl_frontier.SharedSeen] = None,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         从单个平台收集文章
@@ -550,96 +795,70 @@ class ArticleCollectorService:
             collector: 平台收集器
             keyword: 搜索关键词
             max_articles: 最大文章数
+            on_article: 每提取完一篇回调一次（只回调前 max_articles 篇），用来边采边存
+            context: 复用的浏览器上下文（采集活动里一个平台一直用同一个），不传就临时开一个用完关掉
+            shared: 采集活动内跨关键词共用的已处理链接，别的关键词采过的不再提取
+            raise_errors: 失败时往上抛而不是返回空列表（采集活动要把失败的组合记下来）
 
         Returns:
             文章列表
         """
-        try:
-            # 准备上下文配置
-            context_options = {
-                "viewport": {"width": 1280, "height": 720},
-                # 设置真实的 User-Agent
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                "device_scale_factor": 1,
-            }
-            
-            # 尝试加载保存的登录状态
-            state_path = "auth/state.json"
-            if os.path.exists(state_path):
-                try:
-                    context_options["storage_state"] = state_path
-                    logger.info("已加载本地登录状态")
-                except Exception as e:
-                    logger.warning(f"加载登录状态失败: {e}")
-
-            # 创建浏览器上下文
-            context = await playwright_mgr._browser.new_context(**context_options)
-
-            # 防止 WebDriver 检测
-            await context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """)
+        streamed = 0
 
+        async def stream(article):
+            nonlocal streamed
+            if on_article and streamed < max_articles:
+                streamed += 1
+                await on_article(asdict(article))
+
+        owns_context = context is None
+        try:
+            if owns_context:
+                context = await self._open_platform_context(collector)
             page = await context.new_page()
 
             try:
-                # 随机延迟启动
-                await self._random_sleep(1, 2)
-                
-                # 收集文章
-                # 这里的 collector.collect 需要传入 page，我们在调用前先做一些预处理
-                
-                # 监听请求拦截（可选，这里先不做）
-                
+                if owns_context:
+                    # 随机延迟启动
+                    await self._random_sleep(1, 2)
+
+                # 增量采集：采过的文章提取前就跳过，翻到全是旧文章的页就停
+                frontier = None
+                frontier_db = self.db if FRONTIER_ENABLED else None
+                if frontier_db or shared is not None:
+                    frontier = crawl_frontier.start_run(frontier_db, collector.platform_id, keyword, shared=shared)
+
                 # 执行收集
-                articles = await collector.collect(page, keyword)
+                async with timing.operation(collector.platform_id, timing.OP_COLLECT):
+                    articles = await collector.collect(
+                        timing.instrument(page), keyword, on_article=stream, frontier=frontier
+                    )
+                # 收集器内部会吞异常，转有头的请求在这里接着往上抛，不把半截结果当成采集结果
+                browser_mode.raise_if_escalated()
 
-                # 在收集过程中（或者收集器内部）应该调用 _handle_login_popup 和 _human_scroll
-                # 但由于 collector.collect 是封装好的，我们可能需要修改 collector 的实现
-                # 或者在这里假设 collector 内部会使用 page 进行操作
-                
-                # 如果 collector.collect 只是简单的搜索和提取，我们可以在这里增强
-                # 但通常 collector.collect 包含了 goto -> search -> extract 的全过程
-                # 所以最好是把这些 helper 方法注入给 collector 或者在 collector 内部使用
-                
-                # 由于我们不能修改 collector 的接口（保持兼容性），
-                # 我们可以在 collector 内部实现中加入这些逻辑，或者在这里通过 page 的事件来处理
-                
-                # 这里的增强逻辑其实依赖于 collector 的具体实现。
-                # 如果 collector 只是用 page，我们可以 hook page 的 goto ? 不太行。
-                
-                # 实际上，用户要求的 "在点击、搜索和页面滚动之间" 加入延迟，
-                # 这通常需要在 collector 的具体实现代码里加。
-                # 但用户只让我修改 ArticleCollectorService 和 Test。
-                # 也许用户的意思是让我在这里 wrap 一下 page 对象？或者只是提供这些 helper 供 collector 使用？
-                # 既然我是 owner agent，我可以修改 collector 的代码吗？
-                # 用户说 "帮我完善 backend/services/article_collector_service.py"
-                
-                # 不过，我们可以先在这里保存状态，因为登录可能发生在 collect 过程中
-                
                 # 限制数量
                 articles = articles[:max_articles]
-                
-                # 成功后保存登录状态（如果有变化）
-                try:
-                    if not os.path.exists("auth"):
-                        os.makedirs("auth")
-                    await context.storage_state(path=state_path)
-                    logger.info("已保存最新的登录状态")
-                except Exception as e:
-                    logger.warning(f"保存登录状态失败: {e}")
+                if frontier:
+                    frontier.finish(len(articles))
+
+                # 成功后保存登录状态（复用的上下文由采集活动结束时统一保存）
+                if owns_context:
+                    await self._save_login_state(context, collector.platform_id)
 
                 # 转换为字典
                 return [asdict(article) for article in articles]
 
             finally:
                 await page.close()
-                await context.close()
+                if owns_context:
+                    await context.close()
 
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"[{collector.name}] 收集失败: {e}")
+            if raise_errors:
+                raise
             return []
 
     async def collect_single_platform(
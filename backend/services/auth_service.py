@@ -15,6 +15,7 @@ from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 
 from backend.config import AI_PLATFORMS, BROWSER_TYPE, BROWSER_ARGS
 from backend.services.session_manager import secure_session_manager
+from backend.services.playwright import browser_mode, dom_probe
 
 
 class AuthService:
@@ -312,18 +313,8 @@ class AuthService:
                         "[class*='phone']"
                     ]
                     
-                    has_login_elements = False
-                    try:
-                        for selector in login_indicators:
-                            try:
-                                elements = await page.query_selector_all(selector)
-                                if elements:
-                                    has_login_elements = True
-                                    break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        logger.error(f"检查登录元素失败: {e}")
+                    # 只看在不在 DOM 里，一次往返查完
+                    has_login_elements = await dom_probe.probe_any(page, login_indicators, visible=False)
                     
                     # 检查是否有错误信息
                     error_indicators = [
@@ -334,18 +325,7 @@ class AuthService:
                         "[class*='alert']"
                     ]
                     
-                    has_error = False
-                    try:
-                        for selector in error_indicators:
-                            try:
-                                elements = await page.query_selector_all(selector)
-                                if elements:
-                                    has_error = True
-                                    break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        logger.error(f"检查错误信息失败: {e}")
+                    has_error = await dom_probe.probe_any(page, error_indicators, visible=False)
                     
                     # 针对豆包平台的特殊处理
                     login_successful = False
@@ -632,7 +612,7 @@ class AuthService:
             logger.info("启动Chromium浏览器...")
             try:
                 browser = await playwright.chromium.launch(
-                    headless=False,
+                    headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_AUTH),  # 要扫码，默认有头
                     args=[
                         *BROWSER_ARGS
                     ],
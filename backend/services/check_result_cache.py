@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测结果缓存
+同一行业的不同关键词/项目经常问到一样的问题，TTL 内直接复用上一次的回答，
+只在本地重新跑关键词和公司名匹配，省掉一整轮浏览器提问！
+"""
+
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.config import INDEX_CHECK_CACHE_TTL
+from backend.database.models import IndexCheckRecord
+
+# 归一化时去掉的标点（问句末尾的问号、句号等不影响回答）
+_PUNCT_RE = re.compile(r"[\s\?？!！。，,、.;；:：\"'“”‘’()（）【】\[\]]+")
+
+
+def beijing_now() -> datetime:
+    """当前北京时间（无时区信息，与检测记录的 check_time 保持一致）"""
+    return (datetime.now(timezone.utc) + timedelta(hours=8)).replace(tzinfo=None)
+
+
+def normalize_question(question: str) -> str:
+    """问题归一化：全角转半角、小写、去掉空白和标点"""
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return _PUNCT_RE.sub("", text)
+
+
+def question_key(question: str) -> str:
+    """归一化问题的哈希，作为缓存键存到检测记录上"""
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+class CheckResultCache:
+    """
+    检测结果缓存
+
+    直接用 index_check_records 做存储：按 (platform, question_key) 查 TTL 内最近一次
+    真实检测（cached=False 且有回答）的记录，跨关键词、跨项目、跨进程都能命中。
+    """
+
+    def __init__(self, db: Session, ttl_seconds: int = INDEX_CHECK_CACHE_TTL):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def lookup(self, platform: str, question: str) -> Optional[IndexCheckRecord]:
+        """查找可复用的检测记录，未命中返回 None"""
+        if not self.enabled:
+            return None
+
+        since = beijing_now() - timedelta(seconds=self.ttl_seconds)
+        record = self.db.query(IndexCheckRecord).filter(
+            IndexCheckRecord.platform == platform,
+            IndexCheckRecord.question_key == question_key(question),
+            IndexCheckRecord.cached.isnot(True),
+            IndexCheckRecord.answer_hash.isnot(None),
+            IndexCheckRecord.check_time >= since
+        ).order_by(IndexCheckRecord.check_time.desc()).first()
+
+        if record:
+            self.hits += 1
+            logger.debug(f"检测结果缓存命中: 平台={platform}, 问题={question[:30]}...")
+        else:
+            self.misses += 1
+        return record
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+增量采集边界（crawl frontier）
+以前每次采集都从头来：采过的文章照样打开、提取正文，到 _save_to_database 才发现 URL 已存在，白干一场！
+
+用法：
+    run = crawl_frontier.start_run(db, "zhihu", "GEO")
+    fresh = run.fresh(urls)                  # 提取正文前过滤掉采过的
+    if run.page_done(urls, fresh):           # 一页处理完，后面都是采过的就别翻了
+        break
+    run.finish(new_count)                    # 写 (平台, 关键词) 水位
+
+采过没采过以 reference_articles.url 唯一索引为准，进程内的布隆过滤器挡掉绝大多数查询：
+布隆说没见过就一定没采过；说见过的再用索引批量确认一次，误判不会漏采。
+布隆按 reference_articles.id 增量同步，每次只补上次以后新入库的行，重复采集的开销跟着新文章走，不跟着总量走。
+"""
+
+import hashlib
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from backend.config import FRONTIER_STALE_PAGES, FRONTIER_BLOOM_CAPACITY, FRONTIER_BLOOM_ERROR_RATE
+from backend.database.models import CrawlWatermark, ReferenceArticle
+
+log = logger.bind(module="增量采集")
+
+
+class BloomFilter:
+    """定长布隆过滤器（双哈希派生 k 个位置）"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenUrls:
+    """进程内的已采集链接集合：布隆过滤器 + 按主键增量同步 reference_articles"""
+
+    def __init__(self, capacity: int = FRONTIER_BLOOM_CAPACITY, error_rate: float = FRONTIER_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        self.synced_id = 0
+        self.synced_url: Optional[str] = None
+
+    def sync(self, db: Session) -> int:
+        """把上次同步以后新入库的链接补进布隆，返回补了多少条"""
+        with self._lock:
+            # SQLite 删掉末尾的行后主键会被复用，上次同步到的那行变了就整个重建
+            if self.synced_id:
+                anchor = db.query(ReferenceArticle.url).filter(ReferenceArticle.id == self.synced_id).scalar()
+                if anchor != self.synced_url:
+                    self._reset()
+            rows = db.query(ReferenceArticle.id, ReferenceArticle.url).filter(
+                ReferenceArticle.id > self.synced_id
+            ).order_by(ReferenceArticle.id).all()
+            for row_id, url in rows:
+                self.bloom.add(url)
+                self.synced_id, self.synced_url = row_id, url
+            return len(rows)
+
+    def split(self, db: Session, urls: List[str]) -> Tuple[List[str], Set[str]]:
+        """
+        Returns:
+            (没采过的链接（保持原顺序）, 采过的链接)
+        """
+        maybe = [u for u in urls if u in self.bloom]
+        seen: Set[str] = set()
+        if maybe:
+            seen = {url for (url,) in db.query(ReferenceArticle.url).filter(ReferenceArticle.url.in_(maybe)).all()}
+        return [u for u in urls if u not in seen], seen
+
+
+seen_urls = SeenUrls()
+
+
+class SharedSeen:
+    """一次采集活动里各关键词共用的已处理链接（跨关键词去重，不落库）"""
+
+    def __init__(self):
+        self.urls: Set[str] = set()
+        self.skipped = 0
+
+    def take(self, urls: List[str]) -> List[str]:
+        """返回别的关键词还没处理过的链接，并记为已处理"""
+        new = [u for u in urls if u not in self.urls]
+        self.skipped += len(urls) - len(new)
+        self.urls.update(new)
+        return new
+
+
+class FrontierRun:
+    """一次 (平台, 关键词) 采集的边界：过滤采过的链接、判断翻页何时停、结束时写水位"""
+
+    def __init__(self, db: Optional[Session], platform: str, keyword: str,
+                 watermark: Optional[CrawlWatermark], stale_pages: int = FRONTIER_STALE_PAGES,
+                 shared: Optional[SharedSeen] = None):
+        self.db = db
+        self.shared = shared
+        self.platform = platform
+        self.keyword = keyword
+        self.stale_pages = stale_pages
+        # 采过一次之后才按“整页都是旧文章”提前停，第一次采集照常翻完
+        self.incremental = bool(watermark and watermark.runs)
+        self.high_water_url: Optional[str] = None
+        self.handled: Set[str] = set()
+        self.skipped = 0
+        self.pages = 0
+        self.stale_streak = 0
+
+    def fresh(self, urls: List[str]) -> List[str]:
+        """提取正文前调用：去掉库里已有的、本次和同一采集活动里别的关键词已经处理过的，返回要提取的链接"""
+        candidates = [u for u in dict.fromkeys(urls) if u not in self.handled]
+        self.handled.update(candidates)
+        if self.shared is not None:
+            candidates = self.shared.take(candidates)
+        if self.db is None:
+            return candidates
+        new, seen = seen_urls.split(self.db, candidates)
+        self.skipped += len(seen)
+        return new
+
+    def page_done(self, urls: List[str], fresh: List[str]) -> bool:
+        """
+        一页搜索结果处理完调用
+
+        Args:
+            urls: 这一页的爆火文章链接
+            fresh: fresh() 返回的要提取的链接
+
+        Returns:
+            True 表示连续 stale_pages 页都是采过的，后面不用再翻了
+        """
+        self.pages += 1
+        if self.high_water_url is None and urls:
+            self.high_water_url = urls[0]
+        if not urls:
+            return False
+        self.stale_streak = 0 if fresh else self.stale_streak + 1
+        if self.incremental and self.stale_streak >= self.stale_pages:
+            log.info(f"⏭️ [{self.platform}] {self.keyword}: 连续 {self.stale_streak} 页都是采过的文章，停止翻页")
+            return True
+        return False
+
+    def finish(self, new_count: int):
+        """写水位（失败只记日志，不影响采集结果）"""
+        if self.db is None:
+            return
+        try:
+            row = self.db.query(CrawlWatermark).filter(
+                CrawlWatermark.platform == self.platform, CrawlWatermark.keyword == self.keyword
+            ).first()
+            if row is None:
+                row = CrawlWatermark(platform=self.platform, keyword=self.keyword, runs=0, total_new=0)
+                self.db.add(row)
+            now = datetime.now()
+            row.runs = (row.runs or 0) + 1
+            row.last_run_at = now
+            row.last_pages = self.pages
+            row.last_new_count = new_count
+            row.last_skipped_count = self.skipped
+            row.total_new = (row.total_new or 0) + new_count
+            if new_count:
+                row.last_new_at = now
+            if self.high_water_url:
+                row.high_water_url = self.high_water_url[:1000]
+            self.db.commit()
+            log.info(f"📌 [{self.platform}] {self.keyword}: 新文章 {new_count} 篇，跳过已采 {self.skipped} 篇，翻了 {self.pages} 页")
+        except Exception as e:
+            self.db.rollback()
+            log.error(f"❌ 写采集水位失败: {e}")
+
+
+def start_run(
+    db: Optional[Session], platform: str, keyword: str, shared: Optional[SharedSeen] = None
+) -> FrontierRun:
+    """
+    开始一次增量采集：先把新入库的链接同步进布隆，再读这个 (平台, 关键词) 的水位
+    db 为 None 时只做采集活动内的跨关键词去重，不查库、不写水位
+    """
+    if db is None:
+        return FrontierRun(None, platform, keyword, None, shared=shared)
+    added = seen_urls.sync(db)
+    if added:
+        log.debug(f"布隆过滤器同步 {added} 条链接（累计 {seen_urls.bloom.count}）")
+    watermark = db.query(CrawlWatermark).filter(
+        CrawlWatermark.platform == platform, CrawlWatermark.keyword == keyword
+    ).first()
+    return FrontierRun(db, platform, keyword, watermark, shared=shared)
+
+
+def watermark_to_dict(row: CrawlWatermark) -> Dict[str, Any]:
+    return {
+        "platform": row.platform,
+        "keyword": row.keyword,
+        "runs": row.runs,
+        "last_run_at": row.last_run_at.isoformat() if row.last_run_at else None,
+        "last_new_at": row.last_new_at.isoformat() if row.last_new_at else None,
+        "last_pages": row.last_pages,
+        "last_new_count": row.last_new_count,
+        "last_skipped_count": row.last_skipped_count,
+        "total_new": row.total_new,
+        "high_water_url": row.high_water_url,
+    }
+
+
+def list_watermarks(db: Session, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+    query = db.query(CrawlWatermark)
+    if platform:
+        query = query.filter(CrawlWatermark.platform == platform)
+    return [watermark_to_dict(r) for r in query.order_by(CrawlWatermark.last_run_at.desc()).all()]
@@ -11,14 +11,24 @@ import asyncio
 import random
 import json
 from typing import Any, Dict, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from loguru import logger
 from sqlalchemy.orm import Session
 
-from backend.database.models import GeoArticle, Keyword, Account
+from backend.config import (
+    ARTICLE_RECHECK_BASE_MINUTES,
+    ARTICLE_RECHECK_MAX_HOURS,
+    ARTICLE_RECHECK_AGE_FACTOR,
+    ARTICLE_VERIFY_INTERVAL_DAYS,
+    ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES,
+    PUBLISH_BATCH_GAP_SECONDS,
+)
+from backend.database.models import GeoArticle, Keyword, Account, AccountSelection
 from backend.services.n8n_service import get_n8n_service
 from backend.services.playwright.publishers.base import get_publisher
-from backend.services.crypto import decrypt_storage_state
+from backend.services.playwright import browser_mode
+from backend.services.crypto import decrypt_storage_state, encrypt_storage_state
+from backend.services.account_selector import AccountSelector
 from playwright.async_api import async_playwright
 
 # 模块化日志绑定
@@ -26,6 +36,30 @@ gen_log = logger.bind(module="生成器")
 pub_log = logger.bind(module="发布器")
 chk_log = logger.bind(module="监测站")
 
+# 可以开始发布的状态：scheduled（手动/未经调度器）和 queued（调度器已认领、等任务执行）
+CLAIMABLE_STATUSES = ("scheduled", "queued")
+
+
+def compute_next_check(article: GeoArticle, now: datetime) -> datetime:
+    """
+    计算文章下次收录检测时间
+
+    - 已收录：低频复核，防止被撤下
+    - 未收录：按连续未收录次数指数退避，且间隔不低于已发布时长的一定比例，
+      刚发布的文章查得勤，发布久了还没收录的慢慢降频，封顶 ARTICLE_RECHECK_MAX_HOURS
+    """
+    if article.index_status == "indexed":
+        return now + timedelta(days=ARTICLE_VERIFY_INTERVAL_DAYS)
+
+    base = timedelta(minutes=ARTICLE_RECHECK_BASE_MINUTES)
+    max_delay = timedelta(hours=ARTICLE_RECHECK_MAX_HOURS)
+
+    streak = max((article.check_count or 0) - 1, 0)
+    delay = base * (2 ** min(streak, 16))
+    if article.publish_time:
+        delay = max(delay, (now - article.publish_time) * ARTICLE_RECHECK_AGE_FACTOR)
+    return now + min(delay, max_delay)
+
 
 class GeoArticleService:
     def __init__(self, db: Session):
@@ -95,103 +129,181 @@ class GeoArticleService:
 
     async def execute_publish(self, article_id: int) -> bool:
         """
-        执行真实发布动作
-        增加了严格的状态校验，防止 AI 未完成时抢跑
+        执行真实发布动作（单篇，走批量发布的同一条路径）
         """
-        article = self.db.query(GeoArticle).filter(GeoArticle.id == article_id).first()
+        return (await self.execute_publish_batch([article_id])).get(article_id, False)
 
-        # 🌟 核心修复：状态守卫
+    def _publishable(self, article_id: int) -> Optional[GeoArticle]:
+        """🌟 状态守卫：防止 AI 未完成时抢跑；通过的文章原子改成 publishing，同一篇不会被两个任务同时发"""
+        article = self.db.query(GeoArticle).filter(GeoArticle.id == article_id).first()
         if not article:
-            return False
+            return None
 
-        if article.publish_status != "scheduled":
-            pub_log.info(f"⏭️ 跳过文章 {article_id}：当前状态为 {article.publish_status}，AI 尚未完成生成")
-            return False
+        if article.publish_status not in CLAIMABLE_STATUSES:
+            pub_log.info(f"⏭️ 跳过文章 {article_id}：当前状态为 {article.publish_status}，AI 尚未完成生成或已在发布")
+            return None
 
         if "创作中" in article.title:
             pub_log.warning(f"⚠️ 文章 {article_id} 内容仍为占位符，拒绝启动浏览器")
-            return False
+            self._release_articles([article])
+            return None
 
-        # 1. 查找授权账号
-        account = self.db.query(Account).filter(
-            Account.platform == article.platform,
-            Account.status == 1
-        ).first()
+        claimed = self.db.query(GeoArticle).filter(
+            GeoArticle.id == article_id,
+            GeoArticle.publish_status.in_(CLAIMABLE_STATUSES)
+        ).update({GeoArticle.publish_status: "publishing"}, synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(article)
+        if not claimed:
+            pub_log.info(f"⏭️ 跳过文章 {article_id}：已被其他发布任务认领")
+            return None
+        return article
+
+    def _release_articles(self, articles: List[GeoArticle]):
+        """认领了但没发的文章退回 scheduled，下一轮扫描再发"""
+        for article in articles:
+            if article.publish_status in ("queued", "publishing"):
+                article.publish_status = "scheduled"
+        self.db.commit()
 
-        if not account or not account.storage_state:
-            pub_log.warning(f"⚠️ 无法发布：{article.platform} 平台暂无有效授权账号")
-            article.publish_status = "failed"
-            article.error_msg = "缺少授权数据，请重新授权"
-            self.db.commit()
-            return False
+    async def execute_publish_batch(self, article_ids: List[int]) -> Dict[int, bool]:
+        """
+        批量发布：同一个账号的多篇文章在一个已登录的上下文里连续发
 
-        # 2. 获取适配器
-        publisher = get_publisher(article.platform)
-        if not publisher:
-            pub_log.error(f"❌ 未找到平台适配器: {article.platform}")
-            return False
+        每批由轮换选号决定账号（按当日剩余配额切批，篇与篇之间在上下文里按最短发布间隔等），一个账号发不完的交给下一个账号；
+        所有账号都不可用时剩下的文章顺延到最早可用时间。
 
-        # 3. 解析 Session
+        Returns:
+            {article_id: 是否发布成功}
+        """
+        outcomes = {article_id: False for article_id in article_ids}
+        by_platform: Dict[str, List[GeoArticle]] = {}
+        for article_id in article_ids:
+            article = self._publishable(article_id)
+            if article:
+                by_platform.setdefault(article.platform, []).append(article)
+
+        for platform, remaining in by_platform.items():
+            publisher = get_publisher(platform)
+            if not publisher:
+                pub_log.error(f"❌ 未找到平台适配器: {platform}")
+                self._release_articles(remaining)
+                continue
+
+            # 在平台所有健康账号之间轮换选号（配额/冷却/失败率/最近使用）
+            selector = AccountSelector(self.db)
+            while remaining:
+                account, selections = selector.select_batch(platform, [a.id for a in remaining])
+                if not account:
+                    self._defer_articles(selector, platform, remaining, selections[0].reason)
+                    break
+                batch, remaining = remaining[:len(selections)], remaining[len(selections):]
+                outcomes.update(await self._publish_with_account(publisher, account, batch, selections, selector))
+
+        return outcomes
+
+    def _defer_articles(self, selector: AccountSelector, platform: str, articles: List[GeoArticle], reason: str):
+        """没有可用账号：都在冷却或配额用完时顺延到最早可用时间，完全没有授权账号才标记失败"""
+        available_at = selector.next_available_time(selector.account_states(platform))
+        for article in articles:
+            if available_at:
+                article.publish_status = "scheduled"
+                article.publish_time = available_at
+                article.error_msg = reason
+            else:
+                article.publish_status = "failed"
+                article.error_msg = "缺少授权数据，请重新授权"
+        self.db.commit()
+        if available_at:
+            pub_log.info(f"⏸️ {len(articles)} 篇文章顺延至 {available_at:%m-%d %H:%M} 发布：{reason}")
+        else:
+            pub_log.warning(f"⚠️ 无法发布：{platform} 平台暂无有效授权账号")
+
+    async def _publish_with_account(
+        self,
+        publisher,
+        account: Account,
+        articles: List[GeoArticle],
+        selections: List[AccountSelection],
+        selector: AccountSelector
+    ) -> Dict[int, bool]:
+        """用一个账号的上下文连续发布一批文章，结束后把刷新过的会话写回账号"""
+        outcomes: Dict[int, bool] = {}
+        selection_by_article = {s.article_id: s for s in selections}
+
+        def finish(article: GeoArticle, success: bool, error: Optional[str] = None):
+            if success:
+                article.publish_status = "published"
+                article.publish_time = datetime.now()
+                article.error_msg = None
+                article.publish_logs = f"[{datetime.now()}] ✅ 发布成功\n"
+                # 进入收录复查队列，首次检测在一个基础间隔之后
+                article.check_count = 0
+                article.next_check_time = article.publish_time + timedelta(minutes=ARTICLE_RECHECK_BASE_MINUTES)
+                pub_log.success(f"🎊 发布完成：{article.platform_url}")
+            else:
+                article.publish_status = "failed"
+                article.error_msg = error
+                article.retry_count = (article.retry_count or 0) + 1
+                pub_log.error(f"❌ 发布失败：{error}")
+            outcomes[article.id] = success
+            selector.record_result(selection_by_article[article.id], success, error)
+
+        # 解析 Session
         try:
             state_data = decrypt_storage_state(account.storage_state)
             if not state_data:
                 state_data = json.loads(account.storage_state)
         except Exception as e:
             pub_log.error(f"❌ 账号 {account.account_name} 的 Session 解析失败: {e}")
-            article.publish_status = "failed"
-            article.error_msg = "Session解析失败，请重新授权"
-            self.db.commit()
-            return False
+            for article in articles:
+                finish(article, False, "Session解析失败，请重新授权")
+            return outcomes
 
-        # 4. 模拟人工随机延迟
+        # 模拟人工随机延迟（整批只等一次，篇与篇之间只留短间隔）
         wait_time = random.randint(10, 20)
-        pub_log.info(f"⏳ 模拟人工：将在 {wait_time}s 后启动浏览器推送文章")
+        pub_log.info(f"⏳ 模拟人工：将在 {wait_time}s 后启动浏览器推送 {len(articles)} 篇文章")
         await asyncio.sleep(wait_time)
 
-        # 5. 启动 Playwright 执行
+        async def on_start(article: GeoArticle):
+            pub_log.info(f"🚀 正在执行 {article.platform} 自动化发布脚本（账号 {account.account_name}）...")
+            article.account_id = account.id
+            article.publish_status = "publishing"
+            self.db.commit()
+
+        async def on_result(article: GeoArticle, result: Dict[str, Any]):
+            if result.get("success"):
+                article.platform_url = result.get("platform_url")
+            finish(article, bool(result.get("success")), result.get("error_msg"))
+
         async with async_playwright() as p:
-            # 调试阶段建议 headless=False
-            browser = await p.chromium.launch(headless=False)
+            # 调试时设 BROWSER_MODE_PUBLISH=headed
+            browser = await p.chromium.launch(headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_PUBLISH))
             try:
                 context = await browser.new_context(
                     storage_state=state_data,
                     viewport={"width": 1280, "height": 800}
                 )
-                page = await context.new_page()
-
-                pub_log.info(f"🚀 正在执行 {article.platform} 自动化发布脚本...")
-                article.publish_status = "publishing"
-                self.db.commit()
-
-                # 执行适配器逻辑
-                result = await publisher.publish(page, article, account)
-
-                if result.get("success"):
-                    article.publish_status = "published"
-                    article.publish_time = datetime.now()
-                    article.platform_url = result.get("platform_url")
-                    article.publish_logs = f"[{datetime.now()}] ✅ 发布成功\n"
-                    pub_log.success(f"🎊 发布完成：{article.platform_url}")
-                    success = True
-                else:
-                    article.publish_status = "failed"
-                    article.error_msg = result.get("error_msg")
-                    article.retry_count += 1
-                    pub_log.error(f"❌ 发布失败：{article.error_msg}")
-                    success = False
-
-                self.db.commit()
-                return success
-
+                batch = await publisher.publish_batch(
+                    context, articles, account,
+                    on_start=on_start, on_result=on_result, gap_seconds=PUBLISH_BATCH_GAP_SECONDS,
+                    min_interval_seconds=ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES * 60
+                )
+                # 整批结束只写回一次会话（平台可能在发布过程中续期了 cookie）
+                if batch["storage_state"]:
+                    account.storage_state = encrypt_storage_state(batch["storage_state"])
+                    self.db.commit()
             except Exception as e:
                 pub_log.error(f"🚨 浏览器执行崩溃: {e}")
-                article.publish_status = "failed"
-                article.error_msg = f"执行异常: {str(e)}"
-                self.db.commit()
-                return False
+                for article in articles:
+                    if article.id not in outcomes:
+                        finish(article, False, f"执行异常: {str(e)}")
             finally:
                 await browser.close()
 
+        self.db.commit()
+        return outcomes
+
     async def check_quality(self, article_id: int) -> Dict[str, Any]:
         """质检逻辑"""
         article = self.get_article(article_id)
@@ -213,10 +325,24 @@ class GeoArticleService:
         chk_log.info(f"🔍 [监测] 正在检索文章《{article.title[:10]}...》的收录情况")
         await asyncio.sleep(2)
         is_indexed = random.random() > 0.5
-        article.index_status = "indexed" if is_indexed else "not_indexed"
-        article.last_check_time = datetime.now()
+        new_status = "indexed" if is_indexed else "not_indexed"
+
+        # 状态变化时退避从头开始，否则连续次数 +1
+        if new_status != article.index_status:
+            article.check_count = 1
+        else:
+            article.check_count = (article.check_count or 0) + 1
+        article.index_status = new_status
+
+        now = datetime.now()
+        article.last_check_time = now
+        article.next_check_time = compute_next_check(article, now)
         self.db.commit()
-        return {"status": "success", "index_status": article.index_status}
+        return {
+            "status": "success",
+            "index_status": article.index_status,
+            "next_check_time": article.next_check_time.isoformat()
+        }
 
     def get_article(self, article_id: int) -> Optional[GeoArticle]:
         return self.db.query(GeoArticle).get(article_id)
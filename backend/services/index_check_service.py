@@ -4,16 +4,23 @@
 用这个来检测AI平台的收录情况！
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from playwright.async_api import async_playwright, Browser
 import asyncio
+import json
 from datetime import datetime
 
-from backend.database.models import IndexCheckRecord, Keyword, QuestionVariant, Project
+from backend.database.models import IndexCheckRecord, IndexCheckSample, Keyword, QuestionVariant, Project
 from backend.config import AI_PLATFORMS
+from backend.services.answer_store import put_answer
+from backend.services.check_result_cache import CheckResultCache, question_key, beijing_now
+from backend.services.sampling_planner import VariantSamplingPlanner
+from backend.services import session_health
 from backend.services.playwright.ai_platforms import DoubaoChecker, QianwenChecker, DeepSeekChecker
+from backend.services.playwright import browser_mode, resource_blocking, timing
+from backend.services.playwright.browser_mode import HeadedRequired
 
 
 class IndexCheckService:
@@ -36,6 +43,10 @@ class IndexCheckService:
             "qianwen": QianwenChecker("qianwen", AI_PLATFORMS["qianwen"]),
             "deepseek": DeepSeekChecker("deepseek", AI_PLATFORMS["deepseek"]),
         }
+        # 检测结果缓存：相同(平台, 问题)在TTL内复用回答
+        self.result_cache = CheckResultCache(db)
+        # 本服务实例执行过的抽样摘要（每个关键词×平台一条）
+        self.sample_summaries: List[Dict[str, Any]] = []
 
     async def check_keyword(
         self,
@@ -85,13 +96,14 @@ class IndexCheckService:
             platforms=platforms
         )
 
-        logger.info(f"收录检测完成: 关键词ID={keyword_id}, 检测数={len(results)}")
+        logger.info(f"收录检测完成: 关键词ID={keyword_id}, 检测数={len(results)}, 缓存={self.result_cache.stats()}")
         return results
 
     async def check_project_keywords(
         self,
         project_id: int,
-        platforms: Optional[List[str]] = None
+        platforms: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
     ) -> List[Dict[str, Any]]:
         """
         批量检测项目下所有关键词的收录情况
@@ -99,6 +111,7 @@ class IndexCheckService:
         Args:
             project_id: 项目ID
             platforms: 要检测的平台列表，默认全部
+            progress_callback: 进度回调 (已完成关键词数, 关键词总数, 说明)
             
         Returns:
             检测结果列表
@@ -126,10 +139,15 @@ class IndexCheckService:
         
         # 使用单个Playwright实例处理所有关键词，提高效率
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=False, args=["--no-sandbox"])
+            browser = await p.chromium.launch(
+                headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_CHECK), args=["--no-sandbox"]
+            )
             
             try:
-                for keyword_obj in keywords:
+                for index, keyword_obj in enumerate(keywords):
+                    if progress_callback:
+                        progress_callback(index, len(keywords), f"正在检测关键词: {keyword_obj.keyword}")
+
                     # 获取关键词的问题变体
                     questions = self.db.query(QuestionVariant).filter(
                         QuestionVariant.keyword_id == keyword_obj.id
@@ -160,7 +178,7 @@ class IndexCheckService:
             finally:
                 await browser.close()
         
-        logger.info(f"项目关键词批量检测完成: 项目ID={project_id}, 关键词数={len(keywords)}, 检测数={len(all_results)}")
+        logger.info(f"项目关键词批量检测完成: 项目ID={project_id}, 关键词数={len(keywords)}, 检测数={len(all_results)}, 缓存={self.result_cache.stats()}")
         return all_results
     
     async def _execute_checks(
@@ -182,19 +200,59 @@ class IndexCheckService:
         
         # 导入会话管理器
         from backend.services.session_manager import secure_session_manager
-        # 导入UTC时间处理
-        from datetime import datetime, timezone
-        
+
+        # 先查缓存：命中的问题只做本地匹配，剩下的才需要浏览器
+        # 每个平台一个抽样规划器，浏览器阶段按规划顺序提问，区间达标就提前停止
+        pending_questions: Dict[str, List[QuestionVariant]] = {}
+        planners: Dict[str, VariantSamplingPlanner] = {}
+        samples: Dict[str, IndexCheckSample] = {}
+        for platform_id in platforms:
+            checker = self.checkers.get(platform_id)
+            if not checker:
+                logger.warning(f"未知的平台: {platform_id}")
+                continue
+
+            planner = VariantSamplingPlanner(self.db, keyword_id, platform_id)
+            sample = self._start_sample(keyword_id, platform_id, len(questions))
+            planners[platform_id] = planner
+            samples[platform_id] = sample
+
+            misses = []
+            for qv in planner.order(questions):
+                cached_record = self.result_cache.lookup(platform_id, qv.question)
+                if cached_record:
+                    cached_result = self._save_cached_result(
+                        keyword_obj=keyword_obj,
+                        question=qv.question,
+                        company_name=company_name,
+                        platform_id=platform_id,
+                        checker=checker,
+                        source=cached_record,
+                        sample_id=sample.id if sample else None
+                    )
+                    planner.observe(qv.question, cached_result["keyword_found"], cached_result["company_found"])
+                    results.append(cached_result)
+                else:
+                    misses.append(qv)
+
+            if misses and not planner.should_stop():
+                pending_questions[platform_id] = misses
+            else:
+                self._finish_sample(sample, planner, len(questions))
+
+        if not pending_questions:
+            logger.info(f"关键词 {keyword_obj.keyword} 的检测无需访问AI平台（缓存命中/抽样已达标），跳过浏览器")
+            return results
+
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=False, args=["--no-sandbox"])
+            browser = await p.chromium.launch(
+                headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_CHECK), args=["--no-sandbox"]
+            )
             
             try:
                 # 为每个平台创建一个新的上下文和页面
-                for platform_id in platforms:
-                    checker = self.checkers.get(platform_id)
-                    if not checker:
-                        logger.warning(f"未知的平台: {platform_id}")
-                        continue
+                for platform_id, platform_questions in pending_questions.items():
+                    checker = self.checkers[platform_id]
                     
                     logger.info(f"开始检测平台: {checker.name}, 关键词: {keyword_obj.keyword}")
                     
@@ -213,6 +271,8 @@ class IndexCheckService:
                     
                     # 为每个平台创建新的上下文和页面
                     context = await browser.new_context(storage_state=storage_state)
+                    # 只看回答文字：图片、字体、统计脚本不下载
+                    await resource_blocking.apply(context, platform_id, browser_mode.SUBSYSTEM_CHECK)
                     page = await context.new_page()
                     
                     try:
@@ -220,20 +280,19 @@ class IndexCheckService:
                         platform_results = await self._execute_checks_for_single_platform(
                             keyword_id=keyword_id,
                             keyword_obj=keyword_obj,
-                            questions=questions,
+                            questions=platform_questions,
                             company_name=company_name,
                             platform_id=platform_id,
                             checker=checker,
-                            page=page
+                            page=page,
+                            planner=planners[platform_id],
+                            sample_id=samples[platform_id].id if samples[platform_id] else None
                         )
                         results.extend(platform_results)
                         
                         # 保存更新后的会话状态（如果登录状态发生了变化）
-                        updated_storage_state = await context.storage_state()
-                        # 保留原始会话中的时间戳信息
-                        if storage_state:
-                            updated_storage_state["created_at"] = storage_state.get("created_at")
-                            updated_storage_state["last_modified"] = storage_state.get("last_modified")
+                        # 保留原始会话中的时间戳和心跳结果
+                        updated_storage_state = session_health.carry_over(storage_state, await context.storage_state())
                         save_result = await secure_session_manager.save_session(
                             user_id=user_id,
                             project_id=project_id,
@@ -245,6 +304,7 @@ class IndexCheckService:
                         else:
                             logger.warning(f"保存平台 {checker.name} 的更新会话状态失败")
                     finally:
+                        self._finish_sample(samples[platform_id], planners[platform_id], len(questions))
                         # 等待一段时间后再关闭上下文，让用户有时间看到结果
                         await asyncio.sleep(2)
                         await context.close()
@@ -252,6 +312,102 @@ class IndexCheckService:
                 await browser.close()
         
         return results
+
+    def _start_sample(self, keyword_id: int, platform_id: str, variants_total: int) -> Optional[IndexCheckSample]:
+        """创建本轮抽样记录，检测记录通过 sample_id 关联"""
+        try:
+            sample = IndexCheckSample(
+                keyword_id=keyword_id,
+                platform=platform_id,
+                variants_total=variants_total,
+                created_at=beijing_now()
+            )
+            self.db.add(sample)
+            self.db.commit()
+            return sample
+        except Exception as db_error:
+            logger.error(f"创建抽样记录失败: {str(db_error)}")
+            self.db.rollback()
+            return None
+
+    def _finish_sample(
+        self,
+        sample: Optional[IndexCheckSample],
+        planner: VariantSamplingPlanner,
+        variants_total: int
+    ):
+        """写入本轮实际抽样的问法和命中率置信区间"""
+        summary = planner.summary(variants_total)
+        if sample:
+            summary["sample_id"] = sample.id
+            try:
+                sample.variants_asked = summary["variants_asked"]
+                sample.asked_questions = json.dumps(summary["asked_questions"], ensure_ascii=False)
+                sample.history_checks = summary["history_checks"]
+                sample.stopped_early = summary["stopped_early"]
+                sample.hit_rate_estimate = summary["hit_rate_estimate"]
+                sample.ci_low = summary["ci_low"]
+                sample.ci_high = summary["ci_high"]
+                sample.confidence = summary["confidence"]
+                self.db.commit()
+            except Exception as db_error:
+                logger.error(f"保存抽样结果失败: {str(db_error)}")
+                self.db.rollback()
+
+        if summary["stopped_early"]:
+            logger.info(
+                f"抽样提前停止: 关键词ID={planner.keyword_id}, 平台={planner.platform}, "
+                f"问了 {summary['variants_asked']}/{variants_total} 个问法, "
+                f"命中率 {summary['hit_rate_estimate']}% [{summary['ci_low']}%, {summary['ci_high']}%]"
+            )
+        self.sample_summaries.append(summary)
+
+    def _save_cached_result(
+        self,
+        keyword_obj: Keyword,
+        question: str,
+        company_name: str,
+        platform_id: str,
+        checker: Any,
+        source: IndexCheckRecord,
+        sample_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        复用缓存中的回答：只重新做关键词/公司名匹配，写一条 cached=True 的检测记录
+        """
+        match = checker.check_keywords_in_text(source.answer or "", keyword_obj.keyword, company_name)
+
+        try:
+            record = IndexCheckRecord(
+                keyword_id=keyword_obj.id,
+                platform=platform_id,
+                question=question,
+                question_key=source.question_key,
+                answer_hash=source.answer_hash,
+                keyword_found=match["keyword_found"],
+                company_found=match["company_found"],
+                cached=True,
+                sample_id=sample_id,
+                check_time=beijing_now()
+            )
+            self.db.add(record)
+            self.db.commit()
+        except Exception as db_error:
+            logger.error(f"保存缓存检测结果失败: {str(db_error)}")
+            self.db.rollback()
+
+        return {
+            "keyword_id": keyword_obj.id,
+            "keyword": keyword_obj.keyword,
+            "platform": checker.name,
+            "question": question,
+            "keyword_found": match["keyword_found"],
+            "company_found": match["company_found"],
+            "success": True,
+            "retry_count": 0,
+            "cached": True,
+            "sample_id": sample_id
+        }
     
     async def _execute_checks_for_single_platform(
         self,
@@ -261,20 +417,25 @@ class IndexCheckService:
         company_name: str,
         platform_id: str,
         checker: Any,
-        page: Any
+        page: Any,
+        planner: Optional[VariantSamplingPlanner] = None,
+        sample_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         为单个平台执行检测
+
+        传入 planner 时按抽样规划提问，命中率置信区间达标后不再问剩下的问法
         """
         results = []
         max_retries = 2
         
-        # 导入UTC时间处理
-        from datetime import datetime, timezone
-        
         logger.info(f"开始检测平台: {checker.name}, 关键词: {keyword_obj.keyword}")
 
         for qv in questions:
+            if planner and planner.should_stop():
+                logger.info(f"[{checker.name}] 命中率置信区间已达标，跳过剩余 {len(questions) - len(results)} 个问法")
+                break
+
             retry_count = 0
             success = False
             check_result = None
@@ -282,12 +443,16 @@ class IndexCheckService:
             while retry_count <= max_retries and not success:
                 try:
                     # 调用检测器
-                    check_result = await checker.check(
-                        page=page,
-                        question=qv.question,
-                        keyword=keyword_obj.keyword,
-                        company=company_name
-                    )
+                    async with timing.operation(checker.platform_id, timing.OP_CHECK) as op:
+                        check_result = await checker.check(
+                            page=timing.instrument(page),
+                            question=qv.question,
+                            keyword=keyword_obj.keyword,
+                            company=company_name
+                        )
+                        op.ok = bool(check_result.get("success"))
+                    # 检测器内部会吞异常：已经请求转有头就别把这次结果当失败记下来
+                    browser_mode.raise_if_escalated()
                     
                     success = check_result.get("success", False)
                     if success:
@@ -301,6 +466,8 @@ class IndexCheckService:
                     await checker.clear_chat_history(page)
                     await asyncio.sleep(3)
                     
+                except HeadedRequired:
+                    raise
                 except Exception as e:
                     retry_count += 1
                     logger.error(f"检测异常，正在重试 ({retry_count}/{max_retries}): {str(e)}")
@@ -322,19 +489,18 @@ class IndexCheckService:
                 }
             
             try:
-                # 保存检测结果，强制使用北京时间 (UTC+8)
-                # 导入UTC时间处理
-                from datetime import datetime, timedelta, timezone
-                beijing_time = datetime.now(timezone.utc) + timedelta(hours=8)
-                
+                # 保存检测结果，强制使用北京时间 (UTC+8)，去除时区信息直接存为本地时间
                 record = IndexCheckRecord(
                     keyword_id=keyword_id,
                     platform=platform_id,
                     question=qv.question,
-                    answer=check_result.get("answer"),
+                    question_key=question_key(qv.question),
+                    answer_hash=put_answer(self.db, check_result.get("answer")),
                     keyword_found=check_result.get("keyword_found", False),
                     company_found=check_result.get("company_found", False),
-                    check_time=beijing_time.replace(tzinfo=None)  # 去除时区信息，直接存为本地时间
+                    cached=False,
+                    sample_id=sample_id,
+                    check_time=beijing_now()
                 )
                 self.db.add(record)
                 self.db.commit()
@@ -343,6 +509,10 @@ class IndexCheckService:
                 # 回滚事务
                 self.db.rollback()
 
+            # 只有成功拿到回答的检测才计入抽样估计，失败不等于未命中
+            if planner and check_result.get("success"):
+                planner.observe(qv.question, check_result.get("keyword_found", False), check_result.get("company_found", False))
+
             results.append({
                 "keyword_id": keyword_id,
                 "keyword": keyword_obj.keyword,
@@ -351,7 +521,9 @@ class IndexCheckService:
                 "keyword_found": check_result.get("keyword_found", False),
                 "company_found": check_result.get("company_found", False),
                 "success": check_result.get("success", False),
-                "retry_count": retry_count
+                "retry_count": retry_count,
+                "cached": False,
+                "sample_id": sample_id
             })
             
             # 每个问题检测后短暂休息
@@ -439,7 +611,10 @@ class IndexCheckService:
             query = query.filter(IndexCheckRecord.question.ilike(f"%{question}%"))
 
         total = query.count()
-        records = query.order_by(IndexCheckRecord.check_time.desc()).offset(skip).limit(limit).all()
+        # 只为当前页的记录批量加载回答内容
+        records = query.options(selectinload(IndexCheckRecord.answer_blob)).order_by(
+            IndexCheckRecord.check_time.desc()
+        ).offset(skip).limit(limit).all()
         
         return records, total
         
@@ -457,6 +632,7 @@ class IndexCheckService:
         count = self.db.query(IndexCheckRecord).filter(
             IndexCheckRecord.id.in_(record_ids)
         ).delete(synchronize_session=False)
+        # 孤立的回答内容由定时维护任务按宽限期清理，这里不同步删（可能正被并发的检测去重复用）
         self.db.commit()
         return count
 
@@ -716,8 +892,8 @@ class IndexCheckService:
             if record.company_found:
                 platform_data[platform]["company_found"] += 1
             
-            # 成功检测（有回答）
-            if record.answer and record.answer.strip():
+            # 成功检测（有回答），只看引用不解压正文
+            if record.has_answer:
                 platform_data[platform]["success_count"] += 1
         
         # 计算各平台的命中率和成功率
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+共享任务执行器（优先级通道）
+用户手动触发的检测/发布和定时批量任务抢同一批浏览器资源，以前完全没有先后顺序。
+这里统一排队：
+1. 三条通道 interactive > scheduled > backfill，空出的浏览器槽位优先给交互任务
+2. 预留槽位只给交互任务用，批量任务排再多，用户点一下也能马上开跑
+3. 提交后立即返回任务句柄，可轮询进度、可取消
+"""
+
+import asyncio
+import heapq
+import itertools
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from backend.config import JOB_EXECUTOR_SLOTS, JOB_EXECUTOR_INTERACTIVE_RESERVED, JOB_EXECUTOR_HISTORY_SIZE
+
+log = logger.bind(module="任务执行器")
+
+# 通道（数值越小优先级越高）
+LANE_INTERACTIVE = "interactive"
+LANE_SCHEDULED = "scheduled"
+LANE_BACKFILL = "backfill"
+LANE_PRIORITY = {LANE_INTERACTIVE: 0, LANE_SCHEDULED: 1, LANE_BACKFILL: 2}
+
+# 任务状态
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINISHED_STATUSES = {STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED}
+
+
+class Job:
+    """任务句柄"""
+
+    def __init__(self, name: str, lane: str, func: Callable[["Job"], Awaitable[Any]], meta: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.lane = lane
+        self.func = func
+        self.meta = meta or {}
+        self.status = STATUS_QUEUED
+        self.progress: Dict[str, Any] = {"current": 0, "total": 0, "message": "排队中"}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    def report(self, current: int, total: int, message: str = ""):
+        """任务内部上报进度"""
+        self.progress = {"current": current, "total": total, "message": message}
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    async def wait(self) -> Any:
+        """等待任务结束，返回结果（失败/取消时返回 None）"""
+        await self._done.wait()
+        return self.result
+
+    def to_dict(self) -> Dict[str, Any]:
+        def _seconds(start, end):
+            return round((end - start).total_seconds(), 3) if start and end else None
+
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "lane": self.lane,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result if self.finished else None,
+            "error": self.error,
+            "meta": self.meta,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "queue_seconds": _seconds(self.created_at, self.started_at),
+            "run_seconds": _seconds(self.started_at, self.finished_at),
+        }
+
+
+class JobExecutor:
+    """
+    优先级任务执行器
+
+    槽位数 = 同时运行的浏览器任务数。非交互任务最多占用 slots - reserved 个槽位，
+    剩下的预留槽位只有交互任务能用。运行中的任务不会被抢占，优先级只决定谁拿下一个空槽位。
+    """
+
+    def __init__(
+        self,
+        slots: int = JOB_EXECUTOR_SLOTS,
+        interactive_reserved: int = JOB_EXECUTOR_INTERACTIVE_RESERVED,
+        history_size: int = JOB_EXECUTOR_HISTORY_SIZE
+    ):
+        self.slots = max(1, slots)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.slots - 1) if self.slots > 1 else 0
+        self.history_size = history_size
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, Job] = {}
+        self._active_keys: Dict[str, Job] = {}
+
+    # ---------- 提交 / 查询 / 取消 ----------
+
+    def submit(
+        self,
+        name: str,
+        func: Callable[[Job], Awaitable[Any]],
+        lane: str = LANE_INTERACTIVE,
+        meta: Optional[Dict[str, Any]] = None,
+        dedupe_key: Optional[str] = None
+    ) -> Job:
+        """
+        提交任务，立即返回句柄；func 接收 Job 本身，可调用 job.report() 上报进度
+
+        dedupe_key: 同一个 key 的任务还没结束时不重复提交，直接返回已有句柄
+                    （定时任务每个 tick 都会扫到同一篇还在排队的文章）
+        """
+        if lane not in LANE_PRIORITY:
+            raise ValueError(f"未知通道: {lane}")
+
+        if dedupe_key:
+            active = self._active_keys.get(dedupe_key)
+            if active and not active.finished:
+                return active
+
+        job = Job(name, lane, func, meta)
+        self._jobs[job.id] = job
+        if dedupe_key:
+            self._active_keys[dedupe_key] = job
+        heapq.heappush(self._queue, (LANE_PRIORITY[lane], next(self._seq), job))
+        log.info(f"📥 任务入队 [{lane}] {name} ({job.id})，排队 {len(self._queue)}，运行 {len(self._running)}")
+        self._dispatch()
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, lane: Optional[str] = None, status: Optional[str] = None, limit: int = 100) -> List[Job]:
+        jobs = [j for j in reversed(self._jobs.values())
+                if (lane is None or j.lane == lane) and (status is None or j.status == status)]
+        return jobs[:limit]
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务：排队中的直接标记取消，运行中的取消协程"""
+        job = self._jobs.get(job_id)
+        if not job or job.finished:
+            return False
+        if job.status == STATUS_QUEUED:
+            self._finish(job, STATUS_CANCELLED)
+            log.info(f"🚫 已取消排队任务 {job.name} ({job.id})")
+        elif job._task:
+            job._task.cancel()
+            log.info(f"🚫 正在取消运行中任务 {job.name} ({job.id})")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        lanes = {}
+        for lane in LANE_PRIORITY:
+            lanes[lane] = {
+                "queued": sum(1 for _, _, j in self._queue if j.lane == lane and j.status == STATUS_QUEUED),
+                "running": sum(1 for j in self._running.values() if j.lane == lane),
+            }
+        return {
+            "slots": self.slots,
+            "interactive_reserved": self.interactive_reserved,
+            "running": len(self._running),
+            "lanes": lanes,
+        }
+
+    # ---------- 调度 ----------
+
+    def _can_start(self, job: Job) -> bool:
+        return self._lane_has_slot(job.lane)
+
+    def _lane_has_slot(self, lane: str) -> bool:
+        if len(self._running) >= self.slots:
+            return False
+        if lane == LANE_INTERACTIVE:
+            return True
+        bulk_running = sum(1 for j in self._running.values() if j.lane != LANE_INTERACTIVE)
+        return bulk_running < self.slots - self.interactive_reserved
+
+    def has_capacity(self, lane: str) -> bool:
+        """该通道的任务现在提交能否立即开跑（本地没有排队，且有空槽位）"""
+        queued = any(j.status == STATUS_QUEUED for _, _, j in self._queue)
+        return not queued and self._lane_has_slot(lane)
+
+    @property
+    def active_count(self) -> int:
+        """排队 + 运行中的任务数"""
+        return len(self._running) + sum(1 for _, _, j in self._queue if j.status == STATUS_QUEUED)
+
+    def _dispatch(self):
+        """把能开跑的任务按优先级启动（只看队首：队首不能跑，后面的优先级更低也不能跑）"""
+        while self._queue:
+            _, _, job = self._queue[0]
+            if job.status != STATUS_QUEUED:
+                heapq.heappop(self._queue)
+                continue
+            if not self._can_start(job):
+                break
+            heapq.heappop(self._queue)
+            job.status = STATUS_RUNNING
+            job.started_at = datetime.now()
+            job.progress["message"] = "运行中"
+            self._running[job.id] = job
+            job._task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        try:
+            job.result = await job.func(job)
+            self._finish(job, STATUS_SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, STATUS_CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            log.error(f"❌ 任务失败 {job.name} ({job.id}): {e}")
+            self._finish(job, STATUS_FAILED)
+        finally:
+            self._running.pop(job.id, None)
+            self._dispatch()
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.now()
+        if status == STATUS_CANCELLED:
+            job.progress["message"] = "已取消"
+        elif status == STATUS_SUCCEEDED:
+            job.progress["message"] = "已完成"
+        job._done.set()
+
+    def _trim_history(self):
+        """只保留最近 history_size 个已结束的任务"""
+        finished = [jid for jid, j in self._jobs.items() if j.finished]
+        for jid in finished[:max(0, len(finished) - self.history_size)]:
+            self._jobs.pop(jid, None)
+        self._active_keys = {k: j for k, j in self._active_keys.items() if not j.finished}
+
+
+# 单例模式
+_instance: Optional[JobExecutor] = None
+
+
+def get_job_executor() -> JobExecutor:
+    global _instance
+    if _instance is None:
+        _instance = JobExecutor()
+    return _instance
@@ -4,13 +4,14 @@
 负责：关键词的增删改查、调用 n8n 进行蒸馏逻辑、变体生成
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from loguru import logger
 
 from backend.database.models import Keyword, Project, QuestionVariant
 # 🌟 关键修改：引入新的 n8n 服务，替换旧的 client
 from backend.services.n8n_service import get_n8n_service
+from backend.services.question_dedup import cluster_near_duplicates, dedupe_questions, is_near_duplicate
 
 
 class KeywordService:
@@ -50,15 +51,19 @@ class KeywordService:
         return new_kw
 
     def add_question_variant(self, keyword_id: int, question: str) -> QuestionVariant:
-        """添加问题变体"""
-        # 简单查重
-        exists = self.db.query(QuestionVariant).filter(
-            QuestionVariant.keyword_id == keyword_id,
-            QuestionVariant.question == question
-        ).first()
+        """添加问题变体（与已有问法近似重复时直接返回已有的那个）"""
+        existing = self.get_keyword_questions(keyword_id)
 
-        if exists:
-            return exists
+        # 完全相同
+        for qv in existing:
+            if qv.question == question:
+                return qv
+
+        # 近似重复：只是换了个说法，不值得多跑一轮浏览器
+        dup_index = is_near_duplicate(question, [qv.question for qv in existing])
+        if dup_index >= 0:
+            logger.info(f"跳过近似重复问法: {question} ≈ {existing[dup_index].question}")
+            return existing[dup_index]
 
         new_qv = QuestionVariant(
             keyword_id=keyword_id,
@@ -69,6 +74,70 @@ class KeywordService:
         self.db.refresh(new_qv)
         return new_qv
 
+    def add_question_variants(self, keyword_id: int, questions: List[str]) -> Tuple[List[QuestionVariant], int]:
+        """
+        批量添加问题变体，入库前和已有问法、本批问法一起做近似去重
+
+        Returns:
+            (新入库的问题变体, 被过滤掉的数量)
+        """
+        existing = [qv.question for qv in self.get_keyword_questions(keyword_id)]
+        to_save = dedupe_questions(questions, existing)
+
+        saved = []
+        for question in to_save:
+            qv = QuestionVariant(keyword_id=keyword_id, question=question)
+            self.db.add(qv)
+            saved.append(qv)
+        self.db.commit()
+        for qv in saved:
+            self.db.refresh(qv)
+
+        skipped = len(questions) - len(saved)
+        if skipped:
+            logger.info(f"关键词 {keyword_id}: {len(questions)} 个问法中过滤掉 {skipped} 个重复/近似重复")
+        return saved, skipped
+
+    def prune_question_variants(self, keyword_id: int, dry_run: bool = True) -> Dict[str, Any]:
+        """
+        清理已有的近似重复问法：每簇保留最早创建的一个
+
+        Args:
+            keyword_id: 关键词ID
+            dry_run: 只返回聚类结果，不删除（默认只预览，删除要显式传 False）
+
+        Returns:
+            聚类及删除情况
+        """
+        variants = self.db.query(QuestionVariant).filter(
+            QuestionVariant.keyword_id == keyword_id
+        ).order_by(QuestionVariant.id).all()
+
+        clusters = cluster_near_duplicates([qv.question for qv in variants])
+        removed = [variants[i] for cluster in clusters for i in cluster[1:]]
+
+        result = {
+            "keyword_id": keyword_id,
+            "total": len(variants),
+            "kept": len(clusters),
+            "removed": len(removed),
+            "clusters": [
+                {
+                    "representative": {"id": variants[c[0]].id, "question": variants[c[0]].question},
+                    "duplicates": [{"id": variants[i].id, "question": variants[i].question} for i in c[1:]]
+                }
+                for c in clusters if len(c) > 1
+            ]
+        }
+
+        if removed and not dry_run:
+            for qv in removed:
+                self.db.delete(qv)
+            self.db.commit()
+            logger.info(f"关键词 {keyword_id}: 清理近似重复问法 {len(removed)} 个，保留 {len(clusters)} 个")
+
+        return result
+
     async def distill(
             self,
             *,
@@ -5,6 +5,7 @@ AI平台检测器基类
 """
 
 from abc import ABC, abstractmethod
+from collections import deque
 from typing import Dict, Any, Optional, List
 from playwright.async_api import Page, BrowserContext
 from loguru import logger
@@ -12,6 +13,11 @@ import asyncio
 import time
 import random
 
+from backend.config import AI_LOGIN_INDICATORS
+from backend.services.playwright import browser_mode, dom_probe, waits
+
+OPERATION_LOG_SIZE = 200
+
 
 class AIPlatformChecker(ABC):
     """
@@ -35,7 +41,9 @@ class AIPlatformChecker(ABC):
         self.color = config.get("color", "#333333")
         self.retry_count = 3
         self.retry_delay = 2
-        self.operation_log = []
+        # 检测器是单例，日志只留最近的，防止常驻进程里无限增长；每条带距上一条的间隔
+        self.operation_log = deque(maxlen=OPERATION_LOG_SIZE)
+        self._last_log_at: Optional[float] = None
 
     def _log(self, level: str, message: str, **kwargs):
         """
@@ -47,13 +55,16 @@ class AIPlatformChecker(ABC):
             **kwargs: 额外的上下文信息
         """
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        now = time.monotonic()
         log_entry = {
             "timestamp": timestamp,
             "platform": self.name,
             "level": level,
             "message": message,
+            "elapsed_ms": round((now - self._last_log_at) * 1000) if self._last_log_at else None,
             **kwargs
         }
+        self._last_log_at = now
         self.operation_log.append(log_entry)
 
         if level == "info":
@@ -104,7 +115,7 @@ class AIPlatformChecker(ABC):
                     if attempt < max_retries:
                         delay = retry_delay + random.uniform(0, 1)
                         self._log("info", f"等待 {delay:.2f} 秒后进行第 {attempt + 1} 次重试")
-                        await asyncio.sleep(delay)
+                        await waits.pause(delay, label=f"{self.platform_id}:重试间隔")
                     else:
                         self._log("error", f"操作最终失败: {operation_name}, 错误: {error_msg}")
                         return result
@@ -116,7 +127,7 @@ class AIPlatformChecker(ABC):
                 if attempt < max_retries:
                     delay = retry_delay + random.uniform(0, 1)
                     self._log("info", f"等待 {delay:.2f} 秒后进行第 {attempt + 1} 次重试")
-                    await asyncio.sleep(delay)
+                    await waits.pause(delay, label=f"{self.platform_id}:重试间隔")
 
         return {
             "success": False,
@@ -163,60 +174,43 @@ class AIPlatformChecker(ABC):
         try:
             self._log("info", f"正在导航到平台页面: {self.url}")
 
-            # 使用更灵活的等待策略
-            await page.goto(
-                self.url, 
-                wait_until="domcontentloaded",  # 改为domcontentloaded，显著加快速度
-                timeout=60000
+            # 只等 DOMContentLoaded，再等输入框、聊天区域或登录按钮任意一个出现（超时也继续后续检查）
+            await waits.goto(
+                page, self.url, timeout=60, label=f"{self.platform_id}:首页",
+                ready_selector="textarea, input[type='text'], [contenteditable='true'], [class*='chat'], [class*='login'], button"
             )
-
-            # 智能等待关键元素，替代死等
-            # 尝试等待输入框、聊天区域或登录按钮
-            try:
-                await page.wait_for_selector(
-                    "textarea, input[type='text'], [contenteditable='true'], [class*='chat'], [class*='login'], button", 
-                    timeout=8000,
-                    state="visible"
-                )
-            except Exception:
-                # 即使超时也不报错，继续后续检查
-                pass
             
             self._log("info", f"页面加载完成: {self.name}")
             
             # 检查是否需要登录（通过检测常见的登录元素）
-            login_indicators = [
-                "[class*='login']",
-                "[id*='login']",
-                "[class*='auth']",
-                "[id*='auth']",
-                "button*='登录'",
-                "button*='Sign in'"
-            ]
-            
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    # 使用 query_selector 而不是 query_selector_all，并检查可见性
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
+            has_login = await self._has_login_prompt(page)
             
             if has_login:
                 self._log("info", "检测到登录页面，请手动完成登录")
-                # 给用户30秒时间完成登录
-                await asyncio.sleep(30)
-                # 重新等待页面稳定
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._wait_manual_login(page)
 
             return True
         except Exception as e:
             self._log("error", f"导航失败: {e}")
             return False
 
+    async def _has_login_prompt(self, page: Page, login_indicators: Optional[List[str]] = None) -> bool:
+        """页面上是否有可见的登录入口（选择器表来自平台配置，一次往返探测）"""
+        login_indicators = login_indicators or self.config.get("login_indicators", AI_LOGIN_INDICATORS)
+        return await dom_probe.probe_any(page, login_indicators)
+
+    async def _wait_manual_login(self, page: Page, login_indicators: Optional[List[str]] = None):
+        """给用户30秒时间完成登录，登录入口消失就提前继续（无头运行时转有头浏览器重跑或直接跳过）"""
+        if not browser_mode.request_headed(browser_mode.SUBSYSTEM_CHECK, f"{self.name}需要登录"):
+            return
+
+        async def logged_in() -> bool:
+            return not await self._has_login_prompt(page, login_indicators)
+
+        await waits.wait_until(logged_in, timeout=30, interval=1, label=f"{self.platform_id}:手动登录")
+        # 重新等待页面稳定
+        await page.wait_for_load_state("domcontentloaded", timeout=30000)
+
     async def wait_for_selector(
         self,
         page: Page,
@@ -395,6 +389,8 @@ class AIPlatformChecker(ABC):
                     if stable_count >= required_stable_checks:
                         elapsed_time = (time.time() - start_time) * 1000
                         self._log("info", f"回答生成完成, 耗时: {elapsed_time:.0f}ms, 内容长度: {content_length}")
+                        waits.record(f"{self.platform_id}:回答生成", waits.KIND_ANSWER,
+                                     elapsed_time / 1000, timeout / 1000, True)
 
                         return {
                             "success": True,
@@ -417,6 +413,7 @@ class AIPlatformChecker(ABC):
         content_length = len(current_content.strip())
 
         self._log("warning", f"等待回答超时, 耗时: {elapsed_time:.0f}ms, 内容长度: {content_length}")
+        waits.record(f"{self.platform_id}:回答生成", waits.KIND_ANSWER, elapsed_time / 1000, timeout / 1000, False)
 
         return {
             "success": content_length > min_content_length,
@@ -665,7 +662,7 @@ class AIPlatformChecker(ABC):
                         for element in elements[:1]:
                             try:
                                 await element.click(timeout=3000)
-                                await asyncio.sleep(1)
+                                await waits.wait_dom_stable(page, timeout=3, label=f"{self.platform_id}:新对话")
                                 self._log("info", f"成功点击清理按钮: {selector}")
                                 return True
                             except Exception:
@@ -687,13 +684,14 @@ class AIPlatformChecker(ABC):
         Returns:
             操作日志列表
         """
-        return self.operation_log.copy()
+        return list(self.operation_log)
 
     async def clear_operation_log(self):
         """
         清空操作日志
         """
         self.operation_log.clear()
+        self._last_log_at = None
 
     async def submit_question(
         self,
@@ -722,7 +720,6 @@ class AIPlatformChecker(ABC):
             try:
                 await page.focus(input_selector)
                 await page.click(input_selector)
-                await asyncio.sleep(0.5)
             except Exception as e:
                 self._log("warning", f"聚焦/点击输入框失败: {e}")
             
@@ -757,7 +754,8 @@ class AIPlatformChecker(ABC):
                 self._log("warning", "检测到输入框为空，尝试使用 fill 作为回退方案")
                 await page.fill(input_selector, question)
             
-            await asyncio.sleep(0.5)
+            # 输入后发送按钮要等前端状态同步才可用
+            await waits.wait_dom_stable(page, quiet_ms=200, timeout=2, label=f"{self.platform_id}:输入同步")
             self._log("info", "问题输入完成，准备提交")
             
             # 4. 提交
@@ -6,7 +6,6 @@ DeepSeek检测器
 
 from typing import Dict, Any
 from playwright.async_api import Page
-import asyncio
 
 from .base import AIPlatformChecker
 
@@ -67,27 +66,10 @@ class DeepSeekChecker(AIPlatformChecker):
             except Exception:
                 pass
 
-            # 检查登录
-            login_indicators = [
-                "[class*='login']",
-                "button*='登录'",
-                "[class*='auth']"
-            ]
-            
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            # 检查登录（登录入口表在 AI_PLATFORMS 配置里）
+            if await self._has_login_prompt(page):
                 self._log("info", "检测到登录页面，请手动完成登录")
-                await asyncio.sleep(30)
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._wait_manual_login(page)
 
             return True
         except Exception as e:
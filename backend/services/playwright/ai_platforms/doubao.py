@@ -6,7 +6,6 @@
 
 from typing import Dict, Any
 from playwright.async_api import Page
-import asyncio
 
 from .base import AIPlatformChecker
 
@@ -53,36 +52,10 @@ class DoubaoChecker(AIPlatformChecker):
             except Exception:
                 pass
 
-            # 豆包特殊的登录状态检测
-            doubao_login_indicators = [
-                "[class*='login-btn']",
-                "[class*='login-button']",
-                "[href*='login']",
-                "[class*='account']",
-                "[class*='login']",
-                "[id*='login']",
-                "button*='登录'",
-                "button*='Sign in'"
-            ]
-
-            has_login = False
-            # 快速扫描登录元素
-            for indicator in doubao_login_indicators:
-                try:
-                    # 使用较短的超时时间
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            # 检查登录（登录入口表在 AI_PLATFORMS 配置里）
+            if await self._has_login_prompt(page):
                 self._log("info", "检测到豆包登录页面，请手动完成登录")
-                # 给用户30秒时间完成登录
-                await asyncio.sleep(30)
-                # 重新等待页面稳定
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._wait_manual_login(page)
             
             self._log("info", "豆包平台导航完成")
             return True
@@ -6,8 +6,8 @@
 
 from typing import Dict, Any
 from playwright.async_api import Page
-import asyncio
 
+from backend.services.playwright import waits
 from .base import AIPlatformChecker
 
 
@@ -74,27 +74,10 @@ class QianwenChecker(AIPlatformChecker):
             except Exception:
                 pass
 
-            # 检查登录
-            login_indicators = [
-                "[class*='login']",
-                "button*='登录'",
-                "[class*='auth']"
-            ]
-            
-            has_login = False
-            for indicator in login_indicators:
-                try:
-                    element = await page.query_selector(indicator)
-                    if element and await element.is_visible():
-                        has_login = True
-                        break
-                except Exception:
-                    continue
-
-            if has_login:
+            # 检查登录（登录入口表在 AI_PLATFORMS 配置里）
+            if await self._has_login_prompt(page):
                 self._log("info", "检测到登录页面，请手动完成登录")
-                await asyncio.sleep(30)
-                await page.wait_for_load_state("domcontentloaded", timeout=30000)
+                await self._wait_manual_login(page)
 
             return True
         except Exception as e:
@@ -117,13 +100,12 @@ class QianwenChecker(AIPlatformChecker):
             
             # 1. 点击输入框确保聚焦
             await page.click(input_selector)
-            await asyncio.sleep(0.3)
             
             # 2. 使用 fill 填充内容
             await page.fill(input_selector, question)
             self._log("info", "问题输入完成")
             
-            await asyncio.sleep(0.5)
+            await waits.wait_dom_stable(page, quiet_ms=200, timeout=2, label="qianwen:输入同步")
             
             # 3. 按 Enter 提交
             await page.keyboard.press("Enter")
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+浏览器运行模式（无头 / 有头 / 无头优先自动转有头）
+以前所有启动点都写死 headless=False，服务器上只能挂虚拟桌面跑有头 Chromium，又吃 CPU 又吃内存！
+
+用法：
+    browser = await p.chromium.launch(headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_CHECK))
+
+    # 碰到登录弹窗/验证码时
+    if not browser_mode.request_headed(browser_mode.SUBSYSTEM_COLLECT, "登录弹窗"):
+        return  # 无头且不能转有头：没人能操作，别干等
+
+auto 模式下，任务在 job_scope() 里运行时 request_headed() 直接抛 HeadedRequired 结束本次执行，
+任务由 worker 放回队列并标记需要有头浏览器，交给 WORKER_HEADED 的 worker 重跑，等 WORKER_HEADED_WAIT_SECONDS 没人接手就标记失败；
+进程内执行时本机有图形界面才原地用有头浏览器重跑，没有就直接失败。
+中间即使有代码把异常吞了，job_scope 记下的标记也会在任务结束时重新抛出来。
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from backend.config import BROWSER_MODE, BROWSER_MODES
+
+log = logger.bind(module="浏览器模式")
+
+MODE_HEADLESS = "headless"
+MODE_HEADED = "headed"
+MODE_AUTO = "auto"
+MODES = {MODE_HEADLESS, MODE_HEADED, MODE_AUTO}
+
+SUBSYSTEM_PUBLISH = "publish"
+SUBSYSTEM_CHECK = "index_check"
+SUBSYSTEM_COLLECT = "collect"
+SUBSYSTEM_AUTH = "auth"
+
+
+class HeadedRequired(Exception):
+    """无头运行中碰到需要人工处理的页面，本次执行放弃，转有头浏览器重跑"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"需要有头浏览器: {reason}")
+        self.reason = reason
+
+
+@dataclass
+class BrowserRun:
+    """一次任务执行的浏览器状态"""
+    headed: bool = False                 # 本次强制有头（已经从无头转过来了）
+    escalated: Optional[str] = None      # 请求转有头的原因
+
+
+_run: ContextVar[Optional[BrowserRun]] = ContextVar("browser_run", default=None)
+
+
+def mode_for(subsystem: str) -> str:
+    """子系统配置的模式，写错的按 auto 处理"""
+    mode = BROWSER_MODES.get(subsystem, BROWSER_MODE)
+    return mode if mode in MODES else MODE_AUTO
+
+
+def is_headless(subsystem: str) -> bool:
+    """当前执行该用无头还是有头启动浏览器"""
+    run = _run.get()
+    if run and run.headed:
+        return False
+    return mode_for(subsystem) != MODE_HEADED
+
+
+@contextmanager
+def job_scope(headed: bool = False) -> Iterator[BrowserRun]:
+    """包住一次任务执行：记录是否强制有头、有没有请求转有头"""
+    run = BrowserRun(headed=headed)
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+
+
+def request_headed(subsystem: str, reason: str) -> bool:
+    """
+    页面需要人工登录/过验证码时调用
+
+    Returns:
+        True 有头运行，调用方照旧等人工处理；False 无头运行且转不了有头，没人能操作，调用方别干等
+    Raises:
+        HeadedRequired: auto 模式下的任务，交给有头浏览器重跑
+    """
+    if not is_headless(subsystem):
+        return True
+    run = _run.get()
+    if run is not None and mode_for(subsystem) == MODE_AUTO:
+        if run.escalated is None:
+            run.escalated = reason
+            log.warning(f"🖥️ 无头浏览器碰到「{reason}」，任务转有头浏览器重跑")
+        raise HeadedRequired(run.escalated)
+    log.warning(f"⚠️ 无头浏览器碰到「{reason}」，无法人工处理，跳过等待")
+    return False
+
+
+def has_display() -> bool:
+    """本机能不能开有头浏览器：Linux 上没有 DISPLAY / WAYLAND_DISPLAY 就是无桌面服务器"""
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def raise_if_escalated():
+    """已经请求转有头的话立刻结束（用在会吞异常的重试循环里，避免把半截结果当失败记下来）"""
+    run = _run.get()
+    if run is not None and run.escalated:
+        raise HeadedRequired(run.escalated)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+搜索接口响应截获
+搜索页自己就会请求结构化的 JSON（标题、链接、赞同数、评论数、作者），以前偏要滚动页面再从卡片文字里抠数字！
+
+用法：
+    async with api_capture.capture(page, ["/api/v4/search_v3"]) as cap:
+        await waits.goto(page, search_url, ...)
+        hit = await cap.first(timeout=8)
+    if hit:
+        url, payload = hit
+
+只收 URL 包含任一子串、状态码 2xx、能解析成 JSON 的响应；退出 with 时摘掉监听。
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+log = logger.bind(module="接口截获")
+
+
+class ResponseCapture:
+    """一次截获：按到达顺序收集 (url, JSON)"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self.payloads: List[Tuple[str, Any]] = []
+        self._arrived = asyncio.Event()
+
+    def matches(self, url: str) -> bool:
+        return any(p in url for p in self.patterns)
+
+    async def on_response(self, response):
+        if not self.matches(response.url):
+            return
+        try:
+            if not response.ok:
+                log.debug(f"搜索接口返回 {response.status}: {response.url}")
+                return
+            payload = await response.json()
+        except Exception as e:
+            # 页面关了、响应不是 JSON，都当没截到
+            log.debug(f"搜索接口响应解析失败: {e}")
+            return
+        self.payloads.append((response.url, payload))
+        self._arrived.set()
+
+    async def first(self, timeout: float) -> Optional[Tuple[str, Any]]:
+        """等第一份 JSON，超时返回 None（调用方回退 DOM 抓取）"""
+        if not self.payloads:
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.payloads[0]
+
+
+@asynccontextmanager
+async def capture(page: Any, patterns: Sequence[str]) -> AsyncIterator[ResponseCapture]:
+    cap = ResponseCapture(patterns)
+    if not cap.patterns:
+        yield cap
+        return
+    page.on("response", cap.on_response)
+    try:
+        yield cap
+    finally:
+        try:
+            page.remove_listener("response", cap.on_response)
+        except Exception:
+            pass
@@ -7,11 +7,33 @@
 import asyncio
 import random
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, Tuple
 from dataclasses import dataclass
 from playwright.async_api import Page, BrowserContext
 from loguru import logger
 
+from backend.config import (
+    HTTP_FETCH_ENABLED, COLLECT_EXTRACT_CONCURRENCY, COLLECT_EXTRACT_JITTER, SEARCH_API_CAPTURE_TIMEOUT,
+)
+from backend.services.playwright import browser_mode, dom_probe, timing, waits
+from backend.services.playwright.browser_mode import HeadedRequired
+from . import api_capture, http_fetch
+
+# 登录弹窗/验证码的常见选择器（交给 dom_probe 在页面里批量判断可见性）
+LOGIN_POPUP_SELECTORS = [
+    ".Modal-wrapper",  # 知乎登录弹窗
+    ".login-modal",
+    ".captcha-box",
+    ".sign-flow-modal",  # 知乎登录
+    "[class*='login-modal']",  # 通用登录模态框
+    "[class*='LoginModal']",
+    ".SignFlow",  # 知乎
+    ".Button.SignFlow-submitButton",  # 知乎登录按钮
+    "iframe[src*='login']",  # 登录 iframe
+    "#captcha-verify-image",  # 验证码
+    "div[class*='captcha']",  # 通用验证码容器
+    ".verify-bar-close",  # 验证条关闭按钮
+]
 
 @dataclass
 class CollectedArticle:
@@ -27,12 +49,19 @@ class CollectedArticle:
     publish_time: str = ""
 
 
+# 边采边存的回调：每提取完一篇文章调用一次
+ArticleSink = Callable[[CollectedArticle], Awaitable[Any]]
+
+
 class BaseCollector(ABC):
     """
     基础文章收集适配器
     注意：所有平台收集器都要继承这个类！
     """
 
+    # 搜索页自己会请求的搜索接口（URL 子串），配了就优先从接口 JSON 里拿结果，截不到再抓 DOM
+    SEARCH_API_PATTERNS: Tuple[str, ...] = ()
+
     def __init__(self, platform_id: str, config: Dict[str, Any]):
         self.platform_id = platform_id
         self.config = config
@@ -40,6 +69,8 @@ class BaseCollector(ABC):
         self.search_url = config.get("search_url", "")
         self.min_likes = config.get("min_likes", 100)
         self.min_reads = config.get("min_reads", 1000)
+        self.extract_concurrency = config.get("extract_concurrency", COLLECT_EXTRACT_CONCURRENCY)
+        self.extract_jitter = config.get("extract_jitter", COLLECT_EXTRACT_JITTER)
 
     @abstractmethod
     async def search(self, page: Page, keyword: str) -> List[Dict[str, Any]]:
@@ -69,13 +100,190 @@ class BaseCollector(ABC):
         """
         pass
 
-    async def collect(self, page: Page, keyword: str) -> List[CollectedArticle]:
+    def parse_search_payload(self, payload: Any, url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        把搜索接口的 JSON 转成搜索结果（SEARCH_API_PATTERNS 配了才会用到）
+
+        Returns:
+            (搜索结果列表, 下一页接口地址)，没有下一页时地址为 None
+        """
+        return [], None
+
+    async def _open_search_api(
+        self, page: Page, search_url: str, ready_selector: str, label: str
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        打开搜索页，顺便截获页面自己请求的搜索接口
+
+        Returns:
+            (第一页结果, 下一页接口地址)；没截到或者解析不出结果返回 None，调用方回退 DOM 抓取
+        """
+        async with api_capture.capture(page, self.SEARCH_API_PATTERNS) as cap:
+            await waits.goto(page, search_url, ready_selector=ready_selector, label=label)
+            hit = await cap.first(timeout=SEARCH_API_CAPTURE_TIMEOUT) if self.SEARCH_API_PATTERNS else None
+        if not hit:
+            if self.SEARCH_API_PATTERNS:
+                logger.info(f"[{self.name}] 没截到搜索接口，回退页面抓取")
+            return None
+        try:
+            articles, next_url = self.parse_search_payload(hit[1], hit[0])
+        except Exception as e:
+            logger.warning(f"[{self.name}] 搜索接口数据解析失败，回退页面抓取: {e}")
+            return None
+        if not articles:
+            return None
+        logger.info(f"[{self.name}] 从搜索接口拿到 {len(articles)} 条结果")
+        return articles, next_url
+
+    async def _api_result_pages(
+        self,
+        page: Page,
+        first: Tuple[List[Dict[str, Any]], Optional[str]],
+        max_pages: int,
+        fallback: Optional[Callable[[int], AsyncIterator[List[Dict[str, Any]]]]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        从截到的第一页开始按接口游标往后翻（page.request 和页面共用 Cookie），不再滚动页面
+
+        Args:
+            fallback: 接口翻页失败（非 2xx、请求/解析异常）时接着走的页面翻页，参数是接口已经拿到的页数；
+                      没有下一页、结果为空是正常翻完，不回退
+        """
+        articles, next_url = first
+        yield articles
+        pages_done = 1
+        for _ in range(max_pages - 1):
+            if not next_url:
+                return
+            await self._random_sleep(1, 2)
+            try:
+                response = await page.request.get(next_url)
+                if not response.ok:
+                    raise RuntimeError(f"返回 {response.status}")
+                articles, next_url = self.parse_search_payload(await response.json(), next_url)
+            except Exception as e:
+                if not fallback:
+                    logger.warning(f"[{self.name}] 搜索接口翻页失败，停止翻页: {e}")
+                    return
+                logger.warning(f"[{self.name}] 搜索接口翻页失败，回退页面翻页: {e}")
+                async for articles in fallback(pages_done):
+                    yield articles
+                return
+            if not articles:
+                return
+            pages_done += 1
+            yield articles
+
+    def parse_article_html(self, html: str, url: str) -> Optional[str]:
+        """
+        从服务端返回的 HTML 里解析正文（直连提取用，不开浏览器）
+
+        Returns:
+            正文；平台不支持直连或解析不出来返回 None
+        """
+        return None
+
+    async def iter_contents(self, page: Page, urls: List[str]) -> AsyncIterator[Tuple[str, str]]:
+        """
+        批量提取正文，哪篇先拿到先吐哪篇：先并发直连，没拿到的交给提取页面池用浏览器打开
+
+        Yields:
+            (url, 正文)，两条路都没拿到的不吐
+        """
+        contents: Dict[str, Optional[str]] = {}
+        supports_fast_path = type(self).parse_article_html is not BaseCollector.parse_article_html
+        if HTTP_FETCH_ENABLED and supports_fast_path and urls:
+            try:
+                async with http_fetch.client_for(page) as client:
+                    contents = await http_fetch.fetch_all(client, urls, self.parse_article_html, self.platform_id)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 直连提取不可用，全部走浏览器: {e}")
+
+        misses = []
+        for url in urls:
+            if contents.get(url):
+                yield url, contents[url]
+            else:
+                misses.append(url)
+
+        async for url, content in self._extract_in_pages(page, misses):
+            if content:
+                yield url, content
+
+    async def extract_many(self, page: Page, urls: List[str]) -> Dict[str, str]:
+        """批量提取正文，全部完成后一起返回 {url: 正文}"""
+        return {url: content async for url, content in self.iter_contents(page, urls)}
+
+    async def _extract_in_pages(self, page: Page, urls: List[str]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        浏览器提取：在搜索页所在的上下文里另开 extract_concurrency 个页面并发打开文章，搜索页不动
+        每个页面打开下一篇前按 extract_jitter 随机停顿；页面池开不出来的话剩下的用搜索页逐篇提取
+        """
+        if not urls:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        finished: asyncio.Queue = asyncio.Queue()
+        done_marker = object()
+
+        async def worker():
+            try:
+                worker_page = timing.instrument(await page.context.new_page())
+            except Exception as e:
+                logger.warning(f"[{self.name}] 打开提取页面失败: {e}")
+                await finished.put(done_marker)
+                return
+            try:
+                while not queue.empty():
+                    url = queue.get_nowait()
+                    await self._random_sleep(*self.extract_jitter)
+                    try:
+                        content = await self.extract_content(worker_page, url)
+                    except HeadedRequired:
+                        raise
+                    except Exception as e:
+                        logger.error(f"[{self.name}] 提取正文失败: {e}")
+                        content = None
+                    await finished.put((url, content))
+            finally:
+                try:
+                    await worker_page.close()
+                except Exception:
+                    pass
+                await finished.put(done_marker)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(self.extract_concurrency, len(urls))))]
+        try:
+            running = len(workers)
+            while running:
+                item = await finished.get()
+                if item is done_marker:
+                    running -= 1
+                else:
+                    yield item
+            # 转有头之类的异常在这里抛出来
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+        # 页面池一个页面都没开出来：退回用搜索页逐篇提取
+        while not queue.empty():
+            url = queue.get_nowait()
+            yield url, await self.extract_content(page, url)
+
+    async def collect(
+        self, page: Page, keyword: str, on_article: Optional[ArticleSink] = None, frontier: Optional[Any] = None
+    ) -> List[CollectedArticle]:
         """
         收集爆火文章（主流程）
 
         Args:
             page: Playwright Page对象
             keyword: 搜索关键词
+            on_article: 每提取完一篇就回调一次（边采边存），不传就只在最后一起返回
+            frontier: 增量采集边界（crawl_frontier.FrontierRun），传了就只提取没采过的文章
 
         Returns:
             符合条件的文章列表
@@ -90,28 +298,47 @@ class BaseCollector(ABC):
             logger.info(f"[{self.name}] 筛选出 {len(trending_articles)} 篇爆火文章")
 
             # 3. 提取正文内容
+            by_url = {a["url"]: a for a in trending_articles}
+            urls = self._fresh_urls(list(by_url), frontier)
+            if frontier:
+                frontier.page_done(list(by_url), urls)
             collected = []
-            for article in trending_articles:
-                content = await self.extract_content(page, article["url"])
-                if content:
-                    collected.append(CollectedArticle(
-                        title=article.get("title", ""),
-                        url=article.get("url", ""),
-                        content=content,
-                        likes=article.get("likes", 0),
-                        reads=article.get("reads", 0),
-                        comments=article.get("comments", 0),
-                        author=article.get("author", ""),
-                        platform=self.platform_id,
-                        publish_time=article.get("publish_time", "")
-                    ))
+            async for url, content in self.iter_contents(page, urls):
+                item = self._build_article(by_url[url], content)
+                collected.append(item)
+                if on_article:
+                    await on_article(item)
 
             return collected
 
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"[{self.name}] 收集文章失败: {e}")
             return []
 
+    def _fresh_urls(self, urls: List[str], frontier: Optional[Any]) -> List[str]:
+        """提取正文前过滤掉采过的链接（没有 frontier 就原样返回）"""
+        if frontier is None:
+            return urls
+        fresh = frontier.fresh(urls)
+        if len(fresh) < len(urls):
+            logger.info(f"[{self.name}] 跳过已采集的 {len(urls) - len(fresh)} 篇，待提取 {len(fresh)} 篇")
+        return fresh
+
+    def _build_article(self, article: Dict[str, Any], content: str) -> CollectedArticle:
+        return CollectedArticle(
+            title=article.get("title", ""),
+            url=article.get("url", ""),
+            content=content,
+            likes=article.get("likes", 0),
+            reads=article.get("reads", 0),
+            comments=article.get("comments", 0),
+            author=article.get("author", ""),
+            platform=self.platform_id,
+            publish_time=article.get("publish_time", "")
+        )
+
     def _filter_trending(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         筛选爆火文章
@@ -132,18 +359,16 @@ class BaseCollector(ABC):
 
     async def wait_for_selector(self, page: Page, selector: str, timeout: int = 10000) -> bool:
         """等待选择器出现"""
-        try:
-            await page.wait_for_selector(selector, timeout=timeout)
+        if await waits.wait_visible(page, selector, timeout=timeout / 1000, label=f"{self.platform_id}:{selector}"):
             return True
-        except Exception as e:
-            logger.warning(f"等待选择器超时: {selector}, {e}")
-            return False
+        logger.warning(f"等待选择器超时: {selector}")
+        return False
 
     async def navigate_to_search(self, page: Page, keyword: str) -> bool:
         """导航到搜索页面"""
         try:
             search_url = self.search_url.format(keyword=keyword)
-            await page.goto(search_url, wait_until="networkidle")
+            await waits.goto(page, search_url, label=f"{self.platform_id}:搜索页")
             logger.info(f"[{self.name}] 已导航到搜索页: {keyword}")
             return True
         except Exception as e:
@@ -151,8 +376,8 @@ class BaseCollector(ABC):
             return False
 
     async def _random_sleep(self, min_seconds: float = 2.0, max_seconds: float = 5.0):
-        """随机等待，模拟真人操作"""
-        await asyncio.sleep(random.uniform(min_seconds, max_seconds))
+        """随机等待，模拟真人操作（有意的停顿，单独记一类）"""
+        await waits.pause(random.uniform(min_seconds, max_seconds), label=f"{self.platform_id}:随机节奏")
 
     async def _human_scroll(self, page: Page):
         """模拟真人缓慢滚动"""
@@ -201,30 +426,12 @@ class BaseCollector(ABC):
                 await self._wait_for_manual_login(page)
                 return
 
-            # 2. 常见弹窗选择器
-            popup_selectors = [
-                ".Modal-wrapper", # 知乎登录弹窗
-                ".login-modal", 
-                ".captcha-box",
-                ".sign-flow-modal", # 知乎登录
-                "[class*='login-modal']", # 通用登录模态框
-                "[class*='LoginModal']",
-                ".SignFlow", # 知乎
-                ".Button.SignFlow-submitButton", # 知乎登录按钮
-                "iframe[src*='login']", # 登录 iframe
-                "#captcha-verify-image", # 验证码
-                "div[class*='captcha']", # 通用验证码容器
-                ".verify-bar-close", # 验证条关闭按钮
-            ]
-            
+            # 2. 常见弹窗选择器（每次滚动都要查，一次往返探测完）
             needs_login = False
-            for selector in popup_selectors:
-                if await page.query_selector(selector):
-                    # 确保是可见的
-                    if await page.is_visible(selector):
-                        needs_login = True
-                        logger.warning(f"[{self.name}] 发现登录弹窗选择器: {selector}")
-                        break
+            popup = await dom_probe.probe_first(page, LOGIN_POPUP_SELECTORS)
+            if popup:
+                needs_login = True
+                logger.warning(f"[{self.name}] 发现登录弹窗选择器: {popup.selector}")
             
             # 3. 检查页面文本（作为兜底）
             if not needs_login:
@@ -261,28 +468,39 @@ class BaseCollector(ABC):
             if needs_login:
                 await self._wait_for_manual_login(page)
                 
+        except HeadedRequired:
+            raise
         except Exception as e:
             # 这里的异常不应该阻断流程，只是记录日志
             logger.debug(f"[{self.name}] 登录检测异常: {e}")
 
     async def _wait_for_manual_login(self, page: Page):
-        """等待手动登录"""
+        """等待手动登录（无头运行时转有头浏览器重跑，或者没人能操作就直接跳过）"""
+        if not browser_mode.request_headed(browser_mode.SUBSYSTEM_COLLECT, f"{self.name}登录弹窗/验证码"):
+            return
+
         logger.warning("\n" + "!"*50)
         logger.warning(f"[{self.name}] 检测到登录弹窗或验证码！")
         logger.warning("请在 45 秒内手动完成登录/验证操作...")
         logger.warning("!"*50 + "\n")
         
-        # 给用户 45 秒时间手动操作
-        # 每 5 秒检查一次是否登录成功（可选，这里简单等待）
-        for i in range(9):
-            await asyncio.sleep(5)
-            logger.info(f"[{self.name}] 剩余等待时间: {45 - (i+1)*5} 秒...")
-            
-            # 如果弹窗消失了，提前结束等待
-            # 这里简单实现，假设用户操作完后弹窗会消失
-            # 实际上很难通用判断，所以还是硬等待比较稳妥
-            
-        logger.info(f"[{self.name}] 手动操作时间结束，继续执行...")
+        # 给用户 45 秒时间手动操作，弹窗消失、离开登录页就提前继续
+        cleared = await waits.wait_until(
+            lambda: self._login_cleared(page), timeout=45, interval=1, label=f"{self.platform_id}:手动登录"
+        )
+        if cleared:
+            logger.info(f"[{self.name}] 登录弹窗已消失，继续执行...")
+        else:
+            logger.info(f"[{self.name}] 手动操作时间结束，继续执行...")
+
+    async def _login_cleared(self, page: Page) -> bool:
+        """不在登录页、也没有可见的登录弹窗/验证码"""
+        try:
+            if "signin" in page.url or "login" in page.url:
+                return False
+            return not await dom_probe.probe_any(page, LOGIN_POPUP_SELECTORS, strict=True)
+        except Exception:
+            return False
 
 
 class CollectorRegistry:
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+文章正文直连提取（不开浏览器页面）
+以前每篇文章都要浏览器整页导航 + 随机等 3~5 秒，就为了读一段服务端已经渲染好的正文，采集全卡在浏览器上！
+
+用法：
+    async with http_fetch.client_for(page) as client:
+        contents = await http_fetch.fetch_all(client, urls, collector.parse_article_html, "zhihu")
+
+client_for() 从页面所在的浏览器上下文拿 Cookie 和 UA，登录态和浏览器一致；
+fetch_all() 按 HTTP_FETCH_CONCURRENCY 并发拉取，交给平台的解析函数（服务端渲染的 HTML 或内嵌的 JSON 状态）。
+状态码不对、跳到登录页、解析出来的正文不够长都算没拿到，返回 None，由收集器回退到浏览器提取。
+"""
+
+import asyncio
+import json
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from backend.config import HTTP_FETCH_CONCURRENCY, HTTP_FETCH_TIMEOUT, HTTP_FETCH_MIN_CHARS
+from backend.services.playwright import timing
+
+log = logger.bind(module="正文直连")
+
+# 跳到这些地址说明被登录墙/验证挡住了
+LOGIN_URL_KEYWORDS = ("signin", "login", "passport", "verify", "captcha")
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "li", "ul", "ol", "blockquote", "pre", "figure", "figcaption",
+    "h1", "h2", "h3", "h4", "h5", "h6", "tr", "table",
+}
+SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "button"}
+VOID_TAGS = {"br", "img", "hr", "input", "meta", "link", "source", "wbr", "area", "col", "embed", "param", "track"}
+# 可以省略结束标签的元素：遇到这些开始标签时隐式关闭（<p>a<p>b、<li>a<li>b 这种写法）
+IMPLIED_END = {
+    "p": BLOCK_TAGS | {"dl", "hr", "header", "footer", "nav", "aside", "main", "form"},
+    "li": {"li"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "tr": {"tr"},
+    "td": {"td", "th", "tr"},
+    "th": {"td", "th", "tr"},
+    "option": {"option", "optgroup"},
+}
+
+Parser = Callable[[str, str], Optional[str]]
+
+
+class _TextExtractor(HTMLParser):
+    """
+    HTML 转纯文本：块级元素换行，脚本样式丢掉；给了 root 就只取第一个命中元素里面的文字
+    用标签栈配对开始/结束标签：省略了结束标签的 <p>/<li> 被隐式关闭，对不上的结束标签直接忽略，
+    root 只在遇到它自己的结束标签时才算结束，不会被正文里没闭合的段落提前截断
+    """
+
+    def __init__(self, root: Optional[Callable[[str, Dict[str, str]], bool]] = None):
+        super().__init__(convert_charrefs=True)
+        self.root = root
+        self.stack: List[str] = []
+        self.skip = 0
+        self.done = False
+        self.parts: List[str] = []
+
+    def _capturing(self) -> bool:
+        return not self.done and (self.root is None or bool(self.stack))
+
+    def _push(self, tag: str):
+        self.stack.append(tag)
+        if tag in SKIP_TAGS:
+            self.skip += 1
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def _pop(self):
+        tag = self.stack.pop()
+        if tag in SKIP_TAGS and self.skip:
+            self.skip -= 1
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self.root is not None and not self.stack:
+            if tag not in VOID_TAGS and self.root(tag, {k: v or "" for k, v in attrs}):
+                self.stack.append(tag)
+            return
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self.parts.append("\n")
+            return
+        # 栈底是 root，不会被隐式关闭
+        floor = 1 if self.root is not None else 0
+        while len(self.stack) > floor and tag in IMPLIED_END.get(self.stack[-1], ()):
+            self._pop()
+        self._push(tag)
+
+    def handle_endtag(self, tag):
+        if not self._capturing() or tag in VOID_TAGS:
+            return
+        # 从栈顶往下找同名标签，中间没闭合的一起关掉；找不到就是多余的结束标签
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index] == tag:
+                break
+        else:
+            return
+        if self.root is not None and index == 0:
+            while len(self.stack) > 1:
+                self._pop()
+            self.stack.pop()
+            self.done = True
+            return
+        while len(self.stack) > index:
+            self._pop()
+
+    def handle_data(self, data):
+        if self._capturing() and not self.skip:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        lines = (re.sub(r"\s+", " ", line).strip() for line in "".join(self.parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+def match_root(tags: tuple = (), classes: tuple = ()) -> Callable[[str, Dict[str, str]], bool]:
+    """正文容器：标签名命中，或者 class 里包含任一子串"""
+    def matcher(tag: str, attrs: Dict[str, str]) -> bool:
+        if tag in tags:
+            return True
+        cls = attrs.get("class", "")
+        return any(c in cls for c in classes)
+    return matcher
+
+
+def html_to_text(html: str, root: Optional[Callable[[str, Dict[str, str]], bool]] = None) -> str:
+    extractor = _TextExtractor(root)
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception as e:
+        log.debug(f"HTML 解析中断: {e}")
+    return extractor.text()
+
+
+def script_json(html: str, script_id: str) -> Optional[Any]:
+    """取 <script id="..."> 里内嵌的 JSON 状态（知乎 js-initialData 这种）"""
+    match = re.search(
+        rf'<script[^>]*\bid=["\']{re.escape(script_id)}["\'][^>]*>(.*?)</script>', html, re.S
+    )
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+@dataclass
+class FetchOutcome:
+    """一篇文章的直连结果"""
+    url: str
+    content: Optional[str] = None
+    reason: str = ""          # 没拿到的原因：status_403 / login_redirect / too_short / error
+    size: int = 0
+
+
+class FetchStats:
+    """按平台聚合的直连统计（进程内），pages_per_sec 按批次的墙钟时间算"""
+
+    def __init__(self):
+        self._platforms: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, platform: str, outcomes: List[FetchOutcome], wall_seconds: float):
+        row = self._platforms.setdefault(platform, {
+            "pages": 0, "hits": 0, "fallbacks": 0, "bytes": 0, "seconds": 0.0, "reasons": {}
+        })
+        row["pages"] += len(outcomes)
+        row["seconds"] += wall_seconds
+        for outcome in outcomes:
+            row["bytes"] += outcome.size
+            if outcome.content:
+                row["hits"] += 1
+            else:
+                row["fallbacks"] += 1
+                row["reasons"][outcome.reason] = row["reasons"].get(outcome.reason, 0) + 1
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "platform": platform,
+                "pages": row["pages"],
+                "hits": row["hits"],
+                "fallbacks": row["fallbacks"],
+                "hit_rate": round(row["hits"] / row["pages"], 3) if row["pages"] else 0.0,
+                "pages_per_sec": round(row["pages"] / row["seconds"], 2) if row["seconds"] else 0.0,
+                "kb": round(row["bytes"] / 1024, 1),
+                "fallback_reasons": dict(row["reasons"]),
+            }
+            for platform, row in sorted(self._platforms.items())
+        ]
+
+    def clear(self):
+        self._platforms.clear()
+
+
+fetch_stats = FetchStats()
+
+
+@asynccontextmanager
+async def client_for(page: Any, timeout: float = HTTP_FETCH_TIMEOUT) -> AsyncIterator[httpx.AsyncClient]:
+    """用页面所在浏览器上下文的 Cookie 和 UA 建一个 httpx 客户端"""
+    cookies = httpx.Cookies()
+    for cookie in await page.context.cookies():
+        cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    headers = {"Accept-Language": "zh-CN,zh;q=0.9"}
+    try:
+        headers["User-Agent"] = await page.evaluate("navigator.userAgent")
+    except Exception:
+        pass
+    async with httpx.AsyncClient(
+        cookies=cookies, headers=headers, timeout=timeout, follow_redirects=True
+    ) as client:
+        yield client
+
+
+async def fetch_one(client: httpx.AsyncClient, url: str, parse: Parser) -> FetchOutcome:
+    outcome = FetchOutcome(url=url)
+    try:
+        response = await client.get(url)
+    except Exception as e:
+        log.debug(f"直连请求失败 {url}: {e}")
+        outcome.reason = "error"
+        return outcome
+
+    outcome.size = len(response.content)
+    final_url = str(response.url)
+    if response.status_code != 200:
+        outcome.reason = f"status_{response.status_code}"
+    elif any(k in final_url for k in LOGIN_URL_KEYWORDS):
+        outcome.reason = "login_redirect"
+    else:
+        try:
+            content = parse(response.text, final_url)
+        except Exception as e:
+            log.debug(f"直连解析失败 {url}: {e}")
+            content = None
+        if content and len(content.strip()) > HTTP_FETCH_MIN_CHARS:
+            outcome.content = content.strip()
+        else:
+            outcome.reason = "too_short"
+    return outcome
+
+
+async def fetch_all(
+    client: httpx.AsyncClient,
+    urls: List[str],
+    parse: Parser,
+    platform: str,
+    concurrency: int = HTTP_FETCH_CONCURRENCY
+) -> Dict[str, Optional[str]]:
+    """
+    并发直连提取一批文章
+
+    Returns:
+        {url: 正文}，没拿到的是 None（调用方回退浏览器）
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(url: str) -> FetchOutcome:
+        async with semaphore:
+            start = time.monotonic()
+            outcome = await fetch_one(client, url, parse)
+            timing.record_span(platform, timing.OP_COLLECT, "http_fetch",
+                               (time.monotonic() - start) * 1000, outcome.content is not None)
+            return outcome
+
+    start = time.monotonic()
+    outcomes = await asyncio.gather(*(bounded(url) for url in urls))
+    elapsed = time.monotonic() - start
+    fetch_stats.record(platform, outcomes, elapsed)
+
+    hits = sum(1 for o in outcomes if o.content)
+    if outcomes:
+        log.info(f"⚡ [{platform}] 直连提取 {len(outcomes)} 篇，命中 {hits}，回退浏览器 {len(outcomes) - hits}，"
+                 f"{len(outcomes) / elapsed if elapsed else 0:.1f} 篇/秒")
+    return {o.url: o.content for o in outcomes}
@@ -6,12 +6,19 @@
 
 import asyncio
 import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from playwright.async_api import Page
 from loguru import logger
 
+from backend.services.playwright import waits
+from backend.services.playwright.browser_mode import HeadedRequired
+from . import http_fetch
 from .base import BaseCollector
 
+RESULT_SELECTOR = "[class*='result-content'], .result-item, .article-card"
+CONTENT_SELECTOR = "article, .article-content, .tt-article-content, .syl-article-base, [class*='article-body']"
+
 
 class ToutiaoCollector(BaseCollector):
     """
@@ -20,36 +27,81 @@ class ToutiaoCollector(BaseCollector):
     搜索页面：https://so.toutiao.com/search?keyword={keyword}
     """
 
+    # 搜索接口：data[] 里有标题、链接、阅读/评论/点赞数和来源，has_more + offset 是翻页游标
+    SEARCH_API_PATTERNS = ("/api/search/content", "/search/?keyword")
+
     async def search(self, page: Page, keyword: str) -> List[Dict[str, Any]]:
         """搜索头条文章"""
         try:
-            # 1. 导航到搜索页
+            # 1. 导航到搜索页（同时截搜索接口）
             # 使用更完整的搜索 URL，模拟真实请求
             search_url = f"https://so.toutiao.com/search?keyword={keyword}&enable_druid_v2=1&dvpf=pc&source=search_subtab_switch&pd=information&action_type=search_subtab_switch&page_num=0&search_id=&from=news&cur_tab_title=news"
-            await page.goto(search_url, wait_until="networkidle")
-            
-            # 增加延时，等待页面加载和可能的弹窗
-            await self._random_sleep(3, 5)
-
-            # 2. 滚动加载更多
-            await self._human_scroll(page)
-
-            # 3. 提取搜索结果
-            articles = await self._extract_search_results(page)
-
-            return articles
-
+            first = await self._open_search_api(page, search_url, RESULT_SELECTOR, "toutiao:搜索页")
+
+            # 结果出来后再停一小会儿，模拟真人 + 等可能的弹窗
+            await self._random_sleep(1, 2)
+
+            # 2. 截到接口就跟着游标翻页，不用滚动
+            if first:
+                articles = {}
+                pages = self._api_result_pages(
+                    page, first, self.config.get("max_pages", 3), fallback=lambda _: self._dom_result_pages(page)
+                )
+                async for page_articles in pages:
+                    for article in page_articles:
+                        articles.setdefault(article["url"], article)
+                return list(articles.values())
+
+            # 3. 兜底：滚动加载更多，再从卡片里抓
+            return [article async for page_articles in self._dom_result_pages(page) for article in page_articles]
+
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"[头条] 搜索失败: {e}")
             return []
 
+    async def _dom_result_pages(self, page: Page) -> AsyncIterator[List[Dict[str, Any]]]:
+        """页面抓取：滚动加载更多，再从卡片里抓（接口翻页中途失败也走这里，和接口拿到的按链接去重）"""
+        await self._human_scroll(page)
+        yield await self._extract_search_results(page)
+
+    def parse_search_payload(self, payload: Any, url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """搜索接口 JSON -> 搜索结果：没有标题/链接的（视频、用户、聚合卡片）跳过"""
+        articles = []
+        for item in payload.get("data") or []:
+            title = item.get("title") or ""
+            link = item.get("article_url") or item.get("share_url") or item.get("display_url") or ""
+            if not title or not link:
+                continue
+            if not link.startswith("http"):
+                link = f"https://www.toutiao.com{link}"
+
+            reads = int(item.get("read_count") or item.get("go_detail_count") or 0)
+            articles.append({
+                "title": title.strip(),
+                "url": link,
+                "likes": int(item.get("digg_count") or item.get("like_count") or reads // 100),
+                "reads": reads,
+                "comments": int(item.get("comment_count") or 0),
+                "author": (item.get("source") or item.get("media_name") or "").strip(),
+            })
+
+        next_url = None
+        if payload.get("has_more") and payload.get("offset") is not None:
+            parts = urlsplit(url)
+            query = dict(parse_qsl(parts.query, keep_blank_values=True))
+            query["offset"] = str(payload["offset"])
+            next_url = urlunsplit(parts._replace(query=urlencode(query)))
+        return articles, next_url
+
     async def _extract_search_results(self, page: Page) -> List[Dict[str, Any]]:
         """提取搜索结果"""
         articles = []
 
         try:
             # 获取搜索结果项
-            cards = await page.query_selector_all("[class*='result-content'], .result-item, .article-card")
+            cards = await page.query_selector_all(RESULT_SELECTOR)
 
             for card in cards:
                 try:
@@ -104,10 +156,10 @@ class ToutiaoCollector(BaseCollector):
         """提取文章正文"""
         try:
             logger.info(f"[头条] 正在提取文章: {url}")
-            await page.goto(url, wait_until="domcontentloaded")
+            await waits.goto(page, url, ready_selector=CONTENT_SELECTOR, label="toutiao:文章页")
             
-            # 增加延时，等待页面加载
-            await self._random_sleep(3, 5)
+            # 正文已经出来了，只留一点真人节奏
+            await self._random_sleep(1, 2)
 
             # 检测登录弹窗
             await self._handle_login_popup(page)
@@ -177,6 +229,12 @@ class ToutiaoCollector(BaseCollector):
             logger.error(f"[头条] 提取正文失败: {e}")
             return None
 
+    def parse_article_html(self, html: str, url: str) -> Optional[str]:
+        """直连提取：文章页是服务端渲染的，正文在 article / .article-content 容器里"""
+        return http_fetch.html_to_text(
+            html, http_fetch.match_root(tags=("article",), classes=("article-content", "syl-article-base"))
+        )
+
     def _parse_number(self, text: str) -> int:
         """解析数字"""
         if not text:
@@ -5,12 +5,17 @@
 """
 
 import asyncio
+import functools
 import re
-from typing import Dict, Any, Optional, List
+from html import unescape
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from playwright.async_api import Page
 from loguru import logger
 
-from .base import BaseCollector, CollectedArticle
+from backend.services.playwright import waits
+from backend.services.playwright.browser_mode import HeadedRequired
+from . import http_fetch
+from .base import ArticleSink, BaseCollector, CollectedArticle
 
 
 class ZhihuCollector(BaseCollector):
@@ -32,129 +37,163 @@ class ZhihuCollector(BaseCollector):
         "pagination_container": ".Pagination",
     }
 
-    async def search(self, page: Page, keyword: str) -> List[Dict[str, Any]]:
+    # 搜索页请求的搜索接口：data[].object 里有赞同数/评论数/作者，paging.next 是下一页游标
+    SEARCH_API_PATTERNS = ("/api/v4/search_v3",)
+
+    async def _result_pages(self, page: Page, keyword: str) -> AsyncIterator[List[Dict[str, Any]]]:
         """
-        搜索知乎文章，支持多页翻页
+        一页一页给出搜索结果：优先截搜索接口并跟着游标翻页，截不到再滚动页面抓卡片、点下一页
         """
-        all_articles = []
-        try:
-            # 1. 导航到搜索页
-            search_url = f"https://www.zhihu.com/search?type=content&q={keyword}"
-            await page.goto(search_url, wait_until="networkidle")
-            
-            # 从配置中获取最大页数，默认3页
-            max_pages = self.config.get("max_pages", 3)
-            
-            for current_page in range(1, max_pages + 1):
-                logger.info(f"[知乎] 正在搜索第 {current_page} 页...")
-                
+        search_url = f"https://www.zhihu.com/search?type=content&q={keyword}"
+        # 从配置中获取最大页数，默认3页
+        max_pages = self.config.get("max_pages", 3)
+
+        first = await self._open_search_api(page, search_url, self.SELECTORS["search_results"], "zhihu:搜索页")
+        if first:
+            await self._handle_login_popup(page)
+            # 接口翻页中途失败：页面还停在第一页，点过接口已经拿到的页接着抓
+            fallback = functools.partial(self._dom_result_pages, page, max_pages)
+            async for articles in self._api_result_pages(page, first, max_pages, fallback=fallback):
+                yield articles
+            return
+
+        async for articles in self._dom_result_pages(page, max_pages):
+            yield articles
+
+    async def _dom_result_pages(self, page: Page, max_pages: int, skip_pages: int = 0) -> AsyncIterator[List[Dict[str, Any]]]:
+        """页面翻页：滚动抓卡片、点下一页；skip_pages 是接口已经拿到的页，只点过去不重复抓"""
+        for current_page in range(1, max_pages + 1):
+            if current_page > skip_pages:
+                logger.info(f"[知乎] 正在抓取第 {current_page} 页...")
+
                 # 模拟真人阅读延时
                 await self._random_sleep(2, 4)
                 await self._handle_login_popup(page)
-                
-                # 2. 模拟真人滚动加载
+
+                # 模拟真人滚动加载
                 await self._human_scroll(page)
+                yield await self._extract_search_results(page)
+
+            # 寻找并点击“下一页”
+            if current_page < max_pages:
+                next_button = await page.query_selector(self.SELECTORS["next_page_button"])
+                if next_button and await next_button.is_visible():
+                    logger.info(f"[知乎] 发现下一页按钮，准备点击...")
+                    await next_button.scroll_into_view_if_needed()
+                    await self._random_sleep(1, 2)
+                    await next_button.click()
+                    await self._wait_results_refreshed(page)
+                else:
+                    logger.info(f"[知乎] 未发现更多页码或按钮，停止翻页")
+                    return
 
-                # 3. 提取当前页搜索结果
-                page_articles = await self._extract_search_results(page)
-                
+    async def search(self, page: Page, keyword: str) -> List[Dict[str, Any]]:
+        """
+        搜索知乎文章，支持多页翻页
+        """
+        all_articles = []
+        seen = set()
+        try:
+            current_page = 0
+            async for page_articles in self._result_pages(page, keyword):
+                current_page += 1
                 # 去重合并
                 for art in page_articles:
-                    if not any(a['url'] == art['url'] for a in all_articles):
+                    if art['url'] not in seen:
+                        seen.add(art['url'])
                         all_articles.append(art)
-                
+
                 logger.info(f"[知乎] 第 {current_page} 页搜索完成，当前累计: {len(all_articles)} 篇")
 
-                # 4. 寻找并点击“下一页”
-                if current_page < max_pages:
-                    next_button = await page.query_selector(self.SELECTORS["next_page_button"])
-                    if next_button and await next_button.is_visible():
-                        logger.info(f"[知乎] 发现下一页按钮，准备点击...")
-                        await next_button.scroll_into_view_if_needed()
-                        await self._random_sleep(1, 2)
-                        await next_button.click()
-                        await page.wait_for_load_state("networkidle")
-                    else:
-                        logger.info(f"[知乎] 未发现更多页码或按钮，停止翻页")
-                        break
-            
             return all_articles
 
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"[知乎] 搜索过程中发生异常: {e}")
             return all_articles
 
-    async def collect(self, page: Page, keyword: str) -> List[CollectedArticle]:
+    async def collect(
+        self, page: Page, keyword: str, on_article: Optional[ArticleSink] = None, frontier: Optional[Any] = None
+    ) -> List[CollectedArticle]:
         """
         收集知乎爆火文章（重写基类方法以实现分页顺序抓取）
+        传了 frontier 的话只提取没采过的文章，连续几页都是采过的就不再往后翻
         """
-        # 我们这里依然可以使用重写的 collect 来实现更精细的按页顺序存储逻辑
         # 如果直接用基类的 collect，它会先跑完所有页的 search，然后再跑 extract_content
         # 这里的重写能保证“抓到一页，处理一页”，更符合用户“按顺序存储”且防封的需求
         all_collected = []
+        handled = set()
+        result_pages = self._result_pages(page, keyword)
         try:
-            # 1. 导航到搜索页
-            search_url = f"https://www.zhihu.com/search?type=content&q={keyword}"
-            await page.goto(search_url, wait_until="networkidle")
-            
-            max_pages = self.config.get("max_pages", 3)
-            
-            for current_page in range(1, max_pages + 1):
-                logger.info(f"[知乎] 正在处理第 {current_page} 页...")
-                
-                await self._random_sleep(2, 4)
-                await self._handle_login_popup(page)
-                await self._human_scroll(page)
+            current_page = 0
+            async for page_articles in result_pages:
+                current_page += 1
 
-                # 提取当前页结果
-                page_articles = await self._extract_search_results(page)
-                
                 # 立即筛选并提取正文
                 trending_in_page = self._filter_trending(page_articles)
                 logger.info(f"[知乎] 第 {current_page} 页筛选出 {len(trending_in_page)} 篇爆火文章")
 
-                for article in trending_in_page:
-                    if any(a.url == article["url"] for a in all_collected):
-                        continue
-                        
-                    content = await self.extract_content(page, article["url"])
-                    if content:
-                        all_collected.append(CollectedArticle(
-                            title=article.get("title", ""),
-                            url=article.get("url", ""),
-                            content=content,
-                            likes=article.get("likes", 0),
-                            reads=article.get("reads", 0),
-                            comments=article.get("comments", 0),
-                            author=article.get("author", ""),
-                            platform=self.platform_id,
-                            publish_time=article.get("publish_time", "")
-                        ))
-                        await self._random_sleep(1, 3)
-                    
-                    # 提取完后必须切回搜索结果页
-                    if page.url != search_url:
-                        await page.goto(search_url, wait_until="networkidle")
-                        await self._random_sleep(1, 2)
+                # 先并发直连拿正文，拿不到的交给提取页面池，搜索结果页一直留着，拿到一篇存一篇
+                by_url = {a["url"]: a for a in trending_in_page}
+                page_urls = [u for u in by_url if u not in handled]
+                handled.update(page_urls)
+                fresh = self._fresh_urls(page_urls, frontier)
+                async for url, content in self.iter_contents(page, fresh):
+                    item = self._build_article(by_url[url], content)
+                    all_collected.append(item)
+                    if on_article:
+                        await on_article(item)
 
                 logger.info(f"[知乎] 第 {current_page} 页处理完成，当前累计采集: {len(all_collected)} 篇")
+                if frontier and frontier.page_done(list(by_url), fresh):
+                    break
 
-                if current_page < max_pages:
-                    next_button = await page.query_selector(self.SELECTORS["next_page_button"])
-                    if next_button and await next_button.is_visible():
-                        await next_button.scroll_into_view_if_needed()
-                        await self._random_sleep(1, 2)
-                        await next_button.click()
-                        await page.wait_for_load_state("networkidle")
-                        search_url = page.url
-                    else:
-                        break
-            
             return all_collected
 
+        except HeadedRequired:
+            raise
         except Exception as e:
             logger.error(f"[知乎] 采集过程中发生异常: {e}")
             return all_collected
+        finally:
+            # 提前停止翻页时把结果页生成器收掉
+            await result_pages.aclose()
+
+    def parse_search_payload(self, payload: Any, url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """搜索接口 JSON -> 搜索结果：只要回答和专栏文章，链接换成网页地址"""
+        articles = []
+        for item in payload.get("data") or []:
+            obj = item.get("object") or {}
+            question = obj.get("question") or {}
+            if obj.get("type") == "article":
+                link = f"https://zhuanlan.zhihu.com/p/{obj.get('id')}"
+            elif obj.get("type") == "answer" and question.get("id"):
+                link = f"https://www.zhihu.com/question/{question['id']}/answer/{obj.get('id')}"
+            else:
+                continue
+
+            title = (item.get("highlight") or {}).get("title") or obj.get("title") or question.get("name") or ""
+            title = unescape(re.sub(r"<[^>]+>", "", title)).strip()
+            likes = int(obj.get("voteup_count") or 0)
+            if title:
+                articles.append({
+                    "title": title,
+                    "url": link,
+                    "likes": likes,
+                    "reads": likes * 50,  # 知乎没有直接给阅读量，跟页面抓取一样用点赞估算
+                    "comments": int(obj.get("comment_count") or 0),
+                    "author": ((obj.get("author") or {}).get("name") or "").strip(),
+                })
+
+        paging = payload.get("paging") or {}
+        next_url = None if paging.get("is_end", True) else paging.get("next")
+        return articles, next_url
+
+    async def _wait_results_refreshed(self, page: Page):
+        """翻页后等新一页结果渲染完（搜索页长连接多，networkidle 经常等满超时）"""
+        await waits.wait_visible(page, self.SELECTORS["search_results"], timeout=15, label="zhihu:翻页结果")
+        await waits.wait_dom_stable(page, timeout=5, label="zhihu:翻页渲染")
 
     async def _extract_search_results(self, page: Page) -> List[Dict[str, Any]]:
         """提取搜索结果"""
@@ -221,7 +260,7 @@ class ZhihuCollector(BaseCollector):
         """提取文章正文"""
         try:
             logger.info(f"[知乎] 正在提取正文: {url}")
-            await page.goto(url, wait_until="networkidle")
+            await waits.goto(page, url, ready_selector=self.SELECTORS["content_body"], label="zhihu:文章页")
             
             # 增加随机延时，模拟真人阅读
             await self._random_sleep(2, 5)
@@ -262,6 +301,19 @@ class ZhihuCollector(BaseCollector):
             logger.error(f"[知乎] 提取正文失败: {e}")
             return None
 
+    def parse_article_html(self, html: str, url: str) -> Optional[str]:
+        """直连提取：优先读 js-initialData 里的文章/回答，没有再按正文容器解析 HTML"""
+        data = http_fetch.script_json(html, "js-initialData")
+        if data:
+            entities = data.get("initialState", {}).get("entities", {})
+            for kind, pattern in (("articles", r"/p/(\d+)"), ("answers", r"/answer/(\d+)")):
+                match = re.search(pattern, url)
+                entity = entities.get(kind, {}).get(match.group(1)) if match else None
+                if entity and entity.get("content"):
+                    return http_fetch.html_to_text(entity["content"])
+
+        return http_fetch.html_to_text(html, http_fetch.match_root(classes=("Post-RichText", "RichContent-inner")))
+
     def _parse_number(self, text: str) -> int:
         """解析数字（支持 1.2k, 1.5w 等格式）"""
         if not text:
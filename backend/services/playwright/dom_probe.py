@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+页面元素批量探测
+以前判断登录弹窗/用户名/登录入口都是一个选择器一次 query_selector + is_visible，十几个选择器就是几十次 CDP 往返！
+这里把整张有序的选择器表一次 page.evaluate 丢进页面里判断，返回第一个命中的选择器和它的文本。
+
+选择器支持普通 CSS，另外兼容 Playwright 的 "button:has-text('登录')" 写法（按 textContent 包含匹配），
+写错的选择器在页面里直接跳过，不会影响后面的。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from loguru import logger
+
+log = logger.bind(module="元素探测")
+
+# 参数: [选择器列表, 是否要求可见, 是否要求有文本]
+# 可见性和 Playwright 的 is_visible 口径一致：有非空的盒子，且不是 visibility:hidden
+_PROBE_JS = """([selectors, needVisible, needText]) => {
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    for (let i = 0; i < selectors.length; i++) {
+        let css = selectors[i];
+        let hasText = null;
+        const m = css.match(/^(.*?):has-text\\((['"])(.*)\\2\\)$/);
+        if (m) {
+            css = m[1] || '*';
+            hasText = m[3];
+        }
+        let nodes;
+        try {
+            nodes = document.querySelectorAll(css);
+        } catch (e) {
+            continue;
+        }
+        for (const el of nodes) {
+            const text = (el.textContent || '').trim();
+            if (hasText !== null && !text.includes(hasText)) continue;
+            if (needVisible && !visible(el)) continue;
+            if (needText && !text) continue;
+            return {index: i, selector: selectors[i], text: text};
+        }
+    }
+    return null;
+}"""
+
+
+@dataclass
+class ProbeMatch:
+    """探测命中的元素"""
+    index: int
+    selector: str
+    text: str
+
+
+async def probe_first(
+    page: Any,
+    selectors: Sequence[str],
+    visible: bool = True,
+    with_text: bool = False,
+    strict: bool = False,
+) -> Optional[ProbeMatch]:
+    """
+    按顺序找第一个命中的选择器（一次往返）
+
+    Args:
+        page: Page 或 Frame
+        selectors: 有序的选择器列表，越靠前优先级越高
+        visible: 只认可见元素；False 时只要在 DOM 里就算
+        with_text: 只认文本非空的元素（取用户名用）
+        strict: 页面执行出错时抛出去，而不是当成没命中（"弹窗消失了没"这类判断要分清）
+
+    Returns:
+        ProbeMatch，没命中或页面正在跳转返回 None
+    """
+    if not selectors:
+        return None
+    try:
+        result = await page.evaluate(_PROBE_JS, [list(selectors), visible, with_text])
+    except Exception as e:
+        if strict:
+            raise
+        log.debug(f"元素探测失败: {e}")
+        return None
+    if not result:
+        return None
+    return ProbeMatch(index=result["index"], selector=result["selector"], text=result["text"])
+
+
+async def probe_any(page: Any, selectors: Sequence[str], visible: bool = True, strict: bool = False) -> bool:
+    """有没有任意一个选择器命中"""
+    return await probe_first(page, selectors, visible=visible, strict=strict) is not None
@@ -4,13 +4,36 @@
 重写了！直接访问编辑器URL！
 """
 
-import asyncio
 from typing import Dict, Any
 from playwright.async_api import Page
 from loguru import logger
 
+from backend.services.playwright import waits
 from .base import BasePublisher
 
+# 发布后的结果判定：URL 变化 / 成功提示文本 / 成功提示元素
+PUBLISH_RESULT_JS = """() => {
+    if (window.location.href.includes('success') || window.location.href.includes('publish')) {
+        return 'url_changed';
+    }
+    const bodyText = document.body?.innerText || '';
+    if (bodyText.includes('发布成功') || bodyText.includes('提交成功')) {
+        return 'success_message';
+    }
+    const successEl = document.querySelector('[class*="success"]');
+    if (successEl && successEl.offsetParent !== null) {
+        return 'success_element';
+    }
+    return 'unknown';
+}"""
+
+PUBLISH_BUTTON_ENABLED_JS = """() => {
+    for (const btn of document.querySelectorAll('button')) {
+        if ((btn.textContent || '').trim() === '发布') return !btn.disabled;
+    }
+    return false;
+}"""
+
 
 class BaijiahaoPublisher(BasePublisher):
     """
@@ -46,9 +69,10 @@ class BaijiahaoPublisher(BasePublisher):
             if "login" in page.url.lower():
                 return {"success": False, "platform_url": None, "error_msg": "需要重新登录，请检查账号授权状态"}
 
-            # 等待页面加载
+            # 等待页面加载：正文 iframe 出来、页面不再大面积重绘
             logger.info("[百家号] 等待编辑页面加载...")
-            await asyncio.sleep(3)
+            await waits.wait_visible(page, "iframe", timeout=15, label="baijiahao:正文iframe")
+            await waits.wait_dom_stable(page, timeout=8, label="baijiahao:编辑页渲染")
 
             # ========== 步骤2: 关闭弹窗和新手教程 ==========
             logger.info("[百家号] 开始关闭弹窗和新手教程...")
@@ -59,8 +83,6 @@ class BaijiahaoPublisher(BasePublisher):
             title_result = await self._fill_title(page, article.title)
             if not title_result:
                 logger.warning("[百家号] 标题填充可能失败，继续尝试发布")
-            else:
-                await asyncio.sleep(0.5)
 
             # ========== 步骤4: 填充正文 ==========
             logger.info("[百家号] 开始填充正文...")
@@ -68,8 +90,8 @@ class BaijiahaoPublisher(BasePublisher):
             if not content_result:
                 return {"success": False, "platform_url": None, "error_msg": "正文填充失败"}
 
-            # 等待内容加载
-            await asyncio.sleep(2)
+            # 等待内容渲染完（字数统计、自动保存会改 DOM）
+            await waits.wait_dom_stable(page, timeout=8, label="baijiahao:正文渲染")
 
             # ========== 步骤5: 点击发布按钮 ==========
             logger.info("[百家号] 点击发布按钮...")
@@ -101,8 +123,8 @@ class BaijiahaoPublisher(BasePublisher):
         try:
             logger.info("[百家号] 开始关闭弹窗...")
 
-            # 等待页面完全加载
-            await asyncio.sleep(2)
+            # 新手教程弹窗是异步弹出来的，等 DOM 安静下来再找
+            await waits.wait_dom_stable(page, quiet_ms=800, timeout=6, label="baijiahao:弹窗出现")
 
             # ============ 核心方法：精确点击新手教程的×按钮 ============
             closed = await page.evaluate("""() => {
@@ -130,7 +152,7 @@ class BaijiahaoPublisher(BasePublisher):
 
             if closed.get('success'):
                 logger.info(f"[百家号] 成功关闭新手教程弹窗: {closed.get('method')}")
-                await asyncio.sleep(1)
+                await waits.wait_dom_stable(page, timeout=3, label="baijiahao:弹窗关闭")
                 return
 
             logger.info(f"[百家号] 未找到新手教程弹窗: {closed.get('reason')}")
@@ -168,7 +190,6 @@ class BaijiahaoPublisher(BasePublisher):
                             is_visible = await element.is_visible()
                             if is_visible:
                                 await element.click(timeout=3000)
-                                await asyncio.sleep(0.3)
                                 closed_count += 1
                                 logger.info(f"[百家号] 已点击: {selector}")
                         except Exception:
@@ -183,12 +204,11 @@ class BaijiahaoPublisher(BasePublisher):
             for _ in range(3):
                 try:
                     await page.keyboard.press("Escape")
-                    await asyncio.sleep(0.3)
                 except:
                     pass
 
-            # 最后再等一下，让页面响应
-            await asyncio.sleep(1)
+            # 最后等页面响应完关闭动作
+            await waits.wait_dom_stable(page, timeout=3, label="baijiahao:弹窗关闭")
 
         except Exception as e:
             logger.debug(f"[百家号] 关闭弹窗异常: {e}")
@@ -202,8 +222,6 @@ class BaijiahaoPublisher(BasePublisher):
         try:
             logger.info(f"[百家号] 尝试填充标题: {title}")
 
-            await asyncio.sleep(1)
-
             # 方法1: JavaScript直接填充（因为标题可能是contenteditable的div）
             result = await page.evaluate(f"""(title) => {{
                 // 查找包含"请输入标题"placeholder的元素
@@ -255,13 +273,10 @@ class BaijiahaoPublisher(BasePublisher):
                         if is_visible:
                             # 点击激活
                             await element.click()
-                            await asyncio.sleep(0.3)
 
                             # 清空并填充
                             await page.fill(selector, "")
-                            await asyncio.sleep(0.2)
                             await page.fill(selector, title)
-                            await asyncio.sleep(0.5)
 
                             logger.info(f"[百家号] 标题填充成功")
                             return True
@@ -285,8 +300,6 @@ class BaijiahaoPublisher(BasePublisher):
         try:
             logger.info(f"[百家号] 开始填充正文，长度: {len(content)}")
 
-            await asyncio.sleep(1)
-
             # 方法1: 尝试在iframe中填充
             try:
                 # 查找iframe
@@ -298,7 +311,7 @@ class BaijiahaoPublisher(BasePublisher):
                     iframe = await iframe_element.content_frame()
                     if iframe:
                         # 在iframe中查找可编辑区域
-                        await asyncio.sleep(1)
+                        await waits.wait_visible(iframe, "body", timeout=5, label="baijiahao:iframe编辑区")
 
                         # 尝试在iframe中查找编辑器
                         editable_selectors = [
@@ -315,18 +328,16 @@ class BaijiahaoPublisher(BasePublisher):
                                     if is_visible:
                                         # 点击激活
                                         await editor.click()
-                                        await asyncio.sleep(0.5)
 
                                         # 清空
                                         await iframe.keyboard.press("Control+A")
-                                        await asyncio.sleep(0.2)
 
                                         # 分段输入
                                         chunk_size = 500
                                         for i in range(0, len(content), chunk_size):
                                             chunk = content[i:i+chunk_size]
                                             await iframe.keyboard.type(chunk)
-                                            await asyncio.sleep(0.1)
+                                            await waits.pause(0.1, label="baijiahao:分段输入")
 
                                         logger.info(f"[百家号] iframe正文填充成功，长度: {len(content)}")
                                         return True
@@ -356,18 +367,16 @@ class BaijiahaoPublisher(BasePublisher):
 
                             # 点击激活
                             await element.click()
-                            await asyncio.sleep(0.5)
 
                             # 清空
                             await page.keyboard.press("Control+A")
-                            await asyncio.sleep(0.2)
 
                             # 分段输入
                             chunk_size = 500
                             for i in range(0, len(content), chunk_size):
                                 chunk = content[i:i+chunk_size]
                                 await page.keyboard.type(chunk)
-                                await asyncio.sleep(0.1)
+                                await waits.pause(0.1, label="baijiahao:分段输入")
 
                             logger.info(f"[百家号] 主页面正文填充成功，长度: {len(content)}")
                             return True
@@ -396,7 +405,11 @@ class BaijiahaoPublisher(BasePublisher):
         try:
             logger.info("[百家号] 开始查找发布按钮")
 
-            await asyncio.sleep(1)
+            # 填完内容后发布按钮要等校验通过才变可用
+            await waits.wait_until(
+                lambda: page.evaluate(PUBLISH_BUTTON_ENABLED_JS), timeout=8,
+                label="baijiahao:发布按钮可用", kind=waits.KIND_ENABLED
+            )
 
             # 先检查发布按钮是否可用
             button_state = await page.evaluate("""() => {
@@ -435,7 +448,6 @@ class BaijiahaoPublisher(BasePublisher):
                     }
                     return false;
                 }""")
-                await asyncio.sleep(0.5)
 
             # 点击发布按钮
             selectors = [
@@ -451,7 +463,6 @@ class BaijiahaoPublisher(BasePublisher):
                         is_visible = await element.is_visible()
                         if is_visible:
                             await element.click()
-                            await asyncio.sleep(0.5)
                             logger.info("[百家号] 发布按钮已点击")
                             return True
                 except Exception as e:
@@ -491,46 +502,25 @@ class BaijiahaoPublisher(BasePublisher):
         try:
             logger.info("[百家号] 等待发布结果...")
 
-            # 等待页面响应
-            await asyncio.sleep(5)
-
-            current_url = page.url
-            logger.info(f"[百家号] 当前URL: {current_url}")
+            # 等成功信号出现（最多 10 秒），不再固定等 5 秒
+            indicator = {"value": "unknown"}
 
-            # 检查是否有成功提示
-            try:
-                success_indicators = await page.evaluate("""() => {
-                    // 检查URL变化
-                    if (window.location.href.includes('success') || window.location.href.includes('publish')) {
-                        return 'url_changed';
-                    }
+            async def detected() -> bool:
+                indicator["value"] = await page.evaluate(PUBLISH_RESULT_JS)
+                return indicator["value"] != "unknown"
 
-                    // 检查成功提示文本
-                    const bodyText = document.body?.innerText || '';
-                    if (bodyText.includes('发布成功') || bodyText.includes('提交成功')) {
-                        return 'success_message';
-                    }
+            await waits.wait_until(detected, timeout=10, interval=0.5, label="baijiahao:发布结果")
 
-                    // 检查是否有成功提示元素
-                    const successEl = document.querySelector('[class*="success"]');
-                    if (successEl && successEl.offsetParent !== null) {
-                        return 'success_element';
-                    }
-
-                    return 'unknown';
-                }""")
-
-                logger.info(f"[百家号] 发布状态检测: {success_indicators}")
-
-                if success_indicators in ['url_changed', 'success_message', 'success_element']:
-                    return {
-                        "success": True,
-                        "platform_url": current_url,
-                        "error_msg": None
-                    }
+            current_url = page.url
+            logger.info(f"[百家号] 当前URL: {current_url}")
 
-            except Exception as e:
-                logger.debug(f"[百家号] 检查成功提示失败: {e}")
+            logger.info(f"[百家号] 发布状态检测: {indicator['value']}")
+            if indicator["value"] in ['url_changed', 'success_message', 'success_element']:
+                return {
+                    "success": True,
+                    "platform_url": current_url,
+                    "error_msg": None
+                }
 
             # 默认返回成功（假设已发布）
             logger.info("[百家号] 发布完成（无明确错误）")
@@ -4,11 +4,19 @@ Playwright发布适配器
 用适配器模式实现各平台发布，开闭原则！
 """
 
+import asyncio
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
 from playwright.async_api import Page, BrowserContext
 from loguru import logger
 
+from backend.services.playwright import timing, waits
+
+# 批量发布的回调：on_start(article) 开始发某篇前，on_result(article, result) 某篇发完后
+ArticleCallback = Callable[..., Awaitable[None]]
+
 
 class BasePublisher(ABC):
     """
@@ -49,7 +57,7 @@ class BasePublisher(ABC):
             是否成功导航
         """
         try:
-            await page.goto(self.config["publish_url"], wait_until="networkidle")
+            await waits.goto(page, self.config["publish_url"], label=f"{self.platform_id}:发布页")
             logger.info(f"导航到发布页面: {self.name}")
             return True
         except Exception as e:
@@ -62,12 +70,10 @@ class BasePublisher(ABC):
 
         注意：各平台页面加载速度不同，需要耐心等待！
         """
-        try:
-            await page.wait_for_selector(selector, timeout=timeout)
+        if await waits.wait_visible(page, selector, timeout=timeout / 1000, label=f"{self.platform_id}:{selector}"):
             return True
-        except Exception as e:
-            logger.warning(f"等待选择器超时: {selector}, {e}")
-            return False
+        logger.warning(f"等待选择器超时: {selector}")
+        return False
 
     async def fill_title(self, page: Page, title: str, title_selector: str) -> bool:
         """
@@ -114,8 +120,10 @@ class BasePublisher(ABC):
         Returns:
             发布结果
         """
-        # 默认实现：等待一段时间后检查URL是否变化
-        await page.wait_for_timeout(3000)
+        # 默认实现：等 URL 离开发布页（跳到文章页/管理页），等不到也按当前 URL 返回
+        start_url = page.url
+        await waits.wait_url(page, lambda url: url != start_url, timeout=min(timeout / 1000, 10),
+                             label=f"{self.platform_id}:发布跳转")
 
         result = {
             "success": True,
@@ -125,6 +133,85 @@ class BasePublisher(ABC):
 
         return result
 
+    # ==================== 批量发布 ====================
+
+    async def reset_page(self, context: BrowserContext, page: Page) -> Page:
+        """
+        两篇文章之间回到干净状态
+        关掉发布后弹出的新标签页；当前页已经坏了就在同一个上下文里重开一个（登录态还在，不用重新加载会话）
+        """
+        for other in context.pages:
+            if other is not page and not other.is_closed():
+                await other.close()
+        if page.is_closed():
+            page = await context.new_page()
+            self._auto_accept_dialogs(page)
+        return page
+
+    @staticmethod
+    def _auto_accept_dialogs(page: Page):
+        # 编辑器离开页面时的「确定离开？」弹窗会卡住下一篇的导航
+        page.on("dialog", lambda dialog: asyncio.ensure_future(dialog.accept()))
+
+    async def publish_batch(
+        self,
+        context: BrowserContext,
+        articles: List[Any],
+        account: Any,
+        on_start: Optional[ArticleCallback] = None,
+        on_result: Optional[ArticleCallback] = None,
+        gap_seconds: Tuple[float, float] = (0, 0),
+        min_interval_seconds: float = 0
+    ) -> Dict[str, Any]:
+        """
+        在同一个已登录的上下文里连续发布多篇文章
+
+        只建一次上下文、只加载一次会话，每篇文章只剩编辑器里的操作（publish 自己会回到编辑器页面）。
+        篇与篇之间随机停 gap_seconds，且离上一篇开始发布不少于 min_interval_seconds（账号最短发布间隔），
+        在上下文里等着，不用拆成一篇一批重新开浏览器。
+        单篇失败不影响后面的文章；最后导出一次最新的 storage_state，由调用方写回账号。
+
+        Returns:
+            {"results": [每篇的发布结果], "storage_state": 最新会话 或 None}
+        """
+        page = await context.new_page()
+        self._auto_accept_dialogs(page)
+        instrumented = timing.instrument(page)
+        results = []
+        last_start = 0.0
+
+        for index, article in enumerate(articles):
+            if index:
+                fresh = await self.reset_page(context, page)
+                if fresh is not page:
+                    page, instrumented = fresh, timing.instrument(fresh)
+                gap = random.uniform(*gap_seconds) if gap_seconds[1] > 0 else 0
+                gap = max(gap, min_interval_seconds - (time.monotonic() - last_start))
+                if gap > 0:
+                    await waits.pause(gap, label="publish_batch:篇间隔")
+            last_start = time.monotonic()
+            if on_start:
+                await on_start(article)
+
+            logger.info(f"📦 [{self.name}] 批量发布 {index + 1}/{len(articles)}: {getattr(article, 'title', '')}")
+            async with timing.operation(self.platform_id, timing.OP_PUBLISH) as op:
+                try:
+                    result = await self.publish(instrumented, article, account)
+                except Exception as e:
+                    logger.exception(f"❌ [{self.name}] 批量发布单篇异常: {e}")
+                    result = {"success": False, "error_msg": str(e)}
+                op.ok = bool(result.get("success"))
+            results.append(result)
+            if on_result:
+                await on_result(article, result)
+
+        storage_state = None
+        try:
+            storage_state = await context.storage_state()
+        except Exception as e:
+            logger.warning(f"导出会话失败，本次不回写: {e}")
+        return {"results": results, "storage_state": storage_state}
+
 
 class PublisherRegistry:
     """
@@ -161,6 +248,27 @@ def get_publisher(platform_id: str) -> Optional[BasePublisher]:
     return registry.get(platform_id)
 
 
+async def publish_batch(
+    context: BrowserContext,
+    articles: List[Any],
+    account: Any,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    批量发布入口：同一账号的多篇文章共用一个上下文
+    参数见 BasePublisher.publish_batch
+    """
+    publisher = registry.get(account.platform)
+    if not publisher:
+        results = [{"success": False, "error_msg": f"未找到平台 {account.platform} 的适配器"} for _ in articles]
+        on_result = kwargs.get("on_result")
+        if on_result:
+            for article, result in zip(articles, results):
+                await on_result(article, result)
+        return {"results": results, "storage_state": None}
+    return await publisher.publish_batch(context, articles, account, **kwargs)
+
+
 def list_publishers() -> Dict[str, BasePublisher]:
     """列出所有发布器"""
     return registry.list_all()
@@ -4,11 +4,11 @@
 对搜狐号也熟悉！
 """
 
-import asyncio
 from typing import Dict, Any
 from playwright.async_api import Page
 from loguru import logger
 
+from backend.services.playwright import waits
 from .base import BasePublisher
 
 
@@ -26,8 +26,10 @@ class SohuPublisher(BasePublisher):
             if not await self.navigate_to_publish_page(page):
                 return {"success": False, "platform_url": None, "error_msg": "导航失败"}
 
-            # 2. 等待编辑器加载
-            await asyncio.sleep(3)
+            # 2. 等待编辑器加载（标题框出现 + 编辑器渲染完，不再固定等 3 秒）
+            await waits.wait_visible(page, "#title, input[name='title'], input[placeholder*='标题']",
+                                     timeout=15, label="sohu:标题框")
+            await waits.wait_dom_stable(page, timeout=8, label="sohu:编辑器渲染")
 
             # 3. 填充标题
             if not await self._fill_title(page, article.title):
@@ -133,7 +135,10 @@ class SohuPublisher(BasePublisher):
     async def _wait_for_publish_result(self, page: Page) -> Dict[str, Any]:
         """等待发布结果"""
         try:
-            await asyncio.sleep(3)
+            start_url = page.url
+            # 成功提示或跳到管理页，哪个先来算哪个
+            if not await waits.wait_text(page, ["发布成功", "提交成功", "审核中"], timeout=8, label="sohu:发布提示"):
+                await waits.wait_url(page, lambda url: url != start_url, timeout=5, label="sohu:发布跳转")
 
             return {
                 "success": True,
@@ -7,7 +7,6 @@
 3. 修正逻辑顺序：正文 -> 插图 -> 封面 -> 标题 -> 暴力发布
 """
 
-import asyncio
 import re
 import os
 import httpx
@@ -17,8 +16,11 @@ import base64
 from typing import Dict, Any, List, Optional
 from playwright.async_api import Page
 from loguru import logger
+from backend.services.playwright import waits
 from .base import BasePublisher, registry
 
+EDITOR_SELECTOR = ".ProseMirror"
+
 
 class ToutiaoPublisher(BasePublisher):
     async def publish(self, page: Page, article: Any, account: Any) -> Dict[str, Any]:
@@ -27,8 +29,8 @@ class ToutiaoPublisher(BasePublisher):
             logger.info("🚀 开始今日头条 v5.9 流程 (终极物理版)...")
 
             # 1. 初始导航
-            await page.goto(self.config["publish_url"], wait_until="load", timeout=60000)
-            await asyncio.sleep(8)
+            await waits.goto(page, self.config["publish_url"], timeout=60, label="toutiao:发布页")
+            await waits.wait_editor_ready(page, EDITOR_SELECTOR, timeout=30, label="toutiao:编辑器")
             await self._brutal_kill_interferences(page)
 
             # 2. 准备资源
@@ -50,19 +52,18 @@ class ToutiaoPublisher(BasePublisher):
                 logger.info("Step 2: 正在正文粘贴照片...")
                 await self._inject_image_pro(page, downloaded_paths[0])
             await page.mouse.click(10, 10)
-            await asyncio.sleep(2)
+            await waits.wait_dom_stable(page, timeout=5, label="toutiao:插图后")
 
             # Step 3: 上传封面
             if downloaded_paths:
                 logger.info("Step 3: 正在上传展示封面...")
                 await self._force_upload_cover(page, downloaded_paths[0])
             await page.mouse.click(10, 10)  # 关键：点掉上传成功的提示框
-            await asyncio.sleep(2)
+            await waits.wait_dom_stable(page, timeout=5, label="toutiao:封面后")
 
             # Step 4: 锁定标题 (压轴)
             logger.info(f"Step 4: 正在压轴锁定标题 -> {safe_title}")
             await self._physical_type_title_v59(page, safe_title)
-            await asyncio.sleep(1)
 
             # Step 5: 暴力连点发布
             logger.info("Step 5: 进入暴力发布阶段...")
@@ -87,9 +88,9 @@ class ToutiaoPublisher(BasePublisher):
         try:
             # 1. 确保滚到最上方
             await page.evaluate("window.scrollTo(0, 0)")
-            await asyncio.sleep(1)
 
             title_sel = "textarea.byte-input__inner, .title-input textarea, textarea[placeholder*='标题']"
+            await waits.wait_visible(page, title_sel, timeout=5, label="toutiao:标题框")
             target = page.locator(title_sel).first
 
             # 2. 尝试点击（设定 5 秒短超时，防止死等）
@@ -118,7 +119,6 @@ class ToutiaoPublisher(BasePublisher):
             try:
                 # A. 物理激活焦点
                 await page.mouse.click(450, 220)
-                await asyncio.sleep(0.5)
 
                 # B. 点击发布按钮
                 p_btn = page.locator(PREVIEW_BTN).last
@@ -127,9 +127,8 @@ class ToutiaoPublisher(BasePublisher):
                     await p_btn.click(force=True)
 
                 # C. 处理手机预览确认弹窗
-                await asyncio.sleep(2)
                 c_btn = page.locator(CONFIRM_BTN).last
-                if await c_btn.is_visible(timeout=1000):
+                if await waits.wait_until(c_btn.is_visible, timeout=3, label="toutiao:确认发布弹窗"):
                     await c_btn.click(force=True)
                     logger.success("🎯 发布最终确认成功！")
                     return True
@@ -137,7 +136,7 @@ class ToutiaoPublisher(BasePublisher):
                 if "articles" in page.url: return True
             except:
                 pass
-            await asyncio.sleep(1)
+            await waits.pause(1, label="toutiao:发布重试间隔")
         return False
 
     async def _fill_and_wake_body(self, page: Page, content: str):
@@ -171,7 +170,8 @@ class ToutiaoPublisher(BasePublisher):
                 dt.items.add(new File([new Uint8Array(byteNumbers)], "img.jpg", { type: 'image/jpeg' }));
                 document.querySelector(".ProseMirror").dispatchEvent(new ClipboardEvent("paste", { clipboardData: dt, bubbles: true }));
             }''', b64)
-            await asyncio.sleep(4)
+            # 图片上传完成后占位图会被替换，编辑器 DOM 安静下来即可
+            await waits.wait_dom_stable(page, EDITOR_SELECTOR, quiet_ms=800, timeout=10, label="toutiao:正文图片上传")
         except:
             pass
 
@@ -179,7 +179,7 @@ class ToutiaoPublisher(BasePublisher):
         try:
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
             await page.locator("text=单图").first.click(force=True)
-            await asyncio.sleep(1)
+            await waits.wait_dom_stable(page, timeout=3, label="toutiao:封面面板")
             await page.evaluate('''() => {
                 document.querySelectorAll('input[type="file"]').forEach(el => {
                     el.style.display = 'block'; el.style.opacity = '1';
@@ -188,8 +188,8 @@ class ToutiaoPublisher(BasePublisher):
             cover_input = page.locator("div:has-text('展示封面') >> input[type='file']").first
             if await cover_input.count() == 0: cover_input = page.locator("input[type='file']").last
             await cover_input.set_input_files(path)
-            await page.wait_for_selector("text=预览, text=替换", timeout=12000)
-            logger.info("✅ 封面上传成功")
+            if await waits.wait_visible(page, "text=预览, text=替换", timeout=12, label="toutiao:封面上传"):
+                logger.info("✅ 封面上传成功")
         except:
             pass
 
@@ -221,10 +221,9 @@ class ToutiaoPublisher(BasePublisher):
         return paths
 
     async def _wait_for_publish_result(self, page: Page) -> Dict[str, Any]:
-        for i in range(25):
-            if "articles" in page.url or "content_manage" in page.url:
-                return {"success": True, "platform_url": page.url}
-            await asyncio.sleep(1)
+        await waits.wait_url(
+            page, lambda url: "articles" in url or "content_manage" in url, timeout=25, label="toutiao:管理页跳转"
+        )
         return {"success": True, "platform_url": page.url}
 
 
@@ -6,7 +6,6 @@
 2. 融合 upstream (同事) 的 AI 声明功能
 """
 
-import asyncio
 import re
 import os
 import httpx
@@ -18,8 +17,13 @@ from typing import Dict, Any, List, Optional
 from playwright.async_api import Page
 from loguru import logger
 
+from backend.services.playwright import waits
 from .base import BasePublisher, registry
 
+EDITOR_SELECTOR = ".public-DraftEditor-content"
+# 粘贴/上传的图片走这个接口，等它返回比固定睡 5 秒准
+IMAGE_UPLOAD_PATTERN = "zhihu.com/images"
+
 
 class ZhihuPublisher(BasePublisher):
     async def publish(self, page: Page, article: Any, account: Any) -> Dict[str, Any]:
@@ -28,8 +32,9 @@ class ZhihuPublisher(BasePublisher):
             logger.info("🚀 开始知乎发布 (v4.2 合并加强版)...")
 
             # 1. 导航
-            await page.goto(self.config["publish_url"], wait_until="networkidle", timeout=60000)
-            await asyncio.sleep(5)
+            await waits.goto(page, self.config["publish_url"], timeout=60, label="zhihu:写文章页")
+            if not await waits.wait_editor_ready(page, EDITOR_SELECTOR, timeout=30, label="zhihu:编辑器"):
+                return {"success": False, "platform_url": None, "error_msg": "编辑器未就绪"}
 
             # 2. 图像准备
             # A. 提取正文链接
@@ -53,7 +58,7 @@ class ZhihuPublisher(BasePublisher):
             temp_files.extend(downloaded_paths)
 
             if not downloaded_paths:
-                return {"success": False, "error_msg": "图片下载失败，无法满足强制配图需求"}
+                return {"success": False, "platform_url": None, "error_msg": "图片下载失败，无法满足强制配图需求"}
 
             # 3. 填充标题
             await self._fill_title(page, article.title)
@@ -70,13 +75,13 @@ class ZhihuPublisher(BasePublisher):
             # 7. 发布流程
             topic_word = getattr(article, 'keyword_text', article.title[:4])
             if not await self._handle_publish_process(page, topic_word):
-                return {"success": False, "error_msg": "发布确认环节失败"}
+                return {"success": False, "platform_url": None, "error_msg": "发布确认环节失败"}
 
             return await self._wait_for_publish_result(page)
 
         except Exception as e:
             logger.exception(f"❌ 知乎脚本致命故障: {str(e)}")
-            return {"success": False, "error_msg": str(e)}
+            return {"success": False, "platform_url": None, "error_msg": str(e)}
         finally:
             for f in temp_files:
                 if os.path.exists(f):
@@ -114,11 +119,14 @@ class ZhihuPublisher(BasePublisher):
             logger.info("🖼️ 正在设置文章封面...")
             cover_input = page.locator("input.UploadPicture-input").first
             if await cover_input.count() > 0:
-                await cover_input.set_input_files(paths[0])
-                await asyncio.sleep(3)
+                await waits.wait_response(
+                    page, IMAGE_UPLOAD_PATTERN, trigger=lambda: cover_input.set_input_files(paths[0]),
+                    timeout=15, label="zhihu:封面上传"
+                )
+                await waits.wait_dom_stable(page, timeout=5, label="zhihu:封面渲染")
 
             # Step 2: 遍历插入正文
-            editor = page.locator(".public-DraftEditor-content").first
+            editor = page.locator(EDITOR_SELECTOR).first
             await editor.click()
 
             for i, image_path in enumerate(paths):
@@ -131,11 +139,15 @@ class ZhihuPublisher(BasePublisher):
                 else:
                     for _ in range(4):
                         await page.keyboard.press("PageDown")
-                        await asyncio.sleep(0.2)
+                        await waits.pause(0.2, label="zhihu:翻页节奏")
                     await page.keyboard.press("Enter")
 
-                await self._paste_image_via_js(page, image_path)
-                await asyncio.sleep(5)
+                # 图片上传完成 + 编辑器里占位图换成真图后再插下一张
+                await waits.wait_response(
+                    page, IMAGE_UPLOAD_PATTERN, trigger=lambda: self._paste_image_via_js(page, image_path),
+                    timeout=20, label="zhihu:正文图片上传"
+                )
+                await waits.wait_dom_stable(page, EDITOR_SELECTOR, quiet_ms=800, timeout=10, label="zhihu:图片渲染")
 
         except Exception as e:
             logger.error(f"多图上传流程部分失败: {e}")
@@ -174,7 +186,7 @@ class ZhihuPublisher(BasePublisher):
         await page.fill(sel, title)
 
     async def _fill_content_and_clean_ui(self, page: Page, content: str):
-        editor = ".public-DraftEditor-content"
+        editor = EDITOR_SELECTOR
         await page.wait_for_selector(editor)
         await page.click(editor)
 
@@ -185,7 +197,8 @@ class ZhihuPublisher(BasePublisher):
             document.querySelector(".public-DraftEditor-content").dispatchEvent(ev);
         }''', content)
 
-        await asyncio.sleep(2)
+        # 粘贴后 Draft 编辑器会分段渲染，长文可能还会弹「确认并解析」
+        await waits.wait_dom_stable(page, timeout=8, label="zhihu:正文粘贴")
         try:
             confirm = page.locator("button:has-text('确认并解析')").first
             if await confirm.is_visible(timeout=3000):
@@ -201,10 +214,9 @@ class ZhihuPublisher(BasePublisher):
             ai_btn = page.locator("button:has-text('AI助手'), .ToolbarButton:has-text('AI')").first
             if await ai_btn.is_visible(timeout=3000):
                 await ai_btn.click()
-                await asyncio.sleep(1)
                 # 选择 AI 辅助创作
                 option = page.locator("text=AI辅助创作, [role='menuitem']:has-text('AI')").first
-                if await option.is_visible(timeout=2000):
+                if await waits.wait_until(option.is_visible, timeout=3, label="zhihu:AI声明菜单"):
                     await option.click()
                     logger.info("✅ 已勾选 AI 辅助创作声明")
         except:
@@ -219,9 +231,8 @@ class ZhihuPublisher(BasePublisher):
 
             topic_input = page.locator("input[placeholder*='话题']").first
             await topic_input.fill(topic)
-            await asyncio.sleep(2)
             suggestion = page.locator(".Suggestion-item, .PublishPanel-suggestionItem").first
-            if await suggestion.is_visible(timeout=2000):
+            if await waits.wait_until(suggestion.is_visible, timeout=4, label="zhihu:话题联想"):
                 await suggestion.click()
             else:
                 await page.keyboard.press("Enter")
@@ -230,19 +241,18 @@ class ZhihuPublisher(BasePublisher):
 
         final_btn = page.locator(
             "button.PublishPanel-submitButton, .WriteIndex-publishButton, button:has-text('发布')").last
-        for _ in range(5):
-            if await final_btn.is_enabled():
-                await final_btn.click(force=True)
-                return True
-            await asyncio.sleep(2)
-        return False
+        if not await waits.wait_until(final_btn.is_enabled, timeout=10, label="zhihu:发布按钮可用", kind=waits.KIND_ENABLED):
+            return False
+        await final_btn.click(force=True)
+        return True
 
     async def _wait_for_publish_result(self, page: Page) -> Dict[str, Any]:
-        for i in range(25):
-            if "/p/" in page.url and "/edit" not in page.url:
-                return {"success": True, "platform_url": page.url}
-            await asyncio.sleep(1)
-        return {"success": False, "error_msg": "发布超时"}
+        published = await waits.wait_url(
+            page, lambda url: "/p/" in url and "/edit" not in url, timeout=25, label="zhihu:文章页跳转"
+        )
+        if published:
+            return {"success": True, "platform_url": page.url}
+        return {"success": False, "platform_url": None, "error_msg": "发布超时"}
 
 
 # 注册
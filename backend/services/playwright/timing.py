@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+"""
+Playwright 操作耗时埋点
+一次发布/采集/检测到底慢在哪一步，以前完全看不到！
+
+用法：
+    async with timing.operation("zhihu", timing.OP_PUBLISH):
+        page = timing.instrument(page)
+        await publisher.publish(page, article, account)
+
+instrument() 返回页面代理，goto/fill/click/evaluate/set_input_files 等调用（包括 locator、keyboard、mouse 上的）
+各记一条 span；waits 里的条件等待通过订阅等待记录记成 "wait:<label>"，不会重复计时。
+span 先进进程内的环形缓冲，按间隔丢到线程池批量写 operation_spans 表，接口按平台/步骤在库里聚合出 p50/p95。
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from backend.config import (
+    TIMING_BUFFER_SIZE,
+    TIMING_FLUSH_INTERVAL_SECONDS,
+    TIMING_FLUSH_BATCH,
+    TIMING_RETENTION_DAYS,
+)
+from backend.services.playwright import waits
+
+log = logger.bind(module="耗时埋点")
+
+OP_PUBLISH = "publish"
+OP_COLLECT = "collect"
+OP_CHECK = "check"
+
+STEP_TOTAL = "total"
+
+# 代理上要计时的方法（Page / Frame / Locator / Keyboard / Mouse 共用一份名单）
+TIMED_METHODS = {
+    "goto", "reload", "go_back", "fill", "type", "press", "click", "dblclick", "hover", "focus", "check",
+    "select_option", "set_input_files", "evaluate", "evaluate_handle", "query_selector", "query_selector_all",
+    "inner_text", "inner_html", "text_content", "content", "screenshot", "scroll_into_view_if_needed",
+    "wait_for_selector", "wait_for_function", "wait_for_load_state", "wait_for_timeout", "insert_text",
+}
+# 返回子对象的属性/方法，继续包一层代理，记成 "locator.click"、"keyboard.type" 这样的步骤
+CHILD_ATTRS = {"locator", "first", "last", "nth", "filter", "get_by_text", "get_by_role", "get_by_placeholder",
+               "keyboard", "mouse", "frame_locator", "main_frame"}
+# 只是缩小范围的属性，不进步骤名（page.locator(x).first.click 记成 "locator.click"）
+NARROWING_ATTRS = {"first", "last", "nth", "filter"}
+
+# 当前操作：(平台, 操作类型)，条件等待的记录按它归属
+_current: ContextVar[Optional[Tuple[str, str]]] = ContextVar("timing_current", default=None)
+
+
+@dataclass
+class Span:
+    """一次页面操作的耗时"""
+    platform: str
+    operation: str
+    step: str
+    duration_ms: float
+    ok: bool = True
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "platform": self.platform,
+            "operation": self.operation,
+            "step": self.step,
+            "duration_ms": round(self.duration_ms, 1),
+            "ok": self.ok,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class SpanRecorder:
+    """环形缓冲 + 待落库队列"""
+
+    def __init__(self, maxlen: int = TIMING_BUFFER_SIZE):
+        self.buffer: Deque[Span] = deque(maxlen=maxlen)
+        self._pending: Deque[Span] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_prune: Optional[datetime] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+    def record(self, span: Span):
+        with self._lock:
+            self.buffer.append(span)
+            self._pending.append(span)
+
+    def recent(self, platform: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        spans = [s for s in self.buffer if platform is None or s.platform == platform]
+        return [s.to_dict() for s in spans[-limit:]][::-1]
+
+    def maybe_flush(self):
+        """
+        到了落库间隔或者攒够一批才写库
+        写库丢到线程池里做，不卡事件循环；上一批还没写完就先攒着，写失败的放回队列下次再来
+        """
+        if self._inflight is not None and not self._inflight.done():
+            return
+        due = time.monotonic() - self._last_flush >= TIMING_FLUSH_INTERVAL_SECONDS
+        if not self._pending or not (due or len(self._pending) >= TIMING_FLUSH_BATCH):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        spans = self._take_pending()
+        self._inflight = loop.run_in_executor(None, self._write, spans)
+        self._inflight.add_done_callback(lambda f: self._after_write(f, spans))
+
+    def flush(self) -> int:
+        """同步把未落库的 span 全写进去（退出前、查统计前用）；失败的留到下次"""
+        spans = self._take_pending()
+        if not spans:
+            return 0
+        if not self._write(spans):
+            self._requeue(spans)
+            return 0
+        return len(spans)
+
+    def _take_pending(self) -> List[Span]:
+        with self._lock:
+            self._last_flush = time.monotonic()
+            spans = list(self._pending)
+            self._pending.clear()
+        return spans
+
+    def _requeue(self, spans: List[Span]):
+        """写失败的放回队头；队列满了丢最老的"""
+        with self._lock:
+            self._pending = deque(spans + list(self._pending), maxlen=self._pending.maxlen)
+
+    def _after_write(self, future: "asyncio.Future", spans: List[Span]):
+        if future.cancelled() or future.exception() is not None or not future.result():
+            self._requeue(spans)
+
+    def _write(self, spans: List[Span]) -> bool:
+        """批量写入 operation_spans，顺手清理过期数据（可能在线程池里跑）"""
+        from backend.database import SessionLocal
+        from backend.database.models import OperationSpan
+        from backend.services.worker_jobs import current_node_name
+
+        node = current_node_name()
+        db = SessionLocal()
+        try:
+            db.bulk_save_objects([
+                OperationSpan(
+                    platform=s.platform, operation=s.operation, step=s.step[:200],
+                    duration_ms=s.duration_ms, ok=s.ok, node=node, created_at=s.created_at
+                )
+                for s in spans
+            ])
+            now = datetime.now()
+            if self._last_prune is None or now - self._last_prune > timedelta(hours=1):
+                db.query(OperationSpan).filter(
+                    OperationSpan.created_at < now - timedelta(days=TIMING_RETENTION_DAYS)
+                ).delete(synchronize_session=False)
+                self._last_prune = now
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            log.warning(f"⚠️ 耗时数据落库失败，下次重试: {e}")
+            return False
+        finally:
+            db.close()
+
+
+recorder = SpanRecorder()
+
+
+def record_span(platform: str, operation: str, step: str, duration_ms: float, ok: bool = True):
+    recorder.record(Span(platform=platform, operation=operation, step=step, duration_ms=duration_ms, ok=ok))
+
+
+def _on_wait(record: waits.WaitRecord):
+    """条件等待 -> span（只记发生在某个操作里的等待）"""
+    current = _current.get()
+    if current:
+        record_span(current[0], current[1], f"wait:{record.label}", record.waited * 1000, record.met)
+
+
+waits.wait_stats.add_listener(_on_wait)
+
+
+class OperationScope:
+    """operation() 给出的句柄：结果不是异常而是返回值时，调用方把 ok 设成 False"""
+
+    def __init__(self):
+        self.ok = True
+
+
+@asynccontextmanager
+async def operation(platform: str, operation_type: str, step: str = STEP_TOTAL):
+    """一次完整的发布/采集/检测：记总耗时，期间的条件等待归到这个平台"""
+    token = _current.set((platform, operation_type))
+    start = time.monotonic()
+    scope = OperationScope()
+    try:
+        yield scope
+    except BaseException:
+        scope.ok = False
+        raise
+    finally:
+        _current.reset(token)
+        record_span(platform, operation_type, step, (time.monotonic() - start) * 1000, scope.ok)
+        recorder.maybe_flush()
+
+
+class InstrumentedProxy:
+    """
+    页面代理：名单里的方法计时，其他属性原样透传（page.on、expect_response、is_closed 等都不受影响）
+    条件等待内部对页面的调用不重复计时，由 waits 的记录代表
+    """
+
+    def __init__(self, target: Any, platform: Optional[str], operation_type: Optional[str], prefix: str = ""):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_platform", platform)
+        object.__setattr__(self, "_operation", operation_type)
+        object.__setattr__(self, "_prefix", prefix)
+
+    @property
+    def unwrapped(self) -> Any:
+        return self._target
+
+    def _scope(self) -> Tuple[str, str]:
+        current = _current.get() or ("unknown", "unknown")
+        return self._platform or current[0], self._operation or current[1]
+
+    def _child(self, value: Any, name: str) -> Any:
+        prefix = self._prefix if name in NARROWING_ATTRS else f"{self._prefix}{name}."
+        return InstrumentedProxy(value, self._platform, self._operation, prefix)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if name in CHILD_ATTRS:
+            if callable(attr):
+                def child_factory(*args, **kwargs):
+                    return self._child(attr(*args, **kwargs), name)
+                return child_factory
+            return self._child(attr, name)
+        if name in TIMED_METHODS and callable(attr):
+            step = f"{self._prefix}{name}"
+
+            async def timed(*args, **kwargs):
+                if waits.in_wait():
+                    return await attr(*args, **kwargs)
+                platform, operation_type = self._scope()
+                start = time.monotonic()
+                ok = True
+                try:
+                    return await attr(*args, **kwargs)
+                except BaseException:
+                    ok = False
+                    raise
+                finally:
+                    record_span(platform, operation_type, step, (time.monotonic() - start) * 1000, ok)
+            return timed
+        return attr
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other: Any) -> bool:
+        return self._target == unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._target)
+
+    def __repr__(self) -> str:
+        return f"<Instrumented {self._target!r}>"
+
+
+def instrument(page: Any, platform: Optional[str] = None, operation_type: Optional[str] = None) -> Any:
+    """给页面套上计时代理（已经套过的直接返回）；平台/操作类型不传就用当前 operation() 的"""
+    if page is None or isinstance(page, InstrumentedProxy):
+        return page
+    return InstrumentedProxy(page, platform, operation_type)
+
+
+def unwrap(page: Any) -> Any:
+    return page.unwrapped if isinstance(page, InstrumentedProxy) else page
+
+
+def step_stats(
+    db,
+    platform: Optional[str] = None,
+    operation_type: Optional[str] = None,
+    hours: int = 24
+) -> Dict[str, Any]:
+    """
+    各平台各步骤的 p50/p95 耗时（先把内存里没落库的写进去）
+    计数/失败/最大/累计在库里 GROUP BY，百分位用窗口函数按组排名，每组只取回 p50、p95 两行，
+    不再把时间窗口内的每条 span 拉到内存里排序
+
+    Returns:
+        {"hours", "platforms": {platform: [{step, operation, count, failed, p50_ms, p95_ms, max_ms, total_ms}]}}
+    """
+    from sqlalchemy import case, func, or_
+    from backend.database.models import OperationSpan
+
+    recorder.flush()
+    filters = [OperationSpan.created_at >= datetime.now() - timedelta(hours=hours)]
+    if platform:
+        filters.append(OperationSpan.platform == platform)
+    if operation_type:
+        filters.append(OperationSpan.operation == operation_type)
+    group = (OperationSpan.platform, OperationSpan.operation, OperationSpan.step)
+
+    aggregates = db.query(
+        *group,
+        func.count(OperationSpan.id),
+        func.sum(case((OperationSpan.ok.is_(False), 1), else_=0)),
+        func.max(OperationSpan.duration_ms),
+        func.sum(OperationSpan.duration_ms),
+    ).filter(*filters).group_by(*group).all()
+
+    # 最近秩百分位：组内第 ceil(pct * n / 100) 名（整数运算，SQLite 没有 ceil）
+    ranked = db.query(
+        *group,
+        OperationSpan.duration_ms,
+        func.row_number().over(partition_by=group, order_by=OperationSpan.duration_ms).label("rank"),
+        func.count(OperationSpan.id).over(partition_by=group).label("size"),
+    ).filter(*filters).subquery()
+    p50_rank = (ranked.c.size * 50 + 99) // 100
+    p95_rank = (ranked.c.size * 95 + 99) // 100
+    percentiles: Dict[Tuple[str, str, str], Dict[int, float]] = {}
+    for p, op, step, duration, rank, size in db.query(
+        ranked.c.platform, ranked.c.operation, ranked.c.step, ranked.c.duration_ms, ranked.c.rank, ranked.c.size
+    ).filter(or_(ranked.c.rank == p50_rank, ranked.c.rank == p95_rank)):
+        marks = percentiles.setdefault((p, op, step), {})
+        for pct in (50, 95):
+            if rank == (size * pct + 99) // 100:
+                marks[pct] = duration
+
+    platforms: Dict[str, List[Dict[str, Any]]] = {}
+    for p, op, step, count, failed, max_ms, total_ms in aggregates:
+        marks = percentiles.get((p, op, step), {})
+        platforms.setdefault(p, []).append({
+            "operation": op,
+            "step": step,
+            "count": count,
+            "failed": int(failed or 0),
+            "p50_ms": round(marks.get(50, 0.0), 1),
+            "p95_ms": round(marks.get(95, 0.0), 1),
+            "max_ms": round(max_ms or 0.0, 1),
+            "total_ms": round(total_ms or 0.0, 1),
+        })
+    for steps in platforms.values():
+        # 累计耗时最多的步骤排前面，最值得优化
+        steps.sort(key=lambda s: s["total_ms"], reverse=True)
+    return {"hours": hours, "platforms": platforms}
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+等待策略
+发布器/采集器/检测器里到处是 asyncio.sleep(3) 和 wait_until="networkidle"，
+页面早就好了还在干等，一次发布白白浪费几十秒！
+
+这里统一成「等条件」：元素可见、响应到达、DOM 稳定、编辑器可输入……
+每次等待都有超时预算，并记录实际等了多久、条件是否满足，
+看统计就知道哪些等待是真需要的、预算该设多少。
+
+时间参数统一用秒（内部转换成 Playwright 的毫秒）。
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Pattern, Union
+
+from loguru import logger
+
+# 类型上 Page 和 Frame 都支持 wait_for_selector / wait_for_function / evaluate
+Target = Any
+UrlPattern = Union[str, Pattern, Callable[[str], bool]]
+
+KIND_VISIBLE = "visible"
+KIND_HIDDEN = "hidden"
+KIND_ENABLED = "enabled"
+KIND_RESPONSE = "response"
+KIND_DOM_STABLE = "dom_stable"
+KIND_EDITOR = "editor_ready"
+KIND_TEXT = "text"
+KIND_URL = "url"
+KIND_NAVIGATION = "navigation"
+KIND_PAUSE = "pause"
+KIND_ANSWER = "answer_stable"
+
+# 正在条件等待中：耗时埋点的页面代理据此跳过内部调用，避免和等待记录重复计时
+_in_wait: ContextVar[bool] = ContextVar("waits_in_wait", default=False)
+
+# DOM 连续 quiet_ms 毫秒没有变化即认为稳定；整体超时返回 false
+_DOM_STABLE_JS = """([selector, quietMs, timeoutMs]) => new Promise(resolve => {
+    const root = (selector && document.querySelector(selector)) || document.body || document.documentElement;
+    let timer = null;
+    const done = (value) => { clearTimeout(timer); clearTimeout(guard); observer.disconnect(); resolve(value); };
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => done(true), quietMs);
+    });
+    observer.observe(root, { childList: true, subtree: true, attributes: true, characterData: true });
+    timer = setTimeout(() => done(true), quietMs);
+    const guard = setTimeout(() => done(false), timeoutMs);
+})"""
+
+# 编辑器可输入：元素存在、可见、未禁用，且是输入框或 contenteditable
+_EDITOR_READY_JS = """(selector) => {
+    const el = document.querySelector(selector);
+    if (!el || el.offsetParent === null) return false;
+    if (el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    const tag = el.tagName;
+    return tag === 'INPUT' || tag === 'TEXTAREA' || el.isContentEditable
+        || !!el.querySelector('[contenteditable="true"]');
+}"""
+
+_ENABLED_JS = """(selector) => {
+    const el = document.querySelector(selector);
+    return !!el && el.offsetParent !== null && !el.disabled && !String(el.className).includes('disabled');
+}"""
+
+_TEXT_JS = """(texts) => {
+    const body = document.body ? document.body.innerText : '';
+    return texts.some(t => body.includes(t));
+}"""
+
+
+@dataclass
+class WaitRecord:
+    """一次等待的记录"""
+    label: str
+    kind: str
+    waited: float
+    timeout: float
+    met: bool
+    at: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "label": self.label,
+            "kind": self.kind,
+            "waited": round(self.waited, 3),
+            "timeout": self.timeout,
+            "met": self.met,
+            "at": self.at.isoformat(),
+        }
+
+
+class WaitStats:
+    """等待统计：最近的记录 + 按 label 聚合"""
+
+    def __init__(self, maxlen: int = 2000):
+        self.records: Deque[WaitRecord] = deque(maxlen=maxlen)
+        self._aggregates: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[WaitRecord], None]] = []
+
+    def add_listener(self, listener: Callable[[WaitRecord], None]):
+        """其他模块（如耗时统计）订阅等待记录"""
+        self._listeners.append(listener)
+
+    def record(self, record: WaitRecord):
+        self.records.append(record)
+        agg = self._aggregates.setdefault(record.label, {
+            "label": record.label, "kind": record.kind, "count": 0, "met": 0,
+            "total_waited": 0.0, "max_waited": 0.0, "total_budget": 0.0,
+        })
+        agg["count"] += 1
+        agg["met"] += int(record.met)
+        agg["total_waited"] += record.waited
+        agg["max_waited"] = max(agg["max_waited"], record.waited)
+        agg["total_budget"] += record.timeout
+        for listener in self._listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.debug(f"等待记录订阅方异常: {e}")
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """按累计等待时长排序；met_rate 低说明这个等待经常白等到超时"""
+        rows = []
+        for agg in self._aggregates.values():
+            count = agg["count"]
+            rows.append({
+                "label": agg["label"],
+                "kind": agg["kind"],
+                "count": count,
+                "met_rate": round(agg["met"] / count, 3) if count else 0,
+                "avg_waited": round(agg["total_waited"] / count, 3) if count else 0,
+                "max_waited": round(agg["max_waited"], 3),
+                "total_waited": round(agg["total_waited"], 3),
+                "avg_budget": round(agg["total_budget"] / count, 3) if count else 0,
+            })
+        rows.sort(key=lambda r: r["total_waited"], reverse=True)
+        return rows
+
+    def clear(self):
+        self.records.clear()
+        self._aggregates.clear()
+
+
+wait_stats = WaitStats()
+
+
+def in_wait() -> bool:
+    return _in_wait.get()
+
+
+def record(label: str, kind: str, waited: float, timeout: float, met: bool):
+    """自己写轮询的地方（如等 AI 回答生成完）也把结果记进统计"""
+    wait_stats.record(WaitRecord(label=label, kind=kind, waited=waited, timeout=timeout, met=met))
+
+
+async def _timed(label: str, kind: str, timeout: float, run: Callable[[], Awaitable[Any]]) -> Any:
+    """执行等待并记录；超时/异常都视为条件未满足，返回 None"""
+    start = time.monotonic()
+    value, met = None, False
+    token = _in_wait.set(True)
+    try:
+        value = await run()
+        met = value is not False and value is not None
+    except Exception as e:
+        logger.debug(f"⏱️ 等待未满足 [{label}] {kind}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+    finally:
+        _in_wait.reset(token)
+    record(label, kind, time.monotonic() - start, timeout, met)
+    return value if met else None
+
+
+def _ms(seconds: float) -> float:
+    return seconds * 1000
+
+
+def _url_matcher(pattern: UrlPattern) -> Callable[[str], bool]:
+    if callable(pattern):
+        return pattern
+    if isinstance(pattern, str):
+        return lambda url: pattern in url
+    return lambda url: bool(pattern.search(url))
+
+
+# ==================== 条件等待 ====================
+
+async def wait_visible(target: Target, selector: str, timeout: float = 10, label: Optional[str] = None) -> bool:
+    """元素出现且可见"""
+    result = await _timed(label or selector, KIND_VISIBLE, timeout, lambda: target.wait_for_selector(
+        selector, state="visible", timeout=_ms(timeout)
+    ))
+    return result is not None
+
+
+async def wait_hidden(target: Target, selector: str, timeout: float = 10, label: Optional[str] = None) -> bool:
+    """元素消失（弹窗关闭、loading 结束）"""
+    result = await _timed(label or selector, KIND_HIDDEN, timeout, lambda: _hidden(target, selector, timeout))
+    return result is not None
+
+
+async def _hidden(target: Target, selector: str, timeout: float) -> bool:
+    await target.wait_for_selector(selector, state="hidden", timeout=_ms(timeout))
+    return True
+
+
+async def wait_enabled(target: Target, selector: str, timeout: float = 10, label: Optional[str] = None) -> bool:
+    """按钮可点击（可见且未禁用）"""
+    result = await _timed(label or selector, KIND_ENABLED, timeout, lambda: target.wait_for_function(
+        _ENABLED_JS, arg=selector, timeout=_ms(timeout)
+    ))
+    return result is not None
+
+
+async def wait_text(target: Target, texts: List[str], timeout: float = 10, label: Optional[str] = None) -> bool:
+    """页面出现任意一段文字（如「发布成功」）"""
+    result = await _timed(label or "|".join(texts), KIND_TEXT, timeout, lambda: target.wait_for_function(
+        _TEXT_JS, arg=list(texts), timeout=_ms(timeout)
+    ))
+    return result is not None
+
+
+async def _poll(check: Callable[[], Any], timeout: float, interval: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while True:
+        value = check()
+        if asyncio.iscoroutine(value):
+            value = await value
+        if value:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+
+
+async def wait_until(
+    check: Callable[[], Any],
+    timeout: float = 10,
+    interval: float = 0.2,
+    label: str = "condition",
+    kind: str = "condition"
+) -> bool:
+    """轮询任意条件（同步或异步函数），条件写不成选择器时用，比如 locator.is_enabled"""
+    result = await _timed(label, kind, timeout, lambda: _poll(check, timeout, interval))
+    return result is not None
+
+
+async def wait_url(page: Any, pattern: UrlPattern, timeout: float = 15, label: Optional[str] = None) -> bool:
+    """当前地址满足条件（跳转到文章页等）"""
+    match = _url_matcher(pattern)
+    return await wait_until(lambda: match(page.url), timeout=timeout, label=label or str(pattern), kind=KIND_URL)
+
+
+async def wait_response(
+    page: Any,
+    pattern: UrlPattern,
+    trigger: Optional[Callable[[], Awaitable[Any]]] = None,
+    timeout: float = 15,
+    label: Optional[str] = None
+) -> Optional[Any]:
+    """
+    等待地址匹配的响应
+
+    trigger: 触发请求的动作（点击等）。先挂监听再触发，避免响应来得太快错过
+    Returns:
+        Response 或 None
+    """
+    match = _url_matcher(pattern)
+
+    async def run():
+        if trigger is None:
+            return await page.wait_for_event("response", predicate=lambda r: match(r.url), timeout=_ms(timeout))
+        async with page.expect_response(lambda r: match(r.url), timeout=_ms(timeout)) as info:
+            await trigger()
+        return await info.value
+
+    return await _timed(label or str(pattern), KIND_RESPONSE, timeout, run)
+
+
+async def wait_dom_stable(
+    target: Target,
+    selector: Optional[str] = None,
+    quiet_ms: int = 500,
+    timeout: float = 10,
+    label: Optional[str] = None
+) -> bool:
+    """DOM 在 quiet_ms 内不再变化（异步渲染/弹窗动画结束）"""
+    result = await _timed(label or f"dom_stable:{selector or 'body'}", KIND_DOM_STABLE, timeout, lambda: target.evaluate(
+        _DOM_STABLE_JS, [selector, quiet_ms, _ms(timeout)]
+    ))
+    return result is not None
+
+
+async def wait_editor_ready(
+    target: Target,
+    selector: str,
+    timeout: float = 15,
+    quiet_ms: int = 300,
+    label: Optional[str] = None
+) -> bool:
+    """编辑器可输入：元素可见、未禁用、可编辑，并且周围的 DOM 已经稳定下来"""
+    label = label or f"editor:{selector}"
+
+    async def run():
+        start = time.monotonic()
+        await target.wait_for_function(_EDITOR_READY_JS, arg=selector, timeout=_ms(timeout))
+        remaining = max(timeout - (time.monotonic() - start), 0.5)
+        await target.evaluate(_DOM_STABLE_JS, [None, quiet_ms, _ms(remaining)])
+        return True
+
+    result = await _timed(label, KIND_EDITOR, timeout, run)
+    return result is not None
+
+
+async def goto(
+    page: Any,
+    url: str,
+    ready_selector: Optional[str] = None,
+    timeout: float = 30,
+    label: Optional[str] = None
+) -> Optional[Any]:
+    """
+    导航到页面：只等 DOMContentLoaded，再等关键元素可见
+    不用 networkidle：长连接/埋点请求多的页面可能永远等不到 idle，白白耗满超时
+
+    Returns:
+        导航响应；导航失败时抛出原异常（调用方一般要据此判定失败）
+    """
+    start = time.monotonic()
+    token = _in_wait.set(True)
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=_ms(timeout))
+    except Exception:
+        record(label or url, KIND_NAVIGATION, time.monotonic() - start, timeout, False)
+        raise
+    finally:
+        _in_wait.reset(token)
+    record(label or url, KIND_NAVIGATION, time.monotonic() - start, timeout, True)
+    if ready_selector:
+        remaining = max(timeout - (time.monotonic() - start), 1)
+        await wait_visible(page, ready_selector, timeout=remaining, label=f"{label or url}:ready")
+    return response
+
+
+async def pause(seconds: float, label: str = "pause"):
+    """
+    有意的停顿（模拟人工节奏、等动画），和条件等待分开记录，统计里一眼能看出哪些是纯等
+    """
+    start = time.monotonic()
+    await asyncio.sleep(seconds)
+    record(label, KIND_PAUSE, time.monotonic() - start, seconds, True)
@@ -19,11 +19,12 @@ from sqlalchemy.orm import Session
 
 from backend.config import (
     BROWSER_TYPE, BROWSER_ARGS,
-    LOGIN_CHECK_INTERVAL, LOGIN_MAX_WAIT_TIME, PLATFORMS
+    LOGIN_CHECK_INTERVAL, LOGIN_MAX_WAIT_TIME, PLATFORMS, SESSION_KEY_COOKIES
 )
 from backend.services.crypto import encrypt_cookies, encrypt_storage_state, decrypt_cookies, decrypt_storage_state
 # 注意：这里我们只导入 registry，具体的发布器注册逻辑通常在应用启动时完成
-from backend.services.playwright.publishers.base import registry
+from backend.services.playwright.publishers.base import registry, publish_batch
+from backend.services.playwright import browser_mode, dom_probe, timing
 
 
 class AuthTask:
@@ -58,7 +59,9 @@ class PlaywrightManager:
 
     def __init__(self):
         self._playwright = None
-        self._browser: Optional[Browser] = None
+        # 无头/有头各最多一个浏览器，按子系统的运行模式取（True=无头）
+        self._browsers: Dict[bool, Browser] = {}
+        self._launch_lock = asyncio.Lock()
         self._auth_tasks: Dict[str, AuthTask] = {}
         self._contexts: Dict[str, BrowserContext] = {}
         self._is_running = False
@@ -91,13 +94,30 @@ class PlaywrightManager:
         return None
 
     async def start(self):
-        """启动浏览器服务"""
+        """启动 Playwright 服务（浏览器按需启动，见 get_browser）"""
         if self._is_running:
             return
 
         logger.info("🚀 正在启动 Playwright 浏览器服务...")
         self._playwright = await async_playwright().start()
+        self._is_running = True
 
+    async def get_browser(self, subsystem: str) -> Browser:
+        """
+        按子系统的运行模式取浏览器（授权默认有头，发布/采集默认无头），
+        任务转有头重跑时 browser_mode 会让这里返回有头的那个
+        """
+        await self.start()
+        headless = browser_mode.is_headless(subsystem)
+        async with self._launch_lock:
+            browser = self._browsers.get(headless)
+            if browser and browser.is_connected():
+                return browser
+            browser = await self._launch(headless)
+            self._browsers[headless] = browser
+            return browser
+
+    async def _launch(self, headless: bool) -> Browser:
         # 尝试查找本地 Chrome 路径（绕过检测，更稳定）
         chrome_paths = [
             r"C:\Program Files\Google\Chrome\Application\chrome.exe",
@@ -113,7 +133,7 @@ class PlaywrightManager:
                 break
 
         launch_options = {
-            "headless": False,  # 授权和发布通常需要有头模式，或者由上层控制
+            "headless": headless,
             "args": BROWSER_ARGS + [
                 "--disable-blink-features=AutomationControlled",  # 核心反爬
                 "--disable-dev-shm-usage",
@@ -127,9 +147,9 @@ class PlaywrightManager:
             launch_options["executable_path"] = executable_path
 
         try:
-            self._browser = await self._playwright[BROWSER_TYPE].launch(**launch_options)
-            self._is_running = True
-            logger.success(f"✅ Playwright 浏览器 ({BROWSER_TYPE}) 已就绪")
+            browser = await self._playwright[BROWSER_TYPE].launch(**launch_options)
+            logger.success(f"✅ Playwright 浏览器 ({BROWSER_TYPE}, {'无头' if headless else '有头'}) 已就绪")
+            return browser
         except Exception as e:
             logger.error(f"❌ 浏览器启动失败: {e}")
             raise e
@@ -145,8 +165,9 @@ class PlaywrightManager:
         self._contexts.clear()
 
         # 关闭浏览器
-        if self._browser:
-            await self._browser.close()
+        for browser in self._browsers.values():
+            await browser.close()
+        self._browsers.clear()
         if self._playwright:
             await self._playwright.stop()
 
@@ -166,8 +187,6 @@ class PlaywrightManager:
         """
         logger.info(f"[Auth] 开始创建授权任务: platform={platform}, account_id={account_id}")
 
-        await self.start()
-
         if platform not in PLATFORMS:
             raise ValueError(f"不支持的平台: {platform}")
 
@@ -176,8 +195,9 @@ class PlaywrightManager:
 
         platform_config = PLATFORMS[platform]
 
-        # 创建浏览器上下文
-        context = await self._browser.new_context(
+        # 创建浏览器上下文（授权要用户扫码，默认有头）
+        browser = await self.get_browser(browser_mode.SUBSYSTEM_AUTH)
+        context = await browser.new_context(
             viewport={"width": 1280, "height": 800},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         )
@@ -250,53 +270,7 @@ class PlaywrightManager:
 
             # 2. 基础验证
             # 针对不同平台的关键 Cookie 检查 (支持多个备选Cookie，用|分隔)
-            platform_checks = {
-                "zhihu": "z_c0|z_cari0",  # 知乎关键Cookie，增加 z_c0 作为备选
-                "baijiahao": "BDUSS|STOKEN",
-                "toutiao": "sessionid|sid_tt",
-                "wenku": "BDUSS|STOKEN",
-                "penguin": "uin|skey|p_sktkt",
-                "weixin": "pt2gguin|token|app_id|app_msgid",  # 微信公众号关键Cookie
-                "wangyi": "NTES_SESS|S_INFO",
-                "sohu": "ppinf|pprdig",
-                "zijie": "sessionid|sid_tt",
-                "xiaohongshu": "xhs_web_session|webid|web_session|webId",  # 小红书关键Cookie
-                "bilibili": "bili_jct|SESSDATA",
-                "36kr": "uid|ticket",
-                "huxiu": "huxiu_hash|huxiusessionid",
-                "woshipm": "uid|token",
-                # 新增平台
-                "doyin": "sessionid|passport_auth_id",
-                "kuaishou": "userId|token",
-                "video_account": "wxuin|webwxuvid",
-                "sohu_video": "ppinf|pprdig",
-                "weibo": "SUB|SUBP",
-                "haokan": "BAIDUID|STOKEN",
-                "xigua": "sessionid|sid_tt",
-                "jianshu": "_session_id",
-                "iqiyi": "P00001|P00003",
-                "dayu": "e_token|e_u",
-                "acfun": "acFun__web__pc__session_id",
-                "tencent_video": "vqq_vusession",
-                "yidian": "uid|token",
-                "pipixia": "token|uid",
-                "meipai": "token|uid",
-                "douban": "dbcl2|ll",
-                "kuai_chuan": "qi_uin|qkn",
-                "dafeng": "auth_cookie|ssuid",
-                "xueqiu": "xq_a_token|xq_r_token",
-                "yiche": "yiche_uid|yiche_sso",
-                "chejia": "autohomecookie|token",
-                "duoduo": "cookie2|p_token",
-                "weishi": "uin|skey",
-                "mango": "mgtv_complex_id",
-                "ximalaya": "device_idudi|token",
-                "meituan": "token|userId",
-                "alipay": "euid|ALIPAY_JWT",
-                "douyin_company": "sessionid|passport_auth_id",
-                "douyin_company_lead": "sessionid|passport_auth_id",
-            }
-            key_cookie_str = platform_checks.get(task.platform)
+            key_cookie_str = SESSION_KEY_COOKIES.get(task.platform)
 
             # 🔍 调试：输出所有 Cookie
             logger.info(f"[Auth] 平台: {task.platform}, Cookie数量: {len(cookies)}")
@@ -435,366 +409,35 @@ class PlaywrightManager:
 
     async def _extract_username(self, page: Page, platform: str) -> Optional[str]:
         """
-        从页面提取用户名 (增强版)
+        从页面提取用户名（选择器表在 PLATFORMS[platform]["username_selectors"]，一次往返探测）
         """
-        try:
-            if platform == "zhihu":
-                # 尝试多种选择器
-                selectors = [".AppHeader-profileText", ".Header-userName", ".UserLink-link", ".ProfileHeader-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "toutiao":
-                selectors = [".user-name", ".name", ".mp-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "wenku":
-                selectors = [".user-info-name", ".user-name", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "penguin":
-                selectors = [".header-user-name", ".user-info-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "weixin":
-                selectors = [".weui-desktop-account__name", ".account_name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "wangyi":
-                # 增加更宽泛的选择器
-                selectors = [".name", ".account-name", ".user-name", ".m-name", ".header-info .name", ".media-info .name", "div[class*='name']"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text and text.strip(): return text.strip()
-
-            elif platform == "sohu":
-                selectors = [".user-name", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "zijie":
-                # 字节号（与头条号相同）
-                selectors = [".user-name", ".name", ".mp-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "xiaohongshu":
-                # 小红书
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "bilibili":
-                # B站专栏
-                selectors = [".username-text", ".user-nick", ".nickname"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "36kr":
-                # 36氪
-                selectors = [".user-name", ".name", ".profile-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "huxiu":
-                # 虎嗅
-                selectors = [".user-name", ".username", ".author-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "woshipm":
-                # 人人都是产品经理
-                selectors = [".user-name", ".username", ".author-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            # 新增平台的用户名提取
-            elif platform == "douyin":
-                selectors = [".user-name", ".username", ".nickname"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "kuaishou":
-                selectors = [".user-name", ".username", ".creator-name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "video_account":
-                selectors = [".user-name", ".username", ".nickname"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "sohu_video":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "weibo":
-                selectors = [".ScreenName", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "haokan":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "xigua":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "jianshu":
-                selectors = [".user-nick", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "iqiyi":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "dayu":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "acfun":
-                selectors = [".user-name", ".username", ".nickname"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "tencent_video":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "yidian":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "pipixia":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "meipai":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "douban":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "kuai_chuan":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "dafeng":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "xueqiu":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "yiche":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "chejia":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "duoduo":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "weishi":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "mango":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "ximalaya":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "meituan":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "alipay":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "douyin_company":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            elif platform == "douyin_company_company_lead":
-                selectors = [".user-name", ".username", ".name"]
-                for s in selectors:
-                    el = await page.query_selector(s)
-                    if el:
-                        text = await el.text_content()
-                        if text: return text.strip()
-
-            return None
-        except:
-            return None
+        selectors = PLATFORMS.get(platform, {}).get("username_selectors", [])
+        # 用户名常在折叠的头像菜单里，只要在 DOM 里有文本就行
+        match = await dom_probe.probe_first(page, selectors, visible=False, with_text=True)
+        return match.text if match else None
 
     # ==================== 发布相关 ====================
 
+    def _load_storage_state(self, account: Any) -> Dict:
+        """解密账号 Session，解析失败返回空（裸奔）"""
+        state_data = {}
+        if account.storage_state:
+            try:
+                decrypted = decrypt_storage_state(account.storage_state)
+                state_data = decrypted if decrypted else json.loads(account.storage_state)
+
+                # 兼容旧数据格式：如果缺少 cookies 字段，从 account.cookies 补充
+                if isinstance(state_data, dict) and "cookies" not in state_data and account.cookies:
+                    logger.warning(f"storage_state缺少cookies字段，使用独立cookies")
+                    state_data["cookies"] = decrypt_cookies(account.cookies)
+            except:
+                logger.warning(f"账号 {account.account_name} Session 解析失败，尝试裸奔")
+        return state_data
+
     async def execute_publish(self, article: Any, account: Any) -> Dict[str, Any]:
         """
         供 Service 调用的发布执行入口 (核心)
         """
-        await self.start()
-
         # 动态获取发布器
         publisher = registry.get(account.platform)
         if not publisher:
@@ -803,21 +446,9 @@ class PlaywrightManager:
         # 准备上下文
         context = None
         try:
-            # 解密 Session
-            state_data = {}
-            if account.storage_state:
-                try:
-                    decrypted = decrypt_storage_state(account.storage_state)
-                    state_data = decrypted if decrypted else json.loads(account.storage_state)
-
-                    # 兼容旧数据格式：如果缺少 cookies 字段，从 account.cookies 补充
-                    if isinstance(state_data, dict) and "cookies" not in state_data and account.cookies:
-                        logger.warning(f"storage_state缺少cookies字段，使用独立cookies")
-                        state_data["cookies"] = decrypt_cookies(account.cookies)
-                except:
-                    logger.warning(f"账号 {account.account_name} Session 解析失败，尝试裸奔")
-
-            context = await self._browser.new_context(
+            state_data = self._load_storage_state(account)
+            browser = await self.get_browser(browser_mode.SUBSYSTEM_PUBLISH)
+            context = await browser.new_context(
                 storage_state=state_data if state_data else None,
                 viewport={"width": 1280, "height": 800}
             )
@@ -826,7 +457,9 @@ class PlaywrightManager:
 
             # 执行发布逻辑
             logger.info(f"🚀 [Publish] 开始执行发布: {account.platform} - {article.title}")
-            result = await publisher.publish(page, article, account)
+            async with timing.operation(account.platform, timing.OP_PUBLISH) as op:
+                result = await publisher.publish(timing.instrument(page), article, account)
+                op.ok = bool(result.get("success"))
 
             return result
 
@@ -837,6 +470,35 @@ class PlaywrightManager:
             if context:
                 await context.close()
 
+    async def execute_publish_batch(
+        self,
+        articles: List[Any],
+        account: Any,
+        on_result: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """
+        同一账号连续发布多篇：只建一个上下文、只加载一次会话
+
+        Returns:
+            {"results": [...], "storage_state": 最新会话（调用方加密后写回账号）}
+        """
+        context = None
+        try:
+            state_data = self._load_storage_state(account)
+            browser = await self.get_browser(browser_mode.SUBSYSTEM_PUBLISH)
+            context = await browser.new_context(
+                storage_state=state_data if state_data else None,
+                viewport={"width": 1280, "height": 800}
+            )
+            logger.info(f"🚀 [Publish] 账号 {account.account_name} 批量发布 {len(articles)} 篇")
+            return await publish_batch(context, articles, account, on_result=on_result)
+        except Exception as e:
+            logger.exception(f"❌ [Publish] 批量执行异常: {e}")
+            return {"results": [], "storage_state": None, "error_msg": str(e)}
+        finally:
+            if context:
+                await context.close()
+
 
 # 全局单例
 playwright_mgr = PlaywrightManager()
\ No newline at end of file
@@ -21,6 +21,7 @@ from ..config import (
     RETRY_INTERVAL,
 )
 from .crypto import CryptoService
+from .playwright import browser_mode
 from ..database.models import Account, Article, PublishRecord
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -532,7 +533,7 @@ class PublishTask:
         try:
             # 1. 启动浏览器
             browser = await playwright.chromium.launch(
-                headless=False,  # 显示浏览器，方便调试
+                headless=browser_mode.is_headless(browser_mode.SUBSYSTEM_PUBLISH),  # 调试时设 BROWSER_MODE_PUBLISH=headed
                 args=BROWSER_ARGS,
             )
 
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+问题变体近似去重
+n8n 生成的问法很多只是换了个说法，每个问法每轮检测都要在每个平台跑一遍浏览器！
+这里用字符 n-gram 的 TF-IDF 向量 + 余弦相似度（NumPy 矩阵运算）把几乎一样的问法聚成一簇，
+每簇只留一个代表。
+"""
+
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from backend.config import QUESTION_DEDUP_THRESHOLD, QUESTION_DEDUP_NGRAM_RANGE
+from backend.services.check_result_cache import normalize_question
+
+
+def char_ngrams(text: str, ngram_range=QUESTION_DEDUP_NGRAM_RANGE) -> Counter:
+    """归一化后的字符 n-gram 计数（中文按字切，不需要分词）"""
+    text = normalize_question(text)
+    low, high = ngram_range
+    grams = Counter()
+    for n in range(low, high + 1):
+        if len(text) < n:
+            continue
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    # 太短的问题至少保留整句
+    if not grams and text:
+        grams[text] = 1
+    return grams
+
+
+def tfidf_matrix(texts: Sequence[str]) -> np.ndarray:
+    """
+    构造 L2 归一化的 TF-IDF 矩阵（行=问题，列=n-gram）
+
+    IDF 只在这一批问题里统计：同一关键词的问法都包含关键词本身，
+    关键词的 n-gram 权重自然被压低，差异部分才决定相似度。
+    """
+    docs = [char_ngrams(t) for t in texts]
+    vocab: Dict[str, int] = {}
+    for grams in docs:
+        for gram in grams:
+            vocab.setdefault(gram, len(vocab))
+
+    matrix = np.zeros((len(docs), max(len(vocab), 1)), dtype=np.float64)
+    for row, grams in enumerate(docs):
+        for gram, count in grams.items():
+            matrix[row, vocab[gram]] = count
+
+    # 平滑 IDF：log((1 + N) / (1 + df)) + 1
+    df = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1
+    matrix *= idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def similarity_matrix(texts: Sequence[str]) -> np.ndarray:
+    """两两余弦相似度"""
+    if not texts:
+        return np.zeros((0, 0))
+    matrix = tfidf_matrix(texts)
+    return matrix @ matrix.T
+
+
+def cluster_near_duplicates(
+    texts: Sequence[str],
+    threshold: float = QUESTION_DEDUP_THRESHOLD
+) -> List[List[int]]:
+    """
+    近似重复聚类
+
+    按输入顺序贪心：每个问题和已有的簇代表比较，相似度达到阈值就并入该簇，
+    否则自己成为新簇的代表。所以排在前面的（已入库的、先生成的）优先当代表。
+
+    Returns:
+        簇列表，每个簇是下标列表，第一个下标就是代表
+    """
+    sims = similarity_matrix(texts)
+    clusters: List[List[int]] = []
+    representatives: List[int] = []
+
+    for i in range(len(texts)):
+        if representatives:
+            rep_sims = sims[i, representatives]
+            best = int(np.argmax(rep_sims))
+            if rep_sims[best] >= threshold:
+                clusters[best].append(i)
+                continue
+        representatives.append(i)
+        clusters.append([i])
+
+    return clusters
+
+
+def dedupe_questions(
+    new_questions: Sequence[str],
+    existing_questions: Sequence[str] = (),
+    threshold: float = QUESTION_DEDUP_THRESHOLD
+) -> List[str]:
+    """
+    过滤新问题：和已有问题或本批中更早的问题近似重复的都丢掉
+
+    Returns:
+        需要入库的新问题（保持原顺序）
+    """
+    existing = list(existing_questions)
+    candidates = [q for q in new_questions if q and q.strip()]
+    if not candidates:
+        return []
+
+    clusters = cluster_near_duplicates(existing + candidates, threshold)
+    keep = {cluster[0] for cluster in clusters}
+    return [q for offset, q in enumerate(candidates) if len(existing) + offset in keep]
+
+
+def is_near_duplicate(question: str, existing_questions: Sequence[str], threshold: float = QUESTION_DEDUP_THRESHOLD) -> int:
+    """
+    判断问题是否与已有问题近似重复
+
+    Returns:
+        最相似的已有问题下标，不重复时返回 -1
+    """
+    if not existing_questions:
+        return -1
+    sims = similarity_matrix(list(existing_questions) + [question])[-1, :-1]
+    best = int(np.argmax(sims))
+    return best if sims[best] >= threshold else -1
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+问题变体抽样规划器
+不再每次把关键词的所有问法都问一遍：
+1. 历史结果波动大的问法先问（信息量大），没问过的最先问
+2. 以该(关键词, 平台)的历史命中情况做先验，逐个问法更新后验
+3. 命中率的置信区间收窄到配置的宽度后提前停止
+稳定的关键词只需要问一两个问法，报告出去的命中率仍然有统计依据！
+"""
+
+import math
+from datetime import timedelta
+from statistics import NormalDist
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    INDEX_CHECK_SAMPLING_ENABLED,
+    INDEX_CHECK_SAMPLING_MIN_SAMPLES,
+    INDEX_CHECK_SAMPLING_CI_HALF_WIDTH,
+    INDEX_CHECK_SAMPLING_CONFIDENCE,
+    INDEX_CHECK_SAMPLING_PRIOR_WEIGHT,
+    INDEX_CHECK_SAMPLING_HISTORY_DAYS,
+)
+from backend.database.models import IndexCheckRecord, QuestionVariant
+from backend.services.check_result_cache import question_key, beijing_now
+
+
+class VariantSamplingPlanner:
+    """
+    单个(关键词, 平台)的抽样规划器
+
+    每个回答算一次试验，关键词或公司名出现任意一个就算命中（同一个回答里的两个结果高度相关，
+    拆成两次试验会把样本量算多一倍，区间虚窄、停得过早）。
+    用 Beta 分布做后验，区间为正态近似的可信区间。
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        keyword_id: int,
+        platform: str,
+        *,
+        enabled: bool = INDEX_CHECK_SAMPLING_ENABLED,
+        min_samples: int = INDEX_CHECK_SAMPLING_MIN_SAMPLES,
+        ci_half_width: float = INDEX_CHECK_SAMPLING_CI_HALF_WIDTH,
+        confidence: float = INDEX_CHECK_SAMPLING_CONFIDENCE,
+        prior_weight: int = INDEX_CHECK_SAMPLING_PRIOR_WEIGHT,
+        history_days: int = INDEX_CHECK_SAMPLING_HISTORY_DAYS
+    ):
+        self.db = db
+        self.keyword_id = keyword_id
+        self.platform = platform
+        self.enabled = enabled
+        self.min_samples = max(1, min_samples)
+        self.ci_half_width = ci_half_width
+        self.confidence = confidence
+        self.prior_weight = prior_weight
+        self.history_days = history_days
+
+        # 先验 Beta(alpha, beta)，无历史时为均匀分布
+        self.prior_alpha = 1.0
+        self.prior_beta = 1.0
+        self.history_checks = 0
+        # 每个问法的历史 (回答数, 命中回答数)
+        self.variant_history: Dict[str, Tuple[int, int]] = {}
+
+        # 本轮观测
+        self.hits = 0
+        self.trials = 0
+        self.asked: List[str] = []
+        # 是否做出过“区间已够窄、剩下的不问了”的决定
+        self.stopped = False
+
+        self._load_history()
+
+    def _load_history(self):
+        """读取历史检测记录，构造先验和每个问法的历史命中情况（复用缓存的记录是同一个回答的副本，不计入）"""
+        since = beijing_now() - timedelta(days=self.history_days)
+        rows = self.db.query(
+            IndexCheckRecord.question_key,
+            IndexCheckRecord.question,
+            IndexCheckRecord.keyword_found,
+            IndexCheckRecord.company_found
+        ).filter(
+            IndexCheckRecord.keyword_id == self.keyword_id,
+            IndexCheckRecord.platform == self.platform,
+            IndexCheckRecord.check_time >= since,
+            (IndexCheckRecord.cached.is_(None)) | (IndexCheckRecord.cached.is_(False))
+        ).all()
+
+        hits = 0
+        for row in rows:
+            key = row.question_key or question_key(row.question)
+            row_hit = int(bool(row.keyword_found or row.company_found))
+            n, h = self.variant_history.get(key, (0, 0))
+            self.variant_history[key] = (n + 1, h + row_hit)
+            hits += row_hit
+
+        self.history_checks = len(rows)
+        trials = len(rows)
+        if trials:
+            # 历史最多折算成 prior_weight 次检测，防止旧数据压住最新的变化
+            scale = min(1.0, self.prior_weight / trials)
+            self.prior_alpha += hits * scale
+            self.prior_beta += (trials - hits) * scale
+
+    def _variant_variance(self, question: str) -> float:
+        """问法历史命中率的方差（平滑后），没问过的按最大方差处理"""
+        n, h = self.variant_history.get(question_key(question), (0, 0))
+        if n == 0:
+            return 0.25
+        p = (h + 1) / (n + 2)
+        return p * (1 - p)
+
+    def order(self, questions: List[QuestionVariant]) -> List[QuestionVariant]:
+        """按信息量排序：方差大的先问，同方差的按历史检测次数少的先问"""
+        if not self.enabled:
+            return list(questions)
+        return sorted(
+            questions,
+            key=lambda qv: (
+                -self._variant_variance(qv.question),
+                self.variant_history.get(question_key(qv.question), (0, 0))[0]
+            )
+        )
+
+    def observe(self, question: str, keyword_found: bool, company_found: bool):
+        """记录本轮一个问法的检测结果：一个回答一次试验，任一命中即命中"""
+        self.asked.append(question)
+        self.hits += int(bool(keyword_found or company_found))
+        self.trials += 1
+
+    def _posterior(self) -> Tuple[float, float]:
+        """后验均值和区间半宽"""
+        alpha = self.prior_alpha + self.hits
+        beta = self.prior_beta + (self.trials - self.hits)
+        total = alpha + beta
+        std = math.sqrt(alpha * beta / (total * total * (total + 1)))
+        z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        return alpha / total, z * std
+
+    def interval(self) -> Tuple[float, float, float]:
+        """当前命中率估计及可信区间 (estimate, low, high)"""
+        mean, half_width = self._posterior()
+        return mean, max(0.0, mean - half_width), min(1.0, mean + half_width)
+
+    def should_stop(self) -> bool:
+        """区间已经足够窄，可以不再问剩下的问法（调用方据此停下，决定记下来给 summary 用）"""
+        if not self.enabled or len(self.asked) < self.min_samples:
+            return False
+        if self._posterior()[1] <= self.ci_half_width:
+            self.stopped = True
+        return self.stopped
+
+    def summary(self, variants_total: int) -> Dict[str, Any]:
+        estimate, low, high = self.interval()
+        return {
+            "keyword_id": self.keyword_id,
+            "platform": self.platform,
+            "variants_total": variants_total,
+            "variants_asked": len(self.asked),
+            "asked_questions": list(self.asked),
+            "history_checks": self.history_checks,
+            "hit_rate_estimate": round(estimate * 100, 2),
+            "ci_low": round(low * 100, 2),
+            "ci_high": round(high * 100, 2),
+            "confidence": self.confidence,
+            # 只有抽样决定停下才算提前停止；出错、中途取消少问的不算
+            "stopped_early": self.stopped and len(self.asked) < variants_total,
+        }
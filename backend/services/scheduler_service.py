@@ -5,12 +5,16 @@
 """
 
 import asyncio
+import math
 import random
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
 from loguru import logger
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 # 尝试导入时区，防止环境缺失报错
@@ -19,12 +23,28 @@ try:
 except ImportError:
     timezone = None
 
-from backend.services.geo_article_service import GeoArticleService
-from backend.database.models import ScheduledTask, GeoArticle, Project, Keyword
+from backend.config import (
+    ARTICLE_RECHECK_BATCH_SIZE, ARTICLE_RECHECK_CONCURRENCY,
+    SCHEDULER_SHARDED_MODE, SCHEDULER_RUN_HISTORY_DAYS, SCHEDULER_MISFIRE_GRACE_SECONDS, SCHEDULER_SHARD_COUNT, SCHEDULER_SHARD_MIN_TICK_SECONDS,
+    PUBLISH_BATCH_SIZE, SESSION_REFRESH_TICK_MINUTES, ANSWER_BLOB_PRUNE_INTERVAL_HOURS,
+)
+from backend.services.shard_scheduler import ShardPlan, ShardStats, TickRecord, uniform_cron_period
+from backend.services.job_executor import LANE_SCHEDULED, STATUS_FAILED
+from backend.services.worker_jobs import submit_job, account_affinity
+from backend.database.models import ScheduledTask, ScheduledTaskRun, GeoArticle, Project, Keyword
 
 # 🌟 统一日志绑定
 log = logger.bind(module="调度中心")
 
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩百分位数（输入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
 class SchedulerService:
     def __init__(self):
         tz = timezone('Asia/Shanghai') if timezone else None
@@ -32,7 +52,7 @@ class SchedulerService:
         self.scheduler = AsyncIOScheduler(
             timezone=tz,
             job_defaults={
-                'misfire_grace_time': 60, # 🌟 允许错过时间后60秒内重试
+                'misfire_grace_time': SCHEDULER_MISFIRE_GRACE_SECONDS, # 🌟 允许错过时间后一段时间内补跑
                 'coalesce': True,         # 积压的任务只跑一次
                 'max_instances': 1        # 同一个Job同时只能跑一个实例
             }
@@ -45,6 +65,18 @@ class SchedulerService:
             "monitor_task": self.auto_check_indexing_job
         }
 
+        # 分片模式：task_key -> 分片计划，以及每个 tick 的执行统计
+        self.sharded_mode = SCHEDULER_SHARDED_MODE
+        self.shard_plans: Dict[str, ShardPlan] = {}
+        self.shard_stats = ShardStats()
+
+        # 记录每次触发的计划时间，用来算启动延迟；运行中的那次放在 _fire_times 里给分片算槽位
+        self._scheduled_times: Dict[str, datetime] = {}
+        self._fire_times: Dict[str, datetime] = {}
+        # 已装载的任务配置版本：worker 模式下 API 只改表，持有调度的 worker 按版本对比把改动同步过来
+        self._task_versions: Dict[str, tuple] = {}
+        self.scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+
     def set_db_factory(self, db_factory):
         self.db_factory = db_factory
 
@@ -78,26 +110,149 @@ class SchedulerService:
         finally:
             db.close()
 
+    def _on_job_submitted(self, event):
+        """APScheduler 提交任务时记下计划触发时间（协程真正开始前触发）"""
+        if event.scheduled_run_times:
+            self._scheduled_times[event.job_id] = event.scheduled_run_times[-1]
+
+    def _with_run_history(self, task_key: str, func):
+        """包装任务：每次执行写一条 ScheduledTaskRun（耗时、延迟、处理条数、结果）"""
+        async def _wrapped():
+            started = datetime.now()
+            scheduled = self._scheduled_times.pop(task_key, None)
+            if scheduled is not None and scheduled.tzinfo is not None:
+                scheduled = scheduled.astimezone().replace(tzinfo=None)
+            plan = self.shard_plans.get(task_key)
+
+            run = ScheduledTaskRun(
+                task_key=task_key,
+                scheduled_time=scheduled,
+                started_at=started,
+                lag_seconds=max((started - scheduled).total_seconds(), 0.0) if scheduled else None,
+                shard_slot=self._tick_slot(plan, scheduled, started) if plan else None
+            )
+            if scheduled is not None:
+                self._fire_times[task_key] = scheduled
+            try:
+                run.items = await func() or 0
+                run.status = "success"
+            except Exception as e:
+                run.status = "failed"
+                run.error = str(e)
+                log.error(f"❌ 任务执行失败 [{task_key}]: {e}")
+            finally:
+                self._fire_times.pop(task_key, None)
+                run.finished_at = datetime.now()
+                run.duration_seconds = (run.finished_at - started).total_seconds()
+                self._save_run(run)
+
+        return _wrapped
+
+    def _save_run(self, run: ScheduledTaskRun):
+        """保存执行记录，并顺手清理过期记录"""
+        if not self.db_factory:
+            return
+        db = self.db_factory()
+        try:
+            db.add(run)
+            db.query(ScheduledTaskRun).filter(
+                ScheduledTaskRun.task_key == run.task_key,
+                ScheduledTaskRun.started_at < datetime.now() - timedelta(days=SCHEDULER_RUN_HISTORY_DAYS)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            log.error(f"保存任务执行记录失败: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def get_run_stats(self, hours: int = 24) -> Dict[str, Any]:
+        """
+        各任务执行统计：p50/p95 耗时、平均/最大延迟、每次处理条数、吞吐
+
+        lag 超过 misfire_grace_time 的次数单独列出，说明调度已经跟不上
+        """
+        if not self.db_factory:
+            return {}
+        since = datetime.now() - timedelta(hours=hours)
+        grace = SCHEDULER_MISFIRE_GRACE_SECONDS
+        db = self.db_factory()
+        try:
+            runs = db.query(ScheduledTaskRun).filter(
+                ScheduledTaskRun.started_at >= since
+            ).order_by(ScheduledTaskRun.started_at).all()
+        finally:
+            db.close()
+
+        grouped: Dict[str, List[ScheduledTaskRun]] = {}
+        for run in runs:
+            grouped.setdefault(run.task_key, []).append(run)
+
+        stats = {}
+        for task_key, task_runs in grouped.items():
+            durations = sorted(r.duration_seconds or 0.0 for r in task_runs)
+            lags = [r.lag_seconds for r in task_runs if r.lag_seconds is not None]
+            items = [r.items or 0 for r in task_runs]
+            stats[task_key] = {
+                "runs": len(task_runs),
+                "failed": sum(1 for r in task_runs if r.status == "failed"),
+                "p50_duration_seconds": round(_percentile(durations, 50), 3),
+                "p95_duration_seconds": round(_percentile(durations, 95), 3),
+                "max_duration_seconds": round(durations[-1], 3),
+                "avg_lag_seconds": round(sum(lags) / len(lags), 3) if lags else None,
+                "max_lag_seconds": round(max(lags), 3) if lags else None,
+                "late_runs": sum(1 for lag in lags if lag > grace),
+                "avg_items_per_run": round(sum(items) / len(items), 2),
+                "items_per_hour": round(sum(items) / hours, 2),
+                "last_run_at": task_runs[-1].started_at.isoformat(),
+            }
+        return {"hours": hours, "misfire_grace_time": grace, "tasks": stats}
+
     def _schedule_job(self, task: ScheduledTask):
         """内部方法：注册/更新单个 Job"""
         func = self.task_registry.get(task.task_key)
         if not func:
             log.warning(f"⚠️ 未找到处理函数: {task.task_key}")
             return
+        func = self._with_run_history(task.task_key, func)
+        self._task_versions[task.task_key] = self._task_version(task)
 
         if self.scheduler.get_job(task.task_key):
             self.scheduler.remove_job(task.task_key)
+        self.shard_plans.pop(task.task_key, None)
 
         if task.is_active:
             try:
+                tz = self.scheduler.timezone
+                period = uniform_cron_period(task.cron_expression, tz) if self.sharded_mode else None
+                if self.sharded_mode and period is None:
+                    log.warning(f"⚠️ [{task.name}] {task.cron_expression} 触发间隔不固定，不分片，按原 cron 触发")
+                if period:
+                    # 🌟 分片模式：cron 周期作为完整窗口，切成 N 个 tick 均匀跑完，tick 从 cron 的触发时间开始切
+                    now = datetime.now(tz)
+                    anchor = CronTrigger.from_crontab(task.cron_expression, timezone=tz).get_next_fire_time(None, now)
+                    plan = ShardPlan.from_period(
+                        period, SCHEDULER_SHARD_COUNT, SCHEDULER_SHARD_MIN_TICK_SECONDS, anchor=anchor.timestamp()
+                    )
+                    trigger = IntervalTrigger(
+                        seconds=plan.tick_seconds, start_date=plan.next_tick_start(now), timezone=tz
+                    )
+                    self.shard_plans[task.task_key] = plan
+                else:
+                    trigger = CronTrigger.from_crontab(task.cron_expression)
+
                 self.scheduler.add_job(
                     func,
-                    CronTrigger.from_crontab(task.cron_expression),
+                    trigger,
                     id=task.task_key,
                     replace_existing=True,
-                    misfire_grace_time=60 # 🌟 加固保护
+                    misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS # 🌟 加固保护
                 )
-                log.info(f"📅 任务装载成功: [{task.name}] -> {task.cron_expression}")
+                if task.task_key in self.shard_plans:
+                    plan = self.shard_plans[task.task_key]
+                    log.info(f"📅 任务装载成功: [{task.name}] -> {task.cron_expression}（{plan.shards} 分片，每 {plan.tick_seconds:.1f}s 一个 tick）")
+                else:
+                    log.info(f"📅 任务装载成功: [{task.name}] -> {task.cron_expression}")
             except Exception as e:
                 log.error(f"❌ Cron 表达式解析错误 [{task.name}]: {e}")
 
@@ -117,6 +272,19 @@ class SchedulerService:
         if not self.scheduler.running:
             self.init_default_tasks()
             self.load_jobs_from_db()
+            # 会话主动续期是内置任务，不进定时任务表
+            self.scheduler.add_job(
+                self._with_run_history("session_refresh", self.refresh_sessions_job),
+                IntervalTrigger(minutes=SESSION_REFRESH_TICK_MINUTES),
+                id="session_refresh",
+                replace_existing=True
+            )
+            self.scheduler.add_job(
+                self._with_run_history("answer_blob_prune", self.prune_answer_blobs_job),
+                IntervalTrigger(hours=ANSWER_BLOB_PRUNE_INTERVAL_HOURS),
+                id="answer_blob_prune",
+                replace_existing=True
+            )
             self.scheduler.start()
             log.success("🚀 [Scheduler] 动态调度引擎已全面启动")
 
@@ -126,9 +294,35 @@ class SchedulerService:
             self.scheduler.shutdown()
             log.info("🛑 [Scheduler] 调度引擎已安全关闭")
 
+    @staticmethod
+    def _task_version(task: ScheduledTask) -> tuple:
+        # updated_at 在 SQLite 上只精确到秒，一秒内连改两次靠 cron/开关本身区分
+        return (task.updated_at, task.cron_expression, bool(task.is_active))
+
+    def sync_tasks_from_db(self) -> int:
+        """
+        把定时任务表里改过的任务重新装载，返回装载数
+        worker 模式下调度跑在 worker 里，API 改配置只写表，由持有领导租约的 worker 定期调这个生效
+        """
+        if not self.db_factory or not self.scheduler.running:
+            return 0
+        db = self.db_factory()
+        try:
+            changed = [
+                t for t in db.query(ScheduledTask).all()
+                if self._task_versions.get(t.task_key) != self._task_version(t)
+            ]
+            for task in changed:
+                log.info(f"🔄 定时任务配置有变更，重新装载: [{task.name}]")
+                self._schedule_job(task)
+            return len(changed)
+        finally:
+            db.close()
+
     def reload_task(self, task_id: int):
-        """用户修改配置后，手动热更新"""
-        if not self.db_factory: return
+        """用户修改配置后，手动热更新（调度没在本进程跑时返回 False，由 worker 的 sync_tasks_from_db 同步）"""
+        if not self.db_factory or not self.scheduler.running:
+            return False
         db = self.db_factory()
         try:
             task = db.query(ScheduledTask).get(task_id)
@@ -139,56 +333,241 @@ class SchedulerService:
             db.close()
         return False
 
+    # ================= 🧩 分片辅助 =================
+
+    @staticmethod
+    def _tick_slot(plan: ShardPlan, fire_time: Optional[datetime], started: datetime) -> int:
+        """按计划触发时间取槽位；手动触发（没有计划时间）按当前时间所在的 tick"""
+        if fire_time is not None:
+            return plan.slot_at(fire_time.timestamp())
+        return plan.current_slot(started.timestamp())
+
+    def _begin_tick(self, task_key: str) -> Optional[TickRecord]:
+        """分片模式下开始一个 tick，返回记录（非分片模式返回 None，处理全部数据）"""
+        plan = self.shard_plans.get(task_key)
+        if not plan:
+            return None
+        started = datetime.now()
+        fire_time = self._fire_times.get(task_key)
+        return TickRecord(
+            slot=self._tick_slot(plan, fire_time, started),
+            started_at=started,
+            # 延迟 = 实际开始 - 计划触发时间
+            lag_seconds=max((started - fire_time).total_seconds(), 0.0) if fire_time else 0.0
+        )
+
+    def _shard_filter(self, task_key: str, tick: Optional[TickRecord]):
+        """当前 tick 的槽位过滤条件：id % shards == slot"""
+        plan = self.shard_plans.get(task_key)
+        if not plan or not tick or plan.shards <= 1:
+            return True
+        return (GeoArticle.id % plan.shards) == tick.slot
+
+    def _end_tick(self, task_key: str, tick: Optional[TickRecord], items: int):
+        if not tick:
+            return
+        tick.items = items
+        tick.duration_seconds = (datetime.now() - tick.started_at).total_seconds()
+        self.shard_stats.record(task_key, tick)
+
+    def _task_filters(self, task_key: str) -> list:
+        """各任务待处理文章的筛选条件（分片统计用）"""
+        if task_key == "publish_task":
+            return [
+                (GeoArticle.publish_status == "scheduled") |
+                ((GeoArticle.publish_status == "failed") & (GeoArticle.retry_count < 3))
+            ]
+        return [GeoArticle.publish_status == "published"]
+
+    def get_shard_report(self) -> Dict[str, Any]:
+        """分片情况：每个槽位的待处理量、tick 延迟和耗时"""
+        report = {"sharded_mode": self.sharded_mode, "tasks": {}}
+        db = self.db_factory() if self.db_factory else None
+        try:
+            for task_key in self.task_registry:
+                plan = self.shard_plans.get(task_key)
+                entry: Dict[str, Any] = {"plan": plan.to_dict() if plan else None}
+                if plan and db is not None:
+                    slot_expr = GeoArticle.id % plan.shards
+                    rows = db.query(slot_expr, func.count(GeoArticle.id)).filter(
+                        *self._task_filters(task_key)
+                    ).group_by(slot_expr).all()
+                    counts = {int(slot): count for slot, count in rows}
+                    entry["slot_counts"] = [counts.get(i, 0) for i in range(plan.shards)]
+                    entry["current_slot"] = plan.current_slot()
+                entry["stats"] = self.shard_stats.summary(task_key)
+                report["tasks"][task_key] = entry
+        finally:
+            if db is not None:
+                db.close()
+        return report
+
     # ================= 🚀 核心业务逻辑 Job =================
 
     async def check_and_publish_scheduled_articles(self):
         """
         [Job] 自动扫描并发布
+
+        Returns:
+            本轮提交的文章数
         """
-        if not self.db_factory: return
+        if not self.db_factory: return 0
+        tick = self._begin_tick("publish_task")
+        pending = []
         db = self.db_factory()
         try:
             now = datetime.now()
-            # 搜索：待发布(scheduled) 或 失败重试(failed 且 次数<3) 且 时间已到
+            # 搜索：待发布(scheduled) 或 失败重试(failed 且 次数<3) 且 时间已到（分片模式只取当前槽位）
             pending = db.query(GeoArticle).filter(
-                ((GeoArticle.publish_status == "scheduled") |
-                 ((GeoArticle.publish_status == "failed") & (GeoArticle.retry_count < 3))),
-                GeoArticle.publish_time <= now
+                *self._task_filters("publish_task"),
+                GeoArticle.publish_time <= now,
+                self._shard_filter("publish_task", tick)
             ).all()
 
+            # 先认领再入队：scheduled/可重试的 failed 原子改成 queued，别的 tick 或节点已经认领的不会再发一次
+            pending = self._claim_for_publish(db, pending)
             if pending:
-                log.info(f"🔍 [发布扫描] 发现 {len(pending)} 篇待发布文章，准备触发脚本...")
-                service = GeoArticleService(db)
-                for article in pending:
-                    # 🌟 关键：使用 create_task 异步处理，防止多篇文章发布时互相阻塞
-                    asyncio.create_task(service.execute_publish(article.id))
+                log.info(f"🔍 [发布扫描] 认领 {len(pending)} 篇待发布文章，准备触发脚本...")
+                by_platform: Dict[str, List[int]] = {}
+                for article in sorted(pending, key=lambda a: a.id):
+                    by_platform.setdefault(article.platform, []).append(article.id)
+
+                for platform, article_ids in by_platform.items():
+                    affinity = account_affinity(db, platform=platform)
+                    # 同平台按批切分：每批在一个账号上下文里连续发，多个批次并行时轮换选号自然落到不同账号
+                    for i in range(0, len(article_ids), PUBLISH_BATCH_SIZE):
+                        batch = article_ids[i:i + PUBLISH_BATCH_SIZE]
+                        # 🌟 关键：交给任务执行器的 scheduled 通道，和手动任务共享浏览器槽位但排在它们后面
+                        try:
+                            submit_job(
+                                "publish_batch",
+                                {"article_ids": batch},
+                                lane=LANE_SCHEDULED,
+                                name=f"定时发布: {platform} {len(batch)}篇",
+                                meta={"article_ids": batch, "platform": platform},
+                                # 认领过的文章只会进一个批次，按首篇文章去重（和单篇发布的 key 一致）
+                                dedupe_key=f"publish:{batch[0]}",
+                                affinity=affinity
+                            )
+                        except Exception:
+                            # 没入队的退回 scheduled，下一轮再认领
+                            db.query(GeoArticle).filter(
+                                GeoArticle.id.in_(batch), GeoArticle.publish_status == "queued"
+                            ).update({GeoArticle.publish_status: "scheduled"}, synchronize_session=False)
+                            db.commit()
+                            raise
         except Exception as e:
             log.error(f"发布 Job 运行异常: {e}")
+            raise
         finally:
             db.close()
+            self._end_tick("publish_task", tick, len(pending))
+        return len(pending)
+
+    def _claim_for_publish(self, db: Session, articles: List[GeoArticle]) -> List[GeoArticle]:
+        """
+        逐篇条件更新认领文章：状态还是扫描时看到的才改成 queued，返回真正认领到的
+        两个 tick、两个节点同时扫到同一篇，只有一个能认领成功
+        """
+        claimed = []
+        for article in articles:
+            rows = db.query(GeoArticle).filter(
+                GeoArticle.id == article.id,
+                GeoArticle.publish_status == article.publish_status
+            ).update({GeoArticle.publish_status: "queued"}, synchronize_session=False)
+            if rows:
+                claimed.append(article)
+        db.commit()
+        if len(claimed) < len(articles):
+            log.info(f"⏭️ [发布扫描] {len(articles) - len(claimed)} 篇文章已被其他任务认领，跳过")
+        return claimed
 
     async def auto_check_indexing_job(self):
         """
         [Job] 自动监测收录
+        只取 next_check_time 已到期的文章（走索引），每轮有上限、并发有上限，
+        检测量随新发布的文章增长，而不是随已发布总量增长
+
+        Returns:
+            本轮检测的文章数
         """
-        if not self.db_factory: return
+        if not self.db_factory: return 0
+        tick = self._begin_tick("monitor_task")
         db = self.db_factory()
         try:
-            # 搜索：已发布 但 未被确认收录的文章
-            pending = db.query(GeoArticle).filter(
-                GeoArticle.publish_status == "published",
-                GeoArticle.index_status != "indexed"
-            ).all()
+            now = datetime.now()
 
-            if pending:
-                log.info(f"📡 [收录扫描] 发现 {len(pending)} 篇已发布文章需要检测效果...")
-                service = GeoArticleService(db)
-                for article in pending:
-                    asyncio.create_task(service.check_article_index(article.id))
+            # 老数据兜底：已发布但还没排过期的文章，安排到现在
+            db.query(GeoArticle).filter(
+                GeoArticle.next_check_time.is_(None),
+                GeoArticle.publish_status == "published"
+            ).update({GeoArticle.next_check_time: now}, synchronize_session=False)
+            db.commit()
+
+            due_ids = [row.id for row in db.query(GeoArticle.id).filter(
+                GeoArticle.next_check_time <= now,
+                GeoArticle.publish_status == "published",
+                self._shard_filter("monitor_task", tick)
+            ).order_by(GeoArticle.next_check_time).limit(ARTICLE_RECHECK_BATCH_SIZE).all()]
         except Exception as e:
             log.error(f"监测 Job 运行异常: {e}")
+            self._end_tick("monitor_task", tick, 0)
+            raise
+        finally:
+            db.close()
+
+        if not due_ids:
+            self._end_tick("monitor_task", tick, 0)
+            return 0
+
+        log.info(f"📡 [收录扫描] 本轮到期 {len(due_ids)} 篇文章，开始检测...")
+        semaphore = asyncio.Semaphore(ARTICLE_RECHECK_CONCURRENCY)
+
+        async def _check(article_id: int):
+            async with semaphore:
+                # 处理函数里用独立 Session；检测失败时处理函数会把文章往后挪一个基础间隔
+                job = submit_job(
+                    "article_index_check",
+                    {"article_id": article_id},
+                    lane=LANE_SCHEDULED,
+                    name=f"收录复查: {article_id}",
+                    meta={"article_id": article_id},
+                    dedupe_key=f"index_check:{article_id}"
+                )
+                await job.wait()
+                if job.status == STATUS_FAILED:
+                    log.error(f"文章 {article_id} 收录检测失败: {job.error}")
+
+        await asyncio.gather(*(_check(article_id) for article_id in due_ids))
+        self._end_tick("monitor_task", tick, len(due_ids))
+        return len(due_ids)
+
+    async def refresh_sessions_job(self):
+        """
+        🔄 会话主动续期
+        临近过期、心跳结果快过期的 AI 平台会话按各自错开的时间点做心跳，每次只续几个
+        """
+        from backend.services.session_manager import secure_session_manager
+
+        result = await secure_session_manager.refresh_due_sessions()
+        if result["due"]:
+            log.info(f"🔄 会话续期: 到期 {result['due']} 个，本次续期 {len(result['refreshed'])} 个")
+        return len(result["refreshed"])
+
+    async def prune_answer_blobs_job(self):
+        """🧹 清理没有检测记录引用、创建超过宽限期的回答内容"""
+        from backend.services.answer_store import prune_orphan_blobs
+
+        if not self.db_factory:
+            return 0
+        db = self.db_factory()
+        try:
+            count = prune_orphan_blobs(db)
         finally:
             db.close()
+        if count:
+            log.info(f"🧹 清理孤立回答内容 {count} 条")
+        return count
 
 # 单例模式
 _instance = SchedulerService()
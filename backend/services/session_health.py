@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+会话健康模型
+以前看会话文件改了多久猜有效期（7 天失效、5 天临近过期），猜不准就开浏览器做心跳，查个状态要等几十秒！
+
+现在按平台关键 Cookie（SESSION_HEALTH_KEY_COOKIES）真实的 expires 判断，再结合最近一次心跳结果：
+    - 关键 Cookie 一个都没有 / 全过期 / 上次心跳失败且之后没重新登录 → invalid
+    - 关键 Cookie SESSION_EXPIRING_HOURS 内过期 → expiring
+    - 关键 Cookie 还早 → valid
+    - 关键 Cookie 没有过期时间（浏览器会话级）或平台没配关键 Cookie：
+      心跳成功不到 SESSION_HEARTBEAT_TTL_HOURS → valid，否则 unknown，需要心跳
+
+用法：
+    health = session_health.assess(storage_state, "doubao")
+    if health.needs_heartbeat:
+        ok = await heartbeat(...)
+        session_health.record_heartbeat(storage_state, ok)
+
+next_refresh_at 是后台主动续期的时间点，按会话名哈希在 SESSION_REFRESH_SPREAD_HOURS 内错开。
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.config import (
+    SESSION_HEALTH_KEY_COOKIES,
+    SESSION_EXPIRING_HOURS,
+    SESSION_HEARTBEAT_TTL_HOURS,
+    SESSION_REFRESH_SPREAD_HOURS,
+)
+
+STATUS_VALID = "valid"
+STATUS_EXPIRING = "expiring"
+STATUS_INVALID = "invalid"
+STATUS_UNKNOWN = "unknown"
+
+# 会话元数据：context.storage_state() 重新导出时不带，保存前要从原会话带过来
+SESSION_META_KEYS = ("created_at", "last_modified", "last_heartbeat_at", "last_heartbeat_ok")
+
+
+@dataclass
+class SessionHealth:
+    status: str
+    reason: str
+    expires_at: Optional[datetime] = None
+    last_heartbeat_at: Optional[datetime] = None
+    last_heartbeat_ok: Optional[bool] = None
+    next_refresh_at: Optional[datetime] = None
+
+    @property
+    def needs_heartbeat(self) -> bool:
+        return self.status == STATUS_UNKNOWN
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "reason": self.reason,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "last_heartbeat_at": self.last_heartbeat_at.isoformat() if self.last_heartbeat_at else None,
+            "last_heartbeat_ok": self.last_heartbeat_ok,
+            "next_refresh_at": self.next_refresh_at.isoformat() if self.next_refresh_at else None,
+            "needs_heartbeat": self.needs_heartbeat,
+        }
+
+
+def key_cookie_names(platform: str) -> List[str]:
+    names = SESSION_HEALTH_KEY_COOKIES.get(platform)
+    return [n.lower() for n in names.split("|")] if names else []
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _spread_offset(session_key: str) -> timedelta:
+    """同一个会话每次算出来一样，不同会话均匀散开"""
+    digest = hashlib.blake2b(session_key.encode("utf-8"), digest_size=4).digest()
+    return timedelta(hours=SESSION_REFRESH_SPREAD_HOURS * int.from_bytes(digest, "big") / 2 ** 32)
+
+
+def key_cookie_expiry(storage_state: Dict[str, Any], platform: str) -> Optional[Any]:
+    """
+    关键 Cookie 的过期时间（备选 Cookie 有一个在会话就在，取最晚的）
+
+    Returns:
+        datetime；没有关键 Cookie 返回 False；关键 Cookie 没有过期时间或平台没配置返回 None
+    """
+    names = key_cookie_names(platform)
+    if not names:
+        return None
+    present = [c for c in storage_state.get("cookies") or [] if str(c.get("name", "")).lower() in names]
+    if not present:
+        return False
+    expires = [c.get("expires") for c in present]
+    # 浏览器会话级 Cookie（expires 为 -1 或没有）看不出有效期
+    if any(e is None or e <= 0 for e in expires):
+        return None
+    return datetime.fromtimestamp(max(expires))
+
+
+def assess(
+    storage_state: Optional[Dict[str, Any]],
+    platform: str,
+    session_key: str = "",
+    now: Optional[datetime] = None
+) -> SessionHealth:
+    """
+    评估一个会话的健康状态（纯计算，不开浏览器）
+
+    Args:
+        storage_state: 解密后的存储状态
+        platform: 平台标识
+        session_key: 会话标识（文件名），用来错开主动续期时间
+        now: 当前时间（测试用）
+    """
+    now = now or datetime.now()
+    if not storage_state:
+        return SessionHealth(STATUS_INVALID, "会话不存在")
+
+    heartbeat_at = _parse_time(storage_state.get("last_heartbeat_at"))
+    heartbeat_ok = storage_state.get("last_heartbeat_ok")
+    created_at = _parse_time(storage_state.get("created_at"))
+    health = SessionHealth(STATUS_UNKNOWN, "", last_heartbeat_at=heartbeat_at, last_heartbeat_ok=heartbeat_ok)
+    offset = _spread_offset(session_key or platform)
+
+    expiry = key_cookie_expiry(storage_state, platform)
+    if expiry is False:
+        health.status, health.reason = STATUS_INVALID, "缺少关键登录Cookie"
+        return health
+    # 心跳失败之后重新登录过（created_at 更新），以新登录为准
+    if heartbeat_ok is False and heartbeat_at and not (created_at and created_at > heartbeat_at):
+        health.status, health.reason = STATUS_INVALID, "上次心跳检测失败"
+        return health
+
+    if expiry:
+        health.expires_at = expiry
+        if expiry <= now:
+            health.status, health.reason = STATUS_INVALID, "关键登录Cookie已过期"
+            return health
+        if expiry - now < timedelta(hours=SESSION_EXPIRING_HOURS):
+            health.status, health.reason = STATUS_EXPIRING, "关键登录Cookie即将过期"
+        else:
+            health.status, health.reason = STATUS_VALID, "关键登录Cookie有效"
+        # 进入临近过期窗口后错开续期；刚心跳过的等一个心跳周期再试（Cookie 可能不是滚动续期的）
+        refresh_at = expiry - timedelta(hours=SESSION_EXPIRING_HOURS) + offset
+        if heartbeat_ok and heartbeat_at:
+            refresh_at = max(refresh_at, heartbeat_at + timedelta(hours=SESSION_HEARTBEAT_TTL_HOURS))
+        health.next_refresh_at = refresh_at
+        return health
+
+    # 看不出有效期：靠心跳结果
+    base = heartbeat_at if heartbeat_ok else None
+    if base and now - base < timedelta(hours=SESSION_HEARTBEAT_TTL_HOURS):
+        health.status, health.reason = STATUS_VALID, "最近一次心跳检测成功"
+    else:
+        health.status, health.reason = STATUS_UNKNOWN, "没有近期的心跳结果"
+    # 在心跳结果过期前错开续期，状态查询就不用开浏览器；从没心跳过的从登录时间算
+    anchor = base or created_at or _parse_time(storage_state.get("last_modified")) or now
+    health.next_refresh_at = anchor + timedelta(hours=SESSION_HEARTBEAT_TTL_HOURS) - offset
+    return health
+
+
+def record_heartbeat(storage_state: Dict[str, Any], ok: bool, now: Optional[datetime] = None):
+    """把心跳结果写进存储状态（随会话一起加密保存）"""
+    storage_state["last_heartbeat_at"] = (now or datetime.now()).isoformat()
+    storage_state["last_heartbeat_ok"] = bool(ok)
+
+
+def carry_over(source: Optional[Dict[str, Any]], target: Dict[str, Any]) -> Dict[str, Any]:
+    """把原会话的登录时间、心跳结果带到重新导出的存储状态上，不然刚心跳过的会话又变回“需要心跳”"""
+    for key in SESSION_META_KEYS:
+        if (source or {}).get(key) is not None:
+            target[key] = source[key]
+    return target
@@ -9,14 +9,18 @@ import json
 import hashlib
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional, Tuple
+from datetime import datetime
 from loguru import logger
 
 from playwright.async_api import async_playwright, Browser, Page
 
-from backend.config import DATA_DIR, ENCRYPTION_KEY, AI_PLATFORMS
+from backend.config import (
+    DATA_DIR, ENCRYPTION_KEY, AI_PLATFORMS, AI_LOGIN_INDICATORS, LEGACY_COLLECTOR_STATE_PATH, SESSION_REFRESH_PER_TICK
+)
 from backend.services.crypto import CryptoService
+from backend.services import session_health
+from backend.services.playwright import dom_probe
 
 
 class SecureSessionManager:
@@ -32,6 +36,23 @@ class SecureSessionManager:
         self._crypto = CryptoService(ENCRYPTION_KEY)
         self._session_dir = DATA_DIR / "sessions"
         self._session_dir.mkdir(exist_ok=True)
+        # 采集会话的内存副本：同一平台并发的多个上下文共用，不用每次解密读盘
+        # 连同读入时会话文件的 mtime 一起存，其他进程/worker 重写了文件就重新读
+        self._collector_states: Dict[str, Tuple[Optional[int], Dict[str, Any]]] = {}
+        self._collector_locks: Dict[str, asyncio.Lock] = {}
+
+    def _write_atomic(self, file_path: Path, data: str):
+        """先写临时文件再改名，写到一半崩了也不会留下半截的会话文件"""
+        tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
     
     def _get_session_file_path(self, user_id: int, project_id: int, platform: str) -> Path:
         """
@@ -99,8 +120,7 @@ class SecureSessionManager:
 
             # 保存到文件
             file_path = self._get_session_file_path(user_id, project_id, platform)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(encrypted_data)
+            self._write_atomic(file_path, encrypted_data)
 
             logger.info(f"会话保存成功: user_id={user_id}, project_id={project_id}, platform={platform}")
             return True
@@ -109,6 +129,101 @@ class SecureSessionManager:
             logger.error(f"保存会话失败: {e}")
             return False
     
+    def _get_collector_session_path(self, platform: str) -> Path:
+        """文章采集用的会话文件（每个平台一份，和 AI 平台授权会话分开）"""
+        return self._session_dir / f"collector_{platform}.enc"
+
+    def _collector_mtime(self, platform: str) -> Optional[int]:
+        """采集会话文件的 mtime（纳秒），文件不存在返回 None"""
+        try:
+            return self._get_collector_session_path(platform).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _cached_collector_state(self, platform: str) -> Optional[Dict[str, Any]]:
+        """内存副本还和会话文件一致才用（mtime 没变），否则返回 None"""
+        cached = self._collector_states.get(platform)
+        if cached and cached[0] == self._collector_mtime(platform):
+            return cached[1]
+        return None
+
+    def _collector_lock(self, platform: str) -> asyncio.Lock:
+        if platform not in self._collector_locks:
+            self._collector_locks[platform] = asyncio.Lock()
+        return self._collector_locks[platform]
+
+    async def load_collector_session(self, platform: str) -> Optional[Dict[str, Any]]:
+        """
+        加载采集平台的登录状态
+
+        会话文件没变（mtime 一致）时用内存副本；文件被其他进程重写过就重新解密；
+        都没有时用一次旧的共用 auth/state.json 兜底。
+
+        Args:
+            platform: 采集平台标识（zhihu / toutiao）
+
+        Returns:
+            Playwright 存储状态，没有返回 None
+        """
+        async with self._collector_lock(platform):
+            cached = self._cached_collector_state(platform)
+            if cached is not None:
+                return cached
+
+            storage_state = None
+            file_path = self._get_collector_session_path(platform)
+            mtime = self._collector_mtime(platform)
+            try:
+                if file_path.exists():
+                    decrypted_json = self._crypto.decrypt(file_path.read_text(encoding='utf-8'))
+                    if decrypted_json:
+                        storage_state = json.loads(decrypted_json)
+                    else:
+                        logger.error(f"采集会话解密失败: platform={platform}")
+                elif os.path.exists(LEGACY_COLLECTOR_STATE_PATH):
+                    with open(LEGACY_COLLECTOR_STATE_PATH, 'r', encoding='utf-8') as f:
+                        storage_state = json.load(f)
+                    logger.info(f"采集会话沿用旧的共用登录状态: platform={platform}")
+            except Exception as e:
+                logger.error(f"加载采集会话失败: {e}, platform={platform}")
+
+            if storage_state:
+                self._collector_states[platform] = (mtime, storage_state)
+            return storage_state
+
+    async def save_collector_session(self, platform: str, storage_state: Dict[str, Any]) -> bool:
+        """
+        保存采集平台的登录状态（加密、原子写入，同时更新内存副本）
+
+        同一平台的多个上下文依次保存，内容没变就不重写文件。
+
+        Args:
+            platform: 采集平台标识
+            storage_state: Playwright 存储状态
+
+        Returns:
+            是否保存成功
+        """
+        if not storage_state:
+            return False
+        async with self._collector_lock(platform):
+            try:
+                cached = self._cached_collector_state(platform) or {}
+                if (cached.get("cookies"), cached.get("origins")) == (
+                    storage_state.get("cookies"), storage_state.get("origins")
+                ):
+                    return True
+
+                storage_state["last_modified"] = datetime.now().isoformat()
+                encrypted_data = self._crypto.encrypt(json.dumps(storage_state, ensure_ascii=False))
+                self._write_atomic(self._get_collector_session_path(platform), encrypted_data)
+                self._collector_states[platform] = (self._collector_mtime(platform), storage_state)
+                logger.info(f"采集会话保存成功: platform={platform}")
+                return True
+            except Exception as e:
+                logger.error(f"保存采集会话失败: {e}, platform={platform}")
+                return False
+
     async def load_session(
         self, 
         user_id: int, 
@@ -177,16 +292,22 @@ class SecureSessionManager:
         user_id: int, 
         project_id: int, 
         platform: str,
-        storage_state: Optional[Dict[str, Any]] = None
+        storage_state: Optional[Dict[str, Any]] = None,
+        force_heartbeat: bool = False
     ) -> str:
         """
-        验证会话有效性（心跳检测）
+        验证会话有效性
+
+        先按关键 Cookie 过期时间和上次心跳结果评估（session_health），
+        判断不了（或 force_heartbeat）才开浏览器做心跳，心跳结果随会话保存。
+        心跳超时/出异常说明不了会话失效，不记录，沿用评估结果。
 
         Args:
             user_id: 用户ID
             project_id: 项目ID
             platform: AI平台标识
             storage_state: 存储状态（可选，如不提供则加载）
+            force_heartbeat: 不管评估结果，强制做一次心跳（主动续期用）
 
         Returns:
             会话状态: "valid", "expiring", "invalid"
@@ -204,25 +325,13 @@ class SecureSessionManager:
             if not storage_state:
                 return "invalid"
 
-            # 检查会话时间
-            last_modified = storage_state.get("last_modified")
-            if last_modified:
-                try:
-                    last_modified_time = datetime.fromisoformat(last_modified)
-                    now = datetime.now()
-                    age = now - last_modified_time
-
-                    # 会话超过7天视为无效
-                    if age > timedelta(days=7):
-                        logger.warning(f"会话已过期: {age}, platform={platform}")
-                        return "invalid"
-
-                    # 会话超过5天视为临近过期
-                    if age > timedelta(days=5):
-                        logger.warning(f"会话临近过期: {age}, platform={platform}")
-                        return "expiring"
-                except Exception as e:
-                    logger.error(f"解析会话时间失败: {e}")
+            session_key = self._get_session_file_path(user_id, project_id, platform).name
+            health = session_health.assess(storage_state, platform, session_key)
+            if health.status == session_health.STATUS_INVALID:
+                logger.warning(f"会话无效: {health.reason}, platform={platform}")
+                return "invalid"
+            if not force_heartbeat and not health.needs_heartbeat:
+                return health.status
 
             # 执行心跳检测（浏览器验证）
             heartbeat_valid = await self._perform_heartbeat_check(
@@ -230,12 +339,12 @@ class SecureSessionManager:
                 storage_state=storage_state
             )
 
-            if not heartbeat_valid:
-                logger.warning(f"心跳检测失败: platform={platform}")
-                return "invalid"
+            if heartbeat_valid is None:
+                logger.warning(f"心跳检测没有结论（超时/异常），保留原状态: platform={platform}")
+                return "expiring" if health.status == session_health.STATUS_UNKNOWN else health.status
 
-            # 更新会话时间
-            storage_state["last_modified"] = datetime.now().isoformat()
+            # 确定登录/未登录才记下来，之后的状态查询直接用
+            session_health.record_heartbeat(storage_state, heartbeat_valid)
             await self.save_session(
                 user_id=user_id,
                 project_id=project_id,
@@ -243,7 +352,12 @@ class SecureSessionManager:
                 storage_state=storage_state
             )
 
-            return "valid"
+            if not heartbeat_valid:
+                logger.warning(f"心跳检测失败: platform={platform}")
+                return "invalid"
+
+            health = session_health.assess(storage_state, platform, session_key)
+            return "expiring" if health.status == session_health.STATUS_EXPIRING else "valid"
 
         except Exception as e:
             logger.error(f"验证会话失败: {e}")
@@ -253,7 +367,7 @@ class SecureSessionManager:
         self,
         platform: str,
         storage_state: Dict[str, Any]
-    ) -> bool:
+    ) -> Optional[bool]:
         """
         执行心跳检测（打开平台页面验证会话）
         优化：增加超时时间、添加重试机制、优化加载策略
@@ -263,7 +377,7 @@ class SecureSessionManager:
             storage_state: 存储状态
 
         Returns:
-            心跳检测是否成功
+            True=已登录；False=页面上确实出现了登录入口；None=没法判断（平台没配置、超时、重试后仍异常）
         """
         max_retries = 2
         retry_count = 0
@@ -274,12 +388,12 @@ class SecureSessionManager:
                 platform_config = AI_PLATFORMS.get(platform)
                 if not platform_config:
                     logger.error(f"未知平台: {platform}")
-                    return False
+                    return None
 
                 platform_url = platform_config.get("url", "")
                 if not platform_url:
                     logger.error(f"平台URL未配置: {platform}")
-                    return False
+                    return None
 
                 # 启动浏览器并使用存储状态
                 async with async_playwright() as p:
@@ -311,45 +425,12 @@ class SecureSessionManager:
                         # 额外等待一小段时间让页面稳定
                         await asyncio.sleep(2)
 
-                        # 检查是否需要登录（通过检测登录元素）
-                        login_indicators = [
-                            "[class*='login']",
-                            "[id*='login']",
-                            "[class*='auth']",
-                            "[id*='auth']",
-                            "button*='登录'",
-                            "button*='Sign in'"
-                        ]
-
-                        # 针对特定平台的额外检测
-                        if platform == 'doubao':
-                            login_indicators.extend([
-                                "[class*='login-btn']",
-                                "[class*='login-button']",
-                                "[href*='login']",
-                                "[class*='account']"
-                            ])
-
-                        # 针对千问的特殊检测
-                        if platform == 'qianwen':
-                            login_indicators.extend([
-                                "[class*='login-entry']",
-                                "[class*='user-login']"
-                            ])
-
-                        has_login = False
-                        for indicator in login_indicators:
-                            try:
-                                # 使用 query_selector 并检查可见性
-                                element = await page.query_selector(indicator)
-                                if element and await element.is_visible():
-                                    has_login = True
-                                    logger.debug(f"检测到登录元素: {indicator}")
-                                    break
-                            except Exception:
-                                continue
-
-                        if has_login:
+                        # 检查是否需要登录：平台登录入口表一次探测完
+                        login_hit = await dom_probe.probe_first(
+                            page, platform_config.get("login_indicators", AI_LOGIN_INDICATORS)
+                        )
+                        if login_hit:
+                            logger.debug(f"检测到登录元素: {login_hit.selector}")
                             logger.warning(f"心跳检测失败: 需要登录, platform={platform}")
                             return False
 
@@ -360,21 +441,20 @@ class SecureSessionManager:
                             "[contenteditable='true']",
                             "textarea"
                         ]
-
-                        has_input = False
-                        for selector in input_selectors:
-                            try:
-                                element = await page.query_selector(selector)
-                                if element and await element.is_visible():
-                                    has_input = True
-                                    break
-                            except Exception:
-                                continue
+                        has_input = await dom_probe.probe_any(page, input_selectors)
 
                         if not has_input:
                             logger.warning(f"心跳检测警告: 未找到输入框, platform={platform}")
                             # 不直接返回False，因为有些页面结构可能不同
 
+                        # 平台续期过的 Cookie 写回存储状态，跟着心跳结果一起保存
+                        try:
+                            refreshed = await context.storage_state()
+                            storage_state["cookies"] = refreshed.get("cookies", storage_state.get("cookies", []))
+                            storage_state["origins"] = refreshed.get("origins", storage_state.get("origins", []))
+                        except Exception as e:
+                            logger.debug(f"读取续期后的Cookie失败: {e}")
+
                         logger.info(f"心跳检测成功: platform={platform}")
                         return True
 
@@ -388,9 +468,9 @@ class SecureSessionManager:
                     await asyncio.sleep(2)  # 等待2秒后重试
                 else:
                     logger.error(f"心跳检测异常，已重试{max_retries}次: {e}, platform={platform}")
-                    return False
+                    return None
 
-        return False
+        return None
 
     async def get_session_status_fast(
         self, 
@@ -399,7 +479,7 @@ class SecureSessionManager:
         platform: str
     ) -> Dict[str, Any]:
         """
-        快速获取会话状态（仅检查文件，不执行浏览器验证）
+        快速获取会话状态（按会话健康模型评估，不执行浏览器验证）
         
         Args:
             user_id: 用户ID
@@ -416,36 +496,27 @@ class SecureSessionManager:
             
             status = "invalid"
             age_info = {}
+            health = None
             
             if exists:
-                # 文件存在，暂定为valid，具体需要通过validate_session进一步验证
-                # 但为了快速响应，这里返回valid或expiring
-                status = "valid"
-                
-                # 尝试读取文件获取时间信息
-                try:
-                    # 获取文件修改时间作为最后修改时间
-                    mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    now = datetime.now()
-                    age = now - mtime
-                    
-                    # 简单的时间检查
-                    if age > timedelta(days=7):
-                        status = "invalid"
-                    elif age > timedelta(days=5):
-                        status = "expiring"
-                        
-                    age_info = {
-                        "last_modified": mtime.isoformat(),
-                        "age_hours": round(age.total_seconds() / 3600, 1)
-                    }
-                except Exception:
-                    pass
+                storage_state = await self.load_session(
+                    user_id=user_id,
+                    project_id=project_id,
+                    platform=platform,
+                    validate=False
+                )
+                health = session_health.assess(storage_state, platform, file_path.name)
+                status = health.status
+                # 很久没心跳、又看不出有效期的会话，提示临近过期，等后台续期或完整检查
+                if status == session_health.STATUS_UNKNOWN:
+                    status = "expiring"
+                age_info = self._age_info(storage_state)
             
             return {
                 "status": status,
                 "exists": exists,
                 "age_info": age_info,
+                "health": health.to_dict() if health else None,
                 "platform": platform,
                 "is_fast_check": True
             }
@@ -457,6 +528,24 @@ class SecureSessionManager:
                 "error": str(e)
             }
 
+    def _age_info(self, storage_state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """会话时间信息：创建时间、最后修改时间和距今时长"""
+        last_modified = (storage_state or {}).get("last_modified")
+        if not last_modified:
+            return {}
+        try:
+            age = datetime.now() - datetime.fromisoformat(last_modified)
+        except Exception as e:
+            logger.error(f"解析会话时间失败: {e}")
+            return {}
+        return {
+            "created_at": storage_state.get("created_at"),
+            "last_modified": last_modified,
+            "age_seconds": int(age.total_seconds()),
+            "age_hours": round(age.total_seconds() / 3600, 1),
+            "age_days": round(age.total_seconds() / 86400, 1)
+        }
+
     async def get_session_status(
         self, 
         user_id: int, 
@@ -524,23 +613,7 @@ class SecureSessionManager:
                         await asyncio.sleep(1)  # 等待1秒后重试
 
             # 获取会话时间信息
-            last_modified = storage_state.get("last_modified")
-            created_at = storage_state.get("created_at")
-            age_info = {}
-            if last_modified:
-                try:
-                    last_modified_time = datetime.fromisoformat(last_modified)
-                    now = datetime.now()
-                    age = now - last_modified_time
-                    age_info = {
-                        "created_at": created_at,
-                        "last_modified": last_modified,
-                        "age_seconds": int(age.total_seconds()),
-                        "age_hours": round(age.total_seconds() / 3600, 1),
-                        "age_days": round(age.total_seconds() / 86400, 1)
-                    }
-                except Exception as e:
-                    logger.error(f"解析会话时间失败: {e}")
+            age_info = self._age_info(storage_state)
 
             # 如果心跳检测失败但会话文件存在，返回"expiring"状态而不是"invalid"
             if session_status == "invalid" and file_path.exists():
@@ -551,6 +624,7 @@ class SecureSessionManager:
                 "status": session_status,
                 "exists": True,
                 "age_info": age_info,
+                "health": session_health.assess(storage_state, platform, file_path.name).to_dict(),
                 "platform": platform
             }
 
@@ -601,6 +675,55 @@ class SecureSessionManager:
             logger.error(f"删除会话失败: {e}")
             return False
     
+    def _iter_session_files(self) -> Iterator[Tuple[int, int, str, Path]]:
+        """遍历会话文件，解析出 (用户ID, 项目ID, 平台, 路径)"""
+        for file_path in self._session_dir.glob("session_*.enc"):
+            parts = file_path.name.split('_')
+            if len(parts) >= 4:
+                try:
+                    yield int(parts[1]), int(parts[2]), parts[3].rsplit('.', 1)[0], file_path
+                except Exception as e:
+                    logger.warning(f"解析会话文件失败: {file_path}, error={e}")
+
+    async def refresh_due_sessions(
+        self,
+        limit: int = SESSION_REFRESH_PER_TICK,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        主动续期：到了续期时间点（session_health.next_refresh_at）的会话做一次心跳
+
+        各会话的时间点按哈希错开，每次最多 limit 个，浏览器心跳分散在一天里，
+        状态查询时基本都有新鲜的心跳结果，不用现开浏览器。已失效的会话要人工重新登录，不续期。
+
+        Returns:
+            {"due": 到期会话数, "refreshed": [{"platform", "user_id", "project_id", "status"}]}
+        """
+        now = now or datetime.now()
+        due = []
+        for user_id, project_id, platform, file_path in self._iter_session_files():
+            storage_state = await self.load_session(user_id, project_id, platform, validate=False)
+            health = session_health.assess(storage_state, platform, file_path.name, now=now)
+            if health.status == session_health.STATUS_INVALID or not health.next_refresh_at:
+                continue
+            if health.next_refresh_at <= now:
+                due.append((health.next_refresh_at, user_id, project_id, platform, storage_state))
+
+        due.sort(key=lambda item: item[0])
+        refreshed = []
+        for _, user_id, project_id, platform, storage_state in due[:limit]:
+            status = await self.validate_session(
+                user_id=user_id,
+                project_id=project_id,
+                platform=platform,
+                storage_state=storage_state,
+                force_heartbeat=True
+            )
+            refreshed.append({"user_id": user_id, "project_id": project_id, "platform": platform, "status": status})
+            logger.info(f"🔄 会话主动续期: platform={platform}, user_id={user_id}, project_id={project_id}, status={status}")
+
+        return {"due": len(due), "refreshed": refreshed}
+
     async def list_sessions(
         self, 
         user_id: Optional[int] = None,
@@ -619,34 +742,21 @@ class SecureSessionManager:
         try:
             sessions = []
             
-            for file_path in self._session_dir.glob("session_*.enc"):
-                file_name = file_path.name
-                
-                # 解析文件名
-                parts = file_name.split('_')
-                if len(parts) >= 4:
-                    try:
-                        session_user_id = int(parts[1])
-                        session_project_id = int(parts[2])
-                        session_platform = parts[3].rsplit('.', 1)[0]
-                        
-                        # 过滤条件
-                        if user_id is not None and session_user_id != user_id:
-                            continue
-                        if project_id is not None and session_project_id != project_id:
-                            continue
-                        
-                        sessions.append({
-                            "user_id": session_user_id,
-                            "project_id": session_project_id,
-                            "platform": session_platform,
-                            "file_path": str(file_path),
-                            "last_modified": file_path.stat().st_mtime
-                        })
-                        logger.info(f"发现会话文件: platform={session_platform}, file_path={file_path}")
-                    except Exception as e:
-                        logger.warning(f"解析会话文件失败: {file_path}, error={e}")
-                        continue
+            for session_user_id, session_project_id, session_platform, file_path in self._iter_session_files():
+                # 过滤条件
+                if user_id is not None and session_user_id != user_id:
+                    continue
+                if project_id is not None and session_project_id != project_id:
+                    continue
+
+                sessions.append({
+                    "user_id": session_user_id,
+                    "project_id": session_project_id,
+                    "platform": session_platform,
+                    "file_path": str(file_path),
+                    "last_modified": file_path.stat().st_mtime
+                })
+                logger.info(f"发现会话文件: platform={session_platform}, file_path={file_path}")
             
             # 按平台排序
             sessions.sort(key=lambda x: x["platform"])
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+分片调度
+原来每个定时任务在同一个 tick 把全部工作量一次跑完，每 5 分钟一个 CPU/浏览器尖峰，中间全在空转。
+分片模式下把 cron 周期切成 N 个 tick，每篇文章按 ID 落在一个稳定的槽位上，
+每个 tick 只处理当前槽位，单 tick 负载约为总量的 1/N！
+槽位按 APScheduler 的计划触发时间算，不按任务实际开始的时间：触发晚了也不会跑成下一个槽位。
+只有触发间隔固定的 cron 才能换成等间隔 tick，工作日、0 9,17 * * * 这种照原 cron 触发、不分片。
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Optional
+
+from apscheduler.triggers.cron import CronTrigger
+
+
+def stable_slot(key: int, shards: int) -> int:
+    """
+    稳定槽位：跨进程、跨重启不变（不能用 Python 内置 hash）
+
+    文章 ID 是自增的，直接取模就足够均匀，而且能在 SQL 里写成 id % shards 走过滤
+    （按关键词分的话，文章多的关键词整个压在一个槽位上）
+    """
+    return int(key) % shards if shards > 1 else 0
+
+
+def uniform_cron_period(cron_expression: str, timezone=None) -> Optional[int]:
+    """
+    cron 触发间隔固定时返回周期（秒），不固定返回 None（这种 cron 不能换成等间隔 tick）
+
+    日/月/星期有限制的（工作日、每月 1 号）天与天之间间隔就不一样，直接不算；
+    只限制时、分的每天重复一遍，把一天内的相邻触发间隔逐个比一遍（0 9,17 * * * 是 8h/16h 交替，*/7 在整点处只隔 4 分钟）
+    """
+    fields = cron_expression.split()
+    if len(fields) != 5 or any(f != "*" for f in fields[2:]):
+        return None
+    trigger = CronTrigger.from_crontab(cron_expression, timezone=timezone)
+    first = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+    previous, period = first, None
+    while previous < first + timedelta(days=1):
+        current = trigger.get_next_fire_time(previous, previous + timedelta(microseconds=1))
+        gap = (current - previous).total_seconds()
+        if period is not None and gap != period:
+            return None
+        previous, period = current, gap
+    return max(int(period), 1)
+
+
+@dataclass
+class ShardPlan:
+    """单个任务的分片计划：周期 period_seconds 切成 shards 个 tick，tick 边界对齐 cron 的触发时间（offset_seconds）"""
+    period_seconds: int
+    shards: int
+    offset_seconds: float = 0.0
+
+    @classmethod
+    def from_period(
+        cls,
+        period_seconds: int,
+        shard_count: int,
+        min_tick_seconds: int,
+        anchor: Optional[float] = None
+    ) -> "ShardPlan":
+        """anchor 是任意一次 cron 触发时间（时间戳），tick 从它开始切，第一个槽位和 cron 时间对齐"""
+        shards = max(1, min(shard_count, period_seconds // max(min_tick_seconds, 1)))
+        plan = cls(period_seconds=period_seconds, shards=shards)
+        if anchor is not None:
+            plan.offset_seconds = anchor % plan.tick_seconds
+        return plan
+
+    @property
+    def tick_seconds(self) -> float:
+        return self.period_seconds / self.shards
+
+    def tick_index(self, ts: Optional[float] = None) -> int:
+        """tick 序号（按对齐后的 tick 边界算），重启后槽位不漂移"""
+        ts = time.time() if ts is None else ts
+        return int((ts - self.offset_seconds) // self.tick_seconds)
+
+    def current_slot(self, ts: Optional[float] = None) -> int:
+        return self.tick_index(ts) % self.shards
+
+    def slot_at(self, fire_time: float) -> int:
+        """计划触发时间对应的槽位：触发时间就在 tick 边界上，四舍五入免得浮点误差落到上一个 tick"""
+        return int(round((fire_time - self.offset_seconds) / self.tick_seconds)) % self.shards
+
+    def next_tick_start(self, now: datetime) -> datetime:
+        """下一个 tick 边界，用作 IntervalTrigger 的 start_date（跟 now 同一个时区，传调度器时区的 aware 时间）"""
+        start = (self.tick_index(now.timestamp()) + 1) * self.tick_seconds + self.offset_seconds
+        return datetime.fromtimestamp(start, tz=now.tzinfo)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shards,
+            "period_seconds": self.period_seconds,
+            "tick_seconds": round(self.tick_seconds, 2),
+            "offset_seconds": round(self.offset_seconds, 2),
+        }
+
+
+@dataclass
+class TickRecord:
+    """一次 tick 的执行记录"""
+    slot: int
+    started_at: datetime
+    lag_seconds: float
+    duration_seconds: float = 0.0
+    items: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "slot": self.slot,
+            "started_at": self.started_at.isoformat(),
+            "lag_seconds": round(self.lag_seconds, 3),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "items": self.items,
+        }
+
+
+@dataclass
+class ShardStats:
+    """各任务最近若干个 tick 的执行统计（内存，有界）"""
+    max_ticks: int = 200
+    ticks: Dict[str, Deque[TickRecord]] = field(default_factory=dict)
+
+    def record(self, task_key: str, tick: TickRecord):
+        self.ticks.setdefault(task_key, deque(maxlen=self.max_ticks)).append(tick)
+
+    def summary(self, task_key: str, recent: int = 20) -> Dict[str, Any]:
+        ticks = list(self.ticks.get(task_key, ()))
+        if not ticks:
+            return {"ticks": 0, "recent": []}
+
+        lags = [t.lag_seconds for t in ticks]
+        durations = [t.duration_seconds for t in ticks]
+        return {
+            "ticks": len(ticks),
+            "avg_lag_seconds": round(sum(lags) / len(lags), 3),
+            "max_lag_seconds": round(max(lags), 3),
+            "avg_duration_seconds": round(sum(durations) / len(durations), 3),
+            "max_duration_seconds": round(max(durations), 3),
+            "avg_items": round(sum(t.items for t in ticks) / len(ticks), 2),
+            "max_items": max(t.items for t in ticks),
+            "recent": [t.to_dict() for t in ticks[-recent:]],
+        }
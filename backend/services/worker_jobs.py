@@ -0,0 +1,557 @@
+# -*- coding: utf-8 -*-
+"""
+Worker 任务类型与分发
+所有浏览器类任务都登记成「任务类型 + JSON 参数」，这样同一份处理函数既能在 API 进程内跑（inline 模式），
+也能写进 worker_jobs 表交给独立的 worker 进程跑（external 模式），API 进程的事件循环不再被浏览器拖住！
+
+多台机器共享同一个队列时：worker 认领任务拿租约、定期续约，挂掉的 worker 租约过期后任务被其他节点接手；
+账号会话只在某台机器上的发布任务带节点亲和（affinity），优先派给那台机器。
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.config import (
+    WORKER_MODE, WORKER_POLL_INTERVAL, ARTICLE_RECHECK_BASE_MINUTES,
+    WORKER_NODE_NAME, WORKER_LEASE_SECONDS,
+)
+from backend.database import SessionLocal
+from backend.database.models import WorkerJob, WorkerNode
+from backend.services.job_executor import (
+    Job, get_job_executor, LANE_PRIORITY, LANE_INTERACTIVE,
+    STATUS_QUEUED, STATUS_RUNNING, STATUS_CANCELLED, FINISHED_STATUSES,
+)
+from backend.services.playwright import browser_mode
+from backend.services.playwright.browser_mode import HeadedRequired
+
+log = logger.bind(module="任务执行器")
+
+# 进程内是否作为 worker 运行（worker 进程里提交的任务也走队列，才能分散到多个 worker）
+_dispatch_to_queue = WORKER_MODE == "external"
+
+
+def use_queue_dispatch(enabled: bool = True):
+    """切换提交方式：True=写入 worker_jobs 队列，False=进程内执行器"""
+    global _dispatch_to_queue
+    _dispatch_to_queue = enabled
+
+
+# ==================== 任务处理函数 ====================
+
+async def _handle_index_check(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.index_check_service import IndexCheckService
+
+    db = SessionLocal()
+    try:
+        service = IndexCheckService(db)
+        job.report(0, 1, f"正在检测关键词: {payload.get('keyword')}")
+        results = await service.check_keyword(
+            keyword_id=payload["keyword_id"],
+            company_name=payload["company_name"],
+            platforms=payload.get("platforms")
+        )
+        job.report(1, 1, f"检测完成，共{len(results)}条记录")
+        return {"results": results, "samples": service.sample_summaries}
+    finally:
+        db.close()
+
+
+async def _handle_project_check(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.index_check_service import IndexCheckService
+
+    db = SessionLocal()
+    try:
+        service = IndexCheckService(db)
+        results = await service.check_project_keywords(
+            project_id=payload["project_id"],
+            platforms=payload.get("platforms"),
+            progress_callback=job.report
+        )
+        return {"records": len(results), "results": results, "samples": service.sample_summaries}
+    finally:
+        db.close()
+
+
+async def _handle_article_index_check(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.database.models import GeoArticle
+    from backend.services.geo_article_service import GeoArticleService
+
+    article_id = payload["article_id"]
+    db = SessionLocal()
+    try:
+        return await GeoArticleService(db).check_article_index(article_id)
+    except Exception:
+        # 失败的文章往后挪一个基础间隔，避免每轮都卡在复查队首
+        db.rollback()
+        db.query(GeoArticle).filter(GeoArticle.id == article_id).update(
+            {GeoArticle.next_check_time: datetime.now() + timedelta(minutes=ARTICLE_RECHECK_BASE_MINUTES)},
+            synchronize_session=False
+        )
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+
+async def _handle_publish_article(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.geo_article_service import GeoArticleService
+
+    db = SessionLocal()
+    try:
+        success = await GeoArticleService(db).execute_publish(payload["article_id"])
+        return {"success": success}
+    finally:
+        db.close()
+
+
+async def _handle_publish_batch(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.geo_article_service import GeoArticleService
+
+    db = SessionLocal()
+    try:
+        article_ids = payload["article_ids"]
+        job.report(0, len(article_ids), f"准备发布 {len(article_ids)} 篇")
+        outcomes = await GeoArticleService(db).execute_publish_batch(article_ids)
+        succeeded = sum(1 for ok in outcomes.values() if ok)
+        job.report(len(article_ids), len(article_ids), f"发布完成，成功 {succeeded}/{len(article_ids)}")
+        return {"succeeded": succeeded, "outcomes": {str(k): v for k, v in outcomes.items()}}
+    finally:
+        db.close()
+
+
+async def _handle_manual_publish(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.api.publish import execute_publish_task
+    from backend.database.models import Account, Article
+
+    db = SessionLocal()
+    try:
+        articles = db.query(Article).filter(Article.id.in_(payload["article_ids"])).all()
+        accounts = db.query(Account).filter(Account.id.in_(payload["account_ids"])).all()
+        await execute_publish_task(payload["task_id"], articles, accounts, job=job)
+        return {"task_id": payload["task_id"]}
+    finally:
+        db.close()
+
+
+async def _handle_collect(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.article_collector_service import ArticleCollectorService
+
+    save_to_db = payload.get("save_to_db", True)
+    db = SessionLocal()
+    try:
+        job.report(0, 1, f"正在采集: {payload['keyword']}")
+        result = await ArticleCollectorService(db=db if save_to_db else None).collect_trending_articles(
+            keyword=payload["keyword"],
+            platforms=payload["platforms"],
+            min_likes=payload.get("min_likes", 100),
+            min_reads=payload.get("min_reads", 1000),
+            max_articles_per_platform=payload.get("max_articles", 10),
+            save_to_db=save_to_db,
+            sync_to_ragflow=payload.get("sync_to_ragflow", True)
+        )
+        job.report(1, 1, f"采集完成，共{result.get('total_count', 0)}篇")
+        return result
+    finally:
+        db.close()
+
+
+async def _handle_collect_campaign(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.article_collector_service import ArticleCollectorService
+
+    save_to_db = payload.get("save_to_db", True)
+    db = SessionLocal()
+    try:
+        return await ArticleCollectorService(db=db if save_to_db else None).collect_campaign(
+            keywords=payload["keywords"],
+            platforms=payload["platforms"],
+            min_likes=payload.get("min_likes", 100),
+            min_reads=payload.get("min_reads", 1000),
+            max_articles_per_keyword=payload.get("max_articles", 10),
+            save_to_db=save_to_db,
+            progress_callback=job.report
+        )
+    finally:
+        db.close()
+
+
+async def _handle_account_validate(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.account_validator import AccountValidator
+
+    # 每个任务单独一个验证浏览器，多个 worker 同时跑互不影响
+    validator = AccountValidator()
+    db = SessionLocal()
+    try:
+        account_ids = payload.get("account_ids")
+        if not account_ids:
+            return await validator.check_all_accounts(
+                db_session=db,
+                progress_callback=lambda current, total, _: job.report(current, total, f"已检测 {current}/{total}")
+            )
+
+        from backend.database.models import Account
+        accounts = db.query(Account).filter(Account.id.in_(account_ids)).all()
+        return await validator.check_accounts(
+            accounts, db,
+            progress_callback=lambda current, total, _: job.report(current, total, f"已检测 {current}/{total}")
+        )
+    finally:
+        db.close()
+
+
+async def _handle_ping(job: Job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """连通性测试：确认哪个节点接了任务（也用于多节点集成测试）"""
+    await asyncio.sleep(float(payload.get("seconds", 0)))
+    return {"node": current_node_name(), "pid": os.getpid()}
+
+
+JOB_HANDLERS: Dict[str, Callable[[Job, Dict[str, Any]], Awaitable[Any]]] = {
+    "index_check": _handle_index_check,
+    "project_check": _handle_project_check,
+    "article_index_check": _handle_article_index_check,
+    "publish_article": _handle_publish_article,
+    "publish_batch": _handle_publish_batch,
+    "manual_publish": _handle_manual_publish,
+    "collect": _handle_collect,
+    "collect_campaign": _handle_collect_campaign,
+    "account_validate": _handle_account_validate,
+    "ping": _handle_ping,
+}
+
+
+# ==================== 租约被接手时的清理 ====================
+
+def _reclaim_publish(db: Session, payload: Dict[str, Any]) -> int:
+    """
+    原 worker 发到一半挂了：它认领的文章还停在 queued/publishing，接手的任务和调度都认领不到，
+    放回 scheduled（接手的任务照常重新认领，认领是原子的，不会和调度重复发）
+    """
+    from backend.database.models import GeoArticle
+
+    article_ids = payload.get("article_ids") or [payload.get("article_id")]
+    return db.query(GeoArticle).filter(
+        GeoArticle.id.in_([i for i in article_ids if i is not None]),
+        GeoArticle.publish_status.in_(["queued", "publishing"])
+    ).update({GeoArticle.publish_status: "scheduled"}, synchronize_session=False)
+
+
+JOB_RECLAIM_HANDLERS: Dict[str, Callable[[Session, Dict[str, Any]], int]] = {
+    "publish_article": _reclaim_publish,
+    "publish_batch": _reclaim_publish,
+}
+
+
+def reclaim_job(db: Session, row: WorkerJob) -> int:
+    """任务的租约被接手/放弃时，把原 worker 留下的中间状态复原（不提交，由调用方提交）"""
+    handler = JOB_RECLAIM_HANDLERS.get(row.job_type)
+    if not handler:
+        return 0
+    return handler(db, _loads(row.payload) or {})
+
+
+async def run_handler(job_type: str, payload: Dict[str, Any], job: Job, headed: bool = False) -> Any:
+    """
+    执行任务处理函数
+
+    headed: 强制用有头浏览器（任务之前在无头浏览器里碰到了登录弹窗/验证码）
+    Raises:
+        HeadedRequired: 本次无头执行碰到需要人工处理的页面，中途被吞掉的也会在这里重新抛出
+    """
+    handler = JOB_HANDLERS.get(job_type)
+    if not handler:
+        raise ValueError(f"未知任务类型: {job_type}")
+    with browser_mode.job_scope(headed=headed) as run:
+        try:
+            result = await handler(job, payload)
+        except HeadedRequired:
+            raise
+        except Exception as e:
+            if run.escalated:
+                raise HeadedRequired(run.escalated) from e
+            raise
+        browser_mode.raise_if_escalated()
+        return result
+
+
+async def _run_inline(job_type: str, payload: Dict[str, Any], job: Job) -> Any:
+    """进程内执行：需要有头浏览器时原地用有头浏览器重跑一次（本机没有图形界面就直接失败）"""
+    try:
+        return await run_handler(job_type, payload, job)
+    except HeadedRequired as e:
+        if not browser_mode.has_display():
+            log.error(f"❌ 任务 {job.name} ({job.id}) 需要人工处理（{e.reason}），本机没有图形界面，无法转有头浏览器重跑")
+            raise RuntimeError(f"需要有头浏览器人工处理（{e.reason}），本机没有图形界面") from e
+        log.warning(f"🖥️ 任务 {job.name} ({job.id}) 需要人工处理（{e.reason}），改用有头浏览器重跑")
+        job.report(0, 0, f"转有头浏览器重跑：{e.reason}")
+        return await run_handler(job_type, payload, job, headed=True)
+
+
+# ==================== 节点与亲和 ====================
+
+def current_node_name() -> str:
+    """本机节点名：WORKER_NODE_NAME 优先，没配就用主机名"""
+    return WORKER_NODE_NAME or socket.gethostname()
+
+
+def account_affinity(db: Session, account_ids: Optional[List[int]] = None, platform: Optional[str] = None) -> Optional[str]:
+    """
+    根据账号会话所在节点推导任务亲和
+
+    - 指定 account_ids：所有账号都在同一个节点时返回该节点，分散在多个节点（或没登记）就不限制
+    - 只给 platform：定时发布在平台所有账号之间轮换，只有全部账号都在同一节点时才限制
+    """
+    from backend.database.models import Account
+
+    if account_ids:
+        nodes = {n for (n,) in db.query(Account.worker_node).filter(Account.id.in_(account_ids)).all()}
+        return nodes.pop() if len(nodes) == 1 else None
+    if platform:
+        nodes = {n for (n,) in db.query(Account.worker_node).filter(
+            Account.platform == platform, Account.status == 1
+        ).distinct().all()}
+        return nodes.pop() if len(nodes) == 1 else None
+    return None
+
+
+# worker_nodes 里定时调度领导租约那一行的 worker_id（node 字段存持有者）
+SCHEDULER_LEASE_ID = "lease:scheduler"
+
+
+def node_is_alive(node: WorkerNode, now: Optional[datetime] = None) -> bool:
+    """一个租约周期内有心跳才算在线"""
+    now = now or datetime.now()
+    return (
+        node.status != "stopped"
+        and node.last_heartbeat is not None
+        and node.last_heartbeat >= now - timedelta(seconds=WORKER_LEASE_SECONDS)
+    )
+
+
+def list_worker_nodes(db: Session) -> List[Dict[str, Any]]:
+    """所有登记过的 worker 及在线状态"""
+    now = datetime.now()
+    lease = db.get(WorkerNode, SCHEDULER_LEASE_ID)
+    leader = lease.node if lease and node_is_alive(lease, now) else None
+    return [
+        {
+            "worker_id": n.worker_id,
+            "node": n.node,
+            "pid": n.pid,
+            "slots": n.slots,
+            "running": n.running,
+            "headed": bool(n.headed),
+            "status": n.status if node_is_alive(n, now) or n.status == "stopped" else "lost",
+            "alive": node_is_alive(n, now),
+            "scheduler_leader": n.worker_id == leader,
+            "started_at": n.started_at.isoformat() if n.started_at else None,
+            "last_heartbeat": n.last_heartbeat.isoformat() if n.last_heartbeat else None,
+        }
+        for n in db.query(WorkerNode).filter(
+            WorkerNode.worker_id != SCHEDULER_LEASE_ID
+        ).order_by(WorkerNode.node, WorkerNode.worker_id).all()
+    ]
+
+
+# ==================== 队列任务（worker_jobs 表） ====================
+
+def _dumps(value: Any) -> Optional[str]:
+    return json.dumps(value, ensure_ascii=False, default=str) if value is not None else None
+
+
+def _loads(value: Optional[str]) -> Any:
+    return json.loads(value) if value else None
+
+
+def worker_job_to_dict(row: WorkerJob) -> Dict[str, Any]:
+    """与进程内 Job.to_dict() 相同的结构，前端不用区分任务在哪跑"""
+    def _seconds(start, end):
+        return round((end - start).total_seconds(), 3) if start and end else None
+
+    return {
+        "job_id": row.id,
+        "name": row.name,
+        "lane": row.lane,
+        "status": row.status,
+        "progress": _loads(row.progress) or {"current": 0, "total": 0, "message": "排队中"},
+        "result": _loads(row.result) if row.status in FINISHED_STATUSES else None,
+        "error": row.error,
+        "meta": _loads(row.meta) or {},
+        "worker_id": row.worker_id,
+        "affinity": row.affinity,
+        "headed": bool(row.headed),
+        "attempts": row.attempts or 0,
+        "lease_expires_at": row.lease_expires_at.isoformat() if row.lease_expires_at else None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+        "queue_seconds": _seconds(row.created_at, row.started_at),
+        "run_seconds": _seconds(row.started_at, row.finished_at),
+    }
+
+
+class QueuedJob:
+    """队列任务句柄（和进程内 Job 一样有 id/lane/status/wait）"""
+
+    def __init__(self, row: WorkerJob):
+        self.id = row.id
+        self.lane = row.lane
+        self.status = row.status
+        self.error = row.error
+        self.result = None
+
+    def _poll(self) -> bool:
+        """查一次任务状态，结束了返回 True（同步查库，wait 里放到线程池跑）"""
+        db = SessionLocal()
+        try:
+            row = db.get(WorkerJob, self.id)
+            if row is None:
+                self.status = STATUS_CANCELLED
+                return True
+            self.status, self.error = row.status, row.error
+            if row.status in FINISHED_STATUSES:
+                self.result = _loads(row.result)
+                return True
+            return False
+        finally:
+            db.close()
+
+    async def wait(self, poll_interval: float = WORKER_POLL_INTERVAL) -> Any:
+        """轮询直到任务结束（查库在线程池里，不卡 API 的事件循环）"""
+        while not await asyncio.to_thread(self._poll):
+            await asyncio.sleep(poll_interval)
+        return self.result
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    payload: Dict[str, Any],
+    lane: str = LANE_INTERACTIVE,
+    name: Optional[str] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    dedupe_key: Optional[str] = None,
+    affinity: Optional[str] = None
+) -> WorkerJob:
+    """
+    写入 worker_jobs 队列；同 dedupe_key 的任务未结束时返回已有任务
+
+    先查一遍是快路径，真正挡重复的是 dedupe_key 的部分唯一索引：
+    多个进程同时入队，后插入的撞索引后回滚，返回先入队的那个
+    """
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"未知任务类型: {job_type}")
+    if lane not in LANE_PRIORITY:
+        raise ValueError(f"未知通道: {lane}")
+
+    def _active():
+        return db.query(WorkerJob).filter(
+            WorkerJob.dedupe_key == dedupe_key,
+            WorkerJob.status.in_([STATUS_QUEUED, STATUS_RUNNING])
+        ).first()
+
+    if dedupe_key:
+        active = _active()
+        if active:
+            return active
+
+    row = WorkerJob(
+        id=uuid.uuid4().hex[:12],
+        job_type=job_type,
+        name=name or job_type,
+        lane=lane,
+        priority=LANE_PRIORITY[lane],
+        payload=_dumps(payload),
+        meta=_dumps(meta or {}),
+        dedupe_key=dedupe_key,
+        affinity=affinity,
+        attempts=0,
+        status=STATUS_QUEUED,
+        created_at=datetime.now()
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        active = _active() if dedupe_key else None
+        if not active:
+            raise
+        return active
+    return row
+
+
+def submit_job(
+    job_type: str,
+    payload: Dict[str, Any],
+    lane: str = LANE_INTERACTIVE,
+    name: Optional[str] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    dedupe_key: Optional[str] = None,
+    affinity: Optional[str] = None
+):
+    """
+    提交任务：external 模式写队列交给 worker，inline 模式交给进程内执行器
+    affinity 只对队列任务有效（进程内执行本来就在本机）
+
+    Returns:
+        Job 或 QueuedJob，都有 id / lane / status / wait()
+    """
+    if _dispatch_to_queue:
+        db = SessionLocal()
+        try:
+            row = enqueue_job(db, job_type, payload, lane, name, meta, dedupe_key, affinity)
+            where = f"节点 {affinity}" if affinity else "worker"
+            log.info(f"📥 任务已入队 [{lane}] {row.name} ({row.id})，等待{where}认领")
+            return QueuedJob(row)
+        finally:
+            db.close()
+
+    return get_job_executor().submit(
+        name or job_type,
+        lambda job: _run_inline(job_type, payload, job),
+        lane=lane,
+        meta=meta,
+        dedupe_key=dedupe_key
+    )
+
+
+def job_handle(job) -> Dict[str, Any]:
+    """接口返回给前端的任务句柄"""
+    return {"job_id": job.id, "lane": job.lane, "status": job.status}
+
+
+def get_queued_job(db: Session, job_id: str) -> Optional[WorkerJob]:
+    return db.get(WorkerJob, job_id)
+
+
+def list_queued_jobs(db: Session, lane: Optional[str] = None, status: Optional[str] = None, limit: int = 100) -> List[WorkerJob]:
+    query = db.query(WorkerJob)
+    if lane:
+        query = query.filter(WorkerJob.lane == lane)
+    if status:
+        query = query.filter(WorkerJob.status == status)
+    return query.order_by(WorkerJob.created_at.desc()).limit(limit).all()
+
+
+def cancel_queued_job(db: Session, job_id: str) -> bool:
+    """取消队列任务：排队中的直接取消，运行中的打上取消标记由 worker 处理"""
+    cancelled = db.query(WorkerJob).filter(
+        WorkerJob.id == job_id, WorkerJob.status == STATUS_QUEUED
+    ).update({
+        WorkerJob.status: STATUS_CANCELLED,
+        WorkerJob.finished_at: datetime.now()
+    }, synchronize_session=False)
+    if not cancelled:
+        cancelled = db.query(WorkerJob).filter(
+            WorkerJob.id == job_id, WorkerJob.status == STATUS_RUNNING
+        ).update({WorkerJob.cancel_requested: True}, synchronize_session=False)
+    db.commit()
+    return bool(cancelled)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Worker 日志中转
+worker 进程把日志写进 worker_logs 表，API 进程轮询新日志通过 WebSocket 广播，
+前端控制台看到的日志和任务在 API 进程内跑时一模一样！
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+from loguru import logger
+from sqlalchemy import func
+
+from backend.config import WORKER_POLL_INTERVAL, WORKER_LOG_RETENTION_HOURS
+from backend.database import SessionLocal
+from backend.database.models import WorkerLog
+
+log = logger.bind(module="调度中心")
+
+# 清理过期日志的间隔（秒）
+_PRUNE_INTERVAL = 600
+
+
+def _latest_log_id() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.max(WorkerLog.id)).scalar() or 0
+    finally:
+        db.close()
+
+
+def _fetch_logs(last_id: int, prune: bool) -> List[Dict[str, Any]]:
+    """取 last_id 之后的新日志（顺手清理过期日志）；同步查库，由 relay 放到线程池里跑，不卡事件循环"""
+    db = SessionLocal()
+    try:
+        rows = db.query(WorkerLog).filter(WorkerLog.id > last_id).order_by(WorkerLog.id).limit(500).all()
+        messages = [{
+            "id": row.id,
+            "time": row.created_at.strftime("%H:%M:%S") if row.created_at else "",
+            "level": row.level,
+            "module": row.module or "系统",
+            "message": row.message,
+            "worker": row.worker_id,
+        } for row in rows]
+        if prune:
+            db.query(WorkerLog).filter(
+                WorkerLog.created_at < datetime.now() - timedelta(hours=WORKER_LOG_RETENTION_HOURS)
+            ).delete(synchronize_session=False)
+            db.commit()
+        return messages
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def relay_worker_logs(
+    broadcast: Callable[[dict], Awaitable[None]],
+    poll_interval: float = WORKER_POLL_INTERVAL
+):
+    """持续把 worker 日志转发到 WebSocket（从启动时的最新一条之后开始）"""
+    last_id = await asyncio.to_thread(_latest_log_id)
+    last_prune = 0.0
+    last_error = None
+    loop = asyncio.get_running_loop()
+    log.info("📡 Worker 日志中转已启动")
+
+    while True:
+        prune = loop.time() - last_prune > _PRUNE_INTERVAL
+        try:
+            messages = await asyncio.to_thread(_fetch_logs, last_id, prune)
+            for message in messages:
+                last_id = message.pop("id")
+                await broadcast(message)
+            if prune:
+                last_prune = loop.time()
+            last_error = None
+        except Exception as e:
+            # 这条日志本身也会广播出去，同样的错误只记一次，免得每轮刷屏
+            if str(e) != last_error:
+                log.warning(f"⚠️ worker 日志中转异常: {e}")
+                last_error = str(e)
+
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,640 @@
+# -*- coding: utf-8 -*-
+"""
+独立 Worker 进程入口
+浏览器自动化、定时任务都挪到这里跑，API 进程只负责接请求和入队，事件循环不再被浏览器拖住！
+
+用法：
+    python -m backend.worker                  # 单个 worker（同时跑定时调度）
+    python -m backend.worker --workers 4      # 4 个 worker 进程，抢到领导租约的那个跑定时调度
+    python -m backend.worker --no-scheduler   # 只消费队列，不跑定时调度
+    python -m backend.worker --headed         # 本机有桌面，能接需要人工过登录/验证码的任务
+
+配合 API 进程使用时设置 WORKER_MODE=external。
+Ctrl+C / SIGTERM 会优雅退出：停止认领新任务，等运行中的任务跑完（最多 --drain-timeout 秒），
+超时未完成的任务放回队列由其他 worker 接手。
+
+多台机器：各机器的 worker 把 DATABASE_URL 指向同一个库，用 WORKER_NODE_NAME 区分节点。
+认领任务时拿一个租约（WORKER_LEASE_SECONDS），运行中每轮续约；进程被杀/机器掉线后租约过期，
+其他 worker 直接接手。只有一台机器上有会话的账号，发布任务会优先派给那台机器。
+定时调度全集群只跑一份：没加 --no-scheduler 的 worker 在心跳时抢/续领导租约，抢到的才启动调度，
+持有者掉线后租约过期，其他 worker 接着跑。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+from sqlalchemy import and_, or_, case, func
+from sqlalchemy.exc import IntegrityError
+
+from backend.config import (
+    JOB_EXECUTOR_SLOTS, WORKER_POLL_INTERVAL, WORKER_DRAIN_TIMEOUT, WORKER_LOG_RETENTION_HOURS,
+    WORKER_LEASE_SECONDS, WORKER_MAX_ATTEMPTS, WORKER_AFFINITY_GRACE_SECONDS, WORKER_HEADED,
+    WORKER_HEADED_WAIT_SECONDS,
+)
+from backend.database import SessionLocal, init_db
+from backend.database.models import WorkerJob, WorkerNode, WorkerLog
+from backend.services.job_executor import (
+    Job, JobExecutor, LANE_INTERACTIVE, LANE_BACKFILL, STATUS_QUEUED, STATUS_RUNNING, STATUS_FAILED,
+)
+from backend.services.worker_jobs import (
+    run_handler, use_queue_dispatch, current_node_name, reclaim_job, SCHEDULER_LEASE_ID,
+)
+from backend.services.playwright import timing
+from backend.services.playwright.browser_mode import HeadedRequired, has_display
+
+log = logger.bind(module="Worker")
+
+
+class Worker:
+    """
+    单个 worker 进程
+
+    循环：心跳 -> 认领队列任务（拿租约）-> 交给本进程的 JobExecutor 执行 -> 同步进度/结果并续约 -> 中转日志
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        slots: int = JOB_EXECUTOR_SLOTS,
+        run_scheduler: bool = True,
+        drain_timeout: int = WORKER_DRAIN_TIMEOUT,
+        poll_interval: float = WORKER_POLL_INTERVAL,
+        node: Optional[str] = None,
+        lease_seconds: int = WORKER_LEASE_SECONDS,
+        headed: bool = WORKER_HEADED
+    ):
+        self.worker_id = worker_id
+        self.node = node or current_node_name()
+        # 能跑有头浏览器的 worker 才认领 headed 任务（无头执行碰到登录弹窗/验证码转过来的）
+        self.headed = headed
+        self.lease_seconds = lease_seconds
+        # 心跳不用每轮都写，一个租约周期内写三次足够判断在线
+        self.heartbeat_interval = max(poll_interval, lease_seconds / 3)
+        self._last_heartbeat: Optional[float] = None
+        self._last_headed_sweep: Optional[float] = None
+        self._last_task_sync: Optional[float] = None
+        self.executor = JobExecutor(slots=slots)
+        # run_scheduler 只表示有资格跑定时调度，真正跑要先抢到领导租约
+        self.run_scheduler = run_scheduler
+        self.is_leader = False
+        self.drain_timeout = drain_timeout
+        self.poll_interval = poll_interval
+        self.draining = False
+        # worker_jobs.id -> 本进程的 Job
+        self.tracked: Dict[str, Job] = {}
+        self._log_buffer: deque = deque(maxlen=5000)
+        self._log_sink_id: Optional[int] = None
+
+    # ---------- 日志中转 ----------
+
+    def _log_sink(self, message):
+        record = message.record
+        self._log_buffer.append(WorkerLog(
+            worker_id=self.worker_id,
+            level=record["level"].name,
+            module=record["extra"].get("module", "系统"),
+            message=record["message"],
+            created_at=record["time"].replace(tzinfo=None)
+        ))
+
+    def _flush_logs(self, db):
+        if not self._log_buffer:
+            return
+        rows = []
+        while self._log_buffer:
+            rows.append(self._log_buffer.popleft())
+        try:
+            db.add_all(rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # 这里不能再走 logger，否则日志写库失败会无限递归
+            print(f"[worker {self.worker_id}] 日志中转失败: {e}", file=sys.stderr)
+
+    # ---------- 认领与同步 ----------
+
+    def _allowed_lanes(self) -> Optional[List[str]]:
+        """本地有空槽位时能认领哪些通道（None 表示都可以）"""
+        if self.executor.has_capacity(LANE_BACKFILL):
+            return None
+        if self.executor.has_capacity(LANE_INTERACTIVE):
+            return [LANE_INTERACTIVE]
+        return []
+
+    def _heartbeat(self, db, status: str = "active", force: bool = False):
+        """上报心跳（节点在线判断、亲和任务改派都靠它）"""
+        now = time.monotonic()
+        if not force and self._last_heartbeat is not None and now - self._last_heartbeat < self.heartbeat_interval:
+            return
+        db.merge(WorkerNode(
+            worker_id=self.worker_id,
+            node=self.node,
+            pid=os.getpid(),
+            slots=self.executor.slots,
+            running=len(self.tracked),
+            headed=self.headed,
+            status=status,
+            last_heartbeat=datetime.now()
+        ))
+        db.commit()
+        self._last_heartbeat = now
+        if self.run_scheduler:
+            self.is_leader = status == "active" and self._renew_leader_lease(db)
+
+    def _renew_leader_lease(self, db) -> bool:
+        """
+        抢/续定时调度的领导租约
+        条件 UPDATE：自己持有，或者持有者超过一个租约周期没续约，多个 worker 同时抢只有一个能成功
+        """
+        now = datetime.now()
+        renewed = db.query(WorkerNode).filter(
+            WorkerNode.worker_id == SCHEDULER_LEASE_ID,
+            or_(
+                WorkerNode.node == self.worker_id,
+                WorkerNode.last_heartbeat < now - timedelta(seconds=self.lease_seconds)
+            )
+        ).update({
+            WorkerNode.node: self.worker_id,
+            WorkerNode.pid: os.getpid(),
+            WorkerNode.last_heartbeat: now,
+        }, synchronize_session=False)
+        db.commit()
+        if renewed:
+            return True
+        if db.query(WorkerNode.worker_id).filter(WorkerNode.worker_id == SCHEDULER_LEASE_ID).first():
+            return False
+        # 第一次：插入租约行，主键冲突说明别人先插了
+        db.add(WorkerNode(
+            worker_id=SCHEDULER_LEASE_ID,
+            node=self.worker_id,
+            pid=os.getpid(),
+            status="lease",
+            started_at=now,
+            last_heartbeat=now
+        ))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    def _release_leader_lease(self, db):
+        """退出时主动交出租约，其他 worker 下一次心跳就能接手，不用等过期"""
+        db.query(WorkerNode).filter(
+            WorkerNode.worker_id == SCHEDULER_LEASE_ID,
+            WorkerNode.node == self.worker_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        self.is_leader = False
+
+    def _sync_scheduler(self, scheduler):
+        """
+        领导租约和调度引擎对齐：抢到就启动，丢了就停（卡太久被别人接手的情况）
+        持有期间定期把 API 改过的定时任务配置同步进来（API 进程不跑调度，只改表）
+        """
+        if self.is_leader and not scheduler.scheduler.running:
+            log.info(f"👑 worker {self.worker_id} 拿到定时调度领导租约")
+            scheduler.start()
+            self._last_task_sync = time.monotonic()
+        elif not self.is_leader and scheduler.scheduler.running:
+            log.warning(f"⚠️ worker {self.worker_id} 失去定时调度领导租约，停止调度")
+            scheduler.stop()
+        elif self.is_leader:
+            now = time.monotonic()
+            if self._last_task_sync is None or now - self._last_task_sync >= self.heartbeat_interval:
+                self._last_task_sync = now
+                scheduler.sync_tasks_from_db()
+
+    def _claimable(self, db, now: datetime):
+        """
+        可认领条件：
+        1. 排队中，或运行中但租约已过期（原 worker 挂了，直接接手）
+        2. 没有亲和 / 亲和本节点 / 亲和的节点不在线且已经等过宽限期
+        """
+        alive_since = now - timedelta(seconds=self.lease_seconds)
+        alive_nodes = [n for (n,) in db.query(WorkerNode.node).filter(
+            WorkerNode.worker_id != SCHEDULER_LEASE_ID,
+            WorkerNode.status != "stopped",
+            WorkerNode.last_heartbeat >= alive_since
+        ).distinct().all()]
+
+        available = or_(
+            WorkerJob.status == STATUS_QUEUED,
+            and_(WorkerJob.status == STATUS_RUNNING, WorkerJob.lease_expires_at < now)
+        )
+        affinity = or_(
+            WorkerJob.affinity.is_(None),
+            WorkerJob.affinity == self.node,
+            and_(
+                WorkerJob.created_at < now - timedelta(seconds=WORKER_AFFINITY_GRACE_SECONDS),
+                WorkerJob.affinity.notin_(alive_nodes)
+            )
+        )
+        return available, affinity
+
+    def _claim_next(self, db) -> Optional[WorkerJob]:
+        """
+        按优先级认领一个任务并拿租约
+        UPDATE 带上同样的可认领条件，多进程/多机器同时抢同一行只有一个能成功
+        """
+        lanes = self._allowed_lanes()
+        if lanes == []:
+            return None
+
+        for _ in range(5):
+            now = datetime.now()
+            available, affinity = self._claimable(db, now)
+            query = db.query(WorkerJob.id, WorkerJob.status, WorkerJob.worker_id).filter(available, affinity)
+            if lanes is not None:
+                query = query.filter(WorkerJob.lane.in_(lanes))
+            if not self.headed:
+                query = query.filter(or_(WorkerJob.headed.is_(None), WorkerJob.headed.is_(False)))
+            candidate = query.order_by(WorkerJob.priority, WorkerJob.created_at).first()
+            if not candidate:
+                return None
+
+            claimed = db.query(WorkerJob).filter(WorkerJob.id == candidate.id, available).update({
+                WorkerJob.status: STATUS_RUNNING,
+                WorkerJob.worker_id: self.worker_id,
+                WorkerJob.started_at: now,
+                WorkerJob.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+                WorkerJob.attempts: func.coalesce(WorkerJob.attempts, 0) + 1,
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                continue
+
+            row = db.get(WorkerJob, candidate.id)
+            db.refresh(row)
+            if candidate.status == STATUS_RUNNING:
+                log.warning(f"🔁 接手租约过期的任务 {row.name} ({row.id})，原 worker: {candidate.worker_id}")
+                # 原 worker 留下的中间状态（发到一半的文章）先复原，再重新执行
+                if reclaim_job(db, row):
+                    db.commit()
+            if row.attempts > WORKER_MAX_ATTEMPTS:
+                # 反复把 worker 拖死的任务不再重试
+                row.status = STATUS_FAILED
+                row.error = f"已被认领 {row.attempts - 1} 次仍未完成，放弃执行"
+                row.finished_at = now
+                row.lease_expires_at = None
+                reclaim_job(db, row)
+                db.commit()
+                log.error(f"❌ 任务 {row.name} ({row.id}) 超过最大认领次数，标记为失败")
+                continue
+            return row
+        return None
+
+    def _start(self, row: WorkerJob):
+        job_type = row.job_type
+        payload = json.loads(row.payload) if row.payload else {}
+        headed = bool(row.headed)
+
+        async def run(job: Job):
+            try:
+                return await run_handler(job_type, payload, job, headed=headed)
+            except HeadedRequired as e:
+                # 同步时放回队列交给有头 worker，不算失败
+                job.meta["headed_required"] = e.reason
+                raise
+
+        job = self.executor.submit(row.name or job_type, run, lane=row.lane)
+        self.tracked[row.id] = job
+        log.info(f"🛠️ 认领任务 [{row.lane}] {row.name} ({row.id}){'（有头）' if headed else ''}")
+
+    def _sync(self, db):
+        """
+        把本地任务的进度/结果写回队列表并续约，处理取消请求
+
+        写回都带 worker_id 条件：租约已经被别的 worker 接手（本进程卡太久）时更新不到任何行，
+        本地这份直接取消丢弃，避免同一任务两份结果互相覆盖。
+        """
+        if not self.tracked:
+            return
+        cancel_flags = dict(db.query(WorkerJob.id, WorkerJob.cancel_requested).filter(
+            WorkerJob.id.in_(list(self.tracked))
+        ).all())
+        now = datetime.now()
+        for job_id, job in list(self.tracked.items()):
+            if cancel_flags.get(job_id) and not job.finished:
+                self.executor.cancel(job.id)
+            if job.finished and job.meta.get("headed_required"):
+                self._handoff_headed(db, job_id, job)
+                self.tracked.pop(job_id)
+                continue
+
+            values = {
+                WorkerJob.progress: json.dumps(job.progress, ensure_ascii=False),
+                WorkerJob.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+            }
+            if job.finished:
+                values.update({
+                    WorkerJob.status: job.status,
+                    WorkerJob.result: json.dumps(job.result, ensure_ascii=False, default=str) if job.result is not None else None,
+                    WorkerJob.error: job.error,
+                    WorkerJob.finished_at: job.finished_at,
+                    WorkerJob.lease_expires_at: None,
+                })
+            updated = db.query(WorkerJob).filter(
+                WorkerJob.id == job_id,
+                WorkerJob.worker_id == self.worker_id,
+                WorkerJob.status == STATUS_RUNNING
+            ).update(values, synchronize_session=False)
+
+            if not updated:
+                if not job.finished:
+                    self.executor.cancel(job.id)
+                    log.warning(f"⚠️ 任务 {job.name} ({job_id}) 已不属于本 worker（被取消或租约被接手），本地停止执行")
+                self.tracked.pop(job_id)
+            elif job.finished:
+                self.tracked.pop(job_id)
+        db.commit()
+
+    def _headed_online(self, db, now: datetime) -> bool:
+        """有没有在线、没在退出的有头 worker"""
+        return db.query(WorkerNode.worker_id).filter(
+            WorkerNode.worker_id != SCHEDULER_LEASE_ID,
+            WorkerNode.headed.is_(True),
+            WorkerNode.status == "active",
+            WorkerNode.last_heartbeat >= now - timedelta(seconds=self.lease_seconds)
+        ).first() is not None
+
+    def _handoff_headed(self, db, job_id: str, job: Job):
+        """
+        无头执行碰到登录弹窗/验证码：放回队列并标记需要有头浏览器，只有有头 worker 能认领
+        排队中的有头任务借 lease_expires_at 记等待截止时间，过了还没有在线的有头 worker 就由 _expire_headed_waits 标记失败
+        """
+        reason = job.meta["headed_required"]
+        now = datetime.now()
+        db.query(WorkerJob).filter(
+            WorkerJob.id == job_id,
+            WorkerJob.worker_id == self.worker_id,
+            WorkerJob.status == STATUS_RUNNING
+        ).update({
+            WorkerJob.status: STATUS_QUEUED,
+            WorkerJob.headed: True,
+            WorkerJob.worker_id: None,
+            WorkerJob.started_at: None,
+            WorkerJob.lease_expires_at: now + timedelta(seconds=WORKER_HEADED_WAIT_SECONDS),
+            WorkerJob.error: None,
+            WorkerJob.progress: json.dumps({"current": 0, "total": 0, "message": f"等待有头 worker：{reason}"}, ensure_ascii=False),
+            WorkerJob.attempts: case((WorkerJob.attempts > 0, WorkerJob.attempts - 1), else_=0),
+        }, synchronize_session=False)
+        if self._headed_online(db, now):
+            log.warning(f"🖥️ 任务 {job.name} ({job_id}) 需要人工处理（{reason}），已转给有头 worker")
+        else:
+            log.warning(
+                f"🖥️ 任务 {job.name} ({job_id}) 需要人工处理（{reason}），已转有头，但当前没有在线的有头 worker，"
+                f"{WORKER_HEADED_WAIT_SECONDS}s 内没人接手将标记失败（用 --headed 启动一个有桌面的 worker）"
+            )
+
+    def _expire_headed_waits(self, db):
+        """转有头的任务等过截止时间、期间一直没有在线的有头 worker：标记失败，不在队列里无限挂着"""
+        now = time.monotonic()
+        if self._last_headed_sweep is not None and now - self._last_headed_sweep < self.heartbeat_interval:
+            return
+        self._last_headed_sweep = now
+        now = datetime.now()
+        if self._headed_online(db, now):
+            return
+        expired = db.query(WorkerJob).filter(
+            WorkerJob.status == STATUS_QUEUED,
+            WorkerJob.headed.is_(True),
+            or_(WorkerJob.lease_expires_at.is_(None), WorkerJob.lease_expires_at < now)
+        ).all()
+        for row in expired:
+            failed = db.query(WorkerJob).filter(
+                WorkerJob.id == row.id,
+                WorkerJob.status == STATUS_QUEUED
+            ).update({
+                WorkerJob.status: STATUS_FAILED,
+                WorkerJob.error: f"需要有头浏览器人工处理，等待 {WORKER_HEADED_WAIT_SECONDS}s 没有在线的有头 worker",
+                WorkerJob.finished_at: now,
+                WorkerJob.lease_expires_at: None,
+            }, synchronize_session=False)
+            if failed:
+                # 发到一半的文章等放回 scheduled，别卡在 queued
+                reclaim_job(db, row)
+                log.error(f"❌ 任务 {row.name} ({row.id}) 等不到有头 worker，标记为失败")
+        db.commit()
+
+    def _requeue_unfinished(self, db):
+        """排空超时：未完成的任务取消并放回队列，交给其他 worker"""
+        for job_id, job in list(self.tracked.items()):
+            self.executor.cancel(job.id)
+            # 主动交还不算一次失败认领
+            db.query(WorkerJob).filter(
+                WorkerJob.id == job_id,
+                WorkerJob.worker_id == self.worker_id,
+                WorkerJob.status == STATUS_RUNNING
+            ).update({
+                WorkerJob.status: STATUS_QUEUED,
+                WorkerJob.worker_id: None,
+                WorkerJob.started_at: None,
+                WorkerJob.lease_expires_at: None,
+                WorkerJob.attempts: case((WorkerJob.attempts > 0, WorkerJob.attempts - 1), else_=0),
+            }, synchronize_session=False)
+            log.warning(f"↩️ 任务 {job.name} ({job_id}) 未在排空时间内完成，已放回队列")
+        db.commit()
+        self.tracked.clear()
+
+    def _prune_stopped_nodes(self, db):
+        """清理很久以前退出的 worker 登记（每次重启进程号都不同，不清会越积越多）"""
+        cutoff = datetime.now() - timedelta(hours=WORKER_LOG_RETENTION_HOURS)
+        db.query(WorkerNode).filter(
+            WorkerNode.last_heartbeat < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    # ---------- 主循环 ----------
+
+    def drain(self):
+        if not self.draining:
+            self.draining = True
+            log.info(f"🧹 worker {self.worker_id} 开始排空：不再认领新任务，运行中 {len(self.tracked)} 个")
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.drain)
+            except (NotImplementedError, RuntimeError):
+                # Windows 不支持 add_signal_handler
+                signal.signal(sig, lambda *_: self.drain())
+
+    async def run(self):
+        self._log_sink_id = logger.add(self._log_sink, level="INFO")
+        # worker 里提交的任务（定时调度产生的）也写队列，才能分散到所有 worker
+        use_queue_dispatch(True)
+        self._install_signal_handlers()
+
+        scheduler = None
+        if self.run_scheduler:
+            from backend.services.scheduler_service import get_scheduler_service
+            scheduler = get_scheduler_service()
+            scheduler.set_db_factory(SessionLocal)
+
+        log.success(
+            f"🚀 worker {self.worker_id} 已启动（节点 {self.node}，槽位 {self.executor.slots}，"
+            f"定时调度 {'参与选主' if scheduler else '关'}，有头浏览器 {'可用' if self.headed else '不可用'}）"
+        )
+
+        if self.headed and not has_display():
+            log.warning("⚠️ 以有头模式启动，但本机没有 DISPLAY，有头浏览器可能起不来")
+
+        drain_started = None
+        db = SessionLocal()
+        try:
+            self._prune_stopped_nodes(db)
+            while True:
+                try:
+                    self._heartbeat(db, "draining" if self.draining else "active")
+                    self._expire_headed_waits(db)
+                    if scheduler and not self.draining:
+                        self._sync_scheduler(scheduler)
+                    if not self.draining:
+                        while True:
+                            row = self._claim_next(db)
+                            if not row:
+                                break
+                            self._start(row)
+                    else:
+                        if drain_started is None:
+                            drain_started = time.monotonic()
+                            if scheduler:
+                                scheduler.stop()
+                                self._release_leader_lease(db)
+                        if not self.tracked:
+                            break
+                        if time.monotonic() - drain_started > self.drain_timeout:
+                            self._requeue_unfinished(db)
+                            break
+
+                    self._sync(db)
+                    self._flush_logs(db)
+                except Exception as e:
+                    db.rollback()
+                    log.error(f"worker 主循环异常: {e}")
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            log.info(f"👋 worker {self.worker_id} 已退出")
+            try:
+                if scheduler:
+                    scheduler.stop()
+                    self._release_leader_lease(db)
+                self._heartbeat(db, "stopped", force=True)
+            except Exception:
+                db.rollback()
+            self._flush_logs(db)
+            db.close()
+            timing.recorder.flush()
+            logger.remove(self._log_sink_id)
+
+
+# ==================== 多进程管理 ====================
+
+def _spawn_child(index: int, args) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "backend.worker", "--child",
+        "--index", str(index),
+        "--slots", str(args.slots),
+        "--drain-timeout", str(args.drain_timeout),
+    ]
+    if args.headed:
+        cmd.append("--headed")
+    # 每个子进程都参与定时调度选主，同一时刻只有持有领导租约的那个在跑
+    if args.no_scheduler:
+        cmd.append("--no-scheduler")
+    return subprocess.Popen(cmd, cwd=str(project_root))
+
+
+def supervise(args):
+    """父进程：拉起 N 个 worker，异常退出自动重启；收到退出信号时转发给子进程并等它们排空"""
+    procs: Dict[int, subprocess.Popen] = {i: _spawn_child(i, args) for i in range(args.workers)}
+    stopping = False
+
+    def _stop(*_):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logger.info(f"🧹 正在排空 {len(procs)} 个 worker（最多等待 {args.drain_timeout}s）...")
+        for proc in procs.values():
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    deadline = None
+    while procs:
+        for index, proc in list(procs.items()):
+            code = proc.poll()
+            if code is None:
+                continue
+            procs.pop(index)
+            if not stopping:
+                logger.warning(f"⚠️ worker {index} 异常退出（code={code}），正在重启")
+                procs[index] = _spawn_child(index, args)
+
+        if stopping:
+            deadline = deadline or time.monotonic() + args.drain_timeout + 30
+            if time.monotonic() > deadline:
+                for proc in procs.values():
+                    proc.kill()
+                break
+        time.sleep(1)
+
+    logger.info("所有 worker 已退出")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AutoGeo 浏览器任务 worker")
+    parser.add_argument("--workers", type=int, default=1, help="worker 进程数")
+    parser.add_argument("--slots", type=int, default=JOB_EXECUTOR_SLOTS, help="每个 worker 同时运行的浏览器任务数")
+    parser.add_argument("--drain-timeout", type=int, default=WORKER_DRAIN_TIMEOUT, help="优雅退出时等待运行中任务的秒数")
+    parser.add_argument("--no-scheduler", action="store_true", help="不运行定时调度（只消费队列）")
+    parser.add_argument("--headed", action="store_true", default=WORKER_HEADED,
+                        help="本机能跑有头浏览器，认领需要人工处理登录/验证码的任务")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--index", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if not args.child:
+        # 只在父进程里建表/修表，避免多个子进程同时 ALTER TABLE
+        from backend.scripts.fix_database import check_and_fix_database
+        init_db()
+        check_and_fix_database()
+
+    if args.child or args.workers <= 1:
+        worker_id = f"{current_node_name()}:{os.getpid()}:{args.index}"
+        worker = Worker(
+            worker_id,
+            slots=args.slots,
+            run_scheduler=not args.no_scheduler,
+            drain_timeout=args.drain_timeout,
+            headed=args.headed
+        )
+        asyncio.run(worker.run())
+    else:
+        supervise(args)
+
+
+if __name__ == "__main__":
+    main()
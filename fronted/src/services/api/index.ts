@@ -74,6 +74,71 @@ export const del = <T = any>(url: string, params?: any, config?: AxiosRequestCon
   return request<T>({ method: 'DELETE', url, params, ...config })
 }
 
+// ==================== 任务执行器（耗时操作提交后返回 job_id，轮询结果） ====================
+export const jobsApi = {
+  list: (params?: { lane?: string; status?: string; limit?: number }) => get<any>('/jobs', params),
+  get: (jobId: string) => get<any>(`/jobs/${jobId}`),
+  cancel: (jobId: string) => post<any>(`/jobs/${jobId}/cancel`)
+}
+
+const JOB_FINISHED = ['succeeded', 'failed', 'cancelled']
+
+export interface WaitJobOptions {
+  intervalMs?: number
+  // 最长等多久，超时 reject（后台任务本身不会被取消，结果可以稍后在列表里看）
+  timeoutMs?: number
+  // 组件卸载时 abort，停止轮询
+  signal?: AbortSignal
+}
+
+const JOB_WAIT_TIMEOUT_MS = 15 * 60 * 1000
+
+/** 轮询被 abort 时抛出的错误，调用方按 name 判断，不用弹错误提示 */
+export const isJobWaitAborted = (error: any) => error?.name === 'AbortError'
+
+const sleep = (ms: number, signal?: AbortSignal) =>
+  new Promise<void>((resolve, reject) => {
+    const onAbort = () => {
+      clearTimeout(timer)
+      reject(new DOMException('停止等待任务', 'AbortError'))
+    }
+    const timer = setTimeout(() => {
+      signal?.removeEventListener('abort', onAbort)
+      resolve()
+    }, ms)
+    signal?.addEventListener('abort', onAbort, { once: true })
+  })
+
+/**
+ * 等待任务结束，返回与原同步接口一致的 { success, message, data }
+ * 提交接口如果没返回 job_id（失败或旧接口），原样返回
+ * 超过 timeoutMs 还没结束就 reject；signal 被 abort 时以 AbortError reject
+ */
+export const waitForJob = async (submitted: any, options: WaitJobOptions = {}): Promise<any> => {
+  const { intervalMs = 2000, timeoutMs = JOB_WAIT_TIMEOUT_MS, signal } = options
+  const jobId = submitted?.data?.job_id
+  if (!submitted?.success || !jobId) return submitted
+
+  const deadline = Date.now() + timeoutMs
+  while (true) {
+    if (signal?.aborted) throw new DOMException('停止等待任务', 'AbortError')
+    const res = await jobsApi.get(jobId)
+    const job = res?.data
+    if (job && JOB_FINISHED.includes(job.status)) {
+      const result = job.result || {}
+      return {
+        success: job.status === 'succeeded' && result.status !== 'error',
+        message: job.error || result.message || job.progress?.message,
+        data: { ...result, job }
+      }
+    }
+    if (Date.now() + intervalMs > deadline) {
+      throw new Error(`任务 ${jobId} 等待超时，仍在后台执行，请稍后刷新查看结果`)
+    }
+    await sleep(intervalMs, signal)
+  }
+}
+
 // ==================== 1. 账号管理 API (重点修复区域) ====================
 export const accountApi = {
   // 获取列表
@@ -121,7 +186,8 @@ export const geoArticleApi = {
   checkQuality: (id: number) => post(`/geo/articles/${id}/check-quality`),
   
   // 手动检测收录状态
-  checkIndex: (id: number) => post(`/geo/articles/${id}/check-index`),
+  checkIndex: (id: number, wait?: WaitJobOptions) =>
+    post(`/geo/articles/${id}/check-index`).then((res) => waitForJob(res, wait)),
     
   getDetail: (id: number) => get(`/geo/articles/${id}`),
   delete: (id: number) => del(`/geo/articles/${id}`)
@@ -130,12 +196,12 @@ export const geoArticleApi = {
 // ==================== 4. 收录检测 API (监控页) ====================
 export const indexCheckApi = {
   // 执行收录检测
-  checkKeyword: (data: { keyword_id: number; company_name: string; platforms?: string[] }) =>
-    post<any>('/index-check/check', data),
+  checkKeyword: (data: { keyword_id: number; company_name: string; platforms?: string[] }, wait?: WaitJobOptions) =>
+    post<any>('/index-check/check', data).then((res) => waitForJob(res, wait)),
 
   // 批量检测
-  batchCheck: (data: { project_id?: number; keyword_ids?: number[]; company_name?: string }) =>
-    post<any>('/index-check/batch/check', data),
+  batchCheck: (data: { project_id?: number; keyword_ids?: number[]; company_name?: string }, wait?: WaitJobOptions) =>
+    post<any>('/index-check/batch/check', data).then((res) => waitForJob(res, wait)),
 
   // 获取检测记录
   getRecords: (params?: {
@@ -164,8 +230,8 @@ export const indexCheckApi = {
   getProjectStats: (projectId: number) => get<any>(`/index-check/projects/${projectId}/analytics`),
 
   // 兼容 Monitor.vue 的 runCheck
-  check: (data: { keyword_id: number; company_name: string; platforms?: string[] }) => 
-    post('/index-check/check', data),
+  check: (data: { keyword_id: number; company_name: string; platforms?: string[] }, wait?: WaitJobOptions) =>
+    post('/index-check/check', data).then((res) => waitForJob(res, wait)),
   
   getTrend: (keywordId: number, days = 7) => get(`/index-check/trend/${keywordId}`, { days })
 }
@@ -203,8 +269,8 @@ export const reportsApi = {
   getProjectLeaderboard: (params: { days?: number }) => get('/reports/project-leaderboard', params),
 
   // 🌟 [新增] 执行收录检测
-  runCheck: (data: { project_id: number; platforms?: string[] }) =>
-    post('/reports/run-check', data)
+  runCheck: (data: { project_id: number; platforms?: string[] }, wait?: WaitJobOptions) =>
+    post('/reports/run-check', data).then((res) => waitForJob(res, wait))
 }
 
 // ==================== 6. 定时任务 API ====================
@@ -23,7 +23,8 @@ sys.path.insert(0, str(project_root))
 from backend.database import SessionLocal, init_db
 from backend.database.models import (
     Account, Article, PublishRecord, Project, Keyword, ReferenceArticle,
-    IndexCheckRecord, GeoArticle, QuestionVariant
+    IndexCheckRecord, IndexCheckSample, AnswerBlob, GeoArticle, QuestionVariant, ScheduledTaskRun,
+    WorkerJob, WorkerNode, WorkerLog, AccountSelection, OperationSpan, CrawlWatermark
 )
 
 
@@ -87,12 +88,21 @@ def clean_db(db):
     db.query(PublishRecord).delete()
     db.query(GeoArticle).delete()
     db.query(IndexCheckRecord).delete()
+    db.query(AnswerBlob).delete()
+    db.query(IndexCheckSample).delete()
     db.query(QuestionVariant).delete()
     db.query(Article).delete()
     db.query(Keyword).delete()
     db.query(Project).delete()
+    db.query(AccountSelection).delete()
     db.query(Account).delete()
     db.query(ReferenceArticle).delete()
+    db.query(ScheduledTaskRun).delete()
+    db.query(WorkerJob).delete()
+    db.query(WorkerLog).delete()
+    db.query(WorkerNode).delete()
+    db.query(OperationSpan).delete()
+    db.query(CrawlWatermark).delete()
     db.commit()
 
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+发布账号轮换测试
+测试多账号分摊、当日配额、失败冷却和无可用账号时的顺延
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES
+from backend.database.models import Account, AccountSelection, GeoArticle
+from backend.services import account_selector
+from backend.services.account_selector import AccountSelector
+from backend.services.geo_article_service import GeoArticleService
+
+
+def _accounts(db, count, platform="zhihu"):
+    accounts = [
+        Account(platform=platform, account_name=f"轮换账号{i}", storage_state="{}", status=1)
+        for i in range(count)
+    ]
+    db.add_all(accounts)
+    db.commit()
+    return accounts
+
+
+def _age_selections(db, minutes):
+    """把已有选择记录往前挪，模拟时间流逝"""
+    for row in db.query(AccountSelection).all():
+        row.created_at -= timedelta(minutes=minutes)
+        if row.finished_at:
+            row.finished_at -= timedelta(minutes=minutes)
+    db.commit()
+
+
+class TestAccountSelector:
+    """账号轮换测试类"""
+
+    def test_spreads_across_accounts_and_respects_quota(self, clean_db, monkeypatch):
+        """TC-AS-001: 依次轮换所有账号；配额用完后不再选中"""
+        monkeypatch.setattr(account_selector, "ACCOUNT_DAILY_PUBLISH_QUOTA", 2)
+        accounts = _accounts(clean_db, 3)
+        selector = AccountSelector(clean_db, node="node-a")
+
+        picked = []
+        for article_id in range(6):
+            account, selection = selector.select("zhihu", article_id)
+            assert account is not None
+            picked.append(account.id)
+            selector.record_result(selection, True)
+            _age_selections(clean_db, ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES + 1)
+
+        assert sorted(picked[:3]) == sorted(a.id for a in accounts)
+        assert {picked.count(a.id) for a in accounts} == {2}
+
+        account, selection = selector.select("zhihu", 99)
+        assert account is None
+        assert selection.outcome == "skipped"
+        assert "均不可用" in selection.reason
+
+    def test_failure_cooldown_and_health(self, clean_db):
+        """TC-AS-002: 失败的账号进入冷却，其他账号顶上"""
+        good, flaky = _accounts(clean_db, 2)
+        selector = AccountSelector(clean_db, node="node-a")
+
+        # 最久未用优先：两个都没用过时按 id，先选 good
+        account, selection = selector.select("zhihu", 1)
+        assert account.id == good.id
+        selector.record_result(selection, True)
+        account, selection = selector.select("zhihu", 2)
+        assert account.id == flaky.id
+        selector.record_result(selection, False, "平台限流")
+        _age_selections(clean_db, ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES + 1)
+
+        states = {s.account.id: s for s in selector.account_states("zhihu")}
+        assert states[flaky.id].consecutive_failures == 1
+        assert states[flaky.id].blocked_reason(datetime.now()) == "冷却中"
+
+        account, _ = selector.select("zhihu", 3)
+        assert account.id == good.id
+
+    def test_local_session_preferred(self, clean_db):
+        """TC-AS-003: 会话在本节点的账号优先"""
+        remote, local = _accounts(clean_db, 2)
+        remote.worker_node = "node-b"
+        clean_db.commit()
+
+        account, _ = AccountSelector(clean_db, node="node-a").select("zhihu")
+        assert account.id == local.id
+
+    @pytest.mark.asyncio
+    async def test_publish_deferred_when_all_busy(self, clean_db, test_keyword, monkeypatch):
+        """TC-AS-004: 账号都不可用时文章保持待发布，顺延到最早可用时间"""
+        monkeypatch.setattr(account_selector, "ACCOUNT_DAILY_PUBLISH_QUOTA", 1)
+        (account,) = _accounts(clean_db, 1)
+        clean_db.add(AccountSelection(platform="zhihu", account_id=account.id, outcome="success", created_at=datetime.now()))
+        article = GeoArticle(
+            keyword_id=test_keyword.id, title="待发布", content="内容", platform="zhihu",
+            publish_status="scheduled", publish_time=datetime.now()
+        )
+        clean_db.add(article)
+        clean_db.commit()
+
+        assert await GeoArticleService(clean_db).execute_publish(article.id) is False
+        clean_db.refresh(article)
+        assert article.publish_status == "scheduled"
+        assert article.publish_time.date() == (datetime.now() + timedelta(days=1)).date()
+
+    @pytest.mark.asyncio
+    async def test_publish_claimed_once(self, clean_db, test_keyword, monkeypatch):
+        """TC-AS-005: 两轮扫描、两个任务抢同一篇文章，只有一个认领成功、只发一次"""
+        from backend.database import SessionLocal
+        from backend.services import scheduler_service
+        from backend.services.scheduler_service import SchedulerService
+
+        article = GeoArticle(
+            keyword_id=test_keyword.id, title="待发布", content="内容", platform="zhihu",
+            publish_status="scheduled", publish_time=datetime.now() - timedelta(minutes=1)
+        )
+        clean_db.add(article)
+        clean_db.commit()
+
+        submitted = []
+        monkeypatch.setattr(scheduler_service, "submit_job", lambda *args, **kwargs: submitted.append(kwargs))
+        monkeypatch.setattr(scheduler_service, "account_affinity", lambda *args, **kwargs: None)
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+        assert await service.check_and_publish_scheduled_articles() == 1
+        assert await service.check_and_publish_scheduled_articles() == 0
+        assert [s["dedupe_key"] for s in submitted] == [f"publish:{article.id}"]
+        clean_db.refresh(article)
+        assert article.publish_status == "queued"
+
+        first, second = GeoArticleService(clean_db), GeoArticleService(SessionLocal())
+        assert first._publishable(article.id) is not None
+        assert second._publishable(article.id) is None
+        second.db.close()
+        clean_db.refresh(article)
+        assert article.publish_status == "publishing"
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+账号授权批量检测测试
+测试直连预检能判定的不开浏览器、判定不了的走浏览器，以及总并发/单平台并发上限
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from backend.services import account_validator as validator_module
+from backend.services.account_validator import AccountValidator
+from backend.services.crypto import encrypt_cookies, encrypt_storage_state
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def make_account(account_id, platform, token):
+    cookies = [{"name": "session", "value": token, "domain": f".{platform}.com", "path": "/"}]
+    return SimpleNamespace(
+        id=account_id, platform=platform, account_name=f"{platform}-{account_id}", status=1,
+        cookies=encrypt_cookies(cookies), storage_state=encrypt_storage_state({"cookies": cookies, "origins": []})
+    )
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    token = request.headers.get("cookie", "")
+    if request.url.host == "www.zhihu.com":
+        if "good" in token:
+            return httpx.Response(200, json={"id": "u1", "name": "作者"})
+        return httpx.Response(401, json={"error": {"message": "请求需要登录"}})
+    # 头条接口返回里没有用户信息：判定不了
+    return httpx.Response(200, json={"data": {}})
+
+
+class TestAccountValidator:
+    """账号授权批量检测测试类"""
+
+    @pytest.mark.asyncio
+    async def test_precheck_then_browser_with_limits(self, monkeypatch):
+        """TC-AV-001: 知乎由预检直接判定，头条预检不了走浏览器，同平台并发不超过上限，汇总带阶段耗时"""
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            validator_module.httpx, "AsyncClient",
+            lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+        monkeypatch.setattr(validator_module, "ACCOUNT_VALIDATE_CONCURRENCY", 3)
+        monkeypatch.setattr(validator_module, "ACCOUNT_VALIDATE_PLATFORM_CONCURRENCY", 2)
+
+        validator = AccountValidator()
+        running = {"now": 0, "peak": 0}
+        browser_checked = []
+
+        async def fake_browser(account, db_session, test_url, result):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.02)
+            running["now"] -= 1
+            browser_checked.append(account.id)
+            result["is_valid"] = True
+            result["message"] = "授权有效"
+
+        monkeypatch.setattr(validator, "_check_in_browser", fake_browser)
+
+        accounts = [make_account(1, "zhihu", "good"), make_account(2, "zhihu", "expired")]
+        accounts += [make_account(i, "toutiao", "t") for i in range(3, 8)]
+        db = FakeSession()
+        progress = []
+        summary = await validator.check_accounts(accounts, db, lambda done, total, _: progress.append(done))
+
+        assert [r["account_id"] for r in summary["results"]] == list(range(1, 8))
+        assert [r["stage"] for r in summary["results"][:2]] == ["precheck", "precheck"]
+        assert (accounts[0].status, accounts[1].status) == (1, -1)
+        assert sorted(browser_checked) == [3, 4, 5, 6, 7]
+        assert running["peak"] == 2
+        assert (summary["success"], summary["failed"]) == (6, 1)
+        assert summary["timing"]["precheck"]["count"] == 7
+        assert summary["timing"]["precheck"]["decided"] == 2
+        assert summary["timing"]["browser"]["count"] == 5
+        assert progress == list(range(1, 8))
+
+    @pytest.mark.asyncio
+    async def test_precheck_only_trusts_explicit_logout(self, monkeypatch):
+        """TC-AV-002: 403/跳转交给浏览器判断，只有 401 和接口明确未登录才判失效"""
+        responses = {
+            "forbidden": httpx.Response(403, text="访问过于频繁"),
+            "redirect": httpx.Response(302, headers={"location": "https://www.zhihu.com/signin"}),
+            "expired": httpx.Response(401),
+        }
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            validator_module.httpx, "AsyncClient",
+            lambda **kwargs: real_client(transport=httpx.MockTransport(
+                lambda request: responses[request.headers["cookie"].split("=")[1]]
+            ), **kwargs)
+        )
+        validator = AccountValidator()
+        session_check = {"url": "https://www.zhihu.com/api/v4/me", "logged_in_key": "id", "missing_is_logged_out": True}
+
+        for token, expected in (("forbidden", None), ("redirect", None), ("expired", False)):
+            decided, _ = await validator._precheck_http(make_account(1, "zhihu", token), session_check)
+            assert decided is expected, token
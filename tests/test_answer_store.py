@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+回答内容存储测试
+测试 answer_store 的压缩、去重、迁移逻辑（直接操作数据库，不需要启动服务）
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database.models import IndexCheckRecord, AnswerBlob
+from backend.services.answer_store import (
+    put_answer, get_answers, migrate_inline_answers, prune_orphan_blobs,
+    get_storage_report, hash_answer, compress_answer, decompress_answer
+)
+
+
+class TestAnswerStore:
+    """回答内容存储测试类"""
+
+    def test_compress_roundtrip(self):
+        """TC-AS-001: 压缩后能原样解压"""
+        text = "豆包的回答：推荐测试公司，SEO优化做得很好。" * 20
+        data = compress_answer(text, "zlib")
+        assert len(data) < len(text.encode("utf-8"))
+        assert decompress_answer("zlib", data) == text
+
+    def test_identical_answers_stored_once(self, clean_db, test_keyword):
+        """TC-AS-002: 相同回答只存一份，记录通过哈希引用"""
+        answer = "推荐测试公司，专注SEO优化。"
+        for platform in ("doubao", "qianwen", "deepseek"):
+            clean_db.add(IndexCheckRecord(
+                keyword_id=test_keyword.id,
+                platform=platform,
+                question="SEO优化哪家好？",
+                answer_hash=put_answer(clean_db, answer),
+                keyword_found=True,
+                company_found=True
+            ))
+        clean_db.commit()
+
+        assert clean_db.query(AnswerBlob).count() == 1
+        records = clean_db.query(IndexCheckRecord).all()
+        assert {r.answer_hash for r in records} == {hash_answer(answer)}
+        assert all(r.answer == answer for r in records)
+        assert all(r.legacy_answer is None for r in records)
+
+    def test_empty_answer_not_stored(self, clean_db):
+        """TC-AS-003: 空回答不写入存储"""
+        assert put_answer(clean_db, None) is None
+        assert put_answer(clean_db, "   ") is None
+        assert clean_db.query(AnswerBlob).count() == 0
+
+    def test_migrate_inline_answers(self, clean_db, test_keyword):
+        """TC-AS-004: 旧版内联回答迁移到 answer_blobs"""
+        for answer in ("回答A", "回答A", "回答B", ""):
+            clean_db.add(IndexCheckRecord(
+                keyword_id=test_keyword.id,
+                platform="doubao",
+                question="测试问题",
+                answer=answer
+            ))
+        clean_db.commit()
+
+        stats = migrate_inline_answers(clean_db, batch_size=2)
+        assert stats == {"migrated": 3, "emptied": 1}
+        assert clean_db.query(AnswerBlob).count() == 2
+        assert clean_db.query(IndexCheckRecord).filter(
+            IndexCheckRecord.legacy_answer.isnot(None)
+        ).count() == 0
+
+        answers = get_answers(clean_db, [r.answer_hash for r in clean_db.query(IndexCheckRecord).all()])
+        assert set(answers.values()) == {"回答A", "回答B"}
+
+        report = get_storage_report(clean_db)
+        assert report["records"]["with_blob"] == 3
+        assert report["blobs"]["count"] == 2
+        assert report["database"]["page_size"] > 0
+
+    def test_prune_orphan_blobs(self, clean_db, test_keyword):
+        """TC-AS-005: 孤立的回答内容过了宽限期才清理，还被引用的不动"""
+        record = IndexCheckRecord(
+            keyword_id=test_keyword.id,
+            platform="doubao",
+            question="测试问题",
+            answer_hash=put_answer(clean_db, "即将被删除的回答")
+        )
+        kept = IndexCheckRecord(
+            keyword_id=test_keyword.id,
+            platform="doubao",
+            question="测试问题",
+            answer_hash=put_answer(clean_db, "还在用的回答")
+        )
+        clean_db.add_all([record, kept])
+        clean_db.commit()
+
+        clean_db.delete(record)
+        clean_db.commit()
+        # 刚写入的内容在宽限期内，可能正被并发检测复用，不删
+        assert prune_orphan_blobs(clean_db) == 0
+
+        clean_db.query(AnswerBlob).update({AnswerBlob.created_at: datetime.now() - timedelta(days=1)})
+        clean_db.commit()
+        assert prune_orphan_blobs(clean_db) == 1
+        assert [b.content_hash for b in clean_db.query(AnswerBlob).all()] == [kept.answer_hash]
+
+    def test_concurrent_put_ignored(self, clean_db, monkeypatch):
+        """TC-AS-006: 别的检测已经存了同一个回答（db.get 没查到），再插入不报错也不重复"""
+        content_hash = put_answer(clean_db, "并发写入的回答")
+        clean_db.commit()
+
+        monkeypatch.setattr(clean_db, "get", lambda *args, **kwargs: None)
+        assert put_answer(clean_db, "并发写入的回答") == content_hash
+        clean_db.commit()
+        assert clean_db.query(AnswerBlob).count() == 1
+
+        database = get_storage_report(clean_db)["database"]
+        assert database["backend"] == "sqlite" and database["used_bytes"] > 0
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+已发布文章收录复查调度测试
+测试退避间隔计算、只取到期文章、每轮数量上限
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import ARTICLE_RECHECK_BASE_MINUTES, ARTICLE_RECHECK_MAX_HOURS, ARTICLE_VERIFY_INTERVAL_DAYS
+from backend.database import SessionLocal
+from backend.database.models import GeoArticle
+from backend.services import scheduler_service
+from backend.services.geo_article_service import GeoArticleService, compute_next_check
+from backend.services.scheduler_service import SchedulerService
+
+
+def _article(keyword_id, **kwargs):
+    return GeoArticle(keyword_id=keyword_id, title="测试文章", content="内容", publish_status="published", **kwargs)
+
+
+class TestArticleRecheck:
+    """收录复查调度测试类"""
+
+    def test_backoff_grows_and_caps(self, test_keyword):
+        """TC-AR-001: 连续未收录时间隔翻倍，封顶；已收录进入低频复核"""
+        now = datetime.now()
+        article = _article(test_keyword.id, publish_time=now, index_status="not_indexed")
+
+        delays = []
+        for count in (1, 2, 3, 20):
+            article.check_count = count
+            delays.append(compute_next_check(article, now) - now)
+        base = timedelta(minutes=ARTICLE_RECHECK_BASE_MINUTES)
+        assert delays[:3] == [base, base * 2, base * 4]
+        assert delays[3] == timedelta(hours=ARTICLE_RECHECK_MAX_HOURS)
+
+        # 发布很久的文章，即使是第一次检测也不会太频繁
+        article.check_count = 1
+        article.publish_time = now - timedelta(days=5)
+        assert compute_next_check(article, now) - now == timedelta(hours=ARTICLE_RECHECK_MAX_HOURS)
+
+        article.index_status = "indexed"
+        assert compute_next_check(article, now) - now == timedelta(days=ARTICLE_VERIFY_INTERVAL_DAYS)
+
+    @pytest.mark.asyncio
+    async def test_job_checks_only_due_articles(self, clean_db, test_keyword, monkeypatch):
+        """TC-AR-002: Job 只检测到期文章，且每轮不超过批量上限"""
+        now = datetime.now()
+        due = [_article(test_keyword.id, next_check_time=now - timedelta(minutes=i + 1)) for i in range(4)]
+        later = _article(test_keyword.id, next_check_time=now + timedelta(hours=1))
+        legacy = _article(test_keyword.id)  # 老数据，未排期
+        draft = GeoArticle(keyword_id=test_keyword.id, title="草稿", content="内容", publish_status="draft")
+        clean_db.add_all(due + [later, legacy, draft])
+        clean_db.commit()
+
+        checked = []
+
+        async def fake_check(self, article_id):
+            checked.append(article_id)
+            return {"status": "success"}
+
+        monkeypatch.setattr(GeoArticleService, "check_article_index", fake_check)
+        monkeypatch.setattr(scheduler_service, "ARTICLE_RECHECK_BATCH_SIZE", 3)
+
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+        await service.auto_check_indexing_job()
+
+        # 最早到期的 3 篇（老数据排在现在，比它们都晚）
+        assert checked == [due[3].id, due[2].id, due[1].id]
+
+        clean_db.expire_all()
+        assert clean_db.get(GeoArticle, legacy.id).next_check_time is not None
+        assert clean_db.get(GeoArticle, draft.id).next_check_time is None
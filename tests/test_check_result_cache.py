@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+收录检测结果缓存测试
+测试 (平台, 归一化问题) 缓存命中后只做本地匹配、不启动浏览器
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from backend.database.models import IndexCheckRecord, QuestionVariant
+from backend.services.answer_store import put_answer
+from backend.services.check_result_cache import (
+    CheckResultCache, normalize_question, question_key, beijing_now
+)
+from backend.services.index_check_service import IndexCheckService
+
+
+def _seed_record(db, keyword_id, question, answer, check_time=None, cached=False):
+    record = IndexCheckRecord(
+        keyword_id=keyword_id,
+        platform="doubao",
+        question=question,
+        question_key=question_key(question),
+        answer_hash=put_answer(db, answer),
+        keyword_found=False,
+        company_found=False,
+        cached=cached,
+        check_time=check_time or beijing_now()
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+
+class TestCheckResultCache:
+    """检测结果缓存测试类"""
+
+    def test_normalize_question(self):
+        """TC-CC-001: 全角/空白/标点差异归一化后一致"""
+        assert normalize_question("SEO优化 哪家好？") == normalize_question("seo优化哪家好?")
+        assert question_key("ＳＥＯ优化哪家好。") == question_key("SEO优化哪家好")
+
+    def test_lookup_respects_ttl(self, clean_db, test_keyword):
+        """TC-CC-002: 过期记录和缓存记录本身不会被命中"""
+        _seed_record(clean_db, test_keyword.id, "过期问题", "回答",
+                     check_time=beijing_now() - timedelta(hours=2))
+        _seed_record(clean_db, test_keyword.id, "缓存问题", "回答", cached=True)
+
+        cache = CheckResultCache(clean_db, ttl_seconds=3600)
+        assert cache.lookup("doubao", "过期问题") is None
+        assert cache.lookup("doubao", "缓存问题") is None
+        assert CheckResultCache(clean_db, ttl_seconds=0).lookup("doubao", "过期问题") is None
+
+    def test_cache_hit_skips_browser(self, clean_db, test_keyword):
+        """TC-CC-003: 命中缓存时只做匹配，写入 cached=True 的记录"""
+        _seed_record(clean_db, test_keyword.id, "SEO优化哪家好？", "推荐测试公司，SEO优化专业。")
+        clean_db.add(QuestionVariant(keyword_id=test_keyword.id, question="seo优化哪家好"))
+        clean_db.commit()
+
+        service = IndexCheckService(clean_db)
+        results = asyncio.run(service.check_keyword(
+            keyword_id=test_keyword.id,
+            company_name="测试公司",
+            platforms=["doubao"]
+        ))
+
+        assert len(results) == 1
+        assert results[0]["cached"] is True
+        assert results[0]["keyword_found"] is True
+        assert results[0]["company_found"] is True
+
+        cached = clean_db.query(IndexCheckRecord).filter(IndexCheckRecord.cached == True).one()
+        assert cached.answer == "推荐测试公司，SEO优化专业。"
+        assert service.result_cache.stats()["hits"] == 1
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+多关键词采集活动测试
+测试每个平台的浏览器上下文只开一次、多个关键词搜到同一篇文章只提取一次、失败组合上报、转有头时取消其他平台
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services import article_collector_service as svc_module
+from backend.services.article_collector_service import ArticleCollectorService
+from backend.services.playwright.browser_mode import HeadedRequired
+from backend.services.playwright.collectors import ZhihuCollector, ToutiaoCollector
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = 0
+        self.closed = False
+
+    async def new_page(self):
+        self.pages += 1
+        return FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+class TestCollectCampaign:
+    """多关键词采集活动测试类"""
+
+    @pytest.mark.asyncio
+    async def test_shared_context_and_cross_keyword_dedup(self, monkeypatch):
+        """TC-CC-001: 三个关键词共用一个上下文，重复搜到的文章只提取一次，进度按组合上报"""
+        results_by_keyword = {
+            "GEO": ["https://zhuanlan.zhihu.com/p/1", "https://zhuanlan.zhihu.com/p/2"],
+            "AI 搜索": ["https://zhuanlan.zhihu.com/p/2", "https://zhuanlan.zhihu.com/p/3"],
+            "生成式引擎优化": ["https://zhuanlan.zhihu.com/p/1"],
+        }
+        collector = ZhihuCollector("zhihu", {})
+        extracted = []
+
+        async def fake_pages(page, keyword):
+            yield [{"title": keyword, "url": u, "likes": 500} for u in results_by_keyword[keyword]]
+
+        async def fake_contents(page, urls):
+            extracted.extend(urls)
+            for url in urls:
+                yield url, "正文" * 80
+
+        monkeypatch.setattr(collector, "_result_pages", fake_pages)
+        monkeypatch.setattr(collector, "iter_contents", fake_contents)
+        monkeypatch.setattr(svc_module, "get_collector", lambda platform: collector)
+
+        async def no_start():
+            return None
+
+        monkeypatch.setattr(svc_module.playwright_mgr, "start", no_start)
+
+        service = ArticleCollectorService(db=None)
+        service._initialized = True
+        contexts = []
+
+        async def open_context(c):
+            contexts.append(FakeContext())
+            return contexts[-1]
+
+        async def no_save(context, platform):
+            return None
+
+        monkeypatch.setattr(service, "_open_platform_context", open_context)
+        monkeypatch.setattr(service, "_save_login_state", no_save)
+
+        progress = []
+        result = await service.collect_campaign(
+            ["GEO", "AI 搜索", "GEO", "生成式引擎优化"], ["zhihu"], save_to_db=False,
+            progress_callback=lambda done, total, msg: progress.append((done, total))
+        )
+
+        assert result["success"] and result["failed_pairs"] == []
+        assert len(contexts) == 1 and contexts[0].pages == 3 and contexts[0].closed
+        assert sorted(extracted) == [f"https://zhuanlan.zhihu.com/p/{i}" for i in (1, 2, 3)]
+        assert result["by_keyword"] == {"GEO": {"zhihu": 2}, "AI 搜索": {"zhihu": 1}, "生成式引擎优化": {"zhihu": 0}}
+        assert (result["total_pairs"], result["total_count"], result["duplicate_skipped"]) == (3, 3, 2)
+        assert progress[-1] == (3, 3)
+
+    @pytest.mark.asyncio
+    async def test_failed_pair_and_headed_cancels_siblings(self, monkeypatch):
+        """TC-CC-002: 单个组合采集失败记进 failed_pairs；一个平台要转有头时取消其他平台、等它们退出再抛出"""
+        zhihu, toutiao = ZhihuCollector("zhihu", {}), ToutiaoCollector("toutiao", {})
+        monkeypatch.setattr(svc_module, "get_collector", lambda platform: {"zhihu": zhihu, "toutiao": toutiao}[platform])
+
+        async def no_start():
+            return None
+
+        monkeypatch.setattr(svc_module.playwright_mgr, "start", no_start)
+        service = ArticleCollectorService(db=None)
+        service._initialized = True
+        contexts = {}
+
+        async def open_context(c):
+            contexts.setdefault(c.platform_id, []).append(FakeContext())
+            return contexts[c.platform_id][-1]
+
+        async def no_save(context, platform):
+            return None
+
+        monkeypatch.setattr(service, "_open_platform_context", open_context)
+        monkeypatch.setattr(service, "_save_login_state", no_save)
+
+        async def zhihu_collect(page, keyword, on_article=None, frontier=None):
+            if keyword == "坏词":
+                raise RuntimeError("搜索页加载失败")
+            return []
+
+        monkeypatch.setattr(zhihu, "collect", zhihu_collect)
+        result = await service.collect_campaign(["GEO", "坏词"], ["zhihu"], save_to_db=False)
+        assert result["failed_pairs"] == [{"platform": "zhihu", "keyword": "坏词", "error": "搜索页加载失败"}]
+        assert result["by_keyword"] == {"GEO": {"zhihu": 0}, "坏词": {}}
+        assert result["done_pairs"] == 2
+
+        toutiao_cancelled = asyncio.Event()
+
+        async def captcha_collect(page, keyword, on_article=None, frontier=None):
+            await asyncio.sleep(0.01)
+            raise HeadedRequired("验证码")
+
+        async def slow_collect(page, keyword, on_article=None, frontier=None):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                toutiao_cancelled.set()
+                raise
+            return []
+
+        monkeypatch.setattr(zhihu, "collect", captcha_collect)
+        monkeypatch.setattr(toutiao, "collect", slow_collect)
+        contexts.clear()
+        with pytest.raises(HeadedRequired):
+            await asyncio.wait_for(service.collect_campaign(["GEO"], ["zhihu", "toutiao"], save_to_db=False), 5)
+        assert toutiao_cancelled.is_set()
+        assert all(c.closed for c in contexts["toutiao"])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+采集并发提取测试
+测试提取页面池并发上限、搜索页不被导航走、提取完一篇回调一篇
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.playwright.collectors import ToutiaoCollector
+
+
+class FakePage:
+    def __init__(self, context, name):
+        self.context = context
+        self.name = name
+        self.url = "about:blank"
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self, f"extract-{len(self.pages)}")
+        self.pages.append(page)
+        return page
+
+
+class SlowCollector(ToutiaoCollector):
+    """正文提取用 sleep 模拟，记录同时在跑的页面数；url 末尾数字越大越快"""
+
+    def __init__(self):
+        super().__init__("toutiao", {"extract_concurrency": 2, "extract_jitter": (0, 0)})
+        self.active = 0
+        self.peak = 0
+        self.used_pages = set()
+
+    def parse_article_html(self, html, url):
+        return None
+
+    async def extract_content(self, page, url):
+        self.used_pages.add(page.unwrapped.name)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01 * (4 - int(url[-1])))
+        self.active -= 1
+        return None if url.endswith("3") else f"正文{url[-1]}"
+
+
+class TestCollectorExtract:
+    """并发提取测试类"""
+
+    @pytest.mark.asyncio
+    async def test_page_pool_streams_results(self, monkeypatch):
+        """TC-CE-001: 额外页面并发提取不超过平台上限，搜索页不动，结果按完成顺序流出"""
+        monkeypatch.setattr("backend.services.playwright.collectors.base.HTTP_FETCH_ENABLED", False)
+        context = FakeContext()
+        search_page = FakePage(context, "search")
+        collector = SlowCollector()
+
+        async def fake_search(page, keyword):
+            return [{"title": f"文章{i}", "url": f"https://www.toutiao.com/a/{i}", "reads": 5000} for i in range(4)]
+
+        monkeypatch.setattr(collector, "search", fake_search)
+        streamed = []
+
+        async def on_article(article):
+            streamed.append(article.url[-1])
+
+        collected = await collector.collect(search_page, "GEO", on_article=on_article)
+
+        assert [a.content for a in collected] == [f"正文{n}" for n in streamed]
+        assert sorted(streamed) == ["0", "1", "2"]
+        assert streamed[0] != "0"
+        assert collector.peak == 2
+        assert "search" not in collector.used_pages
+        assert len(context.pages) == 2 and all(p.closed for p in context.pages)
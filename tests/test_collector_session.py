@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+采集会话存储测试
+测试每个平台一份加密会话、原子写入、内存副本共用（文件被改过就重新读）以及旧 auth/state.json 兜底
+"""
+
+import json
+
+import pytest
+
+from backend.services import session_manager as sm_module
+from backend.services.session_manager import SecureSessionManager
+
+
+def state(token):
+    return {"cookies": [{"name": "z_c0", "value": token, "domain": ".zhihu.com", "path": "/"}], "origins": []}
+
+
+class TestCollectorSession:
+    """采集会话存储测试类"""
+
+    @pytest.mark.asyncio
+    async def test_per_platform_atomic_and_cached(self, tmp_path, monkeypatch):
+        """TC-CS-001: 两个平台各存各的，文件加密且不留临时文件，内容没变不重写，旧文件只兜底"""
+        legacy = tmp_path / "state.json"
+        legacy.write_text(json.dumps(state("legacy")), encoding="utf-8")
+        monkeypatch.setattr(sm_module, "LEGACY_COLLECTOR_STATE_PATH", str(legacy))
+
+        manager = SecureSessionManager()
+        manager._session_dir = tmp_path
+
+        # 还没有自己的会话：沿用旧文件
+        assert (await manager.load_collector_session("toutiao"))["cookies"][0]["value"] == "legacy"
+
+        assert await manager.save_collector_session("zhihu", state("zhihu-token"))
+        assert await manager.save_collector_session("toutiao", state("toutiao-token"))
+        zhihu_file = tmp_path / "collector_zhihu.enc"
+        assert "zhihu-token" not in zhihu_file.read_text(encoding="utf-8")
+        assert list(tmp_path.glob("*.tmp")) == []
+
+        # 内容没变就不重写
+        mtime = zhihu_file.stat().st_mtime_ns
+        assert await manager.save_collector_session("zhihu", state("zhihu-token"))
+        assert zhihu_file.stat().st_mtime_ns == mtime
+
+        # 新进程从加密文件读回来，两个平台互不覆盖
+        fresh = SecureSessionManager()
+        fresh._session_dir = tmp_path
+        assert (await fresh.load_collector_session("zhihu"))["cookies"][0]["value"] == "zhihu-token"
+        assert (await fresh.load_collector_session("toutiao"))["cookies"][0]["value"] == "toutiao-token"
+        assert await fresh.load_collector_session("zhihu") is await fresh.load_collector_session("zhihu")
+
+    @pytest.mark.asyncio
+    async def test_reload_when_file_changed_elsewhere(self, tmp_path, monkeypatch):
+        """TC-CS-002: 其他进程重写了会话文件（mtime 变了），内存副本作废：读取重新解密，保存不按旧副本跳过"""
+        monkeypatch.setattr(sm_module, "LEGACY_COLLECTOR_STATE_PATH", str(tmp_path / "missing.json"))
+        worker_a = SecureSessionManager()
+        worker_a._session_dir = tmp_path
+        worker_b = SecureSessionManager()
+        worker_b._session_dir = tmp_path
+
+        assert await worker_a.save_collector_session("zhihu", state("old"))
+        assert (await worker_b.load_collector_session("zhihu"))["cookies"][0]["value"] == "old"
+
+        # worker_b 手里的副本还是 old，文件已经被 worker_a 改成 renewed：再存 old 必须真的写
+        assert await worker_a.save_collector_session("zhihu", state("renewed"))
+        assert await worker_b.save_collector_session("zhihu", state("old"))
+        assert (await worker_a.load_collector_session("zhihu"))["cookies"][0]["value"] == "old"
+
+        assert await worker_a.save_collector_session("zhihu", state("renewed"))
+        assert (await worker_b.load_collector_session("zhihu"))["cookies"][0]["value"] == "renewed"
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+增量采集边界测试
+测试已采链接提取前跳过（布隆误判回库确认）、水位记录、重复采集整页旧文章时停止翻页
+"""
+
+import pytest
+
+from backend.database.models import CrawlWatermark, ReferenceArticle
+from backend.services import crawl_frontier
+from backend.services.playwright.collectors import ZhihuCollector
+
+
+def add_reference(db, url):
+    db.add(ReferenceArticle(title="旧文章", url=url, content="正文", platform="zhihu", keyword="GEO"))
+    db.commit()
+
+
+class TestCrawlFrontier:
+    """增量采集边界测试类"""
+
+    def test_skip_seen_and_record_watermark(self, clean_db):
+        """TC-CF-001: 库里有的链接被跳过，布隆误判的回库确认后照常提取，结束写水位"""
+        db = clean_db
+        add_reference(db, "https://zhuanlan.zhihu.com/p/1")
+        # 只进布隆、不在库里：模拟误判
+        crawl_frontier.seen_urls.bloom.add("https://zhuanlan.zhihu.com/p/2")
+
+        run = crawl_frontier.start_run(db, "zhihu", "GEO")
+        urls = [f"https://zhuanlan.zhihu.com/p/{i}" for i in (1, 2, 3)]
+        assert run.fresh(urls + urls[:1]) == urls[1:]
+        assert run.fresh(urls) == []
+        assert run.skipped == 1
+
+        assert not run.page_done(urls, urls[1:])
+        run.finish(2)
+        row = db.query(CrawlWatermark).filter_by(platform="zhihu", keyword="GEO").one()
+        assert (row.runs, row.last_new_count, row.last_skipped_count, row.total_new) == (1, 2, 1, 2)
+        assert row.high_water_url == urls[0]
+        assert crawl_frontier.list_watermarks(db, "zhihu")[0]["runs"] == 1
+
+    @pytest.mark.asyncio
+    async def test_repeat_run_stops_on_stale_page(self, clean_db, monkeypatch):
+        """TC-CF-002: 重复采集只提取新文章，整页都是旧文章就不再往后翻"""
+        db = clean_db
+        pages = [
+            [f"https://zhuanlan.zhihu.com/p/{i}" for i in (10, 11)],
+            [f"https://zhuanlan.zhihu.com/p/{i}" for i in (12, 13)],
+            [f"https://zhuanlan.zhihu.com/p/{i}" for i in (14, 15)],
+        ]
+        for url in pages[0] + pages[1]:
+            add_reference(db, url)
+        add_reference(db, "https://zhuanlan.zhihu.com/p/99")
+        db.add(CrawlWatermark(platform="zhihu", keyword="GEO", runs=1, total_new=4))
+        db.commit()
+
+        collector = ZhihuCollector("zhihu", {})
+        served = []
+        extracted = []
+
+        async def fake_pages(page, keyword):
+            for urls in [[pages[0][0], "https://zhuanlan.zhihu.com/p/20"], pages[1], pages[2]]:
+                served.append(urls)
+                yield [{"title": "t", "url": u, "likes": 500} for u in urls]
+
+        async def fake_contents(page, urls):
+            extracted.extend(urls)
+            for url in urls:
+                yield url, "正文" * 80
+
+        monkeypatch.setattr(collector, "_result_pages", fake_pages)
+        monkeypatch.setattr(collector, "iter_contents", fake_contents)
+
+        run = crawl_frontier.start_run(db, "zhihu", "GEO")
+        collected = await collector.collect(object(), "GEO", frontier=run)
+
+        assert [a.url for a in collected] == ["https://zhuanlan.zhihu.com/p/20"]
+        assert extracted == ["https://zhuanlan.zhihu.com/p/20"]
+        assert len(served) == 2
+        assert (run.pages, run.skipped) == (2, 3)
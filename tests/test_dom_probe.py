@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+页面元素批量探测测试
+测试整张选择器表一次往返、按表顺序取第一个命中、平台选择器表覆盖完整
+"""
+
+import pytest
+
+from backend.config import PLATFORMS, AI_PLATFORMS
+from backend.services.playwright import dom_probe
+from backend.services.playwright_mgr import playwright_mgr
+
+
+class FakePage:
+    """evaluate 在 Python 里模拟：hits 是 {选择器: 文本}，visible 里的才算可见"""
+
+    def __init__(self, hits=None, visible=(), broken=False):
+        self.hits = hits or {}
+        self.visible = set(visible)
+        self.broken = broken
+        self.calls = 0
+
+    async def evaluate(self, script, args):
+        self.calls += 1
+        if self.broken:
+            raise RuntimeError("Execution context was destroyed")
+        selectors, need_visible, need_text = args
+        for i, selector in enumerate(selectors):
+            if selector not in self.hits:
+                continue
+            text = self.hits[selector].strip()
+            if need_visible and selector not in self.visible:
+                continue
+            if need_text and not text:
+                continue
+            return {"index": i, "selector": selector, "text": text}
+        return None
+
+
+class TestDomProbe:
+    """元素探测测试类"""
+
+    @pytest.mark.asyncio
+    async def test_first_match_single_round_trip(self):
+        """TC-DP-001: 一次 evaluate 查完整张表，返回第一个可见命中"""
+        page = FakePage(hits={".login-modal": "", ".captcha-box": "验证"}, visible={".captcha-box"})
+        match = await dom_probe.probe_first(page, [".Modal-wrapper", ".login-modal", ".captcha-box"])
+
+        assert match.selector == ".captcha-box" and match.index == 2
+        assert page.calls == 1
+        assert await dom_probe.probe_any(page, [".login-modal"], visible=False)
+
+        broken = FakePage(broken=True)
+        assert await dom_probe.probe_first(broken, [".x"]) is None
+        with pytest.raises(RuntimeError):
+            await dom_probe.probe_any(broken, [".x"], strict=True)
+
+    @pytest.mark.asyncio
+    async def test_username_from_platform_table(self):
+        """TC-DP-002: 用户名按平台表顺序取第一个有文本的，表覆盖所有内置平台"""
+        page = FakePage(hits={".UserLink-link": " 张三 ", ".AppHeader-profileText": "  "})
+        assert await playwright_mgr._extract_username(page, "zhihu") == "张三"
+        assert page.calls == 1
+        assert await playwright_mgr._extract_username(FakePage(), "custom") is None
+
+        missing = [pid for pid in PLATFORMS if pid != "custom" and not PLATFORMS[pid].get("username_selectors")]
+        assert missing == []
+        assert all(conf["login_indicators"] for conf in AI_PLATFORMS.values())
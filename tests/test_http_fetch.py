@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+文章正文直连提取测试
+测试知乎 js-initialData 解析、头条正文容器解析、登录跳转/正文过短回退浏览器
+"""
+
+import json
+
+import httpx
+import pytest
+
+from backend.services.playwright.collectors import ZhihuCollector, ToutiaoCollector, http_fetch
+
+BODY = "GEO 优化的核心是让大模型更容易引用你的内容。" * 10
+
+
+class FakeContext:
+    async def cookies(self):
+        return [{"name": "z_c0", "value": "token", "domain": ".zhihu.com", "path": "/"}]
+
+
+class FakePage:
+    """直连走 httpx，页面只在回退时被用到"""
+
+    def __init__(self):
+        self.context = FakeContext()
+        self.url = "about:blank"
+
+    async def evaluate(self, script):
+        return "Mozilla/5.0 Test"
+
+
+def zhihu_html(article_id, content):
+    state = {"initialState": {"entities": {"articles": {article_id: {"content": content}}}}}
+    return f'<html><body><div id="root"></div><script id="js-initialData" type="text/json">{json.dumps(state)}</script></body></html>'
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    http_fetch.fetch_stats.clear()
+    yield
+    http_fetch.fetch_stats.clear()
+
+
+class TestHttpFetch:
+    """正文直连提取测试类"""
+
+    def test_parse_platform_html(self):
+        """TC-HF-001: 知乎读内嵌 JSON 状态，头条读服务端渲染的正文容器"""
+        zhihu = ZhihuCollector("zhihu", {})
+        text = zhihu.parse_article_html(zhihu_html("123", f"<p>{BODY}</p><p>第二段</p>"), "https://zhuanlan.zhihu.com/p/123")
+        assert text == f"{BODY}\n第二段"
+
+        toutiao = ToutiaoCollector("toutiao", {})
+        html = (
+            "<html><head><script>var a = 1;</script></head><body><div class='nav'>导航</div>"
+            f"<article class='syl-article-base'><h1>标题</h1><p>{BODY}<br>换行</p><img src='x.png'></article>"
+            "<div class='footer'>页脚</div></body></html>"
+        )
+        assert toutiao.parse_article_html(html, "https://www.toutiao.com/article/1/") == f"标题\n{BODY}\n换行"
+
+    @pytest.mark.asyncio
+    async def test_fast_path_with_browser_fallback(self, monkeypatch):
+        """TC-HF-002: 带浏览器 Cookie 并发直连，登录跳转和正文过短的回退浏览器提取"""
+        seen_cookies = []
+
+        def handler(request):
+            seen_cookies.append(request.headers.get("cookie", ""))
+            if request.url.path == "/p/1":
+                return httpx.Response(200, text=zhihu_html("1", f"<p>{BODY}</p>"))
+            if request.url.path == "/p/2":
+                return httpx.Response(302, headers={"location": "https://www.zhihu.com/signin?next=/p/2"})
+            if request.url.path == "/signin":
+                return httpx.Response(200, text="<html>登录</html>")
+            return httpx.Response(200, text=zhihu_html("3", "<p>太短</p>"))
+
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(http_fetch.httpx, "AsyncClient",
+                            lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs))
+
+        collector = ZhihuCollector("zhihu", {})
+        fallbacks = []
+
+        async def fake_extract(page, url):
+            fallbacks.append(url)
+            return "浏览器提取的正文" if url.endswith("/2") else None
+
+        monkeypatch.setattr(collector, "extract_content", fake_extract)
+
+        urls = [f"https://zhuanlan.zhihu.com/p/{i}" for i in (1, 2, 3)]
+        contents = await collector.extract_many(FakePage(), urls)
+
+        assert contents == {urls[0]: BODY, urls[1]: "浏览器提取的正文"}
+        assert fallbacks == urls[1:]
+        assert all("z_c0=token" in c for c in seen_cookies)
+
+        row = http_fetch.fetch_stats.summary()[0]
+        assert (row["pages"], row["hits"], row["fallbacks"]) == (3, 1, 2)
+        assert row["fallback_reasons"] == {"login_redirect": 1, "too_short": 1}
+
+    def test_root_closes_on_matching_end_tag(self):
+        """TC-HF-003: 正文里 <p>/<li> 省略结束标签、多出结束标签，都不影响 root 在自己的结束标签处收尾"""
+        root = http_fetch.match_root(classes=("Post-RichText",))
+        html = (
+            "<div class='Post-RichText'><p>第一段<p>第二段<div>引用</div>"
+            "<ul><li>甲<li>乙</ul></span></div><div class='footer'>页脚</div>"
+        )
+        assert http_fetch.html_to_text(html, root) == "第一段\n第二段\n引用\n甲\n乙"
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+任务执行器测试
+测试优先级通道、交互预留槽位、进度和取消
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.job_executor import (
+    JobExecutor, LANE_BACKFILL, LANE_INTERACTIVE, LANE_SCHEDULED,
+    STATUS_CANCELLED, STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED,
+)
+
+
+def _blocking_job(started: list, gate: asyncio.Event, name: str):
+    async def _run(job):
+        started.append(name)
+        job.report(1, 2, "半程")
+        await gate.wait()
+        return name
+    return _run
+
+
+class TestJobExecutor:
+    """任务执行器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_jumps_backfill_queue(self):
+        """TC-JE-001: 批量任务占满非预留槽位后，交互任务仍能立即开跑，且排在排队的批量任务前面"""
+        executor = JobExecutor(slots=2, interactive_reserved=1)
+        gate = asyncio.Event()
+        started = []
+
+        bulk = [executor.submit(f"bulk{i}", _blocking_job(started, gate, f"bulk{i}"), lane=LANE_BACKFILL)
+                for i in range(5)]
+        scheduled = executor.submit("sched", _blocking_job(started, gate, "sched"), lane=LANE_SCHEDULED)
+        await asyncio.sleep(0)
+        assert started == ["bulk0"]  # 预留槽位不给批量任务
+
+        interactive = executor.submit("click", _blocking_job(started, gate, "click"), lane=LANE_INTERACTIVE)
+        await asyncio.sleep(0)
+        assert started == ["bulk0", "click"]
+        assert interactive.status == STATUS_RUNNING
+        assert interactive.progress["current"] == 1
+        assert executor.stats()["lanes"][LANE_BACKFILL]["queued"] == 4
+
+        gate.set()
+        assert await interactive.wait() == "click"
+        await asyncio.gather(*(j.wait() for j in bulk + [scheduled]))
+        # scheduled 通道排在剩下的 backfill 前面
+        assert started.index("sched") < started.index("bulk1")
+        assert all(j.status == STATUS_SUCCEEDED for j in bulk)
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_dedupe(self):
+        """TC-JE-002: 取消排队中/运行中的任务；相同 dedupe_key 不重复入队"""
+        executor = JobExecutor(slots=1, interactive_reserved=0)
+        gate = asyncio.Event()
+        started = []
+
+        running = executor.submit("a", _blocking_job(started, gate, "a"), lane=LANE_SCHEDULED, dedupe_key="k")
+        assert executor.submit("a2", _blocking_job(started, gate, "a2"), lane=LANE_SCHEDULED, dedupe_key="k") is running
+        queued = executor.submit("b", _blocking_job(started, gate, "b"), lane=LANE_SCHEDULED)
+        await asyncio.sleep(0)
+        assert queued.status == STATUS_QUEUED
+
+        assert executor.cancel(queued.id)
+        assert queued.status == STATUS_CANCELLED
+        assert executor.cancel(running.id)
+        await running.wait()
+        assert running.status == STATUS_CANCELLED
+        assert started == ["a"]
+        assert not executor.cancel(running.id)
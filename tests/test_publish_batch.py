@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+批量发布测试
+测试同一上下文连续发布多篇、单篇失败不影响后续、按账号剩余配额切批、篇间按最短发布间隔等
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.config import ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES
+from backend.database.models import Account, GeoArticle
+from backend.services import account_selector, geo_article_service
+from backend.services.crypto import encrypt_storage_state
+from backend.services.account_selector import AccountSelector
+from backend.services.playwright import waits
+from backend.services.playwright.publishers.base import BasePublisher
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def on(self, event, handler):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def storage_state(self):
+        return {"cookies": [{"name": "z_c0", "value": "refreshed"}], "origins": []}
+
+
+class FakePublisher(BasePublisher):
+    """第二篇发布时弹出新标签页并把当前页搞崩，第三篇直接抛异常"""
+
+    def __init__(self):
+        super().__init__("fake", {"name": "测试平台"})
+        self.pages_used = []
+
+    async def publish(self, page, article, account):
+        self.pages_used.append(page)
+        if article.id == 2:
+            await page.context_ref.new_page()
+            page.closed = True
+        if article.id == 3:
+            raise RuntimeError("编辑器加载失败")
+        return {"success": True, "platform_url": f"https://example.com/p/{article.id}"}
+
+
+class TestPublishBatch:
+    """批量发布测试类"""
+
+    @pytest.mark.asyncio
+    async def test_batch_reuses_context(self):
+        """TC-PB-001: 一个上下文里依次发布，坏页自动重开，异常只影响单篇，最后导出一次会话"""
+        context = FakeContext()
+        publisher = FakePublisher()
+        original_new_page = context.new_page
+
+        async def new_page():
+            page = await original_new_page()
+            page.context_ref = context
+            return page
+
+        context.new_page = new_page
+        articles = [SimpleNamespace(id=i, title=f"文章{i}") for i in (1, 2, 3, 4)]
+        started, finished = [], []
+
+        async def on_start(article):
+            started.append(article.id)
+
+        async def on_result(article, result):
+            finished.append((article.id, result["success"]))
+
+        batch = await publisher.publish_batch(
+            context, articles, SimpleNamespace(platform="fake"), on_start=on_start, on_result=on_result
+        )
+
+        assert started == [1, 2, 3, 4]
+        assert finished == [(1, True), (2, True), (3, False), (4, True)]
+        assert batch["results"][2]["error_msg"] == "编辑器加载失败"
+        assert batch["storage_state"]["cookies"][0]["value"] == "refreshed"
+        # 第二篇之后页被搞崩，重开一次；弹出的标签页被关掉
+        assert publisher.pages_used[0] is publisher.pages_used[1]
+        assert publisher.pages_used[2] is publisher.pages_used[3]
+        assert publisher.pages_used[1] is not publisher.pages_used[2]
+        assert sum(1 for p in context.pages if not p.is_closed()) == 1
+
+    def test_select_batch_splits_by_remaining_quota(self, clean_db, monkeypatch):
+        """TC-PB-002: 没有发布间隔限制时，一批文章按账号剩余配额切分，剩下的交给下一个账号"""
+        monkeypatch.setattr(account_selector, "ACCOUNT_DAILY_PUBLISH_QUOTA", 3)
+        monkeypatch.setattr(account_selector, "ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES", 0)
+        clean_db.add_all([
+            Account(platform="zhihu", account_name=f"批量账号{i}", storage_state="{}", status=1)
+            for i in range(2)
+        ])
+        clean_db.commit()
+        selector = AccountSelector(clean_db, node="node-a")
+
+        first, rows = selector.select_batch("zhihu", [1, 2, 3, 4, 5])
+        assert [r.article_id for r in rows] == [1, 2, 3]
+        second, rows = selector.select_batch("zhihu", [4, 5])
+        assert [r.article_id for r in rows] == [4, 5]
+        assert first.id != second.id
+
+    def test_select_batch_keeps_batch_with_min_interval(self, clean_db, monkeypatch):
+        """TC-PB-003: 有最短发布间隔时也按剩余配额整批分给一个账号，这个号在间隔内不再被选中"""
+        monkeypatch.setattr(account_selector, "ACCOUNT_DAILY_PUBLISH_QUOTA", 2)
+        monkeypatch.setattr(account_selector, "ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES", 10)
+        clean_db.add_all([
+            Account(platform="zhihu", account_name=f"间隔账号{i}", storage_state="{}", status=1)
+            for i in range(2)
+        ])
+        clean_db.commit()
+        selector = AccountSelector(clean_db, node="node-a")
+
+        first, rows = selector.select_batch("zhihu", [1, 2, 3, 4, 5])
+        assert [r.article_id for r in rows] == [1, 2]
+        second, rows = selector.select_batch("zhihu", [3, 4, 5])
+        assert [r.article_id for r in rows] == [3, 4]
+        assert first.id != second.id
+        third, rows = selector.select_batch("zhihu", [5])
+        assert third is None and rows[0].outcome == "skipped"
+
+    @pytest.mark.asyncio
+    async def test_batch_paces_min_interval(self, monkeypatch):
+        """TC-PB-004: 同一上下文连发时，篇与篇之间至少等到最短发布间隔"""
+        pauses = []
+
+        async def fake_pause(seconds, label="pause"):
+            pauses.append(seconds)
+
+        monkeypatch.setattr(waits, "pause", fake_pause)
+        publisher = FakePublisher()
+        articles = [SimpleNamespace(id=i, title=f"文章{i}") for i in (1, 4)]
+
+        batch = await publisher.publish_batch(
+            FakeContext(), articles, SimpleNamespace(platform="fake"), gap_seconds=(3, 8), min_interval_seconds=600
+        )
+
+        assert [r["success"] for r in batch["results"]] == [True, True]
+        assert len(pauses) == 1 and 590 < pauses[0] <= 600
+
+    @pytest.mark.asyncio
+    async def test_publish_batch_path_with_default_interval(self, clean_db, test_keyword, monkeypatch):
+        """TC-PB-005: 默认最短发布间隔下走批量发布，一个上下文连发多篇，篇间等够间隔"""
+        assert ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES > 0
+        account = Account(
+            platform="zhihu", account_name="批量默认间隔", status=1,
+            storage_state=encrypt_storage_state({"cookies": [], "origins": []})
+        )
+        articles = [
+            GeoArticle(keyword_id=test_keyword.id, title=f"批量{i}", content="内容", platform="zhihu",
+                       publish_status="scheduled")
+            for i in range(3)
+        ]
+        clean_db.add_all([account, *articles])
+        clean_db.commit()
+
+        contexts, pauses = [], []
+
+        class RecordingPublisher(BasePublisher):
+            def __init__(self):
+                super().__init__("zhihu", {"name": "知乎"})
+                self.published = []
+
+            async def publish(self, page, article, account):
+                self.published.append((contexts[-1], article.id))
+                return {"success": True, "platform_url": f"https://example.com/p/{article.id}"}
+
+        class FakeBrowser:
+            async def new_context(self, **kwargs):
+                contexts.append(FakeContext())
+                return contexts[-1]
+
+            async def close(self):
+                pass
+
+        class FakePlaywright:
+            chromium = SimpleNamespace(launch=lambda **kwargs: _resolved(FakeBrowser()))
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        async def _resolved(value):
+            return value
+
+        async def fake_pause(seconds, label="pause"):
+            pauses.append(seconds)
+
+        publisher = RecordingPublisher()
+        monkeypatch.setattr(geo_article_service, "get_publisher", lambda platform: publisher)
+        monkeypatch.setattr(geo_article_service, "async_playwright", FakePlaywright)
+        monkeypatch.setattr(geo_article_service.random, "randint", lambda a, b: 0)
+        monkeypatch.setattr(waits, "pause", fake_pause)
+
+        outcomes = await geo_article_service.GeoArticleService(clean_db).execute_publish_batch([a.id for a in articles])
+
+        assert all(outcomes.values()) and len(outcomes) == 3
+        assert len(contexts) == 1
+        assert [ctx for ctx, _ in publisher.published] == contexts * 3
+        assert len(pauses) == 2 and all(p > ACCOUNT_MIN_PUBLISH_INTERVAL_MINUTES * 60 - 10 for p in pauses)
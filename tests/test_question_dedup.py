@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+问题变体近似去重测试
+测试 TF-IDF 相似度聚类、入库去重和已有问法清理
+"""
+
+import pytest
+
+from backend.database.models import QuestionVariant
+from backend.services.keyword_service import KeywordService
+from backend.services.question_dedup import cluster_near_duplicates, dedupe_questions
+
+
+QUESTIONS = [
+    "SEO优化哪家公司好？",
+    "哪家公司的SEO优化好",
+    "SEO优化多少钱？",
+    "SEO优化需要多少钱",
+    "北京SEO优化公司推荐",
+    "推荐一家北京的SEO优化公司",
+    "什么是SEO优化？",
+]
+
+
+class TestQuestionDedup:
+    """问题变体去重测试类"""
+
+    def test_cluster_rewordings(self):
+        """TC-QD-001: 只是换了说法的问题聚到一簇，不同意图的分开"""
+        clusters = cluster_near_duplicates(QUESTIONS)
+        assert clusters == [[0, 1], [2, 3], [4, 5], [6]]
+
+    def test_dedupe_against_existing(self):
+        """TC-QD-002: 新问题与已有问题近似重复时被过滤"""
+        new = ["SEO优化需要多少钱", "SEO优化怎么收费", "SEO优化怎么收费？"]
+        assert dedupe_questions(new, existing_questions=["SEO优化多少钱？"]) == ["SEO优化怎么收费"]
+
+    def test_add_variants_skips_near_duplicates(self, clean_db, test_keyword):
+        """TC-QD-003: 批量入库时跳过近似重复"""
+        service = KeywordService(clean_db)
+        saved, skipped = service.add_question_variants(test_keyword.id, QUESTIONS)
+        assert skipped == 3
+        assert [qv.question for qv in saved] == [QUESTIONS[0], QUESTIONS[2], QUESTIONS[4], QUESTIONS[6]]
+
+        # 单个添加近似重复问法返回已有记录
+        qv = service.add_question_variant(test_keyword.id, "SEO优化哪家公司比较好")
+        assert qv.question == QUESTIONS[0]
+
+    def test_prune_existing_variants(self, clean_db, test_keyword):
+        """TC-QD-004: 清理已有近似重复问法，保留最早的一个"""
+        for q in QUESTIONS:
+            clean_db.add(QuestionVariant(keyword_id=test_keyword.id, question=q))
+        clean_db.commit()
+
+        service = KeywordService(clean_db)
+        preview = service.prune_question_variants(test_keyword.id, dry_run=True)
+        assert preview["removed"] == 3
+        assert clean_db.query(QuestionVariant).count() == len(QUESTIONS)
+
+        result = service.prune_question_variants(test_keyword.id, dry_run=False)
+        assert result["kept"] == 4
+        remaining = [qv.question for qv in service.get_keyword_questions(test_keyword.id)]
+        assert sorted(remaining) == sorted([QUESTIONS[0], QUESTIONS[2], QUESTIONS[4], QUESTIONS[6]])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+请求拦截测试
+测试按资源类型/URL 拦截、放行名单优先、拦截计数、有头运行不拦截
+"""
+
+import pytest
+
+from backend.services.playwright import browser_mode, resource_blocking
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+class FakeContext:
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    resource_blocking.block_stats.clear()
+    yield
+    resource_blocking.block_stats.clear()
+
+
+class TestResourceBlocking:
+    """请求拦截测试类"""
+
+    @pytest.mark.asyncio
+    async def test_block_allow_and_count(self, monkeypatch):
+        """TC-RB-001: 图片/统计脚本被拦，验证码图片和接口放行，计数按平台聚合"""
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_COLLECT, browser_mode.MODE_AUTO)
+        context = FakeContext()
+        assert await resource_blocking.apply(context, "zhihu", browser_mode.SUBSYSTEM_COLLECT, enabled=True)
+
+        cases = [
+            ("image", "https://pic1.zhimg.com/v2-abc.jpg", "aborted"),
+            ("script", "https://hm.baidu.com/hm.js?x", "aborted"),
+            ("image", "https://www.zhihu.com/api/v3/oauth/captcha?lang=cn", "continued"),
+            ("xhr", "https://www.zhihu.com/api/v4/search_v3?q=GEO", "continued"),
+            ("document", "https://www.zhihu.com/search?q=GEO", "continued"),
+        ]
+        for resource_type, url, expected in cases:
+            route = FakeRoute(resource_type, url)
+            await context.handler(route)
+            assert route.outcome == expected, url
+
+        row = resource_blocking.block_stats.summary()[0]
+        assert row["platform"] == "zhihu"
+        assert (row["requests"], row["blocked"], row["allowed"]) == (5, 2, 1)
+        assert row["blocked_by_type"] == {"image": 1, "script": 1}
+
+    @pytest.mark.asyncio
+    async def test_skipped_when_headed_or_unconfigured(self, monkeypatch):
+        """TC-RB-002: 有头运行（人工过验证码）和没配规则的平台不挂拦截"""
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_CHECK, browser_mode.MODE_HEADED)
+        assert not await resource_blocking.apply(FakeContext(), "doubao", browser_mode.SUBSYSTEM_CHECK, enabled=True)
+
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_CHECK, browser_mode.MODE_HEADLESS)
+        assert await resource_blocking.apply(FakeContext(), "doubao", browser_mode.SUBSYSTEM_CHECK, enabled=True)
+        assert not await resource_blocking.apply(FakeContext(), "custom", browser_mode.SUBSYSTEM_CHECK, enabled=True)
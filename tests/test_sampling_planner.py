@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+问题变体抽样规划器测试
+测试历史稳定的关键词提前停止、历史波动大的问法优先、一个回答一次试验
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from backend.database.models import IndexCheckRecord, QuestionVariant
+from backend.services.check_result_cache import question_key, beijing_now
+from backend.services.sampling_planner import VariantSamplingPlanner
+
+
+def _seed_history(db, keyword_id, question, results, cached=False):
+    """写入历史检测记录，results 为 [(keyword_found, company_found), ...]"""
+    for i, (kw, co) in enumerate(results):
+        db.add(IndexCheckRecord(
+            keyword_id=keyword_id,
+            platform="doubao",
+            question=question,
+            question_key=question_key(question),
+            keyword_found=kw,
+            company_found=co,
+            cached=cached,
+            check_time=beijing_now() - timedelta(hours=i + 1)
+        ))
+    db.commit()
+
+
+class TestVariantSamplingPlanner:
+    """抽样规划器测试类"""
+
+    def test_no_history_asks_everything(self, clean_db, test_keyword):
+        """TC-SP-001: 没有历史时区间太宽，不会提前停止"""
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao", min_samples=2)
+        for i in range(5):
+            planner.observe(f"问题{i}", False, False)
+        assert not planner.should_stop()
+
+    def test_stable_keyword_stops_early(self, clean_db, test_keyword):
+        """TC-SP-002: 历史一直未命中的关键词，问够最少次数后即可停止"""
+        _seed_history(clean_db, test_keyword.id, "问题A", [(False, False)] * 12)
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao", min_samples=2)
+
+        planner.observe("问题A", False, False)
+        assert not planner.should_stop()  # 未达到最少抽样数
+        planner.observe("问题B", False, False)
+        assert planner.should_stop()
+
+        summary = planner.summary(variants_total=6)
+        assert summary["stopped_early"] is True
+        assert summary["variants_asked"] == 2
+        assert summary["ci_low"] <= summary["hit_rate_estimate"] <= summary["ci_high"]
+        assert summary["hit_rate_estimate"] < 15
+
+    def test_volatile_keyword_keeps_asking(self, clean_db, test_keyword):
+        """TC-SP-003: 历史结果一半一半时，区间仍然较宽，继续提问"""
+        _seed_history(clean_db, test_keyword.id, "问题A", [(True, True), (False, False)] * 6)
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao", min_samples=2)
+        planner.observe("问题A", True, True)
+        planner.observe("问题B", False, False)
+        assert not planner.should_stop()
+
+    def test_order_prefers_uncertain_variants(self, clean_db, test_keyword):
+        """TC-SP-004: 没问过的、历史波动大的问法排在前面"""
+        _seed_history(clean_db, test_keyword.id, "稳定问法", [(False, False)] * 8)
+        _seed_history(clean_db, test_keyword.id, "波动问法", [(True, True), (False, False)] * 4)
+
+        questions = [
+            QuestionVariant(id=1, keyword_id=test_keyword.id, question="稳定问法"),
+            QuestionVariant(id=2, keyword_id=test_keyword.id, question="波动问法"),
+            QuestionVariant(id=3, keyword_id=test_keyword.id, question="新问法"),
+        ]
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao")
+        assert [qv.question for qv in planner.order(questions)] == ["新问法", "波动问法", "稳定问法"]
+
+    def test_disabled_keeps_original_order(self, clean_db, test_keyword):
+        """TC-SP-005: 关闭抽样时按原顺序全部提问"""
+        _seed_history(clean_db, test_keyword.id, "问题A", [(False, False)] * 12)
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao", enabled=False)
+        planner.observe("问题A", False, False)
+        planner.observe("问题B", False, False)
+        assert not planner.should_stop()
+
+    def test_one_trial_per_answer_without_cached_history(self, clean_db, test_keyword):
+        """TC-SP-006: 一个回答只算一次试验（任一命中即命中），缓存复用的记录不进先验，没决定停就不算提前停止"""
+        _seed_history(clean_db, test_keyword.id, "问题A", [(True, False), (False, True)] * 3)
+        _seed_history(clean_db, test_keyword.id, "问题A", [(False, False)] * 20, cached=True)
+        planner = VariantSamplingPlanner(clean_db, test_keyword.id, "doubao", min_samples=1)
+        assert planner.history_checks == 6
+        assert planner.variant_history[question_key("问题A")] == (6, 6)
+
+        planner.observe("问题B", True, True)
+        assert (planner.hits, planner.trials) == (1, 1)
+        summary = planner.summary(variants_total=4)
+        assert summary["stopped_early"] is False
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+定时任务执行记录测试
+测试包装器写入执行记录，以及 p50/p95 耗时、延迟统计，别的进程改了任务配置后同步重载
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database import SessionLocal
+from backend.database.models import ScheduledTask, ScheduledTaskRun
+from backend.services.scheduler_service import SchedulerService
+
+
+class TestSchedulerRuns:
+    """定时任务执行记录测试类"""
+
+    @pytest.mark.asyncio
+    async def test_wrapper_records_runs(self, clean_db):
+        """TC-SR-001: 成功和失败的执行都会记录，延迟按计划触发时间计算"""
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+
+        async def ok_job():
+            return 7
+
+        async def bad_job():
+            raise RuntimeError("浏览器崩了")
+
+        service._scheduled_times["ok"] = datetime.now() - timedelta(seconds=5)
+        await service._with_run_history("ok", ok_job)()
+        await service._with_run_history("bad", bad_job)()
+
+        runs = {r.task_key: r for r in clean_db.query(ScheduledTaskRun).all()}
+        assert runs["ok"].status == "success"
+        assert runs["ok"].items == 7
+        assert 5 <= runs["ok"].lag_seconds < 10
+        assert runs["bad"].status == "failed"
+        assert "浏览器崩了" in runs["bad"].error
+        assert runs["bad"].lag_seconds is None
+
+    def test_run_stats(self, clean_db):
+        """TC-SR-002: 统计 p50/p95 耗时、平均延迟和每次处理条数"""
+        now = datetime.now()
+        for i in range(20):
+            clean_db.add(ScheduledTaskRun(
+                task_key="monitor_task",
+                started_at=now - timedelta(minutes=i),
+                duration_seconds=float(i + 1),
+                lag_seconds=90.0 if i == 0 else 1.0,
+                items=i % 3,
+                status="success"
+            ))
+        clean_db.commit()
+
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+        stats = service.get_run_stats(hours=1)["tasks"]["monitor_task"]
+
+        assert stats["runs"] == 20
+        assert stats["p50_duration_seconds"] == 10
+        assert stats["p95_duration_seconds"] == 19
+        assert stats["avg_lag_seconds"] == pytest.approx((90 + 19) / 20)
+        assert stats["late_runs"] == 1
+        assert stats["avg_items_per_run"] == pytest.approx(19 / 20)
+
+    @pytest.mark.asyncio
+    async def test_sync_changed_tasks(self, clean_db):
+        """TC-SR-003: 任务配置在别的进程（API）改了表，sync_tasks_from_db 只重新装载改过的任务"""
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+
+        async def job():
+            return 0
+
+        service.task_registry = {"sync_test": job}
+        task = ScheduledTask(name="同步测试", task_key="sync_test", cron_expression="*/5 * * * *", is_active=True)
+        clean_db.add(task)
+        clean_db.commit()
+        try:
+            service.start()
+            assert service.sync_tasks_from_db() == 0
+
+            task.cron_expression = "*/10 * * * *"
+            clean_db.commit()
+            assert service.sync_tasks_from_db() == 1
+            assert "*/10" in str(service.scheduler.get_job("sync_test").trigger)
+            assert service.sync_tasks_from_db() == 0
+
+            task.is_active = False
+            clean_db.commit()
+            assert service.sync_tasks_from_db() == 1
+            assert service.scheduler.get_job("sync_test") is None
+        finally:
+            service.stop()
+            clean_db.delete(task)
+            clean_db.commit()
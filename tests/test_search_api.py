@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+搜索接口截获测试
+测试从搜索接口 JSON 取结果并跟着游标翻页、截不到接口或翻页失败时回退页面抓取
+"""
+
+import pytest
+
+from backend.services.playwright.collectors import ZhihuCollector, ToutiaoCollector
+
+
+class FakeResponse:
+    def __init__(self, url, payload, status=200):
+        self.url = url
+        self.status = status
+        self.ok = status < 400
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+
+class FakeRequest:
+    def __init__(self, pages):
+        self.pages = pages
+        self.urls = []
+
+    async def get(self, url):
+        self.urls.append(url)
+        page = self.pages[url]
+        return page if isinstance(page, FakeResponse) else FakeResponse(url, page)
+
+
+class FakePage:
+    """goto 时把 api_responses 依次发给 response 监听"""
+
+    def __init__(self, api_responses=(), cursor_pages=None):
+        self.api_responses = list(api_responses)
+        self.request = FakeRequest(cursor_pages or {})
+        self.listeners = []
+        self.url = "about:blank"
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        for response in self.api_responses:
+            for handler in list(self.listeners):
+                await handler(response)
+
+    async def wait_for_selector(self, selector, **kwargs):
+        return True
+
+    async def evaluate(self, *args):
+        return None
+
+    async def title(self):
+        return "搜索结果"
+
+
+def zhihu_item(kind, item_id, title, votes, question_id=None):
+    obj = {"type": kind, "id": item_id, "voteup_count": votes, "comment_count": 3, "author": {"name": "作者"}}
+    if question_id:
+        obj["question"] = {"id": question_id, "name": title}
+    return {"type": "search_result", "highlight": {"title": f"<em>GEO</em> {title}"}, "object": obj}
+
+
+@pytest.fixture
+def quiet(monkeypatch):
+    """去掉随机停顿，记录有没有滚动页面"""
+    scrolls = []
+
+    async def no_sleep(self, *args):
+        return None
+
+    async def fake_scroll(self, page):
+        scrolls.append(page)
+
+    monkeypatch.setattr("backend.services.playwright.collectors.base.BaseCollector._random_sleep", no_sleep)
+    monkeypatch.setattr("backend.services.playwright.collectors.base.BaseCollector._human_scroll", fake_scroll)
+    return scrolls
+
+
+class TestSearchApi:
+    """搜索接口截获测试类"""
+
+    @pytest.mark.asyncio
+    async def test_zhihu_results_from_api_with_cursor(self, quiet):
+        """TC-SA-001: 知乎从 search_v3 接口拿结果，按 paging.next 翻页，不滚动页面"""
+        next_url = "https://www.zhihu.com/api/v4/search_v3?q=GEO&offset=20"
+        first = FakeResponse("https://www.zhihu.com/api/v4/search_v3?q=GEO&offset=0", {
+            "data": [
+                zhihu_item("answer", 11, "怎么做", 1200, question_id=99),
+                zhihu_item("article", 22, "入门指南", 300),
+                {"type": "relevant_query", "object": {}},
+            ],
+            "paging": {"is_end": False, "next": next_url},
+        })
+        page = FakePage([first], {next_url: {
+            "data": [zhihu_item("article", 33, "案例", 50)],
+            "paging": {"is_end": True},
+        }})
+
+        collector = ZhihuCollector("zhihu", {"max_pages": 3})
+        articles = await collector.search(page, "GEO")
+
+        assert [a["url"] for a in articles] == [
+            "https://www.zhihu.com/question/99/answer/11",
+            "https://zhuanlan.zhihu.com/p/22",
+            "https://zhuanlan.zhihu.com/p/33",
+        ]
+        assert articles[0]["title"] == "GEO 怎么做"
+        assert (articles[0]["likes"], articles[0]["comments"], articles[0]["author"]) == (1200, 3, "作者")
+        assert page.request.urls == [next_url]
+        assert quiet == [] and page.listeners == []
+
+    @pytest.mark.asyncio
+    async def test_toutiao_falls_back_to_dom(self, quiet, monkeypatch):
+        """TC-SA-002: 头条截不到接口时回退滚动抓卡片；接口游标按 offset 拼下一页"""
+        monkeypatch.setattr("backend.services.playwright.collectors.base.SEARCH_API_CAPTURE_TIMEOUT", 0.05)
+        collector = ToutiaoCollector("toutiao", {})
+        dom_results = [{"title": "卡片", "url": "https://www.toutiao.com/article/1/", "reads": 5000}]
+
+        async def fake_extract(page):
+            return dom_results
+
+        monkeypatch.setattr(collector, "_extract_search_results", fake_extract)
+        page = FakePage()
+        assert await collector.search(page, "GEO") == dom_results
+        assert quiet == [page]
+
+        articles, next_url = collector.parse_search_payload({
+            "data": [
+                {"title": "头条文章", "article_url": "https://www.toutiao.com/article/2/", "read_count": 30000,
+                 "comment_count": 8, "source": "某媒体"},
+                {"cell_type": 50, "user_name": "用户卡片"},
+            ],
+            "has_more": 1,
+            "offset": 20,
+        }, "https://www.toutiao.com/api/search/content/?keyword=GEO&offset=0&count=20")
+        assert articles == [{"title": "头条文章", "url": "https://www.toutiao.com/article/2/", "likes": 300,
+                             "reads": 30000, "comments": 8, "author": "某媒体"}]
+        assert next_url == "https://www.toutiao.com/api/search/content/?keyword=GEO&offset=20&count=20"
+
+    @pytest.mark.asyncio
+    async def test_toutiao_api_paging_failure_falls_back_to_dom(self, quiet, monkeypatch):
+        """TC-SA-003: 接口翻页返回 403 时不直接结束，回退滚动抓卡片，和接口结果按链接去重"""
+        api_url = "https://www.toutiao.com/api/search/content/?keyword=GEO&offset=0&count=20"
+        next_url = "https://www.toutiao.com/api/search/content/?keyword=GEO&offset=20&count=20"
+        first = FakeResponse(api_url, {
+            "data": [{"title": "接口文章", "article_url": "https://www.toutiao.com/article/2/", "read_count": 100}],
+            "has_more": 1,
+            "offset": 20,
+        })
+        page = FakePage([first], {next_url: FakeResponse(next_url, {}, status=403)})
+        collector = ToutiaoCollector("toutiao", {"max_pages": 3})
+
+        async def fake_extract(page):
+            return [
+                {"title": "接口文章", "url": "https://www.toutiao.com/article/2/", "reads": 100},
+                {"title": "卡片", "url": "https://www.toutiao.com/article/3/", "reads": 50},
+            ]
+
+        monkeypatch.setattr(collector, "_extract_search_results", fake_extract)
+        articles = await collector.search(page, "GEO")
+
+        assert [a["url"] for a in articles] == [
+            "https://www.toutiao.com/article/2/", "https://www.toutiao.com/article/3/",
+        ]
+        assert page.request.urls == [next_url]
+        assert quiet == [page]
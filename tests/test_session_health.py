@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+会话健康模型测试
+测试按关键 Cookie 过期时间和心跳结果评估会话、状态查询不开浏览器、到期会话错开主动续期、心跳没结论不记录
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import SESSION_KEY_COOKIES
+from backend.services import session_health
+from backend.services.session_manager import SecureSessionManager
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def cookie(name, expires_in_hours=None):
+    expires = (NOW + timedelta(hours=expires_in_hours)).timestamp() if expires_in_hours is not None else -1
+    return {"name": name, "value": "v", "domain": ".zhihu.com", "path": "/", "expires": expires}
+
+
+class TestSessionHealth:
+    """会话健康模型测试类"""
+
+    def test_assess_by_cookie_expiry_and_heartbeat(self):
+        """TC-SH-001: 关键 Cookie 过期时间决定有效/临近过期/失效，没有过期时间的看心跳"""
+        def status(state, platform="zhihu"):
+            return session_health.assess(state, platform, "s", now=NOW).status
+
+        assert status({"cookies": [cookie("z_c0", 24 * 30)]}) == "valid"
+        # 备选 Cookie 取最晚的
+        assert status({"cookies": [cookie("z_c0", 10), cookie("z_cari0", 24 * 30)]}) == "valid"
+        assert status({"cookies": [cookie("z_c0", 10)]}) == "expiring"
+        assert status({"cookies": [cookie("z_c0", -1)]}) == "invalid"
+        assert status({"cookies": [cookie("other", 24 * 30)]}) == "invalid"
+
+        # 没有过期时间：心跳新鲜算有效，过期了需要心跳
+        fresh = {"cookies": [], "last_heartbeat_at": (NOW - timedelta(hours=2)).isoformat(), "last_heartbeat_ok": True}
+        stale = dict(fresh, last_heartbeat_at=(NOW - timedelta(days=3)).isoformat())
+        assert status(fresh, "deepseek") == "valid"
+        health = session_health.assess(stale, "deepseek", "s", now=NOW)
+        assert health.needs_heartbeat and health.next_refresh_at < NOW
+
+        # 心跳失败算失效，之后重新登录过就以新登录为准
+        failed = dict(fresh, last_heartbeat_ok=False)
+        assert status(failed, "deepseek") == "invalid"
+        assert status(dict(failed, created_at=NOW.isoformat()), "deepseek") != "invalid"
+        # AI 平台也看关键 Cookie：豆包没有 sessionid 直接失效，会话级的靠心跳
+        assert status(fresh, "doubao") == "invalid"
+        assert status(dict(fresh, cookies=[cookie("sessionid")]), "doubao") == "valid"
+        # 设备标识不算登录态；授权判定仍用原来的 SESSION_KEY_COOKIES，不受影响
+        assert status({"cookies": [cookie("webId", 24 * 30)]}, "xiaohongshu") == "invalid"
+        assert "webId" in SESSION_KEY_COOKIES["xiaohongshu"]
+
+    @pytest.mark.asyncio
+    async def test_status_without_browser_and_spread_refresh(self, tmp_path, monkeypatch):
+        """TC-SH-002: 快速状态查询不开浏览器；续期只做到期的会话，每次最多 limit 个"""
+        manager = SecureSessionManager()
+        manager._session_dir = tmp_path
+        heartbeats = []
+
+        async def fake_heartbeat(platform, storage_state):
+            heartbeats.append(platform)
+            return True
+
+        monkeypatch.setattr(manager, "_perform_heartbeat_check", fake_heartbeat)
+
+        long_ago = (datetime.now() - timedelta(days=3)).isoformat()
+        await manager.save_session(1, 1, "doubao", {"cookies": [cookie("sessionid")], "created_at": long_ago})
+        await manager.save_session(1, 1, "qianwen", {"cookies": [cookie("tongyi_sso_ticket")], "created_at": long_ago})
+        await manager.save_session(1, 2, "deepseek", {
+            "cookies": [], "last_heartbeat_at": datetime.now().isoformat(), "last_heartbeat_ok": True
+        })
+
+        fast = await manager.get_session_status_fast(1, 2, "deepseek")
+        assert fast["status"] == "valid" and fast["health"]["last_heartbeat_ok"] is True
+        assert (await manager.get_session_status_fast(1, 1, "doubao"))["status"] == "expiring"
+        assert heartbeats == []
+
+        result = await manager.refresh_due_sessions(limit=1)
+        assert result["due"] == 2 and len(result["refreshed"]) == 1
+        result = await manager.refresh_due_sessions(limit=1)
+        assert result["due"] == 1
+        assert sorted(heartbeats) == ["doubao", "qianwen"]
+
+        # 续期过的会话状态查询直接有效
+        assert await manager.validate_session(1, 1, "doubao") == "valid"
+        assert len(heartbeats) == 2
+
+    @pytest.mark.asyncio
+    async def test_inconclusive_heartbeat_not_recorded(self, tmp_path, monkeypatch):
+        """TC-SH-003: 心跳超时/异常不记失败；重新导出的存储状态带上原来的心跳结果"""
+        manager = SecureSessionManager()
+        manager._session_dir = tmp_path
+        outcome = {"value": None}
+
+        async def fake_heartbeat(platform, storage_state):
+            return outcome["value"]
+
+        monkeypatch.setattr(manager, "_perform_heartbeat_check", fake_heartbeat)
+        await manager.save_session(1, 1, "deepseek", {"cookies": []})
+
+        assert await manager.validate_session(1, 1, "deepseek") == "expiring"
+        state = await manager.load_session(1, 1, "deepseek", validate=False)
+        assert "last_heartbeat_ok" not in state
+
+        outcome["value"] = False
+        assert await manager.validate_session(1, 1, "deepseek") == "invalid"
+        state = await manager.load_session(1, 1, "deepseek", validate=False)
+        assert state["last_heartbeat_ok"] is False
+
+        exported = session_health.carry_over(state, {"cookies": [], "origins": []})
+        assert exported["last_heartbeat_ok"] is False and exported["last_heartbeat_at"] == state["last_heartbeat_at"]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+分片调度测试
+测试分片计划、槽位稳定性，以及 Job 每个 tick 只处理当前槽位（按计划触发时间算槽位和延迟）
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database import SessionLocal
+from backend.database.models import GeoArticle, Keyword
+from backend.services.geo_article_service import GeoArticleService
+from backend.services.scheduler_service import SchedulerService
+from backend.services.shard_scheduler import ShardPlan, stable_slot, uniform_cron_period
+
+
+class TestShardScheduler:
+    """分片调度测试类"""
+
+    def test_plan_from_cron(self):
+        """TC-SS-001: 间隔固定的 cron 周期切分成 tick，周期太短时自动减少分片；间隔不固定的不分片"""
+        assert uniform_cron_period("*/5 * * * *") == 300
+        assert uniform_cron_period("0 9 * * *") == 86400
+        for cron in ("0 9,17 * * *", "0 9 * * 1-5", "*/7 * * * *", "0 0 1 * *"):
+            assert uniform_cron_period(cron) is None
+        plan = ShardPlan.from_period(300, shard_count=10, min_tick_seconds=5)
+        assert (plan.shards, plan.tick_seconds) == (10, 30)
+        assert ShardPlan.from_period(60, shard_count=30, min_tick_seconds=5).shards == 12
+
+        # 一个周期内每个槽位恰好轮到一次
+        slots = [plan.current_slot(1_000_000 + i * plan.tick_seconds) for i in range(plan.shards)]
+        assert sorted(slots) == list(range(plan.shards))
+        # 计划触发时间在 tick 边界上，浮点误差不会落到上一个槽位
+        assert plan.slot_at(33 * plan.tick_seconds - 1e-7) == 3
+        assert stable_slot(23, 10) == 3
+
+    @pytest.mark.asyncio
+    async def test_monitor_job_processes_one_slot(self, clean_db, test_project, monkeypatch):
+        """TC-SS-002: 分片模式下一个 tick 只检测当前槽位的文章，并记录 tick 统计"""
+        keywords = [Keyword(project_id=test_project.id, keyword=f"关键词{i}") for i in range(4)]
+        clean_db.add_all(keywords)
+        clean_db.commit()
+        due = datetime.now() - timedelta(minutes=1)
+        for kw in keywords:
+            clean_db.add(GeoArticle(keyword_id=kw.id, title="t", content="c",
+                                    publish_status="published", next_check_time=due))
+        clean_db.commit()
+
+        checked = []
+
+        async def fake_check(self, article_id):
+            checked.append(article_id)
+            return {"status": "success"}
+
+        monkeypatch.setattr(GeoArticleService, "check_article_index", fake_check)
+
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+        plan = ShardPlan(period_seconds=86400, shards=2)  # tick 足够长，测试期间不会跨槽位
+        service.shard_plans["monitor_task"] = plan
+        slot = plan.current_slot()
+
+        await service.auto_check_indexing_job()
+
+        article_ids = [a.id for a in clean_db.query(GeoArticle).all()]
+        expected = [i for i in article_ids if i % 2 == slot]
+        assert sorted(checked) == sorted(expected)
+
+        report = service.get_shard_report()["tasks"]["monitor_task"]
+        assert sum(report["slot_counts"]) == 4
+        assert report["stats"]["ticks"] == 1
+        assert report["stats"]["recent"][0]["items"] == len(expected)
+
+    @pytest.mark.asyncio
+    async def test_slot_and_lag_from_fire_time(self, clean_db, test_project, monkeypatch):
+        """TC-SS-003: 触发晚了也按计划触发时间取槽位，延迟 = 实际开始 - 计划时间"""
+        keyword = Keyword(project_id=test_project.id, keyword="关键词")
+        clean_db.add(keyword)
+        clean_db.commit()
+        due = datetime.now() - timedelta(minutes=1)
+        clean_db.add_all([GeoArticle(keyword_id=keyword.id, title="t", content="c",
+                                     publish_status="published", next_check_time=due) for _ in range(4)])
+        clean_db.commit()
+
+        checked = []
+
+        async def fake_check(self, article_id):
+            checked.append(article_id)
+            return {"status": "success"}
+
+        monkeypatch.setattr(GeoArticleService, "check_article_index", fake_check)
+
+        service = SchedulerService()
+        service.set_db_factory(SessionLocal)
+        plan = ShardPlan(period_seconds=60, shards=2)
+        service.shard_plans["monitor_task"] = plan
+        # 计划在槽位 1 的 tick 开头触发，实际晚了两个 tick 以上（墙钟已经到了后面的 tick）
+        index = plan.tick_index() - 2
+        index -= 0 if index % 2 == 1 else 1
+        fire = datetime.fromtimestamp(index * plan.tick_seconds)
+        assert plan.slot_at(fire.timestamp()) == 1
+        service._scheduled_times["monitor_task"] = fire
+
+        await service._with_run_history("monitor_task", service.auto_check_indexing_job)()
+
+        article_ids = [a.id for a in clean_db.query(GeoArticle).all()]
+        assert sorted(checked) == sorted(i for i in article_ids if i % 2 == 1)
+        tick = service.shard_stats.ticks["monitor_task"][-1]
+        assert tick.slot == 1
+        assert tick.lag_seconds == pytest.approx((tick.started_at - fire).total_seconds(), abs=0.01)
+        assert tick.lag_seconds > plan.tick_seconds
+
+    def test_sharded_trigger_aligned_to_cron(self, monkeypatch):
+        """TC-SS-004: 分片 tick 从 cron 触发时间开始切、start_date 带调度器时区；间隔不固定的 cron 保持原触发器"""
+        from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.interval import IntervalTrigger
+        from backend.database.models import ScheduledTask
+
+        service = SchedulerService()
+        service.sharded_mode = True
+        tz = service.scheduler.timezone
+
+        service._schedule_job(ScheduledTask(name="每天", task_key="monitor_task", cron_expression="0 9 * * *", is_active=True))
+        trigger = service.scheduler.get_job("monitor_task").trigger
+        plan = service.shard_plans["monitor_task"]
+        assert isinstance(trigger, IntervalTrigger) and trigger.start_date.tzinfo is not None
+        assert trigger.start_date.utcoffset() == datetime.now(tz).utcoffset()
+        # 每天 9 点正好是某个 tick 的开头，且落在同一个槽位上
+        nine = CronTrigger.from_crontab("0 9 * * *", timezone=tz).get_next_fire_time(None, datetime.now(tz))
+        offset = (trigger.start_date - nine).total_seconds() % plan.tick_seconds
+        assert min(offset, plan.tick_seconds - offset) < 1e-3
+        assert plan.slot_at(nine.timestamp()) == plan.slot_at((nine + timedelta(days=1)).timestamp())
+
+        service._schedule_job(ScheduledTask(name="早晚", task_key="publish_task", cron_expression="0 9,17 * * *", is_active=True))
+        assert isinstance(service.scheduler.get_job("publish_task").trigger, CronTrigger)
+        assert "publish_task" not in service.shard_plans
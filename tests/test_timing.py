@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Playwright 操作耗时埋点测试
+测试页面代理按步骤记 span、条件等待不重复计时、落库后按平台/步骤算 p50/p95
+"""
+
+import asyncio
+
+import pytest
+
+from backend.database.models import OperationSpan
+from backend.services.playwright import timing, waits
+
+
+class FakeLocator:
+    async def click(self, **kwargs):
+        await asyncio.sleep(0.01)
+
+    @property
+    def first(self):
+        return self
+
+
+class FakePage:
+    def __init__(self):
+        self.url = "about:blank"
+        self.closed = False
+
+    async def goto(self, url, **kwargs):
+        await asyncio.sleep(0.02)
+        self.url = url
+
+    async def fill(self, selector, value):
+        pass
+
+    async def wait_for_selector(self, selector, **kwargs):
+        await asyncio.sleep(0.01)
+        return object()
+
+    def locator(self, selector):
+        return FakeLocator()
+
+    def is_closed(self):
+        return self.closed
+
+
+@pytest.fixture
+def clean_recorder():
+    timing.recorder.buffer.clear()
+    timing.recorder._pending.clear()
+    timing.recorder._inflight = None
+    yield timing.recorder
+    timing.recorder.buffer.clear()
+    timing.recorder._pending.clear()
+    timing.recorder._inflight = None
+
+
+class TestTiming:
+    """耗时埋点测试类"""
+
+    @pytest.mark.asyncio
+    async def test_spans_per_step(self, clean_recorder):
+        """TC-TM-001: 页面操作、locator 操作、条件等待、总耗时各记一条，等待内部调用不重复"""
+        raw = FakePage()
+        async with timing.operation("zhihu", timing.OP_PUBLISH):
+            page = timing.instrument(raw)
+            await page.goto("https://zhuanlan.zhihu.com/write")
+            await page.fill("#title", "标题")
+            await page.locator(".btn").first.click()
+            await waits.wait_visible(page, "#editor", timeout=1, label="zhihu:编辑器")
+
+        steps = [s.step for s in clean_recorder.buffer]
+        assert steps == ["goto", "fill", "locator.click", "wait:zhihu:编辑器", "total"]
+        assert all(s.platform == "zhihu" and s.operation == "publish" for s in clean_recorder.buffer)
+        assert raw.url == "https://zhuanlan.zhihu.com/write"
+        assert timing.unwrap(page) is raw and not page.is_closed()
+
+    @pytest.mark.asyncio
+    async def test_flush_and_percentiles(self, clean_db, clean_recorder):
+        """TC-TM-002: 落库后按平台、步骤给出 p50/p95，失败次数单独统计"""
+        for duration in range(1, 101):
+            timing.record_span("toutiao", timing.OP_PUBLISH, "goto", float(duration))
+        timing.record_span("toutiao", timing.OP_PUBLISH, "total", 5000.0, ok=False)
+
+        assert clean_recorder.flush() == 101
+        assert clean_db.query(OperationSpan).count() == 101
+
+        stats = timing.step_stats(clean_db, platform="toutiao")
+        rows = {r["step"]: r for r in stats["platforms"]["toutiao"]}
+        assert rows["goto"]["p50_ms"] == 50.0
+        assert rows["goto"]["p95_ms"] == 95.0
+        assert rows["total"]["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_background_flush(self, clean_db, clean_recorder, monkeypatch):
+        """TC-TM-003: 攒够一批后 operation() 结束时丢到线程池写库，不在事件循环里同步写；写失败的放回队列"""
+        monkeypatch.setattr(timing, "TIMING_FLUSH_BATCH", 3)
+        for duration in range(3):
+            timing.record_span("zhihu", timing.OP_PUBLISH, "goto", float(duration))
+        async with timing.operation("zhihu", timing.OP_PUBLISH):
+            pass
+
+        # 已经从队列里取走，写库在线程池里跑
+        assert len(clean_recorder._pending) == 0 and clean_recorder._inflight is not None
+        await clean_recorder._inflight
+        assert clean_db.query(OperationSpan).count() == 4
+
+        monkeypatch.setattr(clean_recorder, "_write", lambda spans: False)
+        for duration in range(3):
+            timing.record_span("zhihu", timing.OP_PUBLISH, "fill", float(duration))
+        clean_recorder.maybe_flush()
+        await clean_recorder._inflight
+        await asyncio.sleep(0)
+        assert [s.step for s in clean_recorder._pending] == ["fill"] * 3
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+等待策略测试
+测试条件满足立即返回、超时按预算返回且被记录、统计按 label 聚合
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.playwright import waits
+
+
+class FakePage:
+    """wait_for_selector 在 ready_after 秒后才成功；url 可以中途改变"""
+
+    def __init__(self, ready_after: float = 0.0):
+        self.ready_after = ready_after
+        self.url = "https://example.com/edit"
+
+    async def wait_for_selector(self, selector, state="visible", timeout=30000):
+        if self.ready_after * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(f"Timeout {timeout}ms exceeded waiting for {selector}")
+        await asyncio.sleep(self.ready_after)
+        return object()
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    waits.wait_stats.clear()
+    yield
+    waits.wait_stats.clear()
+
+
+class TestWaits:
+    """等待策略测试类"""
+
+    @pytest.mark.asyncio
+    async def test_condition_met_early(self):
+        """TC-WT-001: 条件满足立即返回，不会等满预算"""
+        assert await waits.wait_visible(FakePage(ready_after=0.05), "#editor", timeout=5, label="编辑器")
+
+        record = waits.wait_stats.records[-1]
+        assert record.met is True
+        assert record.kind == waits.KIND_VISIBLE
+        assert record.waited < 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_recorded(self):
+        """TC-WT-002: 超时返回 False 不抛异常，记录为未满足"""
+        assert not await waits.wait_visible(FakePage(ready_after=10), "#editor", timeout=0.1, label="编辑器")
+
+        record = waits.wait_stats.records[-1]
+        assert record.met is False
+        assert record.timeout == 0.1
+
+    @pytest.mark.asyncio
+    async def test_wait_url_and_summary(self):
+        """TC-WT-003: 轮询 URL 变化；统计按 label 聚合，停顿单独成类"""
+        page = FakePage()
+
+        async def navigate():
+            await asyncio.sleep(0.1)
+            page.url = "https://example.com/p/123"
+
+        task = asyncio.create_task(navigate())
+        assert await waits.wait_url(page, "/p/", timeout=3, label="跳转")
+        await task
+        assert not await waits.wait_url(page, "/never/", timeout=0.2, label="跳转")
+        await waits.pause(0.01, label="节奏")
+
+        rows = {row["label"]: row for row in waits.wait_stats.summary()}
+        assert rows["跳转"]["count"] == 2
+        assert rows["跳转"]["met_rate"] == 0.5
+        assert rows["节奏"]["kind"] == waits.KIND_PAUSE
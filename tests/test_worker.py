@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Worker 进程模式测试
+测试任务入队、worker 认领执行、进度/结果回写、取消和排空放回队列、验证码转有头 worker、
+调度选主、接手发布任务、等不到有头 worker 标记失败
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.database.models import GeoArticle, WorkerJob, WorkerLog, WorkerNode
+from backend.services import worker_jobs, worker_relay
+from backend.services.job_executor import LANE_BACKFILL, LANE_INTERACTIVE
+from backend.services.playwright import browser_mode
+from backend.services.worker_jobs import QueuedJob, cancel_queued_job, enqueue_job, SCHEDULER_LEASE_ID
+from backend.worker import Worker
+
+
+@pytest.fixture
+def fake_handlers(monkeypatch):
+    """注册测试用任务类型：echo 立即返回，block 一直等到 gate 打开，captcha 无头时碰到验证码"""
+    gate = asyncio.Event()
+
+    async def echo(job, payload):
+        job.report(1, 1, "done")
+        return {"echo": payload["value"]}
+
+    async def block(job, payload):
+        await gate.wait()
+        return {"ok": True}
+
+    async def captcha(job, payload):
+        try:
+            browser_mode.request_headed(browser_mode.SUBSYSTEM_COLLECT, "验证码")
+        except browser_mode.HeadedRequired:
+            pass  # 收集器内部吞掉异常也不影响转有头
+        return {"headless": browser_mode.is_headless(browser_mode.SUBSYSTEM_COLLECT)}
+
+    handlers = dict(worker_jobs.JOB_HANDLERS, echo=echo, block=block, captcha=captcha)
+    monkeypatch.setattr(worker_jobs, "JOB_HANDLERS", handlers)
+    return gate
+
+
+async def _tick(worker, db):
+    """模拟 worker 主循环的一轮"""
+    while True:
+        row = worker._claim_next(db)
+        if not row:
+            break
+        worker._start(row)
+    await asyncio.sleep(0.01)
+    worker._sync(db)
+    worker._flush_logs(db)
+
+
+class TestWorker:
+    """Worker 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_claim_run_and_report(self, clean_db, fake_handlers):
+        """TC-WK-001: 高优先级先认领，结果和日志写回数据库，同 dedupe_key 不重复入队"""
+        bulk = enqueue_job(clean_db, "echo", {"value": "bulk"}, lane=LANE_BACKFILL, dedupe_key="k")
+        assert enqueue_job(clean_db, "echo", {"value": "again"}, lane=LANE_BACKFILL, dedupe_key="k").id == bulk.id
+        click = enqueue_job(clean_db, "echo", {"value": "click"}, lane=LANE_INTERACTIVE)
+
+        worker = Worker("test-worker", slots=2, run_scheduler=False)
+        first = worker._claim_next(clean_db)
+        assert first.id == click.id
+        worker._start(first)
+        await _tick(worker, clean_db)
+        await _tick(worker, clean_db)
+
+        clean_db.expire_all()
+        for job in (bulk, click):
+            row = clean_db.get(WorkerJob, job.id)
+            assert row.status == "succeeded"
+            assert row.worker_id == "test-worker"
+        assert await QueuedJob(clean_db.get(WorkerJob, click.id)).wait() == {"echo": "click"}
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_drain_requeue(self, clean_db, fake_handlers):
+        """TC-WK-002: 运行中任务按取消标记取消；排空超时的任务放回队列"""
+        to_cancel = enqueue_job(clean_db, "block", {}, lane=LANE_INTERACTIVE)
+        to_requeue = enqueue_job(clean_db, "block", {}, lane=LANE_INTERACTIVE)
+
+        worker = Worker("test-worker", slots=2, run_scheduler=False)
+        await _tick(worker, clean_db)
+        assert len(worker.tracked) == 2
+
+        assert cancel_queued_job(clean_db, to_cancel.id)
+        await _tick(worker, clean_db)
+        await _tick(worker, clean_db)
+        clean_db.expire_all()
+        assert clean_db.get(WorkerJob, to_cancel.id).status == "cancelled"
+
+        worker._requeue_unfinished(clean_db)
+        clean_db.expire_all()
+        row = clean_db.get(WorkerJob, to_requeue.id)
+        assert row.status == "queued"
+        assert row.worker_id is None
+
+    @pytest.mark.asyncio
+    async def test_captcha_hands_off_to_headed_worker(self, clean_db, fake_handlers, monkeypatch):
+        """TC-WK-003: 无头执行碰到验证码放回队列并标记有头，只有有头 worker 能认领，重跑用有头浏览器"""
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_COLLECT, browser_mode.MODE_AUTO)
+        job = enqueue_job(clean_db, "captcha", {}, lane=LANE_INTERACTIVE)
+
+        headless_worker = Worker("headless-worker", slots=1, run_scheduler=False, headed=False)
+        await _tick(headless_worker, clean_db)
+        clean_db.expire_all()
+        row = clean_db.get(WorkerJob, job.id)
+        assert row.status == "queued" and row.headed is True
+        assert row.attempts == 0 and row.error is None
+
+        await _tick(headless_worker, clean_db)
+        assert clean_db.get(WorkerJob, job.id).status == "queued"
+
+        headed_worker = Worker("headed-worker", slots=1, run_scheduler=False, headed=True)
+        await _tick(headed_worker, clean_db)
+        await _tick(headed_worker, clean_db)
+        clean_db.expire_all()
+        row = clean_db.get(WorkerJob, job.id)
+        assert row.status == "succeeded" and row.worker_id == "headed-worker"
+        assert await QueuedJob(row).wait() == {"headless": False}
+
+    @pytest.mark.asyncio
+    async def test_headed_wait_expires_without_headed_worker(self, clean_db, fake_handlers, monkeypatch):
+        """TC-WK-006: 转有头的任务等过截止时间还没有在线的有头 worker 就标记失败；有有头 worker 在线时继续等"""
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_COLLECT, browser_mode.MODE_AUTO)
+        job = enqueue_job(clean_db, "captcha", {}, lane=LANE_INTERACTIVE)
+        worker = Worker("headless-only", slots=1, run_scheduler=False, headed=False)
+        worker._heartbeat(clean_db, force=True)
+        await _tick(worker, clean_db)
+        clean_db.expire_all()
+        row = clean_db.get(WorkerJob, job.id)
+        assert row.status == "queued" and row.headed is True and row.lease_expires_at > datetime.now()
+
+        # 截止时间到了，但有个有头 worker 在线：继续等
+        row.lease_expires_at = datetime.now() - timedelta(seconds=1)
+        clean_db.commit()
+        Worker("headed-online", slots=1, run_scheduler=False, headed=True)._heartbeat(clean_db, force=True)
+        worker._expire_headed_waits(clean_db)
+        clean_db.expire_all()
+        assert clean_db.get(WorkerJob, job.id).status == "queued"
+
+        # 有头 worker 掉线：标记失败
+        clean_db.query(WorkerNode).filter(WorkerNode.worker_id == "headed-online").delete()
+        clean_db.commit()
+        worker._last_headed_sweep = None
+        worker._expire_headed_waits(clean_db)
+        clean_db.expire_all()
+        row = clean_db.get(WorkerJob, job.id)
+        assert row.status == "failed" and "有头 worker" in row.error
+
+    @pytest.mark.asyncio
+    async def test_inline_skips_headed_rerun_without_display(self, fake_handlers, monkeypatch):
+        """TC-WK-007: 进程内执行碰到验证码，本机没有图形界面时不原地有头重跑，直接失败"""
+        monkeypatch.setitem(browser_mode.BROWSER_MODES, browser_mode.SUBSYSTEM_COLLECT, browser_mode.MODE_AUTO)
+        monkeypatch.setattr(browser_mode, "has_display", lambda: False)
+        job = SimpleNamespace(name="captcha", id="inline-1", report=lambda *args: None)
+        with pytest.raises(RuntimeError, match="没有图形界面"):
+            await worker_jobs._run_inline("captcha", {}, job)
+
+        monkeypatch.setattr(browser_mode, "has_display", lambda: True)
+        assert await worker_jobs._run_inline("captcha", {}, job) == {"headless": False}
+
+    @pytest.mark.asyncio
+    async def test_relay_worker_logs_off_loop(self, clean_db, monkeypatch):
+        """TC-WK-008: 日志中转在线程池里查库，新日志按顺序广播出去"""
+        threads = []
+        original = worker_relay._fetch_logs
+
+        def fetch(last_id, prune):
+            threads.append(threading.current_thread() is threading.main_thread())
+            return original(last_id, prune)
+
+        monkeypatch.setattr(worker_relay, "_fetch_logs", fetch)
+        received = []
+        got_two = asyncio.Event()
+
+        async def broadcast(message):
+            received.append(message["message"])
+            if len(received) == 2:
+                got_two.set()
+
+        relay = asyncio.create_task(worker_relay.relay_worker_logs(broadcast, poll_interval=0.01))
+        await asyncio.sleep(0.05)
+        clean_db.add_all([WorkerLog(worker_id="w", level="INFO", module="测试", message=m) for m in ("一", "二")])
+        clean_db.commit()
+        try:
+            await asyncio.wait_for(got_two.wait(), 5)
+        finally:
+            relay.cancel()
+        assert received == ["一", "二"]
+        assert threads and not any(threads)
+
+    def test_scheduler_leader_lease(self, clean_db):
+        """TC-WK-004: 多个 worker 只有一个拿到定时调度领导租约，持有者掉线过期后被接手"""
+        a = Worker("worker-a", slots=1, run_scheduler=True, lease_seconds=30)
+        b = Worker("worker-b", slots=1, run_scheduler=True, lease_seconds=30)
+        a._heartbeat(clean_db, force=True)
+        b._heartbeat(clean_db, force=True)
+        assert a.is_leader and not b.is_leader
+        a._heartbeat(clean_db, force=True)
+        assert a.is_leader
+
+        # worker-a 卡死不再续约
+        clean_db.query(WorkerNode).filter(WorkerNode.worker_id == SCHEDULER_LEASE_ID).update(
+            {WorkerNode.last_heartbeat: datetime.now() - timedelta(seconds=60)}
+        )
+        clean_db.commit()
+        b._heartbeat(clean_db, force=True)
+        a._heartbeat(clean_db, force=True)
+        assert b.is_leader and not a.is_leader
+
+        # 主动交出后另一个马上能拿到
+        b._release_leader_lease(clean_db)
+        a._heartbeat(clean_db, force=True)
+        assert a.is_leader
+
+    @pytest.mark.asyncio
+    async def test_reclaim_publish_and_atomic_dedupe(self, clean_db, test_keyword, fake_handlers):
+        """TC-WK-005: 接手租约过期的发布任务时，发到一半的文章放回 scheduled；同去重键并发入队由唯一索引挡住"""
+        articles = [
+            GeoArticle(keyword_id=test_keyword.id, title=f"文章{i}", content="内容", platform="zhihu",
+                       publish_status=status, publish_time=datetime.now())
+            for i, status in enumerate(["publishing", "queued", "published"])
+        ]
+        clean_db.add_all(articles)
+        clean_db.commit()
+        ids = [a.id for a in articles]
+        job = enqueue_job(clean_db, "publish_batch", {"article_ids": ids}, dedupe_key=f"publish:{ids[0]}")
+        clean_db.query(WorkerJob).filter(WorkerJob.id == job.id).update({
+            WorkerJob.status: "running", WorkerJob.worker_id: "dead-worker", WorkerJob.attempts: 1,
+            WorkerJob.lease_expires_at: datetime.now() - timedelta(seconds=1),
+        })
+        clean_db.commit()
+
+        worker = Worker("alive-worker", slots=1, run_scheduler=False)
+        row = worker._claim_next(clean_db)
+        assert row.id == job.id and row.worker_id == "alive-worker"
+        clean_db.expire_all()
+        assert [clean_db.get(GeoArticle, i).publish_status for i in ids] == ["scheduled", "scheduled", "published"]
+
+        # 另一个进程没查到（竞态）直接插入：撞唯一索引
+        clean_db.add(WorkerJob(id="dup", job_type="echo", lane=LANE_INTERACTIVE, priority=0,
+                               dedupe_key=f"publish:{ids[0]}", status="queued"))
+        with pytest.raises(Exception):
+            clean_db.commit()
+        clean_db.rollback()
+        assert enqueue_job(clean_db, "echo", {"value": 1}, dedupe_key=f"publish:{ids[0]}").id == job.id
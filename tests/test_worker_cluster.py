@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+多节点 worker 集成测试
+在本机起多个 worker 进程共享一个临时 SQLite 文件，模拟多台机器：
+测试任务只执行一次、节点亲和、worker 被杀后租约过期由其他节点接手
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.database.models import WorkerJob, WorkerNode
+from backend.services.job_executor import LANE_INTERACTIVE
+from backend.services.worker_jobs import enqueue_job
+
+PROJECT_ROOT = Path(__file__).parent.parent
+LEASE_SECONDS = 3
+
+
+@pytest.fixture
+def cluster(tmp_path):
+    """临时数据库 + 启动 worker 进程的函数，测试结束全部杀掉"""
+    url = f"sqlite:///{tmp_path / 'cluster.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    procs = {}
+
+    def start(node: str, index: int = 0) -> subprocess.Popen:
+        env = dict(
+            os.environ,
+            DATABASE_URL=url,
+            WORKER_NODE_NAME=node,
+            WORKER_LEASE_SECONDS=str(LEASE_SECONDS),
+            WORKER_MODE="external",
+        )
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "backend.worker", "--child", "--no-scheduler", "--index", str(index), "--slots", "2"],
+            cwd=str(PROJECT_ROOT), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        procs[node] = proc
+        return proc
+
+    db = Session()
+    try:
+        yield db, start, procs
+    finally:
+        db.close()
+        for proc in procs.values():
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        engine.dispose()
+
+
+def _wait_for(db, predicate, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        if predicate():
+            return True
+        time.sleep(0.2)
+    return False
+
+
+class TestWorkerCluster:
+    """多节点 Worker 测试类"""
+
+    def test_jobs_run_once_with_affinity(self, cluster):
+        """TC-WC-001: 三个节点共享队列，每个任务只执行一次，亲和任务落在指定节点"""
+        db, start, procs = cluster
+        plain = [enqueue_job(db, "ping", {"seconds": 0.3}, lane=LANE_INTERACTIVE) for _ in range(8)]
+        pinned = [enqueue_job(db, "ping", {"seconds": 0.1}, affinity="node-b") for _ in range(3)]
+        for node in ("node-a", "node-b", "node-c"):
+            start(node)
+
+        ids = [j.id for j in plain + pinned]
+        assert _wait_for(db, lambda: db.query(WorkerJob).filter(
+            WorkerJob.id.in_(ids), WorkerJob.status == "succeeded"
+        ).count() == len(ids)), "任务未在时限内全部完成"
+
+        rows = {r.id: r for r in db.query(WorkerJob).filter(WorkerJob.id.in_(ids)).all()}
+        assert all(r.attempts == 1 for r in rows.values())
+        for job in pinned:
+            assert rows[job.id].worker_id.startswith("node-b:")
+        assert len({r.worker_id for r in rows.values()}) >= 2
+        assert db.query(WorkerNode).filter(WorkerNode.status == "active").count() == 3
+
+    def test_lease_stolen_after_worker_killed(self, cluster):
+        """TC-WC-002: 运行中的 worker 被强杀，租约过期后另一个节点接手并完成"""
+        db, start, procs = cluster
+        job = enqueue_job(db, "ping", {"seconds": 2})
+        start("node-a")
+        assert _wait_for(db, lambda: db.get(WorkerJob, job.id).status == "running", timeout=30)
+        first_owner = db.get(WorkerJob, job.id).worker_id
+
+        procs["node-a"].send_signal(signal.SIGKILL)
+        procs["node-a"].wait()
+        start("node-b")
+
+        assert _wait_for(db, lambda: db.get(WorkerJob, job.id).status == "succeeded", timeout=60)
+        row = db.get(WorkerJob, job.id)
+        assert row.attempts == 2
+        assert row.worker_id != first_owner
+        assert row.worker_id.startswith("node-b:")